@@ -89,17 +89,38 @@ class MOMClient:
         payload = {"name": name, "message": message, "type": qtype}
         return do_request("POST", url, headers=headers, json=payload, timeout=self.timeout)
 
-    def receive_message(self, name, qtype):
+    def send_batch(self, name, messages, qtype="queue"):
+        """
+        Envía un lote de mensajes a un queue en una sola petición.
+        Retorna la respuesta de la API.
+        """
+        url = f"{self.base_url}/queue_topic/send_batch/"
+        headers = {}
+        if self.token:
+            headers["Authorization"] = f"{self.token_type} {self.token}"
+        payload = {"name": name, "messages": list(messages), "type": qtype}
+        return do_request("POST", url, headers=headers, json=payload, timeout=self.timeout)
+
+    def receive_message(self, name, qtype, max_messages=1, wait_seconds=0):
         """
         Recibe el siguiente mensaje de un queue o topic.
+        Con max_messages > 1 recibe hasta ese número de mensajes de un queue.
+        Con wait_seconds > 0 el servidor espera hasta ese tiempo a que llegue
+        un mensaje a un queue vacío (long-poll).
         Retorna la respuesta de la API.
         """
         url = f"{self.base_url}/queue_topic/receive/"
         headers = {}
         if self.token:
             headers["Authorization"] = f"{self.token_type} {self.token}"
-        payload = {"name": name, "type": qtype}
-        return do_request("POST", url, headers=headers, json=payload, timeout=self.timeout)
+        payload = {
+            "name": name,
+            "type": qtype,
+            "max_messages": max_messages,
+            "wait_seconds": wait_seconds
+        }
+        # El timeout debe cubrir el tiempo que el servidor mantiene la petición
+        return do_request("POST", url, headers=headers, json=payload, timeout=self.timeout + wait_seconds)
 
     def get_protected_resource(self):
         """
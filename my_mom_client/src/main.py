@@ -16,6 +16,7 @@ RESET  = "\033[0m"
 CONFIG_FILE   = "src/config.yaml"
 ACTIONS_DIR   = "actions"
 DEFAULT_DELAY = 1  # seconds between processing actions
+LONG_POLL_SECONDS = 5  # seconds the server may hold a queue receive open
 
 def setup_logging_to_file():
     """Log all INFO+ messages into logs/app.log only."""
@@ -57,22 +58,27 @@ def get_next_credential():
 
 def listen_subscriptions(client):
     """
-    Background thread: every second, poll each subscribed channel.
+    Background thread: poll each subscribed channel.
+    Queues are long-polled so the server answers as soon as a message
+    arrives; topics are polled every second.
     On Unauthorized (resp None), auto re-login and retry once.
     Print only non-empty messages.
     """
     while True:
         with client.subscribed_channels_lock:
             items = list(client.subscribed_channels.items())
+        long_polled = False
         for channel, qtype in items:
-            resp = client.receive_message(channel, qtype)
+            wait_seconds = LONG_POLL_SECONDS if qtype == "queue" else 0
+            long_polled = long_polled or wait_seconds > 0
+            resp = client.receive_message(channel, qtype, wait_seconds=wait_seconds)
             if resp is None:
                 # Assume Unauthorized: retry login
                 logging.error("Unauthorized on receive for %s; auto re-login.", client.username)
                 if client.login(client.username, client.password):
                     logging.info("Re-login successful in listener for %s", client.username)
                     # retry once
-                    resp = client.receive_message(channel, qtype)
+                    resp = client.receive_message(channel, qtype, wait_seconds=wait_seconds)
                 else:
                     logging.error("Re-login failed in listener for %s", client.username)
                     continue
@@ -82,7 +88,9 @@ def listen_subscriptions(client):
                 if msg:
                     print(f"{BLUE}(Type|Channel)[{qtype}|{channel}] {msg}{RESET}")
                     logging.info("(Type|Channel)[%s|%s] %s", qtype, channel, msg)
-        time.sleep(1)
+        if not long_polled:
+            # No long-poll paced this round
+            time.sleep(1)
 
 def process_action(line, client):
     parts = line.strip().split(";")
@@ -11,6 +11,14 @@ class Database(ABC):
     def get_client(self):
         pass
 
+    @abstractmethod
+    def get_async_client(self):
+        pass
+
     @abstractmethod
     def close(self):
         pass
+
+    @abstractmethod
+    async def close_async(self):
+        pass
@@ -20,12 +20,22 @@ from app.config.env import (
     API_VERSION
 )
 from app.config.limiter import limiter
+from app.domain.notifications import get_notification_hub
+from app.domain.replication_clients import (
+    close_all_replication_clients,
+    get_journal_replayer,
+)
+from app.domain.replication_outbox import get_replication_outbox
+from app.domain.topics.topics_retention import get_retention_worker
+from app.domain.topics.topics_offsets import get_offset_replicator
 from app.dtos.admin.mom_management_dto import QueueTopic
 from app.routes.admin.mom_management.routes import router as admin_mom_management_router
 from app.routes.admin.routes import router as admin_router
 from app.routes.mom.routes import router as mom_router
 from app.routes.routes import router
-from app.utils.db import initialize_database, backup_database, get_elements_from_db
+from app.utils.db import (
+    initialize_database, backup_database, get_elements_from_db, load_scripts
+)
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
@@ -41,10 +51,34 @@ async def lifespan(_: FastAPI):
     # Backup DB
     backup_database(get_elements_from_db())
 
+    # Load the Lua scripts
+    load_scripts()
+
+    # Start the topic retention worker
+    retention_worker = get_retention_worker()
+    retention_worker.start()
+
+    # Start listening to the notifications of the push connections
+    notification_hub = get_notification_hub()
+    notification_hub.start()
+
+    # Start replaying the operations the other nodes missed
+    journal_replayer = get_journal_replayer()
+    journal_replayer.start()
+
     yield  # Let the app run
 
     # On shutdown
     print("🛑 API shutting down...")
+    retention_worker.stop()
+    notification_hub.stop()
+    journal_replayer.stop()
+    # Enviar los offsets agrupados que sigan pendientes
+    get_offset_replicator().stop()
+    # Enviar las replicaciones que sigan en el outbox
+    get_replication_outbox().stop()
+    # Cerrar los streams y canales de replicación
+    close_all_replication_clients()
 
 # FastAPI Metadata
 title = f"{API_NAME} API"
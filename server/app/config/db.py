@@ -2,8 +2,12 @@
 Redis Database Connection Pool
 """
 from app.adapters.db import Database
+from app.config.env import REDIS_MAX_CONNECTIONS
 from app.config.logging import logger
 from redis import Redis, ConnectionPool, ConnectionError as RedisConnectionError
+from redis.asyncio import (
+    Redis as AsyncRedis, ConnectionPool as AsyncConnectionPool
+)
 
 
 class RedisDatabase(Database):
@@ -18,6 +22,7 @@ class RedisDatabase(Database):
         self._client: Redis = None
         self._connected: bool = False
         self._pool: ConnectionPool = None
+        self._async_client: AsyncRedis = None
         self._host = host
         self._port = port
         self._password = password
@@ -39,7 +44,7 @@ class RedisDatabase(Database):
                 port=self._port,
                 password=self._password,
                 decode_responses=True,
-                max_connections=10,
+                max_connections=REDIS_MAX_CONNECTIONS,
                 health_check_interval=30,
                 socket_keepalive=True
             )
@@ -55,6 +60,28 @@ class RedisDatabase(Database):
 
         return self._client
 
+    def get_async_client(self) -> AsyncRedis:
+        """
+        Get the shared redis.asyncio client, with its own connection pool,
+        for the code that runs on an event loop
+
+        Returns:
+            AsyncRedis: Async Redis client instance
+        """
+        if not self._async_client:
+            self._async_client = AsyncRedis(
+                connection_pool=AsyncConnectionPool(
+                    host=self._host,
+                    port=self._port,
+                    password=self._password,
+                    decode_responses=True,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    health_check_interval=30,
+                    socket_keepalive=True
+                )
+            )
+        return self._async_client
+
     def _reconnect(self, attempt: int) -> None:
         """
         Reconnect to the Redis server with a limited number of retries
@@ -91,3 +118,11 @@ class RedisDatabase(Database):
         self._connected = False
         self._client = None
         self._pool = None
+
+    async def close_async(self) -> None:
+        """
+        Close the redis.asyncio client and its connection pool
+        """
+        if self._async_client:
+            await self._async_client.aclose(close_connection_pool=True)
+        self._async_client = None
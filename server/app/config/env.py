@@ -14,6 +14,7 @@ LOCALHOST_SERVER_URL = os.getenv('LOCALHOST_SERVER_URL')
 REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
 REDIS_HOST = os.getenv('REDIS_HOST')
 REDIS_PORT = os.getenv('REDIS_PORT')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
 
 # Backup Database configuration
 # Database configuration
@@ -0,0 +1,118 @@
+"""
+This module contains the codec of the messages stored in Redis.
+Queues and topics store every message as a compact envelope instead of
+a JSON document:
+
+    <version><timestamp><SEP><publisher><SEP><payload>
+    <version><timestamp><SEP><publisher><SEP><attributes><SEP><payload>
+
+    - version    one control character, "\\x01" for the first format and
+                 "\\x02" for the messages published with attributes.
+    - timestamp  the float timestamp in its shortest form, empty if unset.
+    - publisher  the user that published the message, empty for queues.
+    - attributes the attributes of a topic message as a compact JSON
+                 object, JSON escapes the control characters so it never
+                 contains SEP.
+    - payload    the raw message, it is never escaped or encoded again.
+
+The header has no field names and the payload is not JSON encoded a
+second time, so a message takes fewer bytes in Redis and both Python
+and the Lua scripts read it by splitting on SEP. The Redis clients
+decode every response as UTF-8, that is why the header is made of text
+and control characters instead of packed binary fields.
+Messages written before the envelope are JSON documents, they start
+with "{" and are still decoded.
+"""
+
+import json
+
+VERSION = "\x01"
+VERSION_ATTRIBUTES = "\x02"
+SEPARATOR = "\x1f"
+
+# Funciones Lua para leer el sobre dentro de los scripts, se anteponen
+# al script que las usa. Retornan nil en los campos ausentes, los
+# atributos se retornan sin decodificar
+LUA_DECODE = """
+local function envelope_header(raw)
+    local version = string.byte(raw, 1)
+    if version == 1 or version == 2 then
+        local first = string.find(raw, '\\31', 2, true)
+        local second = string.find(raw, '\\31', first + 1, true)
+        local attributes = nil
+        if version == 2 then
+            local third = string.find(raw, '\\31', second + 1, true)
+            attributes = string.sub(raw, second + 1, third - 1)
+        end
+        return tonumber(string.sub(raw, 2, first - 1)),
+            string.sub(raw, first + 1, second - 1), attributes
+    end
+    local ok, message = pcall(cjson.decode, raw)
+    if not ok or type(message) ~= 'table' then
+        return nil, nil
+    end
+    return tonumber(message.timestamp), message.publisher
+end
+"""
+
+
+def encode(
+    payload: str, timestamp: float = None, publisher: str = "",
+    attributes: dict = None
+) -> str:
+    """
+    Build the envelope of a message.
+    Args:
+        payload (str): The message.
+        timestamp (float): When the message was published.
+        publisher (str): The user that published the message.
+        attributes (dict): Attributes of a topic message, the messages
+            without them keep the first format.
+    Returns:
+        str: The envelope to store in Redis.
+    """
+    header = "" if timestamp is None else repr(float(timestamp))
+    if attributes:
+        encoded = json.dumps(attributes, separators=(",", ":"), sort_keys=True) # pylint: disable=C0301
+        return f"{VERSION_ATTRIBUTES}{header}{SEPARATOR}{publisher}{SEPARATOR}{encoded}{SEPARATOR}{payload}" # pylint: disable=C0301
+    return f"{VERSION}{header}{SEPARATOR}{publisher}{SEPARATOR}{payload}"
+
+
+def is_legacy(data: str) -> bool:
+    """
+    Check whether a stored message is a JSON document written before
+    the envelope.
+    Args:
+        data (str): The stored message.
+    Returns:
+        bool: True if the message is not an envelope.
+    """
+    return data[:1] not in (VERSION, VERSION_ATTRIBUTES)
+
+
+def decode(data: str) -> dict:
+    """
+    Read a stored message, either an envelope or a legacy JSON document.
+    Args:
+        data (str): The stored message.
+    Returns:
+        dict: The message with its timestamp, publisher and payload, and
+            its attributes when it has them, legacy messages are
+            returned as they were stored.
+    """
+    if is_legacy(data):
+        return json.loads(data)
+    if data.startswith(VERSION_ATTRIBUTES):
+        timestamp, publisher, attributes, payload = data[1:].split(SEPARATOR, 3) # pylint: disable=C0301
+        return {
+            "timestamp": float(timestamp) if timestamp else None,
+            "publisher": publisher,
+            "attributes": json.loads(attributes),
+            "payload": payload,
+        }
+    timestamp, publisher, payload = data[1:].split(SEPARATOR, 2)
+    return {
+        "timestamp": float(timestamp) if timestamp else None,
+        "publisher": publisher,
+        "payload": payload,
+    }
@@ -48,6 +48,8 @@ class MOMQueueStatus(Enum):
     INTERNAL_ERROR = "Unexpected error"
     SUCCES_OPERATION = "The operation was realized without problems"
     EMPTY_QUEUE = "The queue is empty"
+    MESSAGE_NOT_FOUND = "The message does not exist in the queue"
+    QUEUE_FULL = "The queue reached its message limit"
 
 @dataclass
 class QueueOperationResult:
@@ -81,6 +83,7 @@ class MOMTopicStatus(Enum):
     INVALID_ARGUMENTS = "Invalid arguments provided"
     INCONSISTENT_STATE = "Inconsistent state detected"
     REPLICATION_FAILED = "Replication failed"
+    OFFSET_UPDATED = "Subscriber offset updated successfully"
 
 @dataclass
 class TopicOperationResult:
@@ -0,0 +1,197 @@
+"""
+This module contains the notifications of new messages used by the push
+delivery. The enqueue and publish scripts publish on a Redis Pub/Sub
+channel, mom:queues:<name>:notify or mom:topics:<name>:notify, in the
+same round trip as the write, the partitions of a topic notify on the
+channel of their topic. A single daemon thread per node listens to all
+the channels with one PSUBSCRIBE and wakes the push connections waiting
+on them, so an idle connection makes no Redis calls:
+    - A waiter is registered for a queue, a topic or a pattern of
+      topics, the patterns are matched when the notification arrives.
+    - The notifications are best effort, a lost one is recovered by
+      the waiters with their NOTIFY_FALLBACK_SECONDS timeout and every
+      waiter is woken up when the listener reconnects.
+"""
+
+import os
+import threading
+from app.adapters.db import Database
+from app.adapters.factory import ObjectFactory
+from app.domain import subscriptions
+from app.domain.logger_config import logger
+from app.domain.topics import topics_patterns
+from app.domain.utils import KeyBuilder, TopicKeyBuilder
+
+# Espera máxima de una conexión sin notificaciones antes de volver a leer
+NOTIFY_FALLBACK_SECONDS = int(os.getenv("NOTIFY_FALLBACK_SECONDS", "30"))
+NOTIFY_RECONNECT_SECONDS = 1
+
+_QUEUE_CHANNEL_PREFIX = f"{KeyBuilder.QUEUE_PREFIX}:"
+_TOPIC_CHANNEL_PREFIX = f"{TopicKeyBuilder.TOPIC_PREFIX}:"
+_CHANNEL_SUFFIX = f":{KeyBuilder.NOTIFY_SUFFIX}"
+
+
+class NotificationHub:
+    """
+    Listens to the notification channels of the node and calls the
+    callbacks of the waiters of each queue, topic or pattern.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self._waiters = {}
+        self._patterns = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Start the listener thread if it is not running.
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="message-notifications", daemon=True
+            )
+            self._thread.start()
+        logger.info("Notificaciones de mensajes iniciadas")
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Stop the listener thread.
+        Args:
+            timeout (float): Seconds to wait for the thread.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        logger.info("Notificaciones de mensajes detenidas")
+
+    def register(self, kind: str, name: str, callback) -> tuple:
+        """
+        Register a waiter for the new messages of a queue or topic.
+        Args:
+            kind (str): subscriptions.QUEUE or subscriptions.TOPIC.
+            name (str): The name of the queue or topic, topics also
+                accept a pattern.
+            callback: Called without arguments from the listener thread
+                on every notification, it must not block.
+        Returns:
+            tuple: The handle to give to unregister.
+        """
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        is_pattern = kind == subscriptions.TOPIC \
+            and topics_patterns.is_pattern(name)
+        waiters = self._patterns if is_pattern else self._waiters
+        key = name if is_pattern else (kind, name)
+        with self._lock:
+            waiters.setdefault(key, set()).add(callback)
+        return (is_pattern, key, callback)
+
+    def unregister(self, handle: tuple) -> None:
+        """
+        Remove a waiter.
+        Args:
+            handle (tuple): The handle returned by register.
+        """
+        is_pattern, key, callback = handle
+        waiters = self._patterns if is_pattern else self._waiters
+        with self._lock:
+            callbacks = waiters.get(key)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del waiters[key]
+
+    def dispatch(self, channel: str) -> int:
+        """
+        Wake the waiters of the queue or topic of a channel.
+        Args:
+            channel (str): The notification channel.
+        Returns:
+            int: Number of callbacks called.
+        """
+        if not channel.endswith(_CHANNEL_SUFFIX):
+            return 0
+        if channel.startswith(_QUEUE_CHANNEL_PREFIX):
+            kind = subscriptions.QUEUE
+            name = channel[len(_QUEUE_CHANNEL_PREFIX):-len(_CHANNEL_SUFFIX)]
+        elif channel.startswith(_TOPIC_CHANNEL_PREFIX):
+            kind = subscriptions.TOPIC
+            name = channel[len(_TOPIC_CHANNEL_PREFIX):-len(_CHANNEL_SUFFIX)]
+        else:
+            return 0
+
+        with self._lock:
+            callbacks = list(self._waiters.get((kind, name), ()))
+            if kind == subscriptions.TOPIC:
+                for pattern, waiters in self._patterns.items():
+                    if topics_patterns.matches(pattern, name):
+                        callbacks.extend(waiters)
+        self._call(callbacks)
+        return len(callbacks)
+
+    def wake_all(self) -> None:
+        """
+        Wake every waiter, used when notifications may have been lost.
+        """
+        with self._lock:
+            callbacks = [
+                callback
+                for waiters in (self._waiters, self._patterns)
+                for callbacks in waiters.values()
+                for callback in callbacks
+            ]
+        self._call(callbacks)
+
+    @staticmethod
+    def _call(callbacks: list) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error despertando una conexión push")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.psubscribe(
+                    KeyBuilder.notify_channel("*"),
+                    TopicKeyBuilder.notify_channel("*")
+                )
+                # Lo publicado mientras no se escuchaba se vuelve a leer
+                self.wake_all()
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message["type"] == "pmessage":
+                        self.dispatch(message["channel"])
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error escuchando las notificaciones")
+                self._stop.wait(NOTIFY_RECONNECT_SECONDS)
+            finally:
+                pubsub.close()
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_notification_hub() -> NotificationHub:
+    """
+    Get the notification hub of the node, it is created on the first call.
+    Returns:
+        NotificationHub: The hub over the MOM database.
+    """
+    global _hub # pylint: disable=W0603
+    with _hub_lock:
+        if _hub is None:
+            client = ObjectFactory.get_instance(
+                Database, ObjectFactory.MOM_DATABASE
+            ).get_client()
+            _hub = NotificationHub(client)
+    return _hub
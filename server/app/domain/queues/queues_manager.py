@@ -3,15 +3,19 @@ This module provides a class for managing message queues using Redis,
 including creating, deleting, enqueuing, and dequeuing messages.
 """
 
-import json
+import asyncio
+import functools
 import uuid as uuid_lib
 from datetime import datetime, timezone
 from app.domain.models import MOMQueueStatus, QueueOperationResult
 from app.domain.logger_config import logger
-from app.domain.utils import KeyBuilder
+from app.domain import notifications, replication_outbox, subscriptions
+from app.domain.utils import KeyBuilder, STORAGE_DEFAULT, STORAGE_ENGINES
 from app.domain.queues.queues_subscription import SubscriptionService
+from app.domain.queues import queues_storage
 from app.domain.queues.queues_validator import QueueValidator
 from app.domain.queue_replication_clients import get_source_queue_client, get_target_queue_client, SOURCE_QUEUE_NODE_ID
+from app.domain.replication_clients import get_replica_stream, get_source_stream
 from app.domain.models import NODES_CONFIG, WHOAMI
 from app.domain.queues.queues_replication import QueueReplicationClient
 from app.adapters.factory import ObjectFactory
@@ -48,17 +52,21 @@ class MOMQueueManager:
         # replication_principal apunta al nodo principal
         self.replication_client = QueueReplicationClient(
         stub=replica_stub,
-        target_node_desc=f"nodo réplica ({replica_node})"
+        target_node_desc=f"nodo réplica ({replica_node})",
+        stream=get_source_stream()
         )
         self.replication_principal = QueueReplicationClient(
             stub=source_stub,
-            target_node_desc=f"nodo principal ({WHOAMI})"
+            target_node_desc=f"nodo principal ({WHOAMI})",
+            stream=get_replica_stream()
         )
 
     def create_queue(
         self, queue_name: str, message_limit: int = 1000,
         principal: bool = True, created_at: str = None,
-        endpoint: bool = False
+        endpoint: bool = False,
+        overflow_policy: str = queues_storage.OVERFLOW_REJECT,
+        storage: str = STORAGE_DEFAULT
     ) -> QueueOperationResult:
         """
         Create a new queue with the specified name and message limit.
@@ -66,6 +74,10 @@ class MOMQueueManager:
             queue_name (str): The name of the queue to create.
             message_limit (int): The maximum number of messages 
                 allowed in the queue.
+            overflow_policy (str): What to do when the queue is full,
+                "reject" the new messages or "drop_oldest" ones.
+            storage (str): Storage engine of the messages, "default"
+                keeps them in a sorted set and "stream" in a Redis Stream.
             endpoint (bool): Whether the queue is an endpoint
                 if True, the queue will be created in the backup.
         Returns:
@@ -80,6 +92,22 @@ class MOMQueueManager:
                     replication_result=False
                 )
 
+            if overflow_policy not in queues_storage.OVERFLOW_POLICIES:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid overflow policy",
+                    replication_result=False
+                )
+
+            if storage not in STORAGE_ENGINES:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid storage engine",
+                    replication_result=False
+                )
+
             queue_key = KeyBuilder.queue_key(queue_name)
             metadata_key = KeyBuilder.metadata_key(queue_name)
 
@@ -97,14 +125,20 @@ class MOMQueueManager:
                 "owner": self.user,
                 "created_at": created_at,
                 "total_messages": 0,
-                "original_node": int(principal)
+                "original_node": int(principal),
+                "message_limit": message_limit,
+                "overflow_policy": overflow_policy,
+                "storage": storage
             }
 
             self.redis.hset(metadata_key, mapping=metadata)
             result = self.subscriptions.subscribe(queue_name)
 
             if result.success is False:
-                self.redis.delete(metadata_key, queue_key)
+                self.redis.delete(
+                    metadata_key, queue_key,
+                    KeyBuilder.messages_key(queue_name)
+                )
                 return result
             
             if endpoint:
@@ -125,7 +159,10 @@ class MOMQueueManager:
                 result = self.replication_client.create_queue(
                     queue_name=queue_name,
                     owner=self.user,
-                    created_at=created_at
+                    created_at=created_at,
+                    message_limit=message_limit,
+                    overflow_policy=overflow_policy,
+                    storage=storage
                 )
                 if result is False:
                     return QueueOperationResult(
@@ -150,7 +187,8 @@ class MOMQueueManager:
 
     def enqueue(self, message: str, queue_name: str,
                 uuid: str = None, timestamp = None,
-                im_replicating = False, endpoint: bool = False
+                im_replicating = False, endpoint: bool = False,
+                write_concern: str = None
                 ) -> QueueOperationResult:
         """
         Enqueue a message to the specified queue.
@@ -161,15 +199,43 @@ class MOMQueueManager:
             timestamp (float): The timestamp of the message.
             endpoint (bool): Whether the queue is an endpoint
                 if True, the message will be enqueued in the backup.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
         Returns:
             QueueOperationResult: Result of the enqueue operation.
         """
         try:
-            queue_key = KeyBuilder.queue_key(queue_name)
-            metadata_key = KeyBuilder.metadata_key(queue_name)
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False
+                )
 
-            result = self.validator.validate_queue_exists(queue_name)
-            if result.success is False:
+            if endpoint or not uuid:
+                uuid = str(uuid_lib.uuid4())
+            if endpoint:
+                timestamp = datetime.now(timezone.utc).timestamp()
+
+            full_message = {
+                "id": uuid,
+                "timestamp": timestamp,
+                "payload": message,
+            }
+            # Existencia, límite, escritura y contador en un solo script
+            added, principal, _ = queues_storage.push_messages(
+                self.redis, queue_name, [full_message],
+                enforce_limit=not im_replicating
+            )
+
+            if added == queues_storage.QUEUE_NOT_FOUND:
+                result = QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.METADATA_OR_QUEUE_NOT_EXIST,
+                    details="Queue does not exist",
+                    replication_result=False
+                )
                 # Verificamos si la cola existe en algún nodo usando SMEMBERS
                 nodes = ["A", "B", "C"]
                 queue_exists_somewhere = False
@@ -207,31 +273,39 @@ class MOMQueueManager:
                 result.replication_result = False
                 return result
 
+            if added == queues_storage.QUEUE_FULL:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.QUEUE_FULL,
+                    details=f"Queue {queue_name} reached its message limit",
+                    replication_result=False
+                )
+
+            if added == queues_storage.ID_CONFLICT:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INTERNAL_ERROR,
+                    details="Message id is behind the last id of the stream",
+                    replication_result=False
+                )
+
             # Se decidio que el usuario no debe estar subscrito para
             # encolar mensajes
             # result = self.validator.validate_user_subscribed(queue_name)
             # if result.success is False:
             #     return result
 
-            principal = bool(int(self.redis.hget(metadata_key, "original_node"))) # pylint: disable=C0301
-            if endpoint:
-                uuid = str(uuid_lib.uuid4())
-            if endpoint:
-                timestamp = datetime.now(timezone.utc).timestamp()
+            # En las colas sobre streams el id lo asignó XADD
+            uuid = full_message["id"]
 
-            full_message = {
-                "id": uuid,
-                "timestamp": timestamp,
-                "payload": json.dumps(message),
-            }
-            self.redis.rpush(queue_key, json.dumps(full_message))
-            self.redis.hincrby(metadata_key, "total_messages", 1)
             ## TO DO
             ## Garantizar la replicación de los mensajes
             replication_result = True  # Asumir éxito por defecto
             if not im_replicating:  # Solo replicar si no es una replicación
                 if principal:
-                    replication_result = self.replication_client.enqueue(
+                    replication_result = replication_outbox.replicate(
+                        queue_name, write_concern,
+                        self.replication_client.enqueue,
                         queue_name=queue_name,
                         user=self.user,
                         message=message,
@@ -239,7 +313,9 @@ class MOMQueueManager:
                         timestamp=timestamp
                     )
                 else:
-                    replication_result = self.replication_principal.enqueue(
+                    replication_result = replication_outbox.replicate(
+                        queue_name, write_concern,
+                        self.replication_principal.enqueue,
                         queue_name=queue_name,
                         user=self.user,
                         message=message,
@@ -249,8 +325,10 @@ class MOMQueueManager:
 
             if endpoint:
                 # Realizar todas las operaciones en el backup
-                self.redis_backup.rpush(queue_key, json.dumps(full_message))
-                self.redis_backup.hincrby(metadata_key, "total_messages", 1)
+                queues_storage.push_messages(
+                    self.redis_backup, queue_name, [full_message],
+                    enforce_limit=False
+                )
 
             return QueueOperationResult(
                 success=True,
@@ -267,9 +345,194 @@ class MOMQueueManager:
                 replication_result=False
             )
 
+    def enqueue_many(self, messages: list, queue_name: str,
+                     uuids: list = None, timestamps: list = None,
+                     im_replicating = False, endpoint: bool = False,
+                     write_concern: str = None
+                     ) -> QueueOperationResult:
+        """
+        Enqueue a batch of messages to the specified queue, writing all
+        of them in a single round trip and replicating them with a
+        single gRPC call.
+        Args:
+            messages (list): The messages to enqueue, in order.
+            queue_name (str): The name of the queue to enqueue the messages to.
+            uuids (list): The UUIDs of the messages (when replicating).
+            timestamps (list): The timestamps of the messages
+                (when replicating).
+            im_replicating (bool): Whether this is a replication operation.
+            endpoint (bool): Whether the queue is an endpoint
+                if True, the messages will be enqueued in the backup.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
+        Returns:
+            QueueOperationResult: Result of the enqueue operation.
+        """
+        try:
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False
+                )
+
+            if not messages:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="No messages to enqueue",
+                    replication_result=False
+                )
+
+            # Un lote replicado con listas desparejas perdería mensajes
+            if any(
+                values is not None and len(values) != len(messages)
+                for values in (uuids, timestamps)
+            ):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="The uuids and timestamps must match the messages", # pylint: disable=C0301
+                    replication_result=False
+                )
+
+            if endpoint or uuids is None:
+                uuids = [str(uuid_lib.uuid4()) for _ in messages]
+            if endpoint or timestamps is None:
+                now = datetime.now(timezone.utc).timestamp()
+                timestamps = [now] * len(messages)
+
+            batch = list(zip(messages, uuids, timestamps))
+            full_messages = [
+                {
+                    "id": uuid,
+                    "timestamp": timestamp,
+                    "payload": message,
+                }
+                for message, uuid, timestamp in batch
+            ]
+
+            # Una sola ida y vuelta a Redis para todo el lote, el límite
+            # se aplica al lote completo
+            added, principal, _ = queues_storage.push_messages(
+                self.redis, queue_name, full_messages,
+                enforce_limit=not im_replicating
+            )
+
+            if added == queues_storage.QUEUE_NOT_FOUND:
+                result = QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.METADATA_OR_QUEUE_NOT_EXIST,
+                    details="Queue does not exist",
+                    replication_result=False
+                )
+                # Verificamos si la cola existe en algún nodo usando SMEMBERS
+                nodes = ["A", "B", "C"]
+                target_nodes = [
+                    node for node in nodes
+                    if f"queue:{queue_name}" in self.redis_nodes.smembers(node)
+                ]
+
+                if not target_nodes:
+                    return QueueOperationResult(
+                        success=False,
+                        status=MOMQueueStatus.METADATA_OR_QUEUE_NOT_EXIST,
+                        details="La cola no existe en ningún nodo",
+                        replication_result=False
+                    )
+
+                # El forward se hace mensaje a mensaje, es un camino poco
+                # frecuente y el nodo dueño replica cada uno por su cuenta
+                nodes.remove(WHOAMI)
+                for node in nodes:
+                    if node not in target_nodes:
+                        continue
+                    for message in messages:
+                        result = self.replication_client.forward_enqueue(
+                            queue_name=queue_name,
+                            user=self.user,
+                            message=message,
+                            node=node
+                        )
+                        if not result.success:
+                            break
+                    if result.success:
+                        result.details = f"{len(messages)} messages enqueued successfully" # pylint: disable=C0301
+                        return result
+
+                result.success = False
+                result.replication_result = False
+                return result
+
+            if added == queues_storage.QUEUE_FULL:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.QUEUE_FULL,
+                    details=f"Queue {queue_name} has no room for {len(messages)} messages", # pylint: disable=C0301
+                    replication_result=False
+                )
+
+            if added == queues_storage.ID_CONFLICT:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INTERNAL_ERROR,
+                    details="Message id is behind the last id of the stream",
+                    replication_result=False
+                )
+
+            # En las colas sobre streams los ids los asignó XADD
+            batch = [
+                (message, full_message["id"], timestamp)
+                for (message, _, timestamp), full_message
+                in zip(batch, full_messages)
+            ]
+
+            replication_result = True
+            if not im_replicating:
+                if principal:
+                    replication_result = replication_outbox.replicate(
+                        queue_name, write_concern,
+                        self.replication_client.enqueue_batch,
+                        queue_name=queue_name,
+                        user=self.user,
+                        messages=batch
+                    )
+                else:
+                    replication_result = replication_outbox.replicate(
+                        queue_name, write_concern,
+                        self.replication_principal.enqueue_batch,
+                        queue_name=queue_name,
+                        user=self.user,
+                        messages=batch
+                    )
+
+            if endpoint:
+                # Realizar todas las operaciones en el backup
+                queues_storage.push_messages(
+                    self.redis_backup, queue_name, full_messages,
+                    enforce_limit=False
+                )
+
+            return QueueOperationResult(
+                success=True,
+                status=MOMQueueStatus.SUCCES_OPERATION,
+                details=f"{len(full_messages)} messages enqueued successfully",
+                replication_result=replication_result
+            )
+        except Exception as e: # pylint: disable=W0718
+            logger.exception("Error enqueueing batch to '%s'", queue_name)
+            return QueueOperationResult(
+                success=False,
+                status=MOMQueueStatus.INTERNAL_ERROR,
+                details=str(e),
+                replication_result=False
+            )
+
     def dequeue(
         self, queue_name: str, uuid: str = None, im_replicating: bool = False,
-        endpoint: bool = False
+        endpoint: bool = False, max_messages: int = 1,
+        write_concern: str = None
     ) -> QueueOperationResult:
         """
         Dequeue a message from the specified queue.
@@ -277,13 +540,32 @@ class MOMQueueManager:
             queue_name (str): The name of the queue to dequeue from.
             uuid (str): The UUID of the message to dequeue.
             im_replicating (bool): Whether this is a replication operation.
+            max_messages (int): Maximum number of messages to pop at once,
+                when greater than 1 the details are a list of payloads.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
         Returns:
             QueueOperationResult: Result of the dequeue operation.
         """
-        queue_key = KeyBuilder.queue_key(queue_name)
         metadata_key = KeyBuilder.metadata_key(queue_name)
 
         try:
+            if max_messages < 1 or (uuid is not None and max_messages != 1):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid number of messages to dequeue",
+                    replication_result=False
+                )
+
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False
+                )
+
             result = self.validator.validate_queue_exists(queue_name)
             if result.success is False:
                 # Verificamos si la cola existe en algún nodo usando SMEMBERS
@@ -316,6 +598,9 @@ class MOMQueueManager:
                             node=node
                         )
                         if result.success:
+                            # El forward entrega a lo sumo un mensaje
+                            if max_messages > 1:
+                                result.details = [result.details] if result.details else [] # pylint: disable=C0301
                             return result
 
                 result.success = False
@@ -330,63 +615,60 @@ class MOMQueueManager:
 
             principal = bool(int(self.redis.hget(metadata_key, "original_node"))) # pylint: disable=C0301
 
+            if max_messages > 1:
+                return self._dequeue_many(
+                    queue_name, max_messages, principal,
+                    im_replicating, endpoint, write_concern
+                )
+
             if uuid is not None:
-                # Caso con UUID específico
-                messages = self.redis.lrange(queue_key, 0, -1)
-                message_to_dequeue = None
-                for msg in messages:
-                    msg_data = json.loads(msg)
-                    if msg_data["id"] == uuid:
-                        message_to_dequeue = msg_data
-                        # Eliminar el mensaje específico
-                        self.redis.lrem(queue_key, 1, msg)
-
-                        if endpoint:
-                            # Realizar todas las operaciones en el backup
-                            self.redis_backup.lrem(queue_key, 1, msg)
-                        break
-
-                if not message_to_dequeue:
+                # Caso con UUID específico, se busca en el índice
+                removed = queues_storage.remove_messages(
+                    self.redis, queue_name, [uuid]
+                )
+                if not removed:
                     return QueueOperationResult(
                         success=False,
                         status=MOMQueueStatus.MESSAGE_NOT_FOUND,
                         details="Message not found",
                         replication_result=False
                     )
+                message_to_dequeue = removed[0]
             else:
                 # Caso de pop normal
-                message_json = self.redis.lpop(queue_key)
-                if endpoint:
-                    # Realizar todas las operaciones en el backup
-                    self.redis_backup.lpop(queue_key)
-
-                if not message_json:
+                popped = queues_storage.pop_messages(self.redis, queue_name)
+                if not popped:
                     return QueueOperationResult(
                         success=True,
                         status=MOMQueueStatus.EMPTY_QUEUE,
                         details="",
                         replication_result=False
                     )
-                message_to_dequeue = json.loads(message_json)
+                message_to_dequeue = popped[0]
 
-            self.redis.hincrby(metadata_key, "total_messages", -1)
             if endpoint:
                 # Realizar todas las operaciones en el backup
-                self.redis_backup.hincrby(metadata_key, "total_messages", -1)
+                queues_storage.remove_messages(
+                    self.redis_backup, queue_name, [message_to_dequeue["id"]]
+                )
 
             # Replicación
             replication_result = True
             if not im_replicating:
                 if not principal:
                     # Si no soy principal, replico al nodo original
-                    replication_result = self.replication_principal.dequeue(
+                    replication_result = replication_outbox.replicate(
+                        queue_name, write_concern,
+                        self.replication_principal.dequeue,
                         queue_name=queue_name,
                         user=self.user,
                         uuid=message_to_dequeue["id"]
                     )
                 else:
                     # Si soy principal, replico a quien me replica a mí
-                    replication_result = self.replication_client.dequeue(
+                    replication_result = replication_outbox.replicate(
+                        queue_name, write_concern,
+                        self.replication_client.dequeue,
                         queue_name=queue_name,
                         user=self.user,
                         uuid=message_to_dequeue["id"]
@@ -395,7 +677,7 @@ class MOMQueueManager:
             return QueueOperationResult(
                 success=True,
                 status=MOMQueueStatus.SUCCES_OPERATION,
-                details=json.loads(message_to_dequeue["payload"]),
+                details=message_to_dequeue["payload"],
                 replication_result=replication_result
             )
 
@@ -408,6 +690,283 @@ class MOMQueueManager:
                 replication_result=False
             )
 
+    async def dequeue_waiting(
+        self, queue_name: str, endpoint: bool = False, max_messages: int = 1,
+        wait_seconds: int = 0, write_concern: str = None
+    ) -> QueueOperationResult:
+        """
+        Dequeue like dequeue, waiting up to wait_seconds for a message when
+        the queue is empty. The wait is on the notifications of the queue,
+        it holds neither a thread nor a Redis connection, and the message
+        is popped atomically once it arrives.
+        Args:
+            queue_name (str): The name of the queue to dequeue from.
+            endpoint (bool): Whether the queue is an endpoint.
+            max_messages (int): Maximum number of messages to pop at once.
+            wait_seconds (int): Maximum time to wait for a message when
+                the queue is empty, 0 returns immediately.
+            write_concern (str): Write concern of the replication.
+        Returns:
+            QueueOperationResult: Result of the dequeue operation.
+        """
+        if not 0 <= wait_seconds <= queues_storage.MAX_WAIT_SECONDS:
+            return QueueOperationResult(
+                success=False,
+                status=MOMQueueStatus.INVALID_ARGUMENTS,
+                details="Invalid wait time",
+                replication_result=False
+            )
+
+        loop = asyncio.get_running_loop()
+        dequeue = functools.partial(
+            self.dequeue, queue_name=queue_name, endpoint=endpoint,
+            max_messages=max_messages, write_concern=write_concern
+        )
+        if wait_seconds == 0:
+            return await loop.run_in_executor(None, dequeue)
+
+        # El hilo de notificaciones despierta la espera en este loop
+        wake = asyncio.Event()
+        hub = notifications.get_notification_hub()
+        handle = hub.register(
+            subscriptions.QUEUE, queue_name,
+            lambda: loop.call_soon_threadsafe(wake.set)
+        )
+        deadline = loop.time() + wait_seconds
+        try:
+            while True:
+                # Se limpia antes de leer, una notificación durante la
+                # lectura no se pierde
+                wake.clear()
+                result = await loop.run_in_executor(None, dequeue)
+                remaining = deadline - loop.time()
+                if result.status != MOMQueueStatus.EMPTY_QUEUE \
+                        or remaining <= 0:
+                    return result
+                try:
+                    await asyncio.wait_for(wake.wait(), min(
+                        remaining, notifications.NOTIFY_FALLBACK_SECONDS
+                    ))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            hub.unregister(handle)
+
+    def _dequeue_many(
+        self, queue_name: str, max_messages: int, principal: bool,
+        im_replicating: bool, endpoint: bool, write_concern: str = None
+    ) -> QueueOperationResult:
+        """
+        Pop up to max_messages from the head of the queue atomically with
+        a single script and replicate all the dequeued UUIDs in one call.
+        Args:
+            queue_name (str): The name of the queue to dequeue from.
+            max_messages (int): Maximum number of messages to pop.
+            principal (bool): Whether this node is the principal of the queue.
+            im_replicating (bool): Whether this is a replication operation.
+            endpoint (bool): Whether the queue is an endpoint
+                if True, the messages will be dequeued from the backup.
+            write_concern (str): Write concern of the replication.
+        Returns:
+            QueueOperationResult: Result with the list of payloads.
+        """
+        messages = queues_storage.pop_messages(
+            self.redis, queue_name, max_messages
+        )
+        if not messages:
+            return QueueOperationResult(
+                success=True,
+                status=MOMQueueStatus.EMPTY_QUEUE,
+                details=[],
+                replication_result=False
+            )
+
+        uuids = [message["id"] for message in messages]
+        if endpoint:
+            # Realizar todas las operaciones en el backup
+            queues_storage.remove_messages(self.redis_backup, queue_name, uuids)
+
+        replication_result = True
+        if not im_replicating:
+            if not principal:
+                # Si no soy principal, replico al nodo original
+                replication_result = replication_outbox.replicate(
+                    queue_name, write_concern,
+                    self.replication_principal.dequeue_batch,
+                    queue_name=queue_name,
+                    user=self.user,
+                    uuids=uuids
+                )
+            else:
+                # Si soy principal, replico a quien me replica a mí
+                replication_result = replication_outbox.replicate(
+                    queue_name, write_concern,
+                    self.replication_client.dequeue_batch,
+                    queue_name=queue_name,
+                    user=self.user,
+                    uuids=uuids
+                )
+
+        return QueueOperationResult(
+            success=True,
+            status=MOMQueueStatus.SUCCES_OPERATION,
+            details=[message["payload"] for message in messages],
+            replication_result=replication_result
+        )
+
+    def lease(
+        self, queue_name: str, max_messages: int = 1
+    ) -> QueueOperationResult:
+        """
+        Lease up to max_messages from the head of the queue for a push
+        delivery. The messages stay in the queue, and on the backup and
+        the replica, until they are acknowledged or released.
+        Args:
+            queue_name (str): The name of the queue.
+            max_messages (int): Maximum number of messages to lease.
+        Returns:
+            QueueOperationResult: Result with the list of leased message
+                dicts, with their "id" and "payload".
+        """
+        try:
+            if max_messages < 1:
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid number of messages to dequeue",
+                    replication_result=False
+                )
+
+            result = self.validator.validate_queue_exists(queue_name)
+            if result.success is False:
+                result.replication_result = False
+                return result
+
+            result = self.validator.validate_user_subscribed(queue_name)
+            if result.success is False:
+                result.replication_result = False
+                return result
+
+            messages = queues_storage.lease_messages(
+                self.redis, queue_name, max_messages
+            )
+            if not messages:
+                return QueueOperationResult(
+                    success=True,
+                    status=MOMQueueStatus.EMPTY_QUEUE,
+                    details=[],
+                    replication_result=False
+                )
+
+            return QueueOperationResult(
+                success=True,
+                status=MOMQueueStatus.SUCCES_OPERATION,
+                details=messages,
+                replication_result=False
+            )
+
+        except Exception as e: # pylint: disable=W0718
+            logger.exception("Error leasing from '%s'", queue_name)
+            return QueueOperationResult(
+                success=False,
+                status=MOMQueueStatus.INTERNAL_ERROR,
+                details=str(e),
+                replication_result=False
+            )
+
+    def acknowledge(
+        self, queue_name: str, uuids: list, endpoint: bool = False,
+        write_concern: str = None
+    ) -> QueueOperationResult:
+        """
+        Dequeue the leased messages a push delivery acknowledged, the
+        dequeue is applied on the backup and replicated like a dequeue
+        by UUID.
+        Args:
+            queue_name (str): The name of the queue.
+            uuids (list): UUIDs of the acknowledged messages.
+            endpoint (bool): Whether the queue is an endpoint
+                if True, the messages will be dequeued from the backup.
+            write_concern (str): Write concern of the replication.
+        Returns:
+            QueueOperationResult: Result with the UUIDs dequeued, the
+                messages whose lease expired and were dequeued by
+                another consumer are skipped.
+        """
+        try:
+            removed = queues_storage.remove_messages(
+                self.redis, queue_name, uuids
+            )
+            uuids = [message["id"] for message in removed]
+            if not uuids:
+                return QueueOperationResult(
+                    success=True,
+                    status=MOMQueueStatus.MESSAGE_NOT_FOUND,
+                    details=[],
+                    replication_result=False
+                )
+
+            if endpoint:
+                # Realizar todas las operaciones en el backup
+                queues_storage.remove_messages(
+                    self.redis_backup, queue_name, uuids
+                )
+
+            principal = bool(int(self.redis.hget(
+                KeyBuilder.metadata_key(queue_name), "original_node"
+            ) or 0))
+            target = self.replication_client if principal \
+                else self.replication_principal
+            replication_result = replication_outbox.replicate(
+                queue_name, write_concern, target.dequeue_batch,
+                queue_name=queue_name,
+                user=self.user,
+                uuids=uuids
+            )
+            return QueueOperationResult(
+                success=True,
+                status=MOMQueueStatus.SUCCES_OPERATION,
+                details=uuids,
+                replication_result=replication_result
+            )
+
+        except Exception as e: # pylint: disable=W0718
+            logger.exception("Error acknowledging messages of '%s'", queue_name) # pylint: disable=C0301
+            return QueueOperationResult(
+                success=False,
+                status=MOMQueueStatus.INTERNAL_ERROR,
+                details=str(e),
+                replication_result=False
+            )
+
+    def release(self, queue_name: str, uuids: list) -> QueueOperationResult:
+        """
+        Release the leased messages a push delivery did not acknowledge,
+        they are delivered again in their place in the queue.
+        Args:
+            queue_name (str): The name of the queue.
+            uuids (list): UUIDs of the leased messages.
+        Returns:
+            QueueOperationResult: Result of the release.
+        """
+        try:
+            queues_storage.release_messages(self.redis, queue_name, uuids)
+            return QueueOperationResult(
+                success=True,
+                status=MOMQueueStatus.SUCCES_OPERATION,
+                details=uuids,
+                replication_result=False
+            )
+
+        except Exception as e: # pylint: disable=W0718
+            logger.exception("Error releasing messages of '%s'", queue_name)
+            return QueueOperationResult(
+                success=False,
+                status=MOMQueueStatus.INTERNAL_ERROR,
+                details=str(e),
+                replication_result=False
+            )
+
     def get_queue_info(self, queue_name: str) -> QueueOperationResult:
         """
         Get information about the specified queue, specifically 
@@ -451,8 +1010,10 @@ class MOMQueueManager:
             QueueOperationResult: Result of the queue deletion operation.
         """
         queue_key = KeyBuilder.queue_key(queue_name)
+        messages_key = KeyBuilder.messages_key(queue_name)
         metadata_key = KeyBuilder.metadata_key(queue_name)
         subscribers_key = KeyBuilder.subscribers_key(queue_name)
+        leases_key = KeyBuilder.leases_key(queue_name)
 
         try:
             result = self.validator.validate_queue_exists(queue_name)
@@ -464,9 +1025,19 @@ class MOMQueueManager:
                 return result
 
             principal = bool(int(self.redis.hget(metadata_key, "original_node"))) # pylint: disable=C0301
-            self.redis.delete(queue_key, metadata_key, subscribers_key) 
+            subscriptions.remove_all_subscriptions(
+                self.redis, self.redis.smembers(subscribers_key),
+                subscriptions.QUEUE, queue_name
+            )
+            self.redis.delete(
+                queue_key, messages_key, metadata_key, subscribers_key,
+                leases_key
+            )
             if endpoint:
-                self.redis_backup.delete(queue_key, metadata_key, subscribers_key)
+                self.redis_backup.delete(
+                    queue_key, messages_key, metadata_key, subscribers_key,
+                    leases_key
+                )
                 self.redis_nodes.srem(WHOAMI, f"queue:{queue_name}")
                 self.redis_nodes.srem(SOURCE_QUEUE_NODE_ID, f"queue:{queue_name}")
             
@@ -9,15 +9,19 @@ from app.grpc.replication_service_pb2 import (
     CreateQueueRequest,
     DeleteQueueRequest,
     EnqueueRequest,
+    EnqueueBatchRequest,
+    EnqueueBatchItem,
     QueueSubscribeRequest,
     QueueUnsubscribeRequest,
     DequeueRequest,
+    DequeueBatchRequest,
     QueueForwardEnqueueRequest,
     QueueForwardDequeueRequest,
     QueueForwardSubscribeRequest,
     QueueForwardUnsubscribeRequest,
 )
 from app.grpc.replication_service_pb2_grpc import QueueReplicationStub
+from app.domain.replication_stream import ReplicationStream
 from app.domain.utils import get_node_stubs
 from app.domain.models import QueueOperationResult, MOMQueueStatus
 import json
@@ -25,27 +29,57 @@ import json
 class QueueReplicationClient:
     """Client for topic replication via gRPC"""
 
-    def __init__(self, stub: QueueReplicationStub, target_node_desc: str):
+    def __init__(
+        self, stub: QueueReplicationStub, target_node_desc: str,
+        stream: ReplicationStream = None
+    ):
         """
         Initialize the client with a pre-created gRPC stub.
         Args:
             stub (TopicReplicationStub): The gRPC stub to use for calls.
             target_node_desc (str): Description of the destination
                 node (for logging).
+            stream (ReplicationStream): Replication stream to the same
+                node, None to always use the unary calls.
         """
         self.stub = stub
         self.target_node_desc = target_node_desc
+        self.stream = stream
 
-    def create_queue(self, queue_name: str, owner: str, created_at: float):
+    def _send(self, operation: str, rpc, request):
+        """
+        Send a replication request over the replication stream of the
+        node, or with its unary call when the stream can't be used. The
+        stream keeps it in the journal when the node is down.
+        Args:
+            operation (str): Field of the operation in ReplicationOperation.
+            rpc: The unary call of the operation.
+            request: The request of the operation.
+        Returns:
+            ReplicationResponse: The response of the other node.
+        """
+        if self.stream is not None:
+            return self.stream.replicate(operation, rpc, request)
+        return rpc(request)
+
+    def create_queue(
+        self, queue_name: str, owner: str, created_at: float,
+        message_limit: int = 0, overflow_policy: str = "",
+        storage: str = ""
+    ):
         if not self.stub:
             return False
 
         try:
             request = CreateQueueRequest(
-                queue_name=queue_name, owner=owner, created_at=created_at
+                queue_name=queue_name, owner=owner, created_at=created_at,
+                message_limit=message_limit, overflow_policy=overflow_policy,
+                storage=storage
             )
 
-            response = self.stub.QueueReplicateCreate(request)
+            response = self._send(
+                "create_queue", self.stub.QueueReplicateCreate, request
+            )
 
             if response.success:
                 return True
@@ -64,7 +98,9 @@ class QueueReplicationClient:
         try:
             request = DeleteQueueRequest(queue_name=queue_name, requester=owner)
 
-            response = self.stub.QueueReplicateDelete(request)
+            response = self._send(
+                "delete_queue", self.stub.QueueReplicateDelete, request
+            )
 
             if response.success:
                 return True
@@ -93,7 +129,9 @@ class QueueReplicationClient:
                 timestamp=timestamp,
             )
 
-            response = self.stub.QueueReplicateEnqueue(request)
+            response = self._send(
+                "enqueue", self.stub.QueueReplicateEnqueue, request
+            )
 
             if response.success:
                 return True
@@ -108,6 +146,53 @@ class QueueReplicationClient:
             logger.error("Error inesperado en replicación")
             return False
 
+    def enqueue_batch(
+        self, queue_name: str, user: str, messages: list
+    ) -> bool:
+        """
+        Replica un lote de mensajes encolados en una sola llamada.
+
+        Args:
+            queue_name (str): Nombre de la cola
+            user (str): Usuario que realiza la operación
+            messages (list): Tuplas (message, uuid, timestamp) en orden
+
+        Returns:
+            bool: True si la replicación fue exitosa, False en caso contrario
+        """
+        if not self.stub:
+            logger.error("No hay stub disponible para replicación")
+            return False
+
+        try:
+            request = EnqueueBatchRequest(
+                queue_name=queue_name,
+                requester=user,
+                messages=[
+                    EnqueueBatchItem(
+                        message=message, uuid=uuid, timestamp=timestamp
+                    )
+                    for message, uuid, timestamp in messages
+                ],
+            )
+
+            response = self._send(
+                "enqueue_batch", self.stub.QueueReplicateEnqueueBatch, request
+            )
+
+            if response.success:
+                return True
+            else:
+                logger.error("Error en replicación de lote: %s", response.message) # pylint: disable=C0301
+                return False
+
+        except grpc.RpcError:
+            logger.error("Error gRPC en replicación de lote")
+            return False
+        except Exception: # pylint: disable=W0718
+            logger.error("Error inesperado en replicación de lote")
+            return False
+
     def dequeue(self, queue_name: str, user: str, uuid: str) -> bool:
         """
         Replica una operación de dequeue en el nodo remoto.
@@ -129,7 +214,9 @@ class QueueReplicationClient:
                 queue_name=queue_name, requester=user, uuid=uuid
             ) # pylint: disable=C0301
 
-            response = self.stub.QueueReplicateDequeue(request)
+            response = self._send(
+                "dequeue", self.stub.QueueReplicateDequeue, request
+            )
             if response.success:
                 return True
             else:
@@ -140,6 +227,41 @@ class QueueReplicationClient:
             logger.error("Error inesperado en replicación de dequeue")
             return False
 
+    def dequeue_batch(self, queue_name: str, user: str, uuids: list) -> bool:
+        """
+        Replica una operación de dequeue de varios mensajes en una sola
+        llamada.
+
+        Args:
+            queue_name (str): Nombre de la cola
+            user (str): Usuario que realiza la operación
+            uuids (list): UUIDs de los mensajes desencolados, en orden
+
+        Returns:
+            bool: True si la replicación fue exitosa, False en caso contrario
+        """
+        if not self.stub:
+            logger.error("No hay stub disponible para replicación")
+            return False
+
+        try:
+            request = DequeueBatchRequest(
+                queue_name=queue_name, requester=user, uuids=uuids
+            )
+
+            response = self._send(
+                "dequeue_batch", self.stub.QueueReplicateDequeueBatch, request
+            )
+            if response.success:
+                return True
+            else:
+                logger.error("Error en replicación de dequeue en lote %s", response.message) # pylint: disable=C0301
+                return False
+
+        except Exception: # pylint: disable=W0718
+            logger.error("Error inesperado en replicación de dequeue en lote")
+            return False
+
     def subscribe(self, queue_name: str, user: str):
         if not self.stub:
             return False
@@ -148,7 +270,9 @@ class QueueReplicationClient:
             request = QueueSubscribeRequest(
                 queue_name=queue_name, requester=user
             ) # pylint: disable=C0301
-            response = self.stub.QueueReplicateSubscribe(request)
+            response = self._send(
+                "queue_subscribe", self.stub.QueueReplicateSubscribe, request
+            )
             if response.success:
                 return True
             else:
@@ -168,7 +292,11 @@ class QueueReplicationClient:
                 queue_name=queue_name, requester=user
             ) # pylint: disable=C0301
 
-            response = self.stub.QueueReplicateUnsubscribe(request)
+            response = self._send(
+                "queue_unsubscribe",
+                self.stub.QueueReplicateUnsubscribe,
+                request
+            )
 
             if response.success:
                 return True
@@ -0,0 +1,604 @@
+"""
+This module contains the storage layout of the queue messages in Redis.
+Every queue keeps its messages in two keys:
+    - mom:queues:<name>           ZSET with the message UUIDs scored by a
+                                  sequence number, it keeps the FIFO order.
+    - mom:queues:<name>:messages  HASH from UUID to the message envelope.
+With this layout removing a message by its UUID is O(log n) instead of
+scanning the whole queue. All the operations run as Lua scripts so the
+index, the messages and the total_messages counter never diverge, the
+enqueue script also enforces the message_limit and overflow_policy
+stored in the queue metadata and publishes on the notification channel
+of the queue, in the same round trip as the write. Receives that wait
+for a message don't block on Redis, the manager waits on the
+notifications of the queue and pops with the same script.
+
+Queues created with the "stream" storage keep their messages in a
+Redis Stream on mom:queues:<name> instead, the message id is the entry
+id assigned by XADD on the node that accepted the message. The same
+scripts branch on the storage field of the metadata, reading the head
+with XRANGE and removing with XDEL.
+
+The messages pushed by the stream endpoint are leased instead of
+popped: they stay in the queue, with their UUID in the ZSET
+mom:queues:<name>:leases scored by the lease deadline, and the pop and
+lease scripts skip them. The acknowledgement removes them like a
+dequeue by UUID, a closed connection releases them in their place, and
+an expired lease makes them deliverable again.
+
+Queues written before this layout kept the envelopes in a LIST on
+mom:queues:<name>, the scripts move them to the ZSET and the HASH the
+first time they touch the queue and get_messages reads them in place.
+"""
+
+import json
+import os
+import time
+from app.domain import envelope, scripts
+from app.domain.utils import KeyBuilder
+
+# Tiempo máximo que un receive puede quedar bloqueado esperando mensajes
+MAX_WAIT_SECONDS = 20
+
+# Tiempo que un mensaje entregado por un stream espera su confirmación
+# antes de volver a entregarse, cubre las conexiones de un proceso caído
+LEASE_SECONDS = int(os.getenv("QUEUE_LEASE_SECONDS", "300"))
+
+# Políticas cuando la cola alcanza su message_limit
+OVERFLOW_REJECT = "reject"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (OVERFLOW_REJECT, OVERFLOW_DROP_OLDEST)
+
+# Resultados de push_messages cuando no se encoló nada
+QUEUE_NOT_FOUND = -1
+QUEUE_FULL = -2
+# Una réplica no pudo guardar un mensaje del stream con el id del otro nodo
+ID_CONFLICT = -3
+
+# Las colas anteriores guardaban los sobres JSON en una LIST en la misma
+# clave del índice, la primera vez que un script toca una de ellas pasa
+# sus mensajes al ZSET y al HASH en orden; el sobre se guarda tal cual
+# y _decode lo sigue leyendo como mensaje anterior al sobre compacto.
+LUA_MIGRATE_LIST = """
+local function migrate_list()
+    if redis.call('TYPE', KEYS[1]).ok ~= 'list' then
+        return
+    end
+    local entries = redis.call('LRANGE', KEYS[1], 0, -1)
+    redis.call('DEL', KEYS[1])
+    local seq = tonumber(redis.call('HGET', KEYS[3], 'last_seq') or '0')
+    local skipped = 0
+    for i = 1, #entries do
+        local id = tostring(cjson.decode(entries[i])['id'])
+        seq = seq + 1
+        if redis.call('ZADD', KEYS[1], 'NX', seq, id) == 1 then
+            redis.call('HSET', KEYS[2], id, entries[i])
+        else
+            skipped = skipped + 1
+        end
+    end
+    redis.call('HSET', KEYS[3], 'last_seq', seq)
+    if skipped > 0 then
+        redis.call('HINCRBY', KEYS[3], 'total_messages', -skipped)
+    end
+end
+"""
+
+# KEYS: ids, messages, metadata, leases
+# ARGV: enforce_limit, channel, uuid1, message1, uuid2, message2...
+# Retorna {agregados, original_node, descartados, ids}, agregados es
+# QUEUE_NOT_FOUND o QUEUE_FULL si el lote no se encoló.
+# "drop_oldest" no descarta los mensajes con lease, si sin ellos no hay
+# lugar la cola está llena.
+# Los UUIDs repetidos se ignoran para que la replicación sea idempotente,
+# en los streams el dueño deja que XADD asigne el id y las réplicas
+# (enforce_limit = 0) reutilizan el que reciben; si ese id no se puede
+# agregar y no está, agregados es ID_CONFLICT y el resto del lote no se
+# encola, nunca se guarda con otro id.
+# Si agregó mensajes publica en el canal de notificaciones de la cola
+ENQUEUE_SCRIPT = scripts.register("queue_enqueue", LUA_MIGRATE_LIST + """
+if redis.call('EXISTS', KEYS[3]) == 0 then
+    return {-1, 0, 0, {}}
+end
+migrate_list()
+local principal = tonumber(redis.call('HGET', KEYS[3], 'original_node') or '0')
+local stream = redis.call('HGET', KEYS[3], 'storage') == 'stream'
+local count = (#ARGV - 2) / 2
+local limit = tonumber(redis.call('HGET', KEYS[3], 'message_limit') or '0')
+local policy = redis.call('HGET', KEYS[3], 'overflow_policy') or 'reject'
+local dropped = 0
+if limit > 0 then
+    local size
+    if stream then
+        size = redis.call('XLEN', KEYS[1])
+    else
+        size = redis.call('ZCARD', KEYS[1])
+    end
+    local overflow = size + count - limit
+    if overflow > 0 then
+        local leased = redis.call('ZCARD', KEYS[4])
+        if policy == 'drop_oldest' and count <= limit and leased == 0 then
+            if stream then
+                dropped = redis.call('XTRIM', KEYS[1], 'MAXLEN', size - overflow)
+            else
+                local popped = redis.call('ZPOPMIN', KEYS[1], overflow)
+                local ids = {}
+                for i = 1, #popped, 2 do
+                    ids[#ids + 1] = popped[i]
+                end
+                if #ids > 0 then
+                    redis.call('HDEL', KEYS[2], unpack(ids))
+                end
+                dropped = #ids
+            end
+        elseif policy == 'drop_oldest' and count <= limit then
+            -- Los mensajes con lease esperan su confirmación, se
+            -- descartan los más viejos sin lease
+            local head
+            if stream then
+                head = {}
+                local entries = redis.call(
+                    'XRANGE', KEYS[1], '-', '+', 'COUNT', overflow + leased
+                )
+                for i = 1, #entries do
+                    head[i] = entries[i][1]
+                end
+            else
+                head = redis.call('ZRANGE', KEYS[1], 0, overflow + leased - 1)
+            end
+            local ids = {}
+            for i = 1, #head do
+                if #ids == overflow then
+                    break
+                end
+                if not redis.call('ZSCORE', KEYS[4], head[i]) then
+                    ids[#ids + 1] = head[i]
+                end
+            end
+            if #ids < overflow and ARGV[1] == '1' then
+                return {-2, principal, 0, {}}
+            end
+            if #ids > 0 then
+                if stream then
+                    redis.call('XDEL', KEYS[1], unpack(ids))
+                else
+                    redis.call('ZREM', KEYS[1], unpack(ids))
+                    redis.call('HDEL', KEYS[2], unpack(ids))
+                end
+            end
+            dropped = #ids
+        elseif ARGV[1] == '1' then
+            return {-2, principal, 0, {}}
+        end
+        if dropped > 0 then
+            redis.call('HINCRBY', KEYS[3], 'total_messages', -dropped)
+        end
+    end
+end
+local added = 0
+local conflict = false
+local ids = {}
+if stream then
+    for i = 3, #ARGV, 2 do
+        local id = '*'
+        if ARGV[1] == '0' then
+            id = ARGV[i]
+        end
+        local new_id = redis.pcall('XADD', KEYS[1], id, 'message', ARGV[i + 1])
+        if type(new_id) == 'table' then
+            -- El id no es mayor al último, si ya está se ignora
+            local found = redis.pcall('XRANGE', KEYS[1], id, id)
+            if type(found) ~= 'table' or found.err or #found == 0 then
+                conflict = true
+                break
+            end
+            new_id = false
+        end
+        if new_id then
+            ids[#ids + 1] = new_id
+            added = added + 1
+        else
+            ids[#ids + 1] = id
+        end
+    end
+else
+    local seq = tonumber(redis.call('HGET', KEYS[3], 'last_seq') or '0')
+    for i = 3, #ARGV, 2 do
+        seq = seq + 1
+        if redis.call('ZADD', KEYS[1], 'NX', seq, ARGV[i]) == 1 then
+            redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 1])
+            added = added + 1
+        end
+        ids[#ids + 1] = ARGV[i]
+    end
+    redis.call('HSET', KEYS[3], 'last_seq', seq)
+end
+if added > 0 then
+    redis.call('HINCRBY', KEYS[3], 'total_messages', added)
+    redis.call('PUBLISH', ARGV[2], '')
+end
+if conflict then
+    return {-3, principal, dropped, ids}
+end
+return {added, principal, dropped, ids}
+""")
+
+# Lee la cabeza de la cola sin sacarla, saltando los mensajes con un
+# lease vigente; los leases vencidos se descartan antes de leer.
+# Retorna {id1, mensaje1, id2, mensaje2...} y los ids sin mensaje
+LUA_READ_HEAD = """
+local function read_head(count, now)
+    redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', now)
+    local window = count + redis.call('ZCARD', KEYS[4])
+    local result = {}
+    local orphans = {}
+    if redis.call('HGET', KEYS[3], 'storage') == 'stream' then
+        local entries = redis.call('XRANGE', KEYS[1], '-', '+', 'COUNT', window)
+        for i = 1, #entries do
+            if #result == count * 2 then
+                break
+            end
+            if not redis.call('ZSCORE', KEYS[4], entries[i][1]) then
+                result[#result + 1] = entries[i][1]
+                result[#result + 1] = entries[i][2][2]
+            end
+        end
+    else
+        local ids = redis.call('ZRANGE', KEYS[1], 0, window - 1)
+        for i = 1, #ids do
+            if #result == count * 2 then
+                break
+            end
+            if not redis.call('ZSCORE', KEYS[4], ids[i]) then
+                local message = redis.call('HGET', KEYS[2], ids[i])
+                if message then
+                    result[#result + 1] = ids[i]
+                    result[#result + 1] = message
+                else
+                    orphans[#orphans + 1] = ids[i]
+                end
+            end
+        end
+    end
+    return result, orphans
+end
+"""
+
+# KEYS: ids, messages, metadata, leases | ARGV: count, now
+# Retorna {id1, mensaje1, id2, mensaje2...}
+# Sin leases se saca la cabeza directamente, con leases se saltan los
+# mensajes entregados por un stream que aún no se confirmaron
+POP_SCRIPT = scripts.register(
+    "queue_pop", LUA_MIGRATE_LIST + LUA_READ_HEAD + """
+migrate_list()
+local ids = {}
+local result = {}
+local stream = redis.call('HGET', KEYS[3], 'storage') == 'stream'
+if redis.call('EXISTS', KEYS[4]) == 1 then
+    local orphans
+    result, orphans = read_head(tonumber(ARGV[1]), ARGV[2])
+    for i = 1, #result, 2 do
+        ids[#ids + 1] = result[i]
+    end
+    for i = 1, #orphans do
+        ids[#ids + 1] = orphans[i]
+    end
+    if #ids > 0 then
+        if stream then
+            redis.call('XDEL', KEYS[1], unpack(ids))
+        else
+            redis.call('ZREM', KEYS[1], unpack(ids))
+            redis.call('HDEL', KEYS[2], unpack(ids))
+        end
+    end
+elseif stream then
+    local entries = redis.call('XRANGE', KEYS[1], '-', '+', 'COUNT', ARGV[1])
+    for i = 1, #entries do
+        ids[#ids + 1] = entries[i][1]
+        result[#result + 1] = entries[i][1]
+        result[#result + 1] = entries[i][2][2]
+    end
+    if #ids > 0 then
+        redis.call('XDEL', KEYS[1], unpack(ids))
+    end
+else
+    local popped = redis.call('ZPOPMIN', KEYS[1], ARGV[1])
+    for i = 1, #popped, 2 do
+        ids[#ids + 1] = popped[i]
+        local message = redis.call('HGET', KEYS[2], popped[i])
+        if message then
+            result[#result + 1] = popped[i]
+            result[#result + 1] = message
+        end
+    end
+    if #ids > 0 then
+        redis.call('HDEL', KEYS[2], unpack(ids))
+    end
+end
+if #ids > 0 then
+    redis.call('HINCRBY', KEYS[3], 'total_messages', -#ids)
+end
+return result
+""")
+
+# KEYS: ids, messages, metadata, leases | ARGV: count, now, deadline
+# Retorna {id1, mensaje1, id2, mensaje2...}
+# Los mensajes quedan en la cola con un lease hasta deadline, se sacan
+# al confirmarlos con REMOVE_SCRIPT o vuelven a entregarse al liberarlos
+# o cuando el lease vence
+LEASE_SCRIPT = scripts.register(
+    "queue_lease", LUA_MIGRATE_LIST + LUA_READ_HEAD + """
+migrate_list()
+local result = read_head(tonumber(ARGV[1]), ARGV[2])
+for i = 1, #result, 2 do
+    redis.call('ZADD', KEYS[4], ARGV[3], result[i])
+end
+return result
+""")
+
+# KEYS: ids, messages, metadata, leases | ARGV: uuid1, uuid2...
+# Retorna {id1, mensaje1, id2, mensaje2...}
+# Caso común: los UUIDs son la cabeza de la cola y se sacan con ZPOPMIN.
+# Los mensajes sacados dejan de tener lease
+REMOVE_SCRIPT = scripts.register("queue_remove", LUA_MIGRATE_LIST + """
+migrate_list()
+redis.call('ZREM', KEYS[4], unpack(ARGV))
+if redis.call('HGET', KEYS[3], 'storage') == 'stream' then
+    local ids = {}
+    local result = {}
+    for i = 1, #ARGV do
+        local found = redis.pcall('XRANGE', KEYS[1], ARGV[i], ARGV[i])
+        if type(found) == 'table' and not found.err and #found > 0 then
+            ids[#ids + 1] = ARGV[i]
+            result[#result + 1] = ARGV[i]
+            result[#result + 1] = found[1][2][2]
+        end
+    end
+    if #ids > 0 then
+        redis.call('XDEL', KEYS[1], unpack(ids))
+        redis.call('HINCRBY', KEYS[3], 'total_messages', -#ids)
+    end
+    return result
+end
+local head = redis.call('ZRANGE', KEYS[1], 0, #ARGV - 1)
+local at_head = #head == #ARGV
+for i = 1, #head do
+    if head[i] ~= ARGV[i] then
+        at_head = false
+        break
+    end
+end
+local removed = {}
+if at_head then
+    redis.call('ZPOPMIN', KEYS[1], #ARGV)
+    removed = ARGV
+else
+    for i = 1, #ARGV do
+        if redis.call('ZREM', KEYS[1], ARGV[i]) == 1 then
+            removed[#removed + 1] = ARGV[i]
+        end
+    end
+end
+local result = {}
+if #removed > 0 then
+    for i = 1, #removed do
+        local message = redis.call('HGET', KEYS[2], removed[i])
+        if message then
+            result[#result + 1] = removed[i]
+            result[#result + 1] = message
+        end
+    end
+    redis.call('HDEL', KEYS[2], unpack(removed))
+    redis.call('HINCRBY', KEYS[3], 'total_messages', -#removed)
+end
+return result
+""")
+
+
+def _keys(queue_name: str) -> list:
+    return [
+        KeyBuilder.queue_key(queue_name),
+        KeyBuilder.messages_key(queue_name),
+        KeyBuilder.metadata_key(queue_name),
+        KeyBuilder.leases_key(queue_name),
+    ]
+
+
+def _decode(entries: list) -> list:
+    # Los scripts retornan pares id, mensaje; el id no va en el sobre
+    messages = []
+    for i in range(0, len(entries), 2):
+        message = envelope.decode(entries[i + 1])
+        if envelope.is_legacy(entries[i + 1]):
+            # Antes del sobre el payload de las colas se guardaba como JSON
+            message["payload"] = json.loads(message["payload"])
+        message["id"] = entries[i]
+        messages.append(message)
+    return messages
+
+
+def push_messages(
+    redis, queue_name: str, messages: list, enforce_limit: bool = True
+) -> tuple:
+    """
+    Append messages to the tail of the queue in a single round trip,
+    checking that the queue exists and applying its overflow policy.
+    Args:
+        redis: Redis client to write to.
+        queue_name (str): The name of the queue.
+        messages (list): Message dicts with the "id", "timestamp" and
+            "payload" fields, on stream queues the id assigned by XADD
+            replaces it.
+        enforce_limit (bool): Whether a full queue with the "reject"
+            policy refuses the messages, replicas mirror the writes
+            already accepted by the other node so they skip it and
+            keep the ids of the messages.
+    Returns:
+        tuple: (added, original_node, dropped). added is QUEUE_NOT_FOUND
+            or QUEUE_FULL when nothing was written and ID_CONFLICT when
+            a replica could not keep the id of a stream message, already
+            stored UUIDs are skipped and dropped counts the messages
+            discarded by the "drop_oldest" policy.
+    """
+    result = ENQUEUE_SCRIPT(
+        redis, _keys(queue_name),
+        _push_args(queue_name, messages, enforce_limit)
+    )
+    return _pushed(messages, result)
+
+
+async def push_messages_async(
+    redis, queue_name: str, messages: list, enforce_limit: bool = True
+) -> tuple:
+    """
+    Append messages to the tail of the queue, like push_messages, on a
+    redis.asyncio client.
+    Args:
+        redis: Async Redis client to write to.
+        queue_name (str): The name of the queue.
+        messages (list): Message dicts with the "id", "timestamp" and
+            "payload" fields.
+        enforce_limit (bool): Whether a full queue refuses the messages.
+    Returns:
+        tuple: (added, original_node, dropped) as in push_messages.
+    """
+    result = await ENQUEUE_SCRIPT.call_async(
+        redis, _keys(queue_name),
+        _push_args(queue_name, messages, enforce_limit)
+    )
+    return _pushed(messages, result)
+
+
+def _push_args(
+    queue_name: str, messages: list, enforce_limit: bool
+) -> list:
+    args = [int(enforce_limit), KeyBuilder.notify_channel(queue_name)]
+    for message in messages:
+        args += [
+            message["id"],
+            envelope.encode(message["payload"], message["timestamp"])
+        ]
+    return args
+
+
+def _pushed(messages: list, result: list) -> tuple:
+    added, principal, dropped, ids = result
+    for message, message_id in zip(messages, ids):
+        message["id"] = message_id
+    return added, bool(principal), dropped
+
+
+def pop_messages(redis, queue_name: str, count: int = 1) -> list:
+    """
+    Pop up to count messages from the head of the queue.
+    Args:
+        redis: Redis client to write to.
+        queue_name (str): The name of the queue.
+        count (int): Maximum number of messages to pop.
+    Returns:
+        list: The popped message dicts in FIFO order.
+    """
+    popped = POP_SCRIPT(redis, _keys(queue_name), [count, time.time()])
+    return _decode(popped)
+
+
+def lease_messages(redis, queue_name: str, count: int = 1) -> list:
+    """
+    Read up to count messages from the head of the queue and lease them
+    for LEASE_SECONDS, the leased messages stay in the queue but no pop
+    or lease returns them until they are released or the lease expires.
+    Args:
+        redis: Redis client to write to.
+        queue_name (str): The name of the queue.
+        count (int): Maximum number of messages to lease.
+    Returns:
+        list: The leased message dicts in FIFO order.
+    """
+    now = time.time()
+    leased = LEASE_SCRIPT(
+        redis, _keys(queue_name), [count, now, now + LEASE_SECONDS]
+    )
+    return _decode(leased)
+
+
+def release_messages(redis, queue_name: str, uuids: list) -> None:
+    """
+    Release the leases of the given messages so they can be popped or
+    leased again, in their place in the queue.
+    Args:
+        redis: Redis client to write to.
+        queue_name (str): The name of the queue.
+        uuids (list): UUIDs of the leased messages.
+    """
+    if uuids:
+        redis.zrem(KeyBuilder.leases_key(queue_name), *uuids)
+
+
+def remove_messages(redis, queue_name: str, uuids: list) -> list:
+    """
+    Remove the messages with the given UUIDs from the queue.
+    Args:
+        redis: Redis client to write to.
+        queue_name (str): The name of the queue.
+        uuids (list): UUIDs of the messages to remove.
+    Returns:
+        list: The removed message dicts, missing UUIDs are ignored.
+    """
+    if not uuids:
+        return []
+    removed = REMOVE_SCRIPT(redis, _keys(queue_name), uuids)
+    return _decode(removed)
+
+
+async def remove_messages_async(redis, queue_name: str, uuids: list) -> list:
+    """
+    Remove the messages with the given UUIDs from the queue, like
+    remove_messages, on a redis.asyncio client.
+    Args:
+        redis: Async Redis client to write to.
+        queue_name (str): The name of the queue.
+        uuids (list): UUIDs of the messages to remove.
+    Returns:
+        list: The removed message dicts, missing UUIDs are ignored.
+    """
+    if not uuids:
+        return []
+    removed = await REMOVE_SCRIPT.call_async(redis, _keys(queue_name), uuids)
+    return _decode(removed)
+
+
+def get_messages(redis, queue_name: str, start: int = 0, end: int = -1) -> list:
+    """
+    Read the messages of the queue in FIFO order without removing them.
+    Args:
+        redis: Redis client to read from.
+        queue_name (str): The name of the queue.
+        start (int): Index of the first message.
+        end (int): Index of the last message, -1 for the tail.
+    Returns:
+        list: The message dicts in FIFO order.
+    """
+    queue_key = KeyBuilder.queue_key(queue_name)
+    queue_type = redis.type(queue_key)
+    if queue_type == "list":
+        # Cola anterior aún sin migrar, se lee sin tocarla
+        return _decode([
+            item for message in redis.lrange(queue_key, start, end)
+            for item in (json.loads(message)["id"], message)
+        ])
+    if queue_type == "stream":
+        entries = redis.xrange(queue_key)
+        entries = entries[start:] if end == -1 else entries[start:end + 1]
+        return _decode([
+            item for entry_id, fields in entries
+            for item in (entry_id, fields["message"])
+        ])
+
+    uuids = redis.zrange(queue_key, start, end)
+    if not uuids:
+        return []
+    messages = redis.hmget(KeyBuilder.messages_key(queue_name), uuids)
+    return _decode([
+        item for uuid, message in zip(uuids, messages) if message
+        for item in (uuid, message)
+    ])
@@ -6,12 +6,17 @@ this way isolating the subscription logic from the queue management logic.
 
 from app.domain.models import QueueOperationResult, MOMQueueStatus
 from app.domain.logger_config import logger
+from app.domain import replication_outbox, subscriptions
 from app.domain.utils import KeyBuilder
 from app.domain.queues.queues_validator import QueueValidator
 from app.domain.queue_replication_clients import (
     get_source_queue_client,
     get_target_queue_client,
 )
+from app.domain.replication_clients import (
+    get_replica_stream,
+    get_source_stream,
+)
 from app.domain.models import NODES_CONFIG, WHOAMI
 from app.domain.queues.queues_replication import QueueReplicationClient
 from app.adapters.factory import ObjectFactory
@@ -41,21 +46,36 @@ class SubscriptionService:
         # replication_client apunta al nodo replicante
         # replication_principal apunta al nodo principal
         self.replication_client = QueueReplicationClient(
-            stub=replica_stub, target_node_desc=f"nodo réplica ({replica_node})"
+            stub=replica_stub, target_node_desc=f"nodo réplica ({replica_node})",
+            stream=get_source_stream()
         )
         self.replication_principal = QueueReplicationClient(
-            stub=source_stub, target_node_desc=f"nodo principal ({WHOAMI})"
+            stub=source_stub, target_node_desc=f"nodo principal ({WHOAMI})",
+            stream=get_replica_stream()
         )
 
-    def subscribe(self, queue_name: str, endpoint: bool = False) -> QueueOperationResult:
+    def subscribe(
+        self, queue_name: str, endpoint: bool = False,
+        write_concern: str = None
+    ) -> QueueOperationResult:
         """
         Subscribe the user to a queue.
         Args:
             queue_name (str): The name of the queue to subscribe to.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
         Returns:
             QueueOperationResult: Result of the subscription operation.
         """
         try:
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False,
+                )
+
             result = self.validator.validate_queue_exists(queue_name)
             if result.success is False:
                 nodes = ["A", "B", "C"]
@@ -99,6 +119,9 @@ class SubscriptionService:
 
             subscribers_key = KeyBuilder.subscribers_key(queue_name)
             self.redis.sadd(subscribers_key, self.user)
+            subscriptions.add_subscription(
+                self.redis, self.user, subscriptions.QUEUE, queue_name
+            )
 
             if endpoint:
                 # Realizar todas las operaciones en el backup
@@ -113,12 +136,16 @@ class SubscriptionService:
             replication_op = False
             if not principal:
                 # Si no soy principal, replico al nodo original
-                replication_op = self.replication_principal.subscribe(
+                replication_op = replication_outbox.replicate(
+                    queue_name, write_concern,
+                    self.replication_principal.subscribe,
                     queue_name, self.user
                 )
             else:
                 # Si soy principal, replico a quien me replica a mí
-                replication_op = self.replication_client.subscribe(
+                replication_op = replication_outbox.replicate(
+                    queue_name, write_concern,
+                    self.replication_client.subscribe,
                     queue_name, self.user
                 )
 
@@ -138,15 +165,28 @@ class SubscriptionService:
                 replication_result=False,
             )
 
-    def unsubscribe(self, queue_name: str, endpoint: bool = False) -> QueueOperationResult:
+    def unsubscribe(
+        self, queue_name: str, endpoint: bool = False,
+        write_concern: str = None
+    ) -> QueueOperationResult:
         """
         Unsubscribe the user from a queue.
         Args:
             queue_name (str): The name of the queue to unsubscribe from.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
         Returns:
             QueueOperationResult: Result of the unsubscription operation.
         """
         try:
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return QueueOperationResult(
+                    success=False,
+                    status=MOMQueueStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False,
+                )
+
             result = self.validator.validate_queue_exists(queue_name)
             if result.success is False:
                 # Verificamos si la cola existe en algún nodo usando SMEMBERS
@@ -198,6 +238,9 @@ class SubscriptionService:
 
             subscribers_key = KeyBuilder.subscribers_key(queue_name)
             self.redis.srem(subscribers_key, self.user)
+            subscriptions.remove_subscription(
+                self.redis, self.user, subscriptions.QUEUE, queue_name
+            )
 
             if endpoint:
                 # Realizar todas las operaciones en el backup
@@ -211,12 +254,16 @@ class SubscriptionService:
             replication_op = False
             if not principal:
                 # Si no soy principal, replico al nodo original
-                replication_op = self.replication_principal.unsubscribe(
+                replication_op = replication_outbox.replicate(
+                    queue_name, write_concern,
+                    self.replication_principal.unsubscribe,
                     queue_name, self.user
                 )
             else:
                 # Si soy principal, replico a quien me replica a mí
-                replication_op = self.replication_client.unsubscribe(
+                replication_op = replication_outbox.replicate(
+                    queue_name, write_concern,
+                    self.replication_client.unsubscribe,
                     queue_name, self.user
                 )
 
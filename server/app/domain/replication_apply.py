@@ -0,0 +1,475 @@
+"""
+This module contains the apply layer of the replicated writes.
+The replication servicers applied every write by building a full
+MOMTopicManager or MOMQueueManager, which fetches the backup and nodes
+clients and creates four replication clients, to end up in the same
+storage calls the other node made. The writes of the messages are
+applied here directly on a client of the node kept for the life of the
+process:
+    - publish: one HMGET for the storage of the topic and the publish
+      script of that storage.
+    - enqueue and enqueue_batch: the enqueue script, it checks that the
+      queue exists and skips the UUIDs already stored.
+    - dequeue and dequeue_batch: the remove script, the queue is only
+      checked when nothing was removed.
+    - consume: the subscription and the storage are read in one round
+      trip and the offset and consumer group are moved in another.
+The topics and queues are created, deleted and subscribed by the
+servicers, they are rare and keep their checks. AsyncReplicaApplier
+applies the same writes on a redis.asyncio client for the grpc.aio
+server.
+"""
+
+import threading
+import grpc
+from redis.exceptions import ResponseError
+from app.adapters.db import Database
+from app.adapters.factory import ObjectFactory
+from app.domain import envelope
+from app.domain.queues import queues_storage
+from app.domain.topics import topics_segments, topics_storage
+from app.domain.topics.topics_manager import PUBLISH_SCRIPT
+from app.domain.utils import (
+    KeyBuilder, TopicKeyBuilder, STORAGE_STREAM, STORAGE_SEGMENTED
+)
+from app.grpc.replication_service_pb2 import ReplicationResponse, StatusCode
+
+
+def _failed(context, code: grpc.StatusCode, message: str):
+    context.set_code(code)
+    context.set_details(message)
+    return ReplicationResponse(
+        success=False,
+        status_code=StatusCode.REPLICATION_FAILED,
+        message=message,
+    )
+
+
+def _succeeded(message: str):
+    return ReplicationResponse(
+        success=True,
+        status_code=StatusCode.REPLICATION_SUCCESS,
+        message=message,
+    )
+
+
+def _topic_not_found(context):
+    return _failed(context, grpc.StatusCode.NOT_FOUND, "Topic does not exist")
+
+
+def _queue_not_found(context):
+    return _failed(context, grpc.StatusCode.NOT_FOUND, "Queue does not exist")
+
+
+def _id_conflict(context):
+    # El mensaje no se guarda con otro id, el otro nodo lo reintenta
+    return _failed(
+        context, grpc.StatusCode.ABORTED,
+        "Message id is behind the last id of the stream"
+    )
+
+
+def _not_subscribed(context):
+    return _failed(
+        context, grpc.StatusCode.FAILED_PRECONDITION,
+        "User is not subscribed to this topic"
+    )
+
+
+def _is_partitioned(partitions) -> bool:
+    return partitions is not None and int(partitions) > 1
+
+
+def _partition_required(context):
+    # La réplica no elige partición, guardaría el mensaje en otra
+    return _failed(
+        context, grpc.StatusCode.FAILED_PRECONDITION,
+        "Partitioned topics are replicated by partition"
+    )
+
+
+def _envelope(request) -> str:
+    return envelope.encode(
+        request.message, request.timestamp, request.publisher,
+        dict(request.attributes) or None
+    )
+
+
+def _publish_call(topic_name: str, request, full_message: str) -> tuple:
+    # Claves y argumentos del script de los tópicos sin almacenamiento
+    return (
+        [
+            TopicKeyBuilder.messages_key(topic_name),
+            TopicKeyBuilder.metadata_key(topic_name),
+            TopicKeyBuilder.timeline_key(topic_name)
+        ],
+        [
+            full_message, repr(request.timestamp),
+            TopicKeyBuilder.notify_channel(topic_name)
+        ]
+    )
+
+
+def _offset_field(request) -> tuple:
+    return (
+        TopicKeyBuilder.subscriber_offsets_key(request.topic_name),
+        TopicKeyBuilder.subscriber_offset_field(request.subscriber),
+    )
+
+
+def _message(request) -> list:
+    return [{
+        "id": request.uuid,
+        "timestamp": request.timestamp,
+        "payload": request.message,
+    }]
+
+
+def _batch(request) -> list:
+    return [
+        {
+            "id": item.uuid,
+            "timestamp": item.timestamp,
+            "payload": item.message,
+        }
+        for item in request.messages
+    ]
+
+
+class ReplicaApplier:
+    """
+    Applies the replicated writes of messages on the storage of the node.
+    Every method takes the request of its unary call and the context of
+    the call, and answers its ReplicationResponse.
+    """
+
+    def __init__(self, redis):
+        """
+        Initialize the applier.
+        Args:
+            redis: Client of the MOM database of the node, shared by every
+                call.
+        """
+        self.redis = redis
+
+    def publish(self, request, context) -> ReplicationResponse:
+        """
+        Store a message published on the other node.
+        Args:
+            request (TopicPublishMessageRequest): The replicated publish.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        topic_name = request.topic_name
+        exists, storage, partitions = self.redis.hmget(
+            TopicKeyBuilder.metadata_key(topic_name),
+            "original_node", "storage", "partitions"
+        )
+        if exists is None:
+            return _topic_not_found(context)
+        if _is_partitioned(partitions):
+            return _partition_required(context)
+
+        full_message = _envelope(request)
+        if storage == STORAGE_STREAM:
+            topics_storage.publish_message(
+                self.redis, topic_name, full_message
+            )
+        elif storage == STORAGE_SEGMENTED:
+            topics_segments.publish_message(
+                self.redis, topic_name, full_message, request.timestamp
+            )
+        else:
+            PUBLISH_SCRIPT(
+                self.redis, *_publish_call(topic_name, request, full_message)
+            )
+        return _succeeded("Message replicated successfully")
+
+    def consume(self, request, context) -> ReplicationResponse:
+        """
+        Move the offset of a subscriber that consumed on the other node.
+        Args:
+            request (TopicConsumeMessageRequest): The replicated consume.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        topic_name = request.topic_name
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sismember(
+            TopicKeyBuilder.subscribers_key(topic_name), request.subscriber
+        )
+        pipe.hget(TopicKeyBuilder.metadata_key(topic_name), "storage")
+        is_subscribed, storage = pipe.execute()
+        if not is_subscribed:
+            return _not_subscribed(context)
+
+        messages_key = TopicKeyBuilder.messages_key(topic_name)
+        group_id = f"{request.offset}-0"
+        pipe.hset(*_offset_field(request), request.offset)
+        if storage == STORAGE_STREAM:
+            pipe.xgroup_setid(messages_key, request.subscriber, group_id)
+        results = pipe.execute(raise_on_error=False)
+        if len(results) > 1 and isinstance(results[1], ResponseError):
+            # El grupo aún no existe en este nodo
+            self.redis.xgroup_create(
+                messages_key, request.subscriber, group_id, mkstream=True
+            )
+        return _succeeded("Offset updated successfully")
+
+    def enqueue(self, request, context) -> ReplicationResponse:
+        """
+        Store a message enqueued on the other node.
+        Args:
+            request (EnqueueRequest): The replicated enqueue.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        return self._push(
+            request.queue_name, _message(request), context,
+            "Message enqueued successfully"
+        )
+
+    def enqueue_batch(self, request, context) -> ReplicationResponse:
+        """
+        Store a batch of messages enqueued on the other node.
+        Args:
+            request (EnqueueBatchRequest): The replicated batch.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        return self._push(
+            request.queue_name, _batch(request), context,
+            "Messages enqueued successfully"
+        )
+
+    def dequeue(self, request, context) -> ReplicationResponse:
+        """
+        Remove a message dequeued on the other node.
+        Args:
+            request (DequeueRequest): The replicated dequeue.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        if self._remove(request.queue_name, [request.uuid]) is None:
+            return _queue_not_found(context)
+        return _succeeded("Message dequeued successfully")
+
+    def dequeue_batch(self, request, context) -> ReplicationResponse:
+        """
+        Remove a batch of messages dequeued on the other node.
+        Args:
+            request (DequeueBatchRequest): The replicated batch.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        removed = self._remove(request.queue_name, list(request.uuids))
+        if removed is None:
+            return _queue_not_found(context)
+        return _succeeded(f"{removed} messages dequeued successfully")
+
+    def _push(
+        self, queue_name: str, messages: list, context, message: str
+    ) -> ReplicationResponse:
+        # Las réplicas no aplican el límite, el otro nodo ya lo aceptó
+        added, _, _ = queues_storage.push_messages(
+            self.redis, queue_name, messages, enforce_limit=False
+        )
+        if added == queues_storage.QUEUE_NOT_FOUND:
+            return _queue_not_found(context)
+        if added == queues_storage.ID_CONFLICT:
+            return _id_conflict(context)
+        return _succeeded(message)
+
+    def _remove(self, queue_name: str, uuids: list) -> int:
+        # Retorna None si la cola no existe
+        removed = len(queues_storage.remove_messages(
+            self.redis, queue_name, uuids
+        ))
+        # Sin mensajes borrados se distingue la cola que no existe
+        if not removed \
+                and not self.redis.exists(KeyBuilder.metadata_key(queue_name)):
+            return None
+        return removed
+
+
+
+class AsyncReplicaApplier:
+    """
+    Applies the replicated writes of messages like ReplicaApplier, on a
+    redis.asyncio client so the calls don't hold a thread while Redis
+    answers.
+    """
+
+    def __init__(self, redis):
+        """
+        Initialize the applier.
+        Args:
+            redis: Async client of the MOM database of the node, shared by
+                every call.
+        """
+        self.redis = redis
+
+    async def publish(self, request, context) -> ReplicationResponse:
+        """
+        Store a message published on the other node.
+        Args:
+            request (TopicPublishMessageRequest): The replicated publish.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        topic_name = request.topic_name
+        exists, storage, partitions = await self.redis.hmget(
+            TopicKeyBuilder.metadata_key(topic_name),
+            "original_node", "storage", "partitions"
+        )
+        if exists is None:
+            return _topic_not_found(context)
+        if _is_partitioned(partitions):
+            return _partition_required(context)
+
+        full_message = _envelope(request)
+        if storage == STORAGE_STREAM:
+            await topics_storage.publish_message_async(
+                self.redis, topic_name, full_message
+            )
+        elif storage == STORAGE_SEGMENTED:
+            await topics_segments.publish_message_async(
+                self.redis, topic_name, full_message, request.timestamp
+            )
+        else:
+            await PUBLISH_SCRIPT.call_async(
+                self.redis, *_publish_call(topic_name, request, full_message)
+            )
+        return _succeeded("Message replicated successfully")
+
+    async def consume(self, request, context) -> ReplicationResponse:
+        """
+        Move the offset of a subscriber that consumed on the other node.
+        Args:
+            request (TopicConsumeMessageRequest): The replicated consume.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        topic_name = request.topic_name
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sismember(
+            TopicKeyBuilder.subscribers_key(topic_name), request.subscriber
+        )
+        pipe.hget(TopicKeyBuilder.metadata_key(topic_name), "storage")
+        is_subscribed, storage = await pipe.execute()
+        if not is_subscribed:
+            return _not_subscribed(context)
+
+        messages_key = TopicKeyBuilder.messages_key(topic_name)
+        group_id = f"{request.offset}-0"
+        pipe.hset(*_offset_field(request), request.offset)
+        if storage == STORAGE_STREAM:
+            pipe.xgroup_setid(messages_key, request.subscriber, group_id)
+        results = await pipe.execute(raise_on_error=False)
+        if len(results) > 1 and isinstance(results[1], ResponseError):
+            await self.redis.xgroup_create(
+                messages_key, request.subscriber, group_id, mkstream=True
+            )
+        return _succeeded("Offset updated successfully")
+
+    async def enqueue(self, request, context) -> ReplicationResponse:
+        """
+        Store a message enqueued on the other node.
+        Args:
+            request (EnqueueRequest): The replicated enqueue.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        return await self._push(
+            request.queue_name, _message(request), context,
+            "Message enqueued successfully"
+        )
+
+    async def enqueue_batch(self, request, context) -> ReplicationResponse:
+        """
+        Store a batch of messages enqueued on the other node.
+        Args:
+            request (EnqueueBatchRequest): The replicated batch.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        return await self._push(
+            request.queue_name, _batch(request), context,
+            "Messages enqueued successfully"
+        )
+
+    async def dequeue(self, request, context) -> ReplicationResponse:
+        """
+        Remove a message dequeued on the other node.
+        Args:
+            request (DequeueRequest): The replicated dequeue.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        if await self._remove(request.queue_name, [request.uuid]) is None:
+            return _queue_not_found(context)
+        return _succeeded("Message dequeued successfully")
+
+    async def dequeue_batch(self, request, context) -> ReplicationResponse:
+        """
+        Remove a batch of messages dequeued on the other node.
+        Args:
+            request (DequeueBatchRequest): The replicated batch.
+            context: The context of the call.
+        Returns:
+            ReplicationResponse: The result of the write.
+        """
+        removed = await self._remove(request.queue_name, list(request.uuids))
+        if removed is None:
+            return _queue_not_found(context)
+        return _succeeded(f"{removed} messages dequeued successfully")
+
+    async def _push(
+        self, queue_name: str, messages: list, context, message: str
+    ) -> ReplicationResponse:
+        added, _, _ = await queues_storage.push_messages_async(
+            self.redis, queue_name, messages, enforce_limit=False
+        )
+        if added == queues_storage.QUEUE_NOT_FOUND:
+            return _queue_not_found(context)
+        if added == queues_storage.ID_CONFLICT:
+            return _id_conflict(context)
+        return _succeeded(message)
+
+    async def _remove(self, queue_name: str, uuids: list) -> int:
+        removed = len(await queues_storage.remove_messages_async(
+            self.redis, queue_name, uuids
+        ))
+        if not removed and not await self.redis.exists(
+            KeyBuilder.metadata_key(queue_name)
+        ):
+            return None
+        return removed
+
+_applier = None
+_applier_lock = threading.Lock()
+
+
+def get_replica_applier() -> ReplicaApplier:
+    """
+    Get the replica applier of the node, it is created on the first call.
+    Returns:
+        ReplicaApplier: The applier over the database of the node.
+    """
+    global _applier # pylint: disable=W0603
+    with _applier_lock:
+        if _applier is None:
+            client = ObjectFactory.get_instance(Database).get_client()
+            _applier = ReplicaApplier(client)
+    return _applier
@@ -6,6 +6,8 @@
 import grpc
 from app.domain.models import NODES_CONFIG, WHOAMI
 from app.domain.logger_config import logger
+from app.domain.replication_journal import JournalReplayer
+from app.domain.replication_stream import ReplicationStream
 from app.grpc.replication_service_pb2_grpc import TopicReplicationStub
 
 # --- Determine target nodes ---
@@ -46,6 +48,13 @@ TARGET_REPLICA_CHANNEL, TARGET_REPLICA_STUB = _create_client(TARGET_REPLICA_NODE
 # Cliente para replicar HACIA ATRÁS (al nodo que nos replica a nosotros)
 SOURCE_NODE_CHANNEL, SOURCE_NODE_STUB = _create_client(SOURCE_NODE_ID)
 
+# Streams de replicación, uno por nodo, compartidos por tópicos y colas
+TARGET_REPLICA_STREAM = ReplicationStream(TARGET_REPLICA_CHANNEL, f"nodo réplica ({TARGET_REPLICA_NODE_ID})", TARGET_REPLICA_NODE_ID) # pylint: disable=C0301
+SOURCE_NODE_STREAM = ReplicationStream(SOURCE_NODE_CHANNEL, f"nodo origen ({SOURCE_NODE_ID})", SOURCE_NODE_ID) # pylint: disable=C0301
+
+# Reenvía el diario de replicación de los dos streams
+JOURNAL_REPLAYER = JournalReplayer([TARGET_REPLICA_STREAM, SOURCE_NODE_STREAM]) # pylint: disable=C0301
+
 def get_replica_client_stub():
     """Devuelve el stub para conectarse al nodo réplica de este nodo."""
     if not TARGET_REPLICA_STUB:
@@ -58,8 +67,22 @@ def get_source_client_stub():
         logger.error("Intento de obtener stub de origen (%s), pero no se inicializó.", SOURCE_NODE_ID) # pylint: disable=C0301
     return SOURCE_NODE_STUB
 
+def get_replica_stream() -> ReplicationStream:
+    """Devuelve el stream de replicación hacia el nodo réplica."""
+    return TARGET_REPLICA_STREAM
+
+def get_source_stream() -> ReplicationStream:
+    """Devuelve el stream de replicación hacia el nodo origen."""
+    return SOURCE_NODE_STREAM
+
+def get_journal_replayer() -> JournalReplayer:
+    """Devuelve el reenvío del diario de replicación de este nodo."""
+    return JOURNAL_REPLAYER
+
 def close_all_replication_clients():
     logger.info("Cerrando canales de cliente gRPC de replicación...")
+    TARGET_REPLICA_STREAM.close()
+    SOURCE_NODE_STREAM.close()
     if TARGET_REPLICA_CHANNEL:
         try:
             TARGET_REPLICA_CHANNEL.close()
@@ -0,0 +1,320 @@
+"""
+This module contains the replication journal of the node.
+A replication call that couldn't reach the other node was lost for it,
+the journal keeps it until the node is back:
+    - The operations a peer misses are appended to a Redis Stream in the
+      nodes database, mom:replication:<node>:<peer>:journal, with their
+      sequence as id. While the journal has operations the new ones are
+      appended behind them instead of being sent, so the peer applies
+      them in order.
+    - The replay thread of the node sends the journal to the peer over
+      its replication stream every REPLICATION_JOURNAL_INTERVAL seconds,
+      in batches of REPLICATION_JOURNAL_BATCH_SIZE, and trims what the
+      peer acknowledged, so only the missing suffix is sent.
+    - The peer keeps the last journal sequence it applied from every
+      node, for the topics and for the queues, and skips the operations
+      sent again after a broken batch.
+    - The operations sent live carry the id of their stream and their
+      sequence in it. The ones that time out or are in flight when the
+      stream breaks are appended in order, and the peer skips the ones
+      it applied before the ack was lost.
+    - A journal holds REPLICATION_JOURNAL_MAX_LENGTH operations at most,
+      the ones that don't fit are counted as lost and the peer needs a
+      full copy, they are reported by the journal stats.
+The journal is replayed over the replication stream, it is not used
+with REPLICATION_STREAM disabled or when the peer doesn't support it.
+"""
+
+import base64
+import os
+import threading
+from app.domain import scripts
+from app.domain.logger_config import logger
+from app.grpc.replication_service_pb2 import ReplicationOperation
+
+REPLICATION_JOURNAL_PREFIX = "mom:replication"
+REPLICATION_JOURNAL_MAX_LENGTH = int(
+    os.getenv("REPLICATION_JOURNAL_MAX_LENGTH", "100000")
+)
+REPLICATION_JOURNAL_INTERVAL = float(
+    os.getenv("REPLICATION_JOURNAL_INTERVAL", "1")
+)
+REPLICATION_JOURNAL_BATCH_SIZE = int(
+    os.getenv("REPLICATION_JOURNAL_BATCH_SIZE", "100")
+)
+# Tiempo que el par recuerda lo último aplicado de cada nodo y stream
+REPLICATION_APPLIED_TTL = int(
+    os.getenv("REPLICATION_APPLIED_TTL", str(7 * 24 * 3600))
+)
+
+SERVICE_TOPICS = "topics"
+SERVICE_QUEUES = "queues"
+# Operaciones de los tópicos, el resto son de las colas
+TOPIC_OPERATIONS = (
+    "create_topic", "delete_topic", "publish_message", "consume_message",
+    "topic_subscribe", "topic_unsubscribe",
+)
+
+# Resultados de APPEND_SCRIPT además de la secuencia asignada
+APPEND_NOT_PENDING = 0
+APPEND_FULL = -1
+
+# Añade una operación con la siguiente secuencia del diario, con
+# only_if_pending solo si el diario ya tiene operaciones
+APPEND_SCRIPT = scripts.register("replication_journal_append", """
+local journal_key = KEYS[1]
+local sequence_key = KEYS[2]
+local lost_key = KEYS[3]
+local operation = ARGV[1]
+local only_if_pending = ARGV[2] == '1'
+local max_length = tonumber(ARGV[3])
+
+local length = redis.call('XLEN', journal_key)
+if only_if_pending and length == 0 then
+    return 0
+end
+if length >= max_length then
+    redis.call('INCR', lost_key)
+    return -1
+end
+local sequence = redis.call('INCR', sequence_key)
+redis.call('XADD', journal_key, sequence .. '-0', 'operation', operation)
+return sequence
+""")
+
+
+def operation_service(operation: ReplicationOperation) -> str:
+    """
+    Service of an operation, the peer applies the operations of each
+    service in order.
+    Args:
+        operation (ReplicationOperation): The operation.
+    Returns:
+        str: SERVICE_TOPICS or SERVICE_QUEUES.
+    """
+    if operation.WhichOneof("operation") in TOPIC_OPERATIONS:
+        return SERVICE_TOPICS
+    return SERVICE_QUEUES
+
+
+def applied_key(origin: str, service: str) -> str:
+    """
+    Key of the last sequence applied from a node or a stream for the
+    operations of a service, kept by the peer that applies them.
+    Args:
+        origin (str): The node that sent the journal or the id of the
+            stream.
+        service (str): SERVICE_TOPICS or SERVICE_QUEUES.
+    Returns:
+        str: The key in the MOM database of the peer.
+    """
+    return f"{REPLICATION_JOURNAL_PREFIX}:{origin}:{service}:applied"
+
+
+def applied_marks(operation: ReplicationOperation, origin: str) -> list:
+    """
+    Sequences that tell the peer whether it already applied an operation,
+    by the journal of its node and by the stream it was first sent on.
+    The operation was applied if any of them is not above the last one
+    kept in its key, the keys are per service because the peer applies
+    the topics and the queues apart.
+    Args:
+        operation (ReplicationOperation): The operation to apply.
+        origin (str): The node that sent it.
+    Returns:
+        list[tuple]: (key, sequence) pairs, empty for an operation that
+            can't be sent twice.
+    """
+    service = operation_service(operation)
+    marks = []
+    if operation.journal_sequence and origin:
+        marks.append(
+            (applied_key(origin, service), operation.journal_sequence)
+        )
+    if operation.stream_id:
+        marks.append(
+            (applied_key(operation.stream_id, service),
+             operation.stream_sequence)
+        )
+    return marks
+
+
+class ReplicationJournal:
+    """
+    Append-only journal of the operations a peer missed.
+    """
+
+    def __init__(self, redis, node_id: str, peer_id: str):
+        """
+        Initialize the journal of a peer.
+        Args:
+            redis: Client of the nodes database.
+            node_id (str): This node.
+            peer_id (str): The node the operations are replicated to.
+        """
+        self.redis = redis
+        self.peer_id = peer_id
+        prefix = f"{REPLICATION_JOURNAL_PREFIX}:{node_id}:{peer_id}"
+        self.journal_key = f"{prefix}:journal"
+        self.sequence_key = f"{prefix}:sequence"
+        self.lost_key = f"{prefix}:lost"
+
+    def append(
+        self, operation: ReplicationOperation, only_if_pending: bool = False
+    ) -> int:
+        """
+        Append an operation at the end of the journal.
+        Args:
+            operation (ReplicationOperation): The operation the peer missed.
+            only_if_pending (bool): Only append it when the journal already
+                has operations.
+        Returns:
+            int: The journal sequence of the operation, APPEND_NOT_PENDING
+                if it wasn't appended or APPEND_FULL if it was lost.
+        """
+        encoded = base64.b64encode(operation.SerializeToString())
+        result = int(APPEND_SCRIPT(
+            self.redis,
+            [self.journal_key, self.sequence_key, self.lost_key],
+            [encoded.decode("ascii"), int(only_if_pending),
+             REPLICATION_JOURNAL_MAX_LENGTH]
+        ))
+        if result == APPEND_FULL:
+            logger.error("Diario de replicación de %s lleno, se pierde una operación", self.peer_id) # pylint: disable=C0301
+        return result
+
+    def read(self, count: int) -> list:
+        """
+        Read the first operations of the journal.
+        Args:
+            count (int): Maximum number of operations.
+        Returns:
+            list[ReplicationOperation]: The operations in order, with their
+                journal_sequence.
+        """
+        operations = []
+        for entry_id, fields in self.redis.xrange(
+            self.journal_key, count=count
+        ):
+            operation = ReplicationOperation.FromString(
+                base64.b64decode(fields["operation"])
+            )
+            operation.journal_sequence = int(entry_id.split("-")[0])
+            operations.append(operation)
+        return operations
+
+    def trim(self, sequence: int) -> None:
+        """
+        Remove the operations up to a sequence, acknowledged by the peer.
+        Args:
+            sequence (int): Last journal sequence to remove.
+        """
+        self.redis.xtrim(self.journal_key, minid=f"{sequence + 1}-0")
+
+    def stats(self) -> dict:
+        """
+        Get the state of the journal.
+        Returns:
+            dict: Pending operations, last sequence and lost operations.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xlen(self.journal_key)
+        pipe.get(self.sequence_key)
+        pipe.get(self.lost_key)
+        length, sequence, lost = pipe.execute()
+        return {
+            "peer": self.peer_id,
+            "length": length,
+            "sequence": int(sequence or 0),
+            "lost": int(lost or 0),
+        }
+
+
+class JournalReplayer:
+    """
+    Replays the journal of every replication stream of the node once
+    its peer answers.
+    """
+
+    def __init__(
+        self, streams: list, interval: float = REPLICATION_JOURNAL_INTERVAL
+    ):
+        """
+        Initialize the replayer.
+        Args:
+            streams (list[ReplicationStream]): Streams to the peers.
+            interval (float): Seconds between replays.
+        """
+        self.streams = [stream for stream in streams if stream.node_id]
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "running": False,
+            "replayed": 0,
+            "replays": 0,
+        }
+
+    def start(self) -> None:
+        """
+        Start the replay thread if it is not running.
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="replication-journal", daemon=True
+            )
+            self._thread.start()
+            self._stats["running"] = True
+        logger.info("Reenvío del diario de replicación iniciado")
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Stop the replay thread, the journal is kept for the next start.
+        Args:
+            timeout (float): Seconds to wait for the thread.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        with self._lock:
+            self._stats["running"] = False
+        logger.info("Reenvío del diario de replicación detenido")
+
+    def replay(self) -> int:
+        """
+        Replay the journal of every peer that answers.
+        Returns:
+            int: Number of operations acknowledged by the peers.
+        """
+        replayed = 0
+        for stream in self.streams:
+            try:
+                replayed += stream.replay_journal()
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error reenviando el diario de replicación a %s", stream.target_node_desc) # pylint: disable=C0301
+        with self._lock:
+            self._stats["replayed"] += replayed
+            self._stats["replays"] += 1
+        return replayed
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the replayer and the state of the journals.
+        Returns:
+            dict: Replayed operations and the journal of every peer.
+        """
+        journals = []
+        for stream in self.streams:
+            journal = stream.get_journal()
+            if journal is not None:
+                journals.append(journal.stats())
+        with self._lock:
+            return dict(self._stats, journals=journals)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.replay()
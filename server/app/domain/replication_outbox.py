@@ -0,0 +1,259 @@
+"""
+This module contains the replication outbox of the node.
+Every replication call goes through the outbox, a bounded in-process
+queue drained by worker threads. By default a write waits for the
+result of its call, an operation with the "local" write concern
+returns after the local write instead:
+    - The outbox is split in one shard per worker and the operations
+      of a queue or topic always go to the same shard, so they reach
+      the other node in the order they were written whatever their
+      write concern.
+    - A shard that is full drops a "local" operation, the write answers
+      that its replication failed like when the other node is down. A
+      "replica" operation waits for room.
+    - A failed "local" call is retried REPLICATION_OUTBOX_RETRIES times
+      by its worker before the next operation of the shard is sent, a
+      "replica" call is sent once and its write gets the result.
+    - The pending operations are sent on shutdown.
+The write concern of an operation defaults to
+REPLICATION_WRITE_CONCERN, "replica" keeps the synchronous replication.
+"""
+
+import functools
+import os
+import queue
+import threading
+import time
+import zlib
+from concurrent import futures
+from app.domain.logger_config import logger
+
+WRITE_CONCERN_REPLICA = "replica"
+WRITE_CONCERN_LOCAL = "local"
+WRITE_CONCERNS = (WRITE_CONCERN_REPLICA, WRITE_CONCERN_LOCAL)
+REPLICATION_WRITE_CONCERN = os.getenv("REPLICATION_WRITE_CONCERN", WRITE_CONCERN_REPLICA) # pylint: disable=C0301
+REPLICATION_OUTBOX_SIZE = int(os.getenv("REPLICATION_OUTBOX_SIZE", "10000"))
+REPLICATION_OUTBOX_WORKERS = int(os.getenv("REPLICATION_OUTBOX_WORKERS", "4"))
+REPLICATION_OUTBOX_RETRIES = int(os.getenv("REPLICATION_OUTBOX_RETRIES", "3"))
+REPLICATION_RETRY_DELAY = 0.1
+
+if REPLICATION_WRITE_CONCERN not in WRITE_CONCERNS:
+    raise ValueError(
+        "Environment variable REPLICATION_WRITE_CONCERN must be one of "
+        + ", ".join(WRITE_CONCERNS)
+    )
+
+
+class ReplicationOutbox:
+    """
+    Bounded queue of the replication calls of the node, drained in
+    order per queue or topic by a pool of worker threads.
+    """
+
+    def __init__(
+        self, size: int = REPLICATION_OUTBOX_SIZE,
+        workers: int = REPLICATION_OUTBOX_WORKERS,
+        retries: int = REPLICATION_OUTBOX_RETRIES
+    ):
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.capacity = max(self.workers, size)
+        self._shards = [
+            queue.Queue(maxsize=self.capacity // self.workers)
+            for _ in range(self.workers)
+        ]
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "running": False,
+            "submitted": 0,
+            "replicated": 0,
+            "failed": 0,
+            "retried": 0,
+            "dropped": 0,
+            "last_latency_seconds": 0.0,
+            "max_latency_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        """
+        Start the worker threads if they are not running.
+        """
+        with self._lock:
+            if self._threads and all(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(
+                    target=self._run, args=(shard,),
+                    name=f"replication-outbox-{number}", daemon=True
+                )
+                for number, shard in enumerate(self._shards)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._stats["running"] = True
+        logger.info("Outbox de replicación iniciado")
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Stop the worker threads once the pending operations are sent.
+        Args:
+            timeout (float): Seconds to wait for each thread.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        with self._lock:
+            self._stats["running"] = False
+        logger.info("Outbox de replicación detenido")
+
+    def submit(
+        self, key: str, operation, result: futures.Future = None
+    ) -> bool:
+        """
+        Queue a replication call.
+        Args:
+            key (str): Queue or topic of the operation, the operations
+                with the same key are sent in order.
+            operation: Callable without arguments that replicates the
+                operation and returns whether it succeeded.
+            result (futures.Future): Future of a caller that waits for
+                the call, it gets whether it succeeded. The call is sent
+                once and waits for room in a full shard.
+        Returns:
+            bool: True if the operation was queued, False if its shard
+                was full and it was dropped.
+        """
+        if not self._threads or not all(t.is_alive() for t in self._threads):
+            self.start()
+        shard = self._shards[zlib.crc32(key.encode("utf-8")) % self.workers]
+        item = (time.monotonic(), key, operation, result)
+        try:
+            if result is not None:
+                shard.put(item)
+            else:
+                shard.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            logger.error("Outbox de replicación lleno, se descarta '%s'", key)
+            return False
+        with self._lock:
+            self._stats["submitted"] += 1
+        return True
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the outbox.
+        Returns:
+            dict: Depth, lag and the submitted, replicated, failed and
+                dropped operations.
+        """
+        depth = 0
+        oldest = None
+        for shard in self._shards:
+            with shard.mutex:
+                depth += len(shard.queue)
+                if shard.queue:
+                    queued_at = shard.queue[0][0]
+                    oldest = queued_at if oldest is None else min(oldest, queued_at) # pylint: disable=C0301
+        lag = time.monotonic() - oldest if oldest is not None else 0.0
+        with self._lock:
+            return dict(
+                self._stats, workers=self.workers, capacity=self.capacity,
+                depth=depth, lag_seconds=lag
+            )
+
+    def _run(self, shard: queue.Queue) -> None:
+        # Al detenerse se termina de vaciar el shard
+        while not self._stop.is_set() or not shard.empty():
+            try:
+                queued_at, key, operation, result = shard.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                sent = self._send(
+                    key, operation, queued_at,
+                    0 if result is not None else self.retries
+                )
+                if result is not None:
+                    result.set_result(sent)
+            finally:
+                shard.task_done()
+
+    def _send(
+        self, key: str, operation, queued_at: float, retries: int
+    ) -> bool:
+        for attempt in range(retries + 1):
+            try:
+                if operation():
+                    latency = time.monotonic() - queued_at
+                    with self._lock:
+                        self._stats["replicated"] += 1
+                        self._stats["last_latency_seconds"] = latency
+                        self._stats["max_latency_seconds"] = max(
+                            self._stats["max_latency_seconds"], latency
+                        )
+                    return True
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error replicando '%s' desde el outbox", key)
+            if attempt < retries:
+                with self._lock:
+                    self._stats["retried"] += 1
+                time.sleep(REPLICATION_RETRY_DELAY * (attempt + 1))
+        with self._lock:
+            self._stats["failed"] += 1
+        logger.error("No se pudo replicar '%s' desde el outbox", key)
+        return False
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_replication_outbox() -> ReplicationOutbox:
+    """
+    Get the replication outbox of the node, it is created on the first call.
+    Returns:
+        ReplicationOutbox: The outbox of the node.
+    """
+    global _outbox # pylint: disable=W0603
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = ReplicationOutbox()
+    return _outbox
+
+
+def is_valid_write_concern(write_concern: str) -> bool:
+    """
+    Check a write concern.
+    Args:
+        write_concern (str): The write concern, None for the default.
+    Returns:
+        bool: True if it is None or one of WRITE_CONCERNS.
+    """
+    return write_concern is None or write_concern in WRITE_CONCERNS
+
+
+def replicate(key: str, write_concern: str, operation, *args, **kwargs) -> bool:
+    """
+    Replicate an operation through the shard of its key, waiting for
+    the other node or only queueing the call as its write concern says.
+    Args:
+        key (str): Queue or topic of the operation.
+        write_concern (str): "replica", "local" or None for the default
+            of the node.
+        operation: Method of the replication client to call.
+        *args, **kwargs: Arguments of the call.
+    Returns:
+        bool: The result of the call, or whether it was queued.
+    """
+    call = functools.partial(operation, *args, **kwargs)
+    if (write_concern or REPLICATION_WRITE_CONCERN) == WRITE_CONCERN_LOCAL:
+        return get_replication_outbox().submit(key, call)
+    # Por el shard de la clave, no se adelanta a las operaciones locales
+    result = futures.Future()
+    get_replication_outbox().submit(key, call, result)
+    return result.result()
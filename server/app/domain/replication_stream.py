@@ -0,0 +1,351 @@
+"""
+This module contains the replication stream to a peer node.
+Every replication call of the topic and queue clients was a unary gRPC
+call with its own HTTP/2 headers and frames. The stream multiplexes all
+of them over one long-lived ReplicateStream call per peer:
+    - Every operation gets the next sequence of the stream and the
+      operations queued while a batch is in flight are sent together in
+      the next one, up to REPLICATION_STREAM_BATCH_SIZE.
+    - The peer applies each batch in order and answers with the sequence
+      of the last operation applied and the failures of the batch, the
+      callers waiting on those sequences are woken with their result.
+    - When the stream breaks, or an ack takes longer than
+      REPLICATION_STREAM_TIMEOUT and the stream is closed, the waiting
+      operations fail like a failed unary call and the next operation
+      opens a new stream.
+    - A peer without ReplicateStream answers UNIMPLEMENTED, the stream
+      is disabled and the clients go back to the unary calls.
+    - The operations the peer misses while it is down are kept in the
+      replication journal and replayed by the stream when it is back.
+      The operations without ack when the stream breaks are appended
+      in order, with the id of the stream and their sequence so the
+      peer skips the ones it had applied. While the journal has
+      operations the new ones are appended behind them, the check and
+      the send are done under the lock of the stream.
+The stream is used when REPLICATION_STREAM is enabled, the default.
+"""
+
+import os
+import queue
+import threading
+import uuid
+import grpc
+from app.adapters.db import Database
+from app.adapters.factory import ObjectFactory
+from app.domain.logger_config import logger
+from app.domain.models import WHOAMI
+from app.domain.replication_journal import (
+    ReplicationJournal,
+    REPLICATION_JOURNAL_BATCH_SIZE,
+)
+from app.grpc.replication_service_pb2 import (
+    ReplicationBatch,
+    ReplicationOperation,
+    ReplicationResponse,
+    StatusCode,
+)
+from app.grpc.replication_service_pb2_grpc import ReplicationStreamStub
+
+REPLICATION_STREAM = os.getenv("REPLICATION_STREAM", "true").lower() == "true"
+REPLICATION_STREAM_BATCH_SIZE = int(
+    os.getenv("REPLICATION_STREAM_BATCH_SIZE", "100")
+)
+REPLICATION_STREAM_TIMEOUT = float(
+    os.getenv("REPLICATION_STREAM_TIMEOUT", "10")
+)
+
+# Marca el final de las peticiones de un stream
+_CLOSE = object()
+_TIMEOUT_MESSAGE = "Replication stream timeout"
+
+
+def _closed_response(message: str = "Replication stream closed"):
+    return ReplicationResponse(
+        success=False,
+        status_code=StatusCode.REPLICATE_NODE_DISCONNECTED,
+        message=message,
+    )
+
+
+class _PendingOperation:
+    """An operation sent on the stream waiting for its ack."""
+
+    def __init__(self, operation: ReplicationOperation = None):
+        self.event = threading.Event()
+        self.response = None
+        # Se pasa al diario si el stream se corta antes del ack
+        self.operation = operation
+
+    def resolve(self, response) -> None:
+        """
+        Wake the caller with the result of the operation.
+        Args:
+            response: The ReplicationResponse, None to use the unary call.
+        """
+        self.response = response
+        self.event.set()
+
+
+class ReplicationStream:
+    """
+    Long-lived ReplicateStream call to a peer shared by the topic and
+    queue replication clients.
+    """
+
+    def __init__(
+        self, channel: grpc.Channel, target_node_desc: str,
+        node_id: str = None
+    ):
+        """
+        Initialize the stream, it is opened on the first operation.
+        Args:
+            channel (grpc.Channel): Channel to the peer, None without peer.
+            target_node_desc (str): Description of the peer (for logging).
+            node_id (str): Id of the peer, None without journal.
+        """
+        self.stub = ReplicationStreamStub(channel) if channel else None
+        self.target_node_desc = target_node_desc
+        self.node_id = node_id
+        self.stream_id = f"{WHOAMI}:{uuid.uuid4().hex}"
+        self.enabled = REPLICATION_STREAM and self.stub is not None
+        self._journal = None
+        self._lock = threading.Lock()
+        self._outgoing = None
+        self._call = None
+        self._pending = {}
+        self._sequence = 0
+
+    def send(
+        self, operation: str, request,
+        timeout: float = REPLICATION_STREAM_TIMEOUT
+    ) -> ReplicationResponse:
+        """
+        Send an operation and wait for its ack.
+        Args:
+            operation (str): Field of the operation in ReplicationOperation.
+            request: The request of the unary call of the operation.
+            timeout (float): Seconds to wait for the ack.
+        Returns:
+            ReplicationResponse: The result of the operation, None if the
+                stream can't be used and the unary call must be made.
+        """
+        if not self.enabled:
+            return None
+        return self._wait(
+            *self._submit(ReplicationOperation(**{operation: request})),
+            timeout
+        )
+
+    def replicate(self, operation: str, rpc, request) -> ReplicationResponse:
+        """
+        Replicate an operation over the stream, or with its unary call when
+        the stream can't be used. The operation is appended to the journal
+        when the peer is down or has operations pending in the journal.
+        Args:
+            operation (str): Field of the operation in ReplicationOperation.
+            rpc: The unary call of the operation.
+            request: The request of the operation.
+        Returns:
+            ReplicationResponse: The response of the peer.
+        """
+        if not self.enabled:
+            return rpc(request)
+        journal = self.get_journal()
+        submitted = self._submit(
+            ReplicationOperation(**{operation: request}), journal
+        )
+        if submitted is None:
+            return _closed_response("Replication kept in the journal")
+
+        response = self._wait(*submitted, REPLICATION_STREAM_TIMEOUT)
+        if response is None:
+            return rpc(request)
+        if journal is not None \
+                and response.status_code == StatusCode.REPLICATE_NODE_DISCONNECTED: # pylint: disable=C0301
+            logger.warning("%s no responde, la operación queda en el diario", self.target_node_desc) # pylint: disable=C0301
+        return response
+
+    def replay_journal(
+        self, batch_size: int = REPLICATION_JOURNAL_BATCH_SIZE,
+        timeout: float = REPLICATION_STREAM_TIMEOUT
+    ) -> int:
+        """
+        Send the operations of the journal to the peer in batches, until
+        it is empty or the peer stops answering.
+        Args:
+            batch_size (int): Operations sent before waiting for the acks.
+            timeout (float): Seconds to wait for each ack.
+        Returns:
+            int: Number of operations acknowledged and trimmed.
+        """
+        journal = self.get_journal()
+        if journal is None or not self.enabled:
+            return 0
+        replayed = 0
+        while True:
+            operations = journal.read(batch_size)
+            if not operations:
+                return replayed
+            submitted = [self._submit(operation) for operation in operations]
+            acknowledged = 0
+            for operation, (sequence, pending) in zip(operations, submitted):
+                response = self._wait(sequence, pending, timeout)
+                if response is None or response.status_code \
+                        == StatusCode.REPLICATE_NODE_DISCONNECTED \
+                        or response.message == _TIMEOUT_MESSAGE:
+                    break
+                if not response.success:
+                    # Reenviarla no la arreglaría, se descarta
+                    logger.error("El diario de %s no se pudo aplicar en la secuencia %s: %s", self.target_node_desc, operation.journal_sequence, response.message) # pylint: disable=C0301
+                acknowledged = operation.journal_sequence
+                replayed += 1
+            if acknowledged:
+                journal.trim(acknowledged)
+            if acknowledged != operations[-1].journal_sequence:
+                return replayed
+
+    def get_journal(self) -> ReplicationJournal:
+        """
+        Get the journal of the peer, it is created on the first call.
+        Returns:
+            ReplicationJournal: The journal, None without peer id.
+        """
+        if self._journal is None and self.node_id:
+            client = ObjectFactory.get_instance(
+                Database, ObjectFactory.NODES_DATABASE
+            ).get_client()
+            self._journal = ReplicationJournal(client, WHOAMI, self.node_id)
+        return self._journal
+
+    def _submit(
+        self, operation: ReplicationOperation,
+        journal: ReplicationJournal = None
+    ) -> tuple:
+        # Con el diario la operación se envía en vivo: queda detrás de lo
+        # pendiente en él y, si no recibe su ack, se añade en orden
+        pending = _PendingOperation(operation if journal else None)
+        with self._lock:
+            if journal is not None \
+                    and journal.append(operation, only_if_pending=True):
+                return None
+            if self._outgoing is None:
+                self._open()
+            self._sequence += 1
+            operation.sequence = self._sequence
+            if not operation.stream_id:
+                operation.stream_id = self.stream_id
+                operation.stream_sequence = self._sequence
+            self._pending[operation.sequence] = pending
+            self._outgoing.put(operation)
+        return operation.sequence, pending
+
+    def _wait(
+        self, sequence: int, pending: _PendingOperation, timeout: float
+    ) -> ReplicationResponse:
+        if not pending.event.wait(timeout):
+            # Sin ack no se sabe qué aplicó el par, se cierra el stream y
+            # lo que esperaba pasa al diario en orden
+            logger.error("Sin ack de la operación %s en el stream a %s", sequence, self.target_node_desc) # pylint: disable=C0301
+            self.close(_TIMEOUT_MESSAGE)
+        return pending.response
+
+    def close(self, message: str = "Replication stream closed") -> None:
+        """
+        Close the stream, the operations waiting for an ack fail.
+        Args:
+            message (str): Message of the failed operations.
+        """
+        with self._lock:
+            call = self._call
+            self._finish(self._outgoing, _closed_response(message))
+        if call is not None:
+            call.cancel()
+
+    def _open(self) -> None:
+        # Se llama con el lock tomado
+        outgoing = queue.Queue()
+        call = self.stub.ReplicateStream(self._batches(outgoing))
+        self._outgoing = outgoing
+        self._call = call
+        threading.Thread(
+            target=self._read, args=(call, outgoing),
+            name="replication-stream", daemon=True
+        ).start()
+        logger.info("Stream de replicación abierto a %s", self.target_node_desc) # pylint: disable=C0301
+
+    @staticmethod
+    def _batches(outgoing: queue.Queue):
+        while True:
+            operation = outgoing.get()
+            if operation is _CLOSE:
+                return
+            operations = [operation]
+            # Lo encolado mientras se enviaba el lote anterior va junto
+            while len(operations) < REPLICATION_STREAM_BATCH_SIZE:
+                try:
+                    operation = outgoing.get_nowait()
+                except queue.Empty:
+                    break
+                if operation is _CLOSE:
+                    yield ReplicationBatch(
+                        operations=operations, origin=WHOAMI
+                    )
+                    return
+                operations.append(operation)
+            yield ReplicationBatch(operations=operations, origin=WHOAMI)
+
+    def _read(self, call, outgoing: queue.Queue) -> None:
+        fallback = False
+        try:
+            for ack in call:
+                self._acknowledge(ack)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNIMPLEMENTED:
+                logger.warning("%s no soporta el stream de replicación, se usan las llamadas unarias", self.target_node_desc) # pylint: disable=C0301
+                self.enabled = False
+                fallback = True
+            elif e.code() != grpc.StatusCode.CANCELLED:
+                logger.error("Stream de replicación a %s cerrado: %s", self.target_node_desc, e.code()) # pylint: disable=C0301
+        except Exception: # pylint: disable=W0718
+            logger.exception("Error leyendo el stream de replicación a %s", self.target_node_desc) # pylint: disable=C0301
+        with self._lock:
+            if self._outgoing is outgoing:
+                self._finish(
+                    outgoing, None if fallback else _closed_response()
+                )
+
+    def _acknowledge(self, ack) -> None:
+        failures = {failure.sequence: failure for failure in ack.failures}
+        with self._lock:
+            # Los pendientes están en orden de secuencia
+            for sequence in list(self._pending):
+                if sequence > ack.sequence:
+                    break
+                failure = failures.get(sequence)
+                self._pending.pop(sequence).resolve(
+                    ReplicationResponse(
+                        success=False,
+                        status_code=failure.status_code,
+                        message=failure.message,
+                    ) if failure else ReplicationResponse(
+                        success=True,
+                        status_code=StatusCode.REPLICATION_SUCCESS,
+                    )
+                )
+
+    def _finish(self, outgoing: queue.Queue, response) -> None:
+        # Se llama con el lock tomado, el siguiente envío abre otro stream
+        if outgoing is not None:
+            outgoing.put(_CLOSE)
+        journal = self.get_journal() if response is not None else None
+        # Los pendientes están en orden de secuencia
+        for pending in self._pending.values():
+            if journal is not None and pending.operation is not None:
+                try:
+                    journal.append(pending.operation)
+                except Exception: # pylint: disable=W0718
+                    logger.exception("Error añadiendo la operación %s al diario de %s", pending.operation.sequence, self.target_node_desc) # pylint: disable=C0301
+            pending.resolve(response)
+        self._pending.clear()
+        self._outgoing = None
+        self._call = None
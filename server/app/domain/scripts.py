@@ -0,0 +1,146 @@
+"""
+This module contains the registry of the Lua scripts used by the MOM.
+Every script is registered once when its module is imported and is
+invoked by its SHA1 with EVALSHA, so the source is only sent to Redis
+when the server doesn't know it yet:
+    - load_all sends every registered script with SCRIPT LOAD, it is
+      called once per connection pool when the API starts.
+    - When Redis answers NOSCRIPT (restart, SCRIPT FLUSH, new node) the
+      script is loaded again and the call is retried transparently.
+    - The redis.asyncio clients run the scripts with call_async.
+Every call records its latency so the slow scripts can be spotted from
+the admin stats endpoint.
+"""
+
+import hashlib
+import threading
+import time
+from redis.exceptions import NoScriptError
+from app.domain.logger_config import logger
+
+
+class LuaScript:
+    """
+    A Lua script invoked by its SHA1 on any Redis client.
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        self.source = source
+        self.sha = hashlib.sha1(source.encode("utf-8")).hexdigest()
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, redis, keys=(), args=()):
+        """
+        Run the script with EVALSHA, loading it first if Redis doesn't
+        have it.
+        Args:
+            redis: Redis client to run the script on.
+            keys: The keys the script touches.
+            args: The arguments of the script.
+        Returns:
+            The value returned by the script.
+        """
+        start = time.perf_counter()
+        failed = False
+        try:
+            try:
+                return redis.evalsha(self.sha, len(keys), *keys, *args)
+            except NoScriptError:
+                # El servidor no tiene el script, se carga y se reintenta
+                logger.info("Cargando el script %s en Redis", self.name)
+                redis.script_load(self.source)
+                return redis.evalsha(self.sha, len(keys), *keys, *args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(time.perf_counter() - start, failed)
+
+    async def call_async(self, redis, keys=(), args=()):
+        """
+        Run the script on a redis.asyncio client, like calling it.
+        Args:
+            redis: Async Redis client to run the script on.
+            keys: The keys the script touches.
+            args: The arguments of the script.
+        Returns:
+            The value returned by the script.
+        """
+        start = time.perf_counter()
+        failed = False
+        try:
+            try:
+                return await redis.evalsha(self.sha, len(keys), *keys, *args)
+            except NoScriptError:
+                logger.info("Cargando el script %s en Redis", self.name)
+                await redis.script_load(self.source)
+                return await redis.evalsha(self.sha, len(keys), *keys, *args)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(time.perf_counter() - start, failed)
+
+    def _record(self, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.errors += int(failed)
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+
+    def stats(self) -> dict:
+        """
+        Get the call counters of the script.
+        Returns:
+            dict: Calls, errors and latency in milliseconds.
+        """
+        with self._lock:
+            return {
+                "sha": self.sha,
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": round(self.total_time * 1000 / self.calls, 3) if self.calls else 0.0, # pylint: disable=C0301
+                "max_ms": round(self.max_time * 1000, 3),
+            }
+
+
+_scripts: dict = {}
+
+
+def register(name: str, source: str) -> LuaScript:
+    """
+    Register a script under a unique name.
+    Args:
+        name (str): Name of the script in the stats.
+        source (str): The Lua source.
+    Returns:
+        LuaScript: The script, ready to be called with a Redis client.
+    """
+    if name in _scripts and _scripts[name].source != source:
+        raise ValueError(f"Script {name} is already registered")
+    script = _scripts.setdefault(name, LuaScript(name, source))
+    return script
+
+
+def load_all(redis) -> None:
+    """
+    Load every registered script in a Redis server with SCRIPT LOAD.
+    Args:
+        redis: Redis client of the server.
+    """
+    for script in _scripts.values():
+        redis.script_load(script.source)
+
+
+def get_stats() -> dict:
+    """
+    Get the call counters of every registered script.
+    Returns:
+        dict: The stats of each script by name.
+    """
+    return {name: script.stats() for name, script in _scripts.items()}
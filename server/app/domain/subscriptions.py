@@ -0,0 +1,81 @@
+"""
+This module contains the reverse index of the subscriptions.
+Every user has a set on mom:users:<user>:subscriptions with the queues,
+topics and topic patterns it is subscribed to, written as "queue:<name>",
+"topic:<name>" and "pattern:<pattern>" like the sets of the nodes
+database. The subscribers set
+of each queue or topic is still the source of truth, the index is
+updated next to it by the subscription services, the deletes and the
+replication endpoints, and it is rebuilt from the subscribers sets when
+the database is restored from the backup.
+"""
+
+from app.domain.utils import UserKeyBuilder, PARTITION_SEPARATOR
+
+QUEUE = "queue"
+TOPIC = "topic"
+PATTERN = "pattern"
+
+
+def add_subscription(redis, user: str, kind: str, name: str) -> None:
+    """
+    Add a queue or topic to the subscriptions of a user.
+    Args:
+        redis: Redis client or pipeline to write to.
+        user (str): The subscribed user.
+        kind (str): QUEUE, TOPIC or PATTERN.
+        name (str): The name of the queue, topic or pattern.
+    """
+    # Las particiones no se indexan, el índice guarda el tópico
+    if kind == TOPIC and PARTITION_SEPARATOR in name:
+        return
+    redis.sadd(UserKeyBuilder.subscriptions_key(user), f"{kind}:{name}")
+
+
+def remove_subscription(redis, user: str, kind: str, name: str) -> None:
+    """
+    Remove a queue or topic from the subscriptions of a user.
+    Args:
+        redis: Redis client or pipeline to write to.
+        user (str): The unsubscribed user.
+        kind (str): QUEUE, TOPIC or PATTERN.
+        name (str): The name of the queue, topic or pattern.
+    """
+    redis.srem(UserKeyBuilder.subscriptions_key(user), f"{kind}:{name}")
+
+
+def remove_all_subscriptions(
+    redis, subscribers, kind: str, name: str
+) -> None:
+    """
+    Remove a deleted queue or topic from the index of its subscribers.
+    Args:
+        redis: Redis client to write to.
+        subscribers: The users subscribed to the queue or topic.
+        kind (str): QUEUE or TOPIC.
+        name (str): The name of the queue or topic.
+    """
+    with redis.pipeline(transaction=False) as pipe:
+        for user in subscribers:
+            remove_subscription(pipe, user, kind, name)
+        pipe.execute()
+
+
+def get_subscriptions(redis, user: str) -> dict:
+    """
+    Get the queues, topics and topic patterns a user is subscribed to
+    with one read.
+    Args:
+        redis: Redis client to read from.
+        user (str): The user.
+    Returns:
+        dict: The sorted names under "queues", "topics" and "patterns".
+    """
+    result = {"queues": [], "topics": [], "patterns": []}
+    for member in redis.smembers(UserKeyBuilder.subscriptions_key(user)):
+        kind, name = member.split(":", 1)
+        result[f"{kind}s"].append(name)
+    result["queues"].sort()
+    result["topics"].sort()
+    result["patterns"].sort()
+    return result
@@ -0,0 +1,135 @@
+"""
+This module contains the message filters of the topic subscriptions.
+A topic message can be published with attributes, string names and
+values kept in its envelope, and a subscription can have a filter that
+the consume scripts evaluate inside Redis:
+    - A filter is an object of attribute names and expected values,
+      a message matches when all of them match.
+    - A string value must be equal to the attribute, a list of strings
+      accepts any of its values.
+    - A message without the attribute never matches.
+The filter of every subscriber is kept in the hash
+mom:topics:<name>:filters, the messages that don't match move the
+offset like the own messages, so they are never returned over HTTP.
+"""
+
+import json
+from app.domain.utils import TopicKeyBuilder
+
+MAX_ATTRIBUTES = 32
+MAX_ATTRIBUTE_LENGTH = 256
+
+# Funciones Lua para evaluar el filtro del suscriptor, se anteponen al
+# script de consumo junto con las del sobre
+LUA_FILTER = """
+local function load_filter(filters_key, user)
+    local raw = redis.call('HGET', filters_key, user)
+    if not raw then
+        return nil
+    end
+    return cjson.decode(raw)
+end
+
+local function filter_matches(filter, attributes)
+    if not filter then
+        return true
+    end
+    if not attributes then
+        return false
+    end
+    local values = cjson.decode(attributes)
+    for name, expected in pairs(filter) do
+        local value = values[name]
+        if type(expected) == 'table' then
+            local found = false
+            for _, option in ipairs(expected) do
+                if option == value then
+                    found = true
+                    break
+                end
+            end
+            if not found then
+                return false
+            end
+        elseif value ~= expected then
+            return false
+        end
+    end
+    return true
+end
+"""
+
+
+def _is_valid_text(value) -> bool:
+    return isinstance(value, str) and 0 < len(value) <= MAX_ATTRIBUTE_LENGTH
+
+
+def is_valid_attributes(attributes: dict) -> bool:
+    """
+    Check the attributes of a message.
+    Args:
+        attributes (dict): Names and values of the attributes.
+    Returns:
+        bool: True if every name and value is a non empty string.
+    """
+    return isinstance(attributes, dict) \
+        and len(attributes) <= MAX_ATTRIBUTES \
+        and all(
+            _is_valid_text(name) and _is_valid_text(value)
+            for name, value in attributes.items()
+        )
+
+
+def is_valid_filter(message_filter: dict) -> bool:
+    """
+    Check the filter of a subscription.
+    Args:
+        message_filter (dict): Attribute names and the expected value or
+            list of accepted values.
+    Returns:
+        bool: True if the filter has at least one valid condition.
+    """
+    if not isinstance(message_filter, dict) \
+            or not 0 < len(message_filter) <= MAX_ATTRIBUTES:
+        return False
+    for name, expected in message_filter.items():
+        if not _is_valid_text(name):
+            return False
+        if isinstance(expected, list):
+            if not expected or not all(_is_valid_text(v) for v in expected):
+                return False
+        elif not _is_valid_text(expected):
+            return False
+    return True
+
+
+def encode_filter(message_filter: dict) -> str:
+    """
+    Serialize a filter as it is stored and replicated.
+    Args:
+        message_filter (dict): The filter of the subscription.
+    Returns:
+        str: The compact JSON of the filter, empty without filter.
+    """
+    if not message_filter:
+        return ""
+    return json.dumps(message_filter, separators=(",", ":"), sort_keys=True)
+
+
+def set_filter(
+    redis, topic_name: str, subscriber: str, message_filter: dict
+) -> None:
+    """
+    Set the filter of a subscriber, an empty filter removes it.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        subscriber (str): The subscriber.
+        message_filter (dict): The filter of the subscription.
+    """
+    filters_key = TopicKeyBuilder.filters_key(topic_name)
+    if message_filter:
+        redis.hset(filters_key, subscriber, encode_filter(message_filter))
+    else:
+        redis.hdel(filters_key, subscriber)
+
@@ -5,21 +5,186 @@ publishing, and consuming messages.
 """
 
 import os
-import json
+import random
 import redis
 from datetime import datetime
 from app.domain.models import TopicOperationResult, MOMTopicStatus
 from app.domain.logger_config import logger
-from app.domain.utils import TopicKeyBuilder
+from app.domain.utils import TopicKeyBuilder, STORAGE_DEFAULT, STORAGE_STREAM, STORAGE_SEGMENTED, TOPIC_STORAGE_ENGINES # pylint: disable=C0301
+from app.domain.topics import topics_storage, topics_segments, topics_offsets, topics_partitions, topics_seek, topics_patterns, topics_filters # pylint: disable=C0301
+from app.domain import envelope, replication_outbox, scripts, subscriptions
 from app.domain.topics.topics_subscription import TopicSubscriptionService
 from app.domain.topics.topics_validator import TopicValidator
 from app.domain.topics.topics_replication import TopicReplicationClient
-from app.domain.replication_clients import get_replica_client_stub, get_source_client_stub
+from app.domain.replication_clients import get_replica_client_stub, get_source_client_stub, get_replica_stream, get_source_stream # pylint: disable=C0301
 from app.domain.queue_replication_clients import SOURCE_QUEUE_NODE_ID
 from app.domain.models import NODES_CONFIG, WHOAMI
 from app.adapters.factory import ObjectFactory
 from app.adapters.db import Database
 
+# Máximo de mensajes entregados por llamada a consume y máximo de
+# mensajes que recorre una ejecución del script de consumo
+MAX_CONSUME_MESSAGES = 100
+CONSUME_SCAN_LIMIT = 1000
+
+# KEYS: offsets, messages, metadata, filters
+# ARGV: user, max_messages, scan_limit
+# Retorna {offset_anterior, offset_nuevo, quedan_mensajes, mensajes...}
+CONSUME_SCRIPT = scripts.register(
+    "topic_consume",
+    envelope.LUA_DECODE + topics_filters.LUA_FILTER + """
+local offset_key = KEYS[1]
+local messages_key = KEYS[2]
+local metadata_key = KEYS[3]
+local user = ARGV[1]
+local max_messages = tonumber(ARGV[2])
+local scan_limit = tonumber(ARGV[3])
+local filter = load_filter(KEYS[4], user)
+
+-- Obtener campo del offset
+local offset_field = "subscriber_offset:" .. user
+local current_offset = tonumber(redis.call('HGET', offset_key, offset_field))
+
+-- Validar offset inicializado
+if not current_offset then
+    return {"ERROR", "OFFSET_NOT_INITIALIZED"}
+end
+
+-- Obtener mensajes procesados
+local total_deleted = tonumber(redis.call('HGET', metadata_key, 'processed_count') or 0)
+
+-- Calcular offset real
+local real_offset = current_offset - total_deleted
+if real_offset < 0 then
+    return {"ERROR", "INVALID_OFFSET"}
+end
+
+-- Leer ventanas hasta juntar los mensajes pedidos, los mensajes
+-- propios y los que no cumplen el filtro se saltan sin salir del script
+local total_messages = redis.call('LLEN', messages_key)
+local result = {tostring(current_offset), "", 0}
+local scanned = 0
+while #result - 3 < max_messages and scanned < scan_limit
+    and real_offset + scanned < total_messages do
+    local size = math.min(max_messages - (#result - 3), scan_limit - scanned)
+    local start = real_offset + scanned
+    local window = redis.call('LRANGE', messages_key, start, start + size - 1)
+    for i = 1, #window do
+        local _, publisher, attributes = envelope_header(window[i])
+        if not publisher then
+            return {"ERROR", "MESSAGE_CORRUPTED"}
+        end
+        scanned = scanned + 1
+        if publisher ~= user and filter_matches(filter, attributes) then
+            result[#result + 1] = window[i]
+        end
+    end
+end
+
+-- Actualizar el offset una sola vez
+local new_offset = current_offset + scanned
+if scanned > 0 then
+    redis.call('HSET', offset_key, offset_field, new_offset)
+end
+result[2] = tostring(new_offset)
+result[3] = (real_offset + scanned < total_messages) and 1 or 0
+return result
+""")
+
+# KEYS: messages, metadata, timeline | ARGV: message, timestamp, channel
+# El índice de tiempo guarda el offset absoluto de cada mensaje con su
+# timestamp como score, la limpieza por tiempo lo consulta por rango.
+# Publica en el canal de notificaciones del tópico
+PUBLISH_SCRIPT = scripts.register("topic_publish", """
+local length = redis.call('RPUSH', KEYS[1], ARGV[1])
+local count = redis.call('HINCRBY', KEYS[2], 'message_count', 1)
+local processed = tonumber(redis.call('HGET', KEYS[2], 'processed_count') or 0)
+redis.call('ZADD', KEYS[3], ARGV[2], processed + length - 1)
+redis.call('PUBLISH', ARGV[3], '')
+return count
+""")
+
+# KEYS: messages, offsets, metadata, timeline | ARGV: force_cleanup, persistency_time
+# Retorna la cantidad de mensajes eliminados
+CLEANUP_SCRIPT = scripts.register("topic_cleanup", envelope.LUA_DECODE + """
+local messages_key = KEYS[1]
+local offset_key = KEYS[2]
+local metadata_key = KEYS[3]
+local timeline_key = KEYS[4]
+local force_cleanup = ARGV[1] == 'true'
+local persistency_time = tonumber(ARGV[2])
+
+-- 1. Obtener offsets y metadatos
+local subscriber_offsets = redis.call('HGETALL', offset_key)
+local total_messages = redis.call('LLEN', messages_key)
+local total_deleted = tonumber(redis.call('HGET', metadata_key, 'processed_count') or 0)
+
+-- 2. Calcular mensajes a eliminar por suscripción
+local min_offset = math.huge
+for i = 1, #subscriber_offsets, 2 do
+    local offset = tonumber(subscriber_offsets[i+1])
+    min_offset = math.min(min_offset, offset)
+end
+local real_min_offset = min_offset - total_deleted
+local messages_to_delete_by_subscription = math.min(math.max(0, real_min_offset), total_messages)
+
+-- 3. Calcular mensajes a eliminar por tiempo
+local messages_to_delete_by_time = 0
+if force_cleanup then
+    local cutoff = tonumber(redis.call('TIME')[1]) - (persistency_time * 60)
+    -- Los mensajes publicados antes del índice de tiempo no tienen
+    -- entrada y están al inicio de la lista, solo esos se decodifican
+    local unindexed = total_messages - redis.call('ZCARD', timeline_key)
+    local position = messages_to_delete_by_subscription
+    while position < unindexed do
+        local timestamp = envelope_header(redis.call('LINDEX', messages_key, position))
+        if not (timestamp and timestamp < cutoff) then
+            break
+        end
+        position = position + 1
+    end
+    if position >= unindexed then
+        -- Los mensajes vencidos del índice son un prefijo de la lista
+        local expired = redis.call('ZCOUNT', timeline_key, '-inf', '(' .. cutoff)
+        position = math.max(position, unindexed + expired)
+    end
+    messages_to_delete_by_time = position - messages_to_delete_by_subscription
+end
+
+-- 4. Total de mensajes a eliminar
+local total_messages_to_delete = messages_to_delete_by_subscription + messages_to_delete_by_time
+
+-- 5. Ajustar offsets si hay limpieza por tiempo
+if messages_to_delete_by_time > 0 then
+    for i = 1, #subscriber_offsets, 2 do
+        local subscriber = subscriber_offsets[i]
+        local current_offset = tonumber(subscriber_offsets[i+1])
+        if current_offset < (min_offset + messages_to_delete_by_time) then
+            redis.call('HSET', offset_key, subscriber, min_offset + messages_to_delete_by_time)
+        end
+    end
+end
+
+-- 6. Eliminar mensajes y actualizar metadatos
+if total_messages_to_delete > 0 then
+    redis.call('LTRIM', messages_key, total_messages_to_delete, -1)
+    redis.call('HINCRBY', metadata_key, 'processed_count', total_messages_to_delete)
+
+    -- Sacar del índice los offsets eliminados, por bloques para no
+    -- pasar el límite de argumentos de unpack
+    local last = total_deleted + total_messages_to_delete - 1
+    for first = total_deleted, last, 1000 do
+        local offsets = {}
+        for offset = first, math.min(first + 999, last) do
+            offsets[#offsets + 1] = offset
+        end
+        redis.call('ZREM', timeline_key, unpack(offsets))
+    end
+end
+
+return total_messages_to_delete
+""")
+
 class MOMTopicManager:
     """
     Manager for topic operations in a Redis-based message system.
@@ -47,16 +212,19 @@ class MOMTopicManager:
         # replication_principal apunta al nodo principal
         self.replication_client = TopicReplicationClient(
         stub=replica_stub,
-        target_node_desc=f"nodo réplica ({replica_node})"
+        target_node_desc=f"nodo réplica ({replica_node})",
+        stream=get_source_stream()
         )
         self.replication_principal = TopicReplicationClient(
             stub=source_stub,
-            target_node_desc=f"nodo principal ({WHOAMI})"
+            target_node_desc=f"nodo principal ({WHOAMI})",
+            stream=get_replica_stream()
         )
 
     def create_topic(
             self, topic_name: str, principal = True, created_at = None,
-            endpoint: bool = False
+            endpoint: bool = False, storage: str = STORAGE_DEFAULT,
+            partitions: int = 1
                      ) -> TopicOperationResult:
         """
         Create a new topic with the specified name.
@@ -68,10 +236,32 @@ class MOMTopicManager:
             (if is not principal).
             endpoint (bool): Whether the topic is an endpoint
                 if True, the topic will be created in the backup.
+            storage (str): Storage engine of the messages, "default"
+                keeps them in a list, "stream" in a Redis Stream and
+                "segmented" in lists of a fixed size.
+            partitions (int): Number of partitions of the topic, every
+                partition is an internal topic with its own keys.
         Returns:
             TopicOperationResult: Result of the topic creation operation.
         """
         try:
+            if storage not in TOPIC_STORAGE_ENGINES:
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid storage engine",
+                    replication_result=False
+                )
+
+            if not 1 <= partitions <= topics_partitions.MAX_TOPIC_PARTITIONS \
+                    or (partitions > 1 and topics_partitions.is_partition(topic_name)): # pylint: disable=C0301
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid number of partitions",
+                    replication_result=False
+                )
+
             metadata_key = TopicKeyBuilder.metadata_key(topic_name)
             with self.redis.pipeline() as pipe:
                 while True:
@@ -97,26 +287,42 @@ class MOMTopicManager:
                             "created_at": created_at,
                             "message_count": 0,
                             "processed_count": 0,
-                            "original_node": int(principal)
+                            "original_node": int(principal),
+                            "storage": storage
                         }
+                        if storage == STORAGE_SEGMENTED:
+                            metadata["segment_size"] = topics_segments.SEGMENT_SIZE # pylint: disable=C0301
+                        if partitions > 1:
+                            metadata["partitions"] = partitions
                         pipe.hset(metadata_key, mapping=metadata)
 
                         # Suscribir al usuario (dentro de la misma transacción)
                         subscribers_key = TopicKeyBuilder.subscribers_key(topic_name) # pylint: disable=C0301
                         pipe.sadd(subscribers_key, self.user)
+                        subscriptions.add_subscription(
+                            pipe, self.user, subscriptions.TOPIC, topic_name
+                        )
 
                         # Inicializar offset
                         offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name) # pylint: disable=C0301
                         offset_field = TopicKeyBuilder.subscriber_offset_field(self.user) # pylint: disable=C0301
                         pipe.hsetnx(offset_key, offset_field, 0)
 
+                        # El dueño lee el stream con su propio grupo
+                        messages_key = TopicKeyBuilder.messages_key(topic_name) # pylint: disable=C0301
+                        if storage == STORAGE_STREAM:
+                            pipe.xgroup_create(
+                                messages_key, self.user, "0", mkstream=True
+                            )
+
                         pipe.execute()  # Ejecuta todo atómicamente
 
                         # Replicar creación del tópico
                         replication_op = False
                         if principal:
                             replication_op = self.replication_client.replicate_create_topic( # pylint: disable=C0301
-                                topic_name, self.user, created_at
+                                topic_name, self.user, created_at, storage,
+                                partitions
                             )
 
                         if endpoint:
@@ -124,12 +330,24 @@ class MOMTopicManager:
                             self.redis_backup.hset(metadata_key, mapping=metadata)
                             self.redis_backup.sadd(subscribers_key, self.user)
                             self.redis_backup.hsetnx(offset_key, offset_field, 0)
+                            if storage == STORAGE_STREAM:
+                                self.redis_backup.xgroup_create(
+                                    messages_key, self.user, "0", mkstream=True
+                                )
 
                             #Decir en que nodos se debe crear
                             self.redis_nodes.sadd(WHOAMI, f"topic:{topic_name}")
                             self.redis_nodes.sadd(SOURCE_QUEUE_NODE_ID, f"topic:{topic_name}")
                             logger.info(f"Topic {topic_name} created in {SOURCE_QUEUE_NODE_ID} and {WHOAMI}")
 
+                        # Cada partición se crea y se replica como un tópico
+                        if principal:
+                            for partition in topics_partitions.partition_names(self.redis, topic_name): # pylint: disable=C0301
+                                self.create_topic(
+                                    partition, principal, created_at,
+                                    endpoint, storage
+                                )
+
                         if principal and replication_op is False:
                             # Descartar la transacción si la replicación falla
                             return TopicOperationResult(
@@ -160,7 +378,8 @@ class MOMTopicManager:
     def publish(
             self, message: str, topic_name: str,
             timestamp = None, im_replicating = False,
-            endpoint: bool = False
+            endpoint: bool = False, partition_key: str = None,
+            attributes: dict = None, write_concern: str = None
             ) -> TopicOperationResult:
         """
         Publish a string message to the specified topic.
@@ -170,10 +389,32 @@ class MOMTopicManager:
             timestamp (float): The timestamp of the message.
             im_replicating (bool): Whether the publish is being replicated.
             endpoint (bool): Whether the topic is an endpoint
+            partition_key (str): Key of the message in a partitioned
+                topic, the messages with the same key keep their order.
+            attributes (dict): String attributes of the message, the
+                filters of the subscriptions are evaluated on them.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
         Returns:
             TopicOperationResult: Result of the publish operation.
         """
         try:
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False
+                )
+
+            if attributes and not topics_filters.is_valid_attributes(attributes): # pylint: disable=C0301
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid message attributes",
+                    replication_result=False
+                )
+
             with self.redis.pipeline() as pipe:
                 # Validar existencia del tópico
                 result = self.validator.validate_topic_exists(topic_name)
@@ -206,7 +447,8 @@ class MOMTopicManager:
                                 topic_name=topic_name,
                                 user=self.user,
                                 message=message,
-                                node=node
+                                node=node,
+                                attributes=attributes
                             )
                             if result.success:
                                 return result
@@ -215,8 +457,37 @@ class MOMTopicManager:
                     result.replication_result = False
                     return result
 
+                # Los suscriptores por patrón que aún no leen el tópico
+                # se suscriben antes de guardar el mensaje
+                if not im_replicating:
+                    self.subscriptions.subscribe_matching(topic_name, endpoint)
+
                 # validar si soy el mom principal para este topico
-                result = self.redis.hget(TopicKeyBuilder.metadata_key(topic_name), "original_node") # pylint: disable=C0301
+                result, storage, partitions = self.redis.hmget(
+                    TopicKeyBuilder.metadata_key(topic_name),
+                    "original_node", "storage", "partitions"
+                )
+
+                # Los tópicos particionados publican en una partición
+                if partitions is not None and int(partitions) > 1:
+                    if im_replicating:
+                        # La réplica no elige, se replica la partición
+                        return TopicOperationResult(
+                            success=False,
+                            status=MOMTopicStatus.INVALID_ARGUMENTS,
+                            details="Partitioned topics are replicated by partition", # pylint: disable=C0301
+                            replication_result=False
+                        )
+                    partition = topics_partitions.choose_partition(
+                        int(partitions), partition_key
+                    )
+                    return self.publish(
+                        message,
+                        topics_partitions.partition_name(topic_name, partition),
+                        timestamp, im_replicating, endpoint,
+                        attributes=attributes, write_concern=write_concern
+                    )
+
                 principal = bool(int(result))
                 #logger.critical("Soy el mom principal para este topico: %s", principal) # pylint: disable=C0301
 
@@ -226,23 +497,45 @@ class MOMTopicManager:
                 else:
                     timestamp = float(timestamp)
                 #logger.critical("timestamp: %s", timestamp)
-                full_message = {
-                    "timestamp": timestamp,
-                    "publisher": self.user,
-                    "payload": message,
-                }
+                full_message = envelope.encode(
+                    message, timestamp, self.user, attributes
+                )
 
-                pipe.multi()
                 messages_key = TopicKeyBuilder.messages_key(topic_name)
-                pipe.rpush(messages_key, json.dumps(full_message))
                 metadata_key = TopicKeyBuilder.metadata_key(topic_name)
-                pipe.hincrby(metadata_key, "message_count", 1)
-                pipe.execute()
-
-                if endpoint:
-                    # Realizar todas las operaciones en el backup
-                    self.redis_backup.rpush(messages_key, json.dumps(full_message))
-                    self.redis_backup.hincrby(metadata_key, "message_count", 1)
+                if storage == STORAGE_STREAM:
+                    topics_storage.publish_message(
+                        self.redis, topic_name, full_message
+                    )
+                    if endpoint:
+                        # Realizar todas las operaciones en el backup
+                        topics_storage.publish_message(
+                            self.redis_backup, topic_name, full_message
+                        )
+                elif storage == STORAGE_SEGMENTED:
+                    topics_segments.publish_message(
+                        self.redis, topic_name, full_message, timestamp
+                    )
+                    if endpoint:
+                        # Realizar todas las operaciones en el backup
+                        topics_segments.publish_message(
+                            self.redis_backup, topic_name, full_message,
+                            timestamp
+                        )
+                else:
+                    keys = [
+                        messages_key, metadata_key,
+                        TopicKeyBuilder.timeline_key(topic_name)
+                    ]
+                    args = [
+                        full_message, repr(timestamp),
+                        TopicKeyBuilder.notify_channel(topic_name)
+                    ]
+                    PUBLISH_SCRIPT(self.redis, keys, args)
+
+                    if endpoint:
+                        # Realizar todas las operaciones en el backup
+                        PUBLISH_SCRIPT(self.redis_backup, keys, args)
 
                 # Replicar publicación del mensaje
                 # Para saber si el nodo es principal o replicante se
@@ -253,27 +546,28 @@ class MOMTopicManager:
                 # replication_client esta apunta al nodo replicante
                 # 2. Si es el nodo replicante, se replica la publicación usando
                 # replication_principal que apunta al nodo principal
-                # Primero se debe preguntar al zookeeper si el nodo principal
-                # o replicante esta up si está down se manda un log al
-                # zookeeper para posterior recuperación
+                # Si el otro nodo está caído la operación queda en el
+                # diario de replicación y se le reenvía cuando vuelve
 
                 # IMPORTANTE:
                 # se debe usar una variable que diga si esta
                 # replicando o no para evitar una recursividad infinita
 
-                # TODO: preguntar al zookeeper si el nodo principal o
-                # replicante esta up zookeper_validation = ...
                 replication_op = False
 
                 if principal and im_replicating is False:
                     logger.debug("replicando con replication_client")
-                    replication_op = self.replication_client.replicate_publish_message( # pylint: disable=C0301
-                        topic_name, self.user, message, timestamp
+                    replication_op = replication_outbox.replicate(
+                        topic_name, write_concern,
+                        self.replication_client.replicate_publish_message,
+                        topic_name, self.user, message, timestamp, attributes
                     )
                 elif not principal and im_replicating is False:
                     logger.debug("replicando con replication_principal")
-                    replication_op = self.replication_principal.replicate_publish_message( # pylint: disable=C0301
-                        topic_name, self.user, message, timestamp
+                    replication_op = replication_outbox.replicate(
+                        topic_name, write_concern,
+                        self.replication_principal.replicate_publish_message,
+                        topic_name, self.user, message, timestamp, attributes
                     )
 
                 # Si estoy replicando no necesito replicar de nuevo
@@ -305,24 +599,60 @@ class MOMTopicManager:
             )
 
     def consume(
-            self, topic_name: str, self_consume: bool = False,
-            endpoint: bool = False
+            self, topic_name: str, endpoint: bool = False,
+            max_messages: int = 1, partition: int = None,
+            offsets: dict = None
             ) -> TopicOperationResult:
         """
         Consume string messages from a topic based on the subscriber's current
-        offset. Default is now to consume only one message at a time for
-        better control. Messages remain in the topic for other subscribers.
+        offset. A single script call reads a window of the topic, skips the
+        messages published by the subscriber and moves its offset once, so
+        the offset is replicated once per call instead of once per message.
+        Messages remain in the topic for other subscribers.
 
         Args:
             topic_name (str): The name of the topic to consume from.
-            count (int): Maximum number of messages to consume (default: 1).
-            self_consume (bool): Whether the consume is 
-            from the same user that published the message.
-            im_replicating (bool): Whether the consume is being replicated.
+            endpoint (bool): Whether the consume comes from the API,
+                if True, the consume is also applied on the backup.
+            max_messages (int): Maximum number of messages to consume,
+                when greater than 1 the details are a list of payloads.
+            partition (int): Partition to consume from, None reads from
+                every partition of the topic.
+            offsets (dict): When given, the offset every topic read had
+                before the call is added to it by topic name, so the
+                consume can be rewound with seek.
         Returns:
             TopicOperationResult: Result containing consumed string messages.
         """
         try:
+            if not 1 <= max_messages <= MAX_CONSUME_MESSAGES:
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid number of messages to consume",
+                    replication_result=False
+                )
+
+            # Un patrón lee de los tópicos suscritos que lo cumplen
+            if topics_patterns.is_pattern(topic_name):
+                if partition is not None or not topics_patterns.is_valid_pattern(topic_name): # pylint: disable=C0301
+                    return TopicOperationResult(
+                        success=False,
+                        status=MOMTopicStatus.INVALID_ARGUMENTS,
+                        details="Invalid topic pattern",
+                        replication_result=False
+                    )
+                subscribed_topics = subscriptions.get_subscriptions(
+                    self.redis, self.user
+                )["topics"]
+                return self._consume_topics(
+                    [
+                        name for name in subscribed_topics
+                        if topics_patterns.matches(topic_name, name)
+                    ],
+                    endpoint, max_messages, offsets
+                )
+
             metadata_key = TopicKeyBuilder.metadata_key(topic_name)
             result = self.validator.validate_topic_exists(topic_name)
             if not result.success:
@@ -356,6 +686,9 @@ class MOMTopicManager:
                             node=node
                         )
                         if result.success:
+                            # El forward entrega a lo sumo un mensaje
+                            if max_messages > 1:
+                                result.details = [result.details] if result.details else [] # pylint: disable=C0301
                             return result
 
                 result.success = False
@@ -371,77 +704,51 @@ class MOMTopicManager:
                     replication_result=False
                 )
 
-            lua_script = """
-            local offset_key = KEYS[1]
-            local messages_key = KEYS[2]
-            local metadata_key = KEYS[3]
-            local user = ARGV[1]
-
-            -- Obtener campo del offset
-            local offset_field = "subscriber_offset:" .. user
-            local current_offset = tonumber(redis.call('HGET', offset_key, offset_field))
-            
-            -- Validar offset inicializado
-            if not current_offset then
-                return {"ERROR", "OFFSET_NOT_INITIALIZED"}
-            end
-
-            -- Obtener mensajes procesados
-            local total_deleted = tonumber(redis.call('HGET', metadata_key, 'processed_count') or 0)
-
-            -- Calcular offset real
-            local real_offset = current_offset - total_deleted
-            if real_offset < 0 then
-                return {"ERROR", "INVALID_OFFSET"}
-            end
-
-            -- Verificar si hay mensajes
-            local total_messages = redis.call('LLEN', messages_key)
-            if real_offset >= total_messages then
-                return {"NO_MESSAGES", tostring(current_offset)}
-            end
-
-            -- Leer mensaje
-            local raw_message = redis.call('LINDEX', messages_key, real_offset)
-            if not raw_message then
-                return {"NO_MESSAGES", tostring(current_offset)}
-            end
-
-            -- Decodificar mensaje
-            local success, message_data = pcall(cjson.decode, raw_message)
-            if not success or type(message_data) ~= "table" then
-                return {"ERROR", "MESSAGE_CORRUPTED"}
-            end
-
-            -- Saltar mensajes propios
-            if message_data.publisher == user then
-                local new_offset = current_offset + 1
-                redis.call('HSET', offset_key, offset_field, new_offset)
-                local new_real_offset = new_offset - total_deleted
-                if new_real_offset >= redis.call('LLEN', messages_key) then
-                    return {"NO_MESSAGES", tostring(new_offset)}
-                else
-                    return {"SELF_MESSAGE", tostring(new_offset)}
-                end
-            end
-
-            -- Actualizar offset y retornar mensaje
-            local new_offset = current_offset + 1
-            redis.call('HSET', offset_key, offset_field, new_offset)
-            return {"MESSAGE", raw_message, tostring(new_offset)}
-            """
+            # Los tópicos particionados leen de sus particiones
+            partitions = topics_partitions.get_partitions(self.redis, topic_name)
+            if partition is not None and not 0 <= partition < partitions:
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid partition",
+                    replication_result=False
+                )
+            if partitions > 1:
+                return self._consume_partitions(
+                    topic_name, partitions, endpoint, max_messages, partition,
+                    offsets
+                )
 
             keys = [
                 TopicKeyBuilder.subscriber_offsets_key(topic_name),
                 TopicKeyBuilder.messages_key(topic_name),
                 TopicKeyBuilder.metadata_key(topic_name),
+                TopicKeyBuilder.filters_key(topic_name),
             ]
-
-            result = self.redis.eval(lua_script, 3, *keys, self.user)
-
-            if endpoint:
-                # Realizar todas las operaciones en el backup
-                self.redis_backup.eval(lua_script, 3, *keys, self.user)
+            args = [self.user, max_messages, CONSUME_SCAN_LIMIT]
+
+            # Los tópicos sobre streams leen con su grupo de consumo y
+            # los segmentados solo leen el segmento del offset
+            script = CONSUME_SCRIPT
+            storage = self.redis.hget(metadata_key, "storage")
+            if storage == STORAGE_STREAM:
+                script = topics_storage.CONSUME_SCRIPT
+            elif storage == STORAGE_SEGMENTED:
+                script = topics_segments.CONSUME_SCRIPT
+                keys = [keys[0], keys[2], keys[3]]
+                args.append(topics_segments.segment_prefix(topic_name))
+
+            result = script(self.redis, keys, args)
+
+            # Si la ventana solo tenía mensajes propios o filtrados se
+            # sigue leyendo, cada llamada avanza hasta CONSUME_SCAN_LIMIT
+            # mensajes
+            while isinstance(result, list) and result[0] != "ERROR" \
+                    and len(result) == 3 and int(result[2]):
+                next_result = script(self.redis, keys, args)
+                if next_result[0] == "ERROR" or next_result[1] == result[1]:
+                    break
+                result = [result[0]] + next_result[1:]
 
             # Validar si soy el mom principal para este topico
             result_principal = self.redis.hget(TopicKeyBuilder.metadata_key(topic_name), "original_node") # pylint: disable=C0301
@@ -452,69 +759,54 @@ class MOMTopicManager:
 
             # Manejo de resultados
             if isinstance(result, list):
-                status = result[0].decode() if isinstance(result[0], bytes) else result[0] # pylint: disable=C0301
-
-                if status == "NO_MESSAGES":
-
-                    # Aunque no hay mensajes, se replica el offset
-                    # Si el consumo es propio
-                    # Esto por que puede que aquel que lo consuma sea
-                    # el que envio el mensaje
-                    if self_consume is True:
-                        new_offset = int(result[1])
-
-                        if principal:
-                            replication_op = self.replication_client.replicate_consume_message( # pylint: disable=C0301
-                                topic_name, self.user, new_offset
-                            )
-                        elif not principal:
-                            replication_op = self.replication_principal.replicate_consume_message( # pylint: disable=C0301
-                                topic_name, self.user, new_offset
-                            )
-                        else:
-                            replication_op = False
-
+                if result[0] == "ERROR":
+                    error_details = result[1] if len(result) > 1 else "Unknown error" # pylint: disable=C0301
                     return TopicOperationResult(
-                        success=True,
-                        status=MOMTopicStatus.NO_MESSAGES,
-                        details="",
-                        replication_result=False if self_consume is False else True # pylint: disable=C0301
+                        success=False,
+                        status=MOMTopicStatus.INTERNAL_ERROR,
+                        details=error_details,
+                        replication_result=False
                     )
 
-                elif status == "SELF_MESSAGE":
-                    # Reintentar recursivamente
-                    return self.consume(topic_name, True)
-
-                elif status == "MESSAGE":
-                    message_data = json.loads(result[1])
-                    new_offset = int(result[2])
+                old_offset, new_offset = int(result[0]), int(result[1])
+                payloads = [
+                    envelope.decode(raw).get("payload", "")
+                    for raw in result[3:]
+                ]
 
-                    if principal:
-                        replication_op = self.replication_client.replicate_consume_message( # pylint: disable=C0301
-                            topic_name, self.user, new_offset
+                # Se replica el offset una vez aunque solo se hayan
+                # saltado mensajes propios, en modo agrupado solo se
+                # envía el último offset de cada suscriptor
+                if new_offset != old_offset:
+                    if offsets is not None:
+                        offsets.setdefault(topic_name, old_offset)
+                    if endpoint:
+                        # El script pudo correr varias veces, el backup
+                        # recibe el offset final en vez de repetirlo
+                        topics_storage.set_subscriber_offset(
+                            self.redis_backup, topic_name, self.user,
+                            new_offset
                         )
-                    elif not principal:
-                        replication_op = self.replication_principal.replicate_consume_message( # pylint: disable=C0301
-                            topic_name, self.user, new_offset
-                        )
-                    else:
-                        replication_op = False
+                    target = self.replication_client if principal \
+                        else self.replication_principal
+                    replication_op = topics_offsets.replicate_offset(
+                        topic_name, self.user, new_offset, target
+                    )
 
+                if not payloads:
                     return TopicOperationResult(
                         success=True,
-                        status=MOMTopicStatus.MESSAGE_CONSUMED,
-                        details=message_data.get("payload", ""),
+                        status=MOMTopicStatus.NO_MESSAGES,
+                        details=[] if max_messages > 1 else "",
                         replication_result=replication_op
                     )
 
-                elif status == "ERROR":
-                    error_details = result[1].decode() if len(result) > 1 else "Unknown error" # pylint: disable=C0301
-                    return TopicOperationResult(
-                        success=False,
-                        status=MOMTopicStatus.INTERNAL_ERROR,
-                        details=error_details,
-                        replication_result=False
-                    )
+                return TopicOperationResult(
+                    success=True,
+                    status=MOMTopicStatus.MESSAGE_CONSUMED,
+                    details=payloads if max_messages > 1 else payloads[0],
+                    replication_result=replication_op
+                )
 
             return TopicOperationResult(
                 False,
@@ -538,6 +830,194 @@ class MOMTopicManager:
                 str(e)
             )
 
+    def _consume_partitions(
+        self, topic_name: str, partitions: int, endpoint: bool,
+        max_messages: int, partition: int = None, offsets: dict = None
+    ) -> TopicOperationResult:
+        """
+        Consume from one partition of a topic or from all of them, the
+        partitions are read from a random one so none of them is starved.
+        Args:
+            topic_name (str): The name of the partitioned topic.
+            partitions (int): The partitions of the topic.
+            endpoint (bool): Whether the consume comes from the API.
+            max_messages (int): Maximum number of messages to consume.
+            partition (int): Partition to consume from, None reads from
+                every partition.
+            offsets (dict): Collects the offsets before the call.
+        Returns:
+            TopicOperationResult: Result containing consumed string messages.
+        """
+        if partition is not None:
+            return self.consume(
+                topics_partitions.partition_name(topic_name, partition),
+                endpoint, max_messages, offsets=offsets
+            )
+
+        return self._consume_topics(
+            [
+                topics_partitions.partition_name(topic_name, p)
+                for p in range(partitions)
+            ],
+            endpoint, max_messages, offsets
+        )
+
+    def _consume_topics(
+        self, topic_names: list, endpoint: bool, max_messages: int,
+        offsets: dict = None
+    ) -> TopicOperationResult:
+        """
+        Consume from several topics, the topics are read from a random
+        one so none of them is starved.
+        Args:
+            topic_names (list): The topics to consume from.
+            endpoint (bool): Whether the consume comes from the API.
+            max_messages (int): Maximum number of messages to consume.
+            offsets (dict): Collects the offsets before the call.
+        Returns:
+            TopicOperationResult: Result containing consumed string messages.
+        """
+        start = random.randrange(len(topic_names)) if topic_names else 0
+        payloads = []
+        replication_results = []
+        for step in range(len(topic_names)):
+            result = self.consume(
+                topic_names[(start + step) % len(topic_names)],
+                endpoint, max_messages - len(payloads), offsets=offsets
+            )
+            if not result.success:
+                return result
+            if result.status == MOMTopicStatus.MESSAGE_CONSUMED:
+                details = result.details
+                payloads.extend(details if isinstance(details, list) else [details]) # pylint: disable=C0301
+                replication_results.append(result.replication_result)
+            if len(payloads) == max_messages:
+                break
+
+        if not payloads:
+            return TopicOperationResult(
+                success=True,
+                status=MOMTopicStatus.NO_MESSAGES,
+                details=[] if max_messages > 1 else "",
+                replication_result=False
+            )
+
+        return TopicOperationResult(
+            success=True,
+            status=MOMTopicStatus.MESSAGE_CONSUMED,
+            details=payloads if max_messages > 1 else payloads[0],
+            replication_result=all(replication_results)
+        )
+
+    def seek(
+        self, topic_name: str, position: str = None, offset: int = None,
+        timestamp: float = None, partition: int = None,
+        endpoint: bool = False
+    ) -> TopicOperationResult:
+        """
+        Move the offset of the user in a topic, forward or backward.
+        Exactly one of the position, the offset or the timestamp must
+        be given.
+        Args:
+            topic_name (str): The name of the topic.
+            position (str): "earliest" or "latest".
+            offset (int): An absolute offset, clamped to the messages
+                still kept. Partitioned topics need the partition.
+            timestamp (float): Moves to the first message published at
+                or after it, found with the index of the topic.
+            partition (int): Partition to move, None moves every
+                partition of the topic.
+            endpoint (bool): Whether the seek comes from the API,
+                if True, the offset is also moved on the backup.
+        Returns:
+            TopicOperationResult: The new offset of every moved topic.
+        """
+        try:
+            if [position, offset, timestamp].count(None) != 2 \
+                    or (position is not None and position not in topics_seek.SEEK_POSITIONS) \
+                    or (offset is not None and offset < 0): # pylint: disable=C0301
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Exactly one valid position, offset or timestamp is required", # pylint: disable=C0301
+                    replication_result=False
+                )
+
+            result = self.validator.validate_topic_exists(topic_name)
+            if not result.success:
+                result.replication_result = False
+                return result
+            result = self.validator.validate_user_subscribed(topic_name)
+            if not result.success:
+                result.replication_result = False
+                return result
+
+            partitions = topics_partitions.get_partitions(self.redis, topic_name)
+            if partition is not None and not 0 <= partition < partitions:
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid partition",
+                    replication_result=False
+                )
+            if partitions > 1 and partition is None and offset is not None:
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="An offset can only be set on one partition",
+                    replication_result=False
+                )
+
+            # En los tópicos particionados se mueve cada partición
+            topic_names = [topic_name]
+            if partitions > 1:
+                topic_names = topics_partitions.partition_names(self.redis, topic_name) # pylint: disable=C0301
+                if partition is not None:
+                    topic_names = [topic_names[partition]]
+
+            offsets = {}
+            replication_results = []
+            for name in topic_names:
+                new_offset = topics_seek.resolve_offset(
+                    self.redis, name, position, offset, timestamp
+                )
+                topics_storage.set_subscriber_offset(
+                    self.redis, name, self.user, new_offset
+                )
+                if endpoint:
+                    # Realizar todas las operaciones en el backup
+                    topics_storage.set_subscriber_offset(
+                        self.redis_backup, name, self.user, new_offset
+                    )
+
+                # Se replica como el offset de un consumo para que el
+                # modo agrupado no lo pise con un offset anterior
+                principal = bool(int(self.redis.hget(
+                    TopicKeyBuilder.metadata_key(name), "original_node"
+                )))
+                target = self.replication_client if principal \
+                    else self.replication_principal
+                replication_results.append(topics_offsets.replicate_offset(
+                    name, self.user, new_offset, target
+                ))
+                offsets[name] = new_offset
+
+            return TopicOperationResult(
+                success=True,
+                status=MOMTopicStatus.OFFSET_UPDATED,
+                details=offsets,
+                replication_result=all(replication_results)
+            )
+
+        except Exception as e: # pylint: disable=W0718
+            logger.exception("Error seeking in topic '%s'", topic_name)
+            return TopicOperationResult(
+                success=False,
+                status=MOMTopicStatus.INTERNAL_ERROR,
+                details=str(e),
+                replication_result=False
+            )
+
     def _cleanup_processed_messages(
         self, topic_name: str, force_cleanup_by_time: bool = False,
         endpoint: bool = False
@@ -567,90 +1047,46 @@ class MOMTopicManager:
             offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
             metadata_key = TopicKeyBuilder.metadata_key(topic_name)
 
-            # Script Lua para atomicidad
-            lua_script = """
-            local messages_key = KEYS[1]
-            local offset_key = KEYS[2]
-            local metadata_key = KEYS[3]
-            local force_cleanup = ARGV[1] == 'true'
-            local persistency_time = tonumber(ARGV[2])
-
-            -- 1. Obtener offsets y metadatos
-            local subscriber_offsets = redis.call('HGETALL', offset_key)
-            local total_messages = redis.call('LLEN', messages_key)
-            local total_deleted = tonumber(redis.call('HGET', metadata_key, 'processed_count') or 0)
-
-            -- 2. Calcular mensajes a eliminar por suscripción
-            local min_offset = math.huge
-            for i = 1, #subscriber_offsets, 2 do
-                local offset = tonumber(subscriber_offsets[i+1])
-                min_offset = math.min(min_offset, offset)
-            end
-            local real_min_offset = min_offset - total_deleted
-            local messages_to_delete_by_subscription = math.max(0, real_min_offset)
-
-            -- 3. Calcular mensajes a eliminar por tiempo
-            local messages_to_delete_by_time = 0
-            if force_cleanup then
-                local cutoff = tonumber(redis.call('TIME')[1]) - (persistency_time * 60)
-                for i = messages_to_delete_by_subscription, total_messages - 1 do
-                    local msg = redis.call('LINDEX', messages_key, i)
-                    if not msg then break end
-                    local timestamp = tonumber(cjson.decode(msg)['timestamp'])
-                    if timestamp < cutoff then
-                        messages_to_delete_by_time = messages_to_delete_by_time + 1
-                    else
-                        break
-                    end
-                end
-            end
-
-            -- 4. Total de mensajes a eliminar
-            local total_messages_to_delete = messages_to_delete_by_subscription + messages_to_delete_by_time
-
-            -- 5. Ajustar offsets si hay limpieza por tiempo
-            if messages_to_delete_by_time > 0 then
-                for i = 1, #subscriber_offsets, 2 do
-                    local subscriber = subscriber_offsets[i]
-                    local current_offset = tonumber(subscriber_offsets[i+1])
-                    if current_offset < (min_offset + messages_to_delete_by_time) then
-                        redis.call('HSET', offset_key, subscriber, min_offset + messages_to_delete_by_time)
-                    end
-                end
-            end
-
-            -- 6. Eliminar mensajes y actualizar metadatos
-            if total_messages_to_delete > 0 then
-                redis.call('LTRIM', messages_key, total_messages_to_delete, -1)
-                redis.call('HINCRBY', metadata_key, 'processed_count', total_messages_to_delete)
-            end
-
-            return total_messages_to_delete
-            """
-
             # Ejecutar script
             persistency_time = int(os.getenv("PERSISTENCY_ON_TOPIC_TIME", "60"))
-            deleted = self.redis.eval(
-                lua_script,
-                3,
-                messages_key,
-                offset_key,
-                metadata_key,
-                str(force_cleanup_by_time).lower(),
-                persistency_time
-            )
+            if topics_storage.is_stream(self.redis, topic_name):
+                deleted = topics_storage.cleanup_messages(
+                    self.redis, topic_name, force_cleanup_by_time,
+                    persistency_time
+                )
+                if endpoint:
+                    # Realizar todas las operaciones en el backup
+                    topics_storage.cleanup_messages(
+                        self.redis_backup, topic_name, force_cleanup_by_time,
+                        persistency_time
+                    )
+                logger.info("Cleaned up %d messages from topic '%s'", deleted, topic_name) # pylint: disable=C0301
+                return deleted
 
-            if endpoint:
-                # Realizar todas las operaciones en el backup
-                self.redis_backup.eval(
-                    lua_script,
-                    3,
-                    messages_key,
-                    offset_key,
-                    metadata_key,
-                    str(force_cleanup_by_time).lower(),
+            if topics_segments.is_segmented(self.redis, topic_name):
+                deleted = topics_segments.cleanup_messages(
+                    self.redis, topic_name, force_cleanup_by_time,
                     persistency_time
                 )
+                if endpoint:
+                    # Realizar todas las operaciones en el backup
+                    topics_segments.cleanup_messages(
+                        self.redis_backup, topic_name, force_cleanup_by_time,
+                        persistency_time
+                    )
+                logger.info("Cleaned up %d messages from topic '%s'", deleted, topic_name) # pylint: disable=C0301
+                return deleted
+
+            keys = [
+                messages_key, offset_key, metadata_key,
+                TopicKeyBuilder.timeline_key(topic_name)
+            ]
+            args = [str(force_cleanup_by_time).lower(), persistency_time]
+            deleted = CLEANUP_SCRIPT(self.redis, keys, args)
+
+            if endpoint:
+                # Realizar todas las operaciones en el backup
+                CLEANUP_SCRIPT(self.redis_backup, keys, args)
             logger.info("Cleaned up %d messages from topic '%s'", deleted, topic_name) # pylint: disable=C0301
             return deleted
 
@@ -681,7 +1117,13 @@ class MOMTopicManager:
             subscribers = [s for s in self.redis.smembers(subscribers_key)]
 
             messages_key = TopicKeyBuilder.messages_key(topic_name)
-            message_count = self.redis.llen(messages_key)
+            if metadata.get("storage") == STORAGE_STREAM:
+                message_count = self.redis.xlen(messages_key)
+            elif metadata.get("storage") == STORAGE_SEGMENTED:
+                message_count = int(metadata["message_count"]) \
+                    - int(metadata["processed_count"])
+            else:
+                message_count = self.redis.llen(messages_key)
 
             offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
             offsets = {
@@ -744,27 +1186,51 @@ class MOMTopicManager:
                 
                 metadata_key = TopicKeyBuilder.metadata_key(topic_name)
                 principal = bool(int(self.redis.hget(metadata_key, "original_node")))
+                subscribers = self.redis.smembers(
+                    TopicKeyBuilder.subscribers_key(topic_name)
+                )
+                partition_topics = topics_partitions.partition_names(
+                    self.redis, topic_name
+                )
 
                 # Eliminar en transacción
                 pipe.multi()
+                for subscriber in subscribers:
+                    subscriptions.remove_subscription(
+                        pipe, subscriber, subscriptions.TOPIC, topic_name
+                    )
                 keys = [
                     TopicKeyBuilder.metadata_key(topic_name),
                     TopicKeyBuilder.subscribers_key(topic_name),
                     TopicKeyBuilder.messages_key(topic_name),
                     TopicKeyBuilder.subscriber_offsets_key(topic_name),
+                    TopicKeyBuilder.timeline_key(topic_name),
+                    TopicKeyBuilder.filters_key(topic_name),
                 ]
+                segment_keys = topics_segments.segment_keys(
+                    self.redis, topic_name
+                )
                 pipe.delete(*keys)
+                # Los segmentos pueden ser muchos, se liberan sin bloquear
+                pipe.unlink(*segment_keys)
 
                 pipe.execute()  # Borrado atómico
 
                 if endpoint:
                     # Realizar todas las operaciones en el backup
                     self.redis_backup.delete(*keys)
+                    self.redis_backup.unlink(
+                        *topics_segments.segment_keys(self.redis_backup, topic_name) # pylint: disable=C0301
+                    )
                     # Decir en cuales nodos ya no existe el topico
                     self.redis_nodes.srem(WHOAMI, f"topic:{topic_name}")
                     self.redis_nodes.srem(SOURCE_QUEUE_NODE_ID, f"topic:{topic_name}")
                     logger.info(f"Topic {topic_name} deleted in {SOURCE_QUEUE_NODE_ID} and {WHOAMI}")
 
+                # Cada partición se borra y se replica como un tópico
+                for partition in partition_topics:
+                    self.delete_topic(partition, principal, endpoint)
+
                 replication_operation = False
                 if principal is True:
                     replication_operation = self.replication_client.replicate_delete_topic( # pylint: disable=C0301
@@ -808,15 +1274,10 @@ class MOMTopicManager:
             TopicOperationResult: Result with list of topics.
         """
         try:
-            topic_pattern = f"{TopicKeyBuilder.TOPIC_PREFIX}:*:{TopicKeyBuilder.SUBSCRIBERS_SUFFIX}"  # pylint: disable=C0301
-            subscriber_keys = self.redis.keys(topic_pattern)
-
-            subscribed_topics = []
-            for key in subscriber_keys:
-                topic_name = key.split(":")[2]
-
-                if self.redis.sismember(key, self.user):
-                    subscribed_topics.append(topic_name)
+            # Una sola lectura del índice de suscripciones del usuario
+            subscribed_topics = subscriptions.get_subscriptions(
+                self.redis, self.user
+            )["topics"]
 
             return TopicOperationResult(
                 True,
@@ -855,14 +1316,16 @@ class MOMTopicManager:
                 )
             else:
                 # Limpiar todos los temas
-                # Buscar todos los temas usando un patrón en las claves
+                # Buscar todos los temas con SCAN para no bloquear Redis
                 metadata_pattern = TopicKeyBuilder.metadata_key_pattern()
-                all_metadata_keys = self.redis.keys(metadata_pattern)
+                all_metadata_keys = self.redis.scan_iter(
+                    match=metadata_pattern, count=100
+                )
 
                 total_deleted = 0
                 for metadata_key in all_metadata_keys:
                     # Extraer el nombre del tema de la clave de metadata
-                    topic_name = metadata_key.decode().split(":")[-1]
+                    topic_name = metadata_key.split(":")[2]
                     deleted_count = self._cleanup_processed_messages(
                         topic_name, force_cleanup_by_time=True
                     )  # pylint: disable=C0301
@@ -880,6 +1343,6 @@ class MOMTopicManager:
             )  # pylint: disable=C0301
             return TopicOperationResult(
                 False,
-                MOMTopicStatus.OPERATION_FAILED,
+                MOMTopicStatus.INTERNAL_ERROR,
                 f"Error scheduling cleanup: {str(e)}",
             )
@@ -0,0 +1,191 @@
+"""
+This module contains the coalesced replication of topic offsets.
+By default every consume that moves an offset replicates it with a
+synchronous gRPC call. With OFFSET_REPLICATION_MODE=coalesced the new
+offsets are kept in memory instead and only the latest offset of each
+(topic, subscriber) is sent:
+    - A daemon thread flushes the pending offsets every
+      OFFSET_FLUSH_INTERVAL_MS, so a replica never lags more than one
+      interval plus the time of the calls.
+    - The flush is brought forward once OFFSET_FLUSH_ADVANCES offsets
+      are pending.
+    - The offsets that fail are kept for the next flush unless a newer
+      one arrived, and the pending offsets are flushed on shutdown.
+"""
+
+import os
+import threading
+from app.domain.logger_config import logger
+
+OFFSET_REPLICATION_SYNC = "sync"
+OFFSET_REPLICATION_COALESCED = "coalesced"
+OFFSET_REPLICATION_MODE = os.getenv("OFFSET_REPLICATION_MODE", OFFSET_REPLICATION_SYNC) # pylint: disable=C0301
+OFFSET_FLUSH_INTERVAL = int(os.getenv("OFFSET_FLUSH_INTERVAL_MS", "200")) / 1000
+OFFSET_FLUSH_ADVANCES = int(os.getenv("OFFSET_FLUSH_ADVANCES", "100"))
+
+
+class OffsetReplicator:
+    """
+    Keeps the latest offset of every subscriber and replicates it in
+    the background.
+    """
+
+    def __init__(
+        self, interval: float = OFFSET_FLUSH_INTERVAL,
+        max_advances: int = OFFSET_FLUSH_ADVANCES
+    ):
+        self.interval = interval
+        self.max_advances = max_advances
+        self._pending = {}
+        self._advances = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "running": False,
+            "submitted": 0,
+            "replicated": 0,
+            "coalesced": 0,
+            "failed": 0,
+            "flushes": 0,
+        }
+
+    def start(self) -> None:
+        """
+        Start the flush thread if it is not running.
+        """
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="offset-replication", daemon=True
+            )
+            self._thread.start()
+            self._stats["running"] = True
+        logger.info("Replicación agrupada de offsets iniciada")
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Stop the flush thread and send the offsets still pending.
+        Args:
+            timeout (float): Seconds to wait for the thread.
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self.flush()
+        with self._lock:
+            self._stats["running"] = False
+        logger.info("Replicación agrupada de offsets detenida")
+
+    def submit(
+        self, topic_name: str, subscriber: str, offset: int, client
+    ) -> bool:
+        """
+        Queue the new offset of a subscriber, replacing the one pending.
+        Args:
+            topic_name (str): The name of the topic.
+            subscriber (str): The subscriber that consumed.
+            offset (int): The new offset of the subscriber.
+            client (TopicReplicationClient): Client of the node that
+                must receive the offset.
+        Returns:
+            bool: True, the offset is replicated by the next flush.
+        """
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        with self._lock:
+            key = (topic_name, subscriber)
+            if key in self._pending:
+                self._stats["coalesced"] += 1
+            self._pending[key] = (offset, client)
+            self._stats["submitted"] += 1
+            self._advances += 1
+            if self._advances >= self.max_advances:
+                self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """
+        Replicate the latest offset of every pending subscriber.
+        Returns:
+            int: Number of offsets replicated.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._advances = 0
+        if not pending:
+            return 0
+
+        replicated = 0
+        failed = {}
+        for (topic_name, subscriber), (offset, client) in pending.items():
+            if client.replicate_consume_message(topic_name, subscriber, offset):
+                replicated += 1
+            else:
+                failed[(topic_name, subscriber)] = (offset, client)
+
+        with self._lock:
+            # Se reintentan en el siguiente flush salvo que haya uno nuevo
+            for key, value in failed.items():
+                self._pending.setdefault(key, value)
+            self._stats["replicated"] += replicated
+            self._stats["failed"] += len(failed)
+            self._stats["flushes"] += 1
+        return replicated
+
+    def stats(self) -> dict:
+        """
+        Get the counters of the offset replication.
+        Returns:
+            dict: Submitted, replicated, coalesced and pending offsets.
+        """
+        with self._lock:
+            return dict(self._stats, pending=len(self._pending))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error replicando los offsets agrupados")
+
+
+_replicator = None
+
+
+def get_offset_replicator() -> OffsetReplicator:
+    """
+    Get the offset replicator of the node, it is created on the first call.
+    Returns:
+        OffsetReplicator: The replicator of the topic offsets.
+    """
+    global _replicator # pylint: disable=W0603
+    if _replicator is None:
+        _replicator = OffsetReplicator()
+    return _replicator
+
+
+def replicate_offset(
+    topic_name: str, subscriber: str, offset: int, client
+) -> bool:
+    """
+    Replicate the offset of a subscriber with the configured mode.
+    Args:
+        topic_name (str): The name of the topic.
+        subscriber (str): The subscriber that consumed.
+        offset (int): The new offset of the subscriber.
+        client (TopicReplicationClient): Client of the target node.
+    Returns:
+        bool: Whether the offset was replicated or queued.
+    """
+    if OFFSET_REPLICATION_MODE == OFFSET_REPLICATION_COALESCED:
+        return get_offset_replicator().submit(
+            topic_name, subscriber, offset, client
+        )
+    return client.replicate_consume_message(topic_name, subscriber, offset)
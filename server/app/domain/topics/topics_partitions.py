@@ -0,0 +1,89 @@
+"""
+This module contains the helpers of the partitioned topics.
+A topic created with N partitions keeps no messages itself, every
+partition is an internal topic named "<name>.<n>" with its own list,
+offsets and storage keys, so one hot topic is spread over N Redis keys
+that can live in different shards:
+    - Publish picks the partition with the CRC32 of the partition key,
+      or round-robin when the message has no key.
+    - Subscribe, unsubscribe and delete are applied to every partition,
+      so every subscriber has one offset per partition.
+    - Consume reads one partition or all of them, starting by a random
+      partition so no partition is starved.
+Partitions are created, replicated and cleaned like any other topic,
+the parent only keeps the number of partitions in its metadata.
+"""
+
+import itertools
+import zlib
+from app.domain.utils import TopicKeyBuilder, PARTITION_SEPARATOR
+
+MAX_TOPIC_PARTITIONS = 64
+
+_round_robin = itertools.count()
+
+
+def partition_name(topic_name: str, partition: int) -> str:
+    """
+    Get the name of the internal topic of a partition.
+    Args:
+        topic_name (str): The name of the partitioned topic.
+        partition (int): The number of the partition.
+    Returns:
+        str: The name of the partition topic.
+    """
+    return f"{topic_name}{PARTITION_SEPARATOR}{partition}"
+
+
+def is_partition(topic_name: str) -> bool:
+    """
+    Check whether a topic is the partition of another topic.
+    Args:
+        topic_name (str): The name of the topic.
+    Returns:
+        bool: True if the topic is a partition.
+    """
+    return PARTITION_SEPARATOR in topic_name
+
+
+def get_partitions(redis, topic_name: str) -> int:
+    """
+    Get the number of partitions of a topic.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+    Returns:
+        int: The partitions, 1 when the topic is not partitioned.
+    """
+    metadata_key = TopicKeyBuilder.metadata_key(topic_name)
+    return int(redis.hget(metadata_key, "partitions") or 1)
+
+
+def partition_names(redis, topic_name: str) -> list:
+    """
+    Get the names of the partitions of a topic.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+    Returns:
+        list: The partition topics, empty when it is not partitioned.
+    """
+    partitions = get_partitions(redis, topic_name)
+    if partitions == 1:
+        return []
+    return [partition_name(topic_name, p) for p in range(partitions)]
+
+
+def choose_partition(partitions: int, partition_key: str = None) -> int:
+    """
+    Choose the partition of a message.
+    Args:
+        partitions (int): The partitions of the topic.
+        partition_key (str): Messages with the same key go to the same
+            partition, round-robin when it is None.
+    Returns:
+        int: The number of the partition.
+    """
+    if partition_key is None:
+        return next(_round_robin) % partitions
+    return zlib.crc32(partition_key.encode("utf-8")) % partitions
@@ -0,0 +1,330 @@
+"""
+This module contains the pattern subscriptions of the topics.
+Topic names are hierarchical, their levels are separated by "/", and a
+user can subscribe to a pattern of topics instead of a single one:
+    - "*" matches exactly one level, "orders/*/created" matches
+      "orders/eu/created".
+    - "#" matches the remaining levels, none included, and can only be
+      the last level, "orders/#" matches "orders" and "orders/eu/created".
+The subscribers of every pattern are kept in
+mom:patterns:<pattern>:subscribers next to the set mom:patterns of the
+patterns in use, and every process keeps them in memory in a trie of
+the pattern levels. A publish walks the trie with the levels of its
+topic, so the pattern subscribers of a topic are resolved without
+scanning the patterns. The trie is loaded from Redis on its first use,
+every change of the patterns, local or replicated from another node,
+is published on mom:patterns:changes in the same round trip, and a
+daemon thread listening to it marks the trie stale so the next use
+reloads it.
+"""
+
+import threading
+import time
+from app.domain import subscriptions
+from app.domain.logger_config import logger
+from app.domain.utils import (
+    PatternKeyBuilder, TopicKeyBuilder, TOPIC_LEVEL_SEPARATOR
+)
+from app.domain.topics import topics_partitions
+
+SINGLE_LEVEL = "*"
+MULTI_LEVEL = "#"
+PATTERN_SCAN_COUNT = 100
+PATTERN_RECONNECT_SECONDS = 1
+
+
+def is_pattern(name: str) -> bool:
+    """
+    Check whether a name is a pattern of topics.
+    Args:
+        name (str): The name of the topic or pattern.
+    Returns:
+        bool: True if the name has a wildcard.
+    """
+    return SINGLE_LEVEL in name or MULTI_LEVEL in name
+
+
+def is_valid_pattern(pattern: str) -> bool:
+    """
+    Check that the wildcards of a pattern are whole levels and that "#"
+    is only used as the last level.
+    Args:
+        pattern (str): The pattern of topics.
+    Returns:
+        bool: True if the pattern is valid.
+    """
+    levels = pattern.split(TOPIC_LEVEL_SEPARATOR)
+    for position, level in enumerate(levels):
+        if not level:
+            return False
+        if is_pattern(level) and level not in (SINGLE_LEVEL, MULTI_LEVEL):
+            return False
+        if level == MULTI_LEVEL and position != len(levels) - 1:
+            return False
+    return True
+
+
+def matches(pattern: str, topic_name: str) -> bool:
+    """
+    Check whether a topic matches a pattern.
+    Args:
+        pattern (str): The pattern of topics.
+        topic_name (str): The name of the topic.
+    Returns:
+        bool: True if the topic matches the pattern.
+    """
+    pattern_levels = pattern.split(TOPIC_LEVEL_SEPARATOR)
+    levels = topic_name.split(TOPIC_LEVEL_SEPARATOR)
+    for position, level in enumerate(pattern_levels):
+        if level == MULTI_LEVEL:
+            return True
+        if position >= len(levels) or level not in (SINGLE_LEVEL, levels[position]): # pylint: disable=C0301
+            return False
+    return len(pattern_levels) == len(levels)
+
+
+def find_topics(redis, pattern: str) -> list:
+    """
+    Find the topics of the node that match a pattern, the scan is
+    limited to the keys of the literal levels before the first wildcard.
+    Args:
+        redis: Redis client to read from.
+        pattern (str): The pattern of topics.
+    Returns:
+        list: The sorted names of the matching topics.
+    """
+    levels = pattern.split(TOPIC_LEVEL_SEPARATOR)
+    literal = []
+    for level in levels:
+        if is_pattern(level):
+            break
+        literal.append(level)
+    prefix = TOPIC_LEVEL_SEPARATOR.join(literal)
+
+    topics = set()
+    for key in redis.scan_iter(
+        match=TopicKeyBuilder.metadata_key(f"{prefix}*"),
+        count=PATTERN_SCAN_COUNT
+    ):
+        topic_name = key.split(":")[2]
+        # Las particiones se suscriben desde su tópico
+        if not topics_partitions.is_partition(topic_name) \
+                and matches(pattern, topic_name):
+            topics.add(topic_name)
+    return sorted(topics)
+
+
+def add_pattern(redis, pattern: str, user: str) -> None:
+    """
+    Store the subscription of a user to a pattern.
+    Args:
+        redis: Redis client to write to.
+        pattern (str): The pattern of topics.
+        user (str): The subscribed user.
+    """
+    with redis.pipeline() as pipe:
+        pipe.sadd(PatternKeyBuilder.subscribers_key(pattern), user)
+        pipe.sadd(PatternKeyBuilder.patterns_key(), pattern)
+        subscriptions.add_subscription(
+            pipe, user, subscriptions.PATTERN, pattern
+        )
+        pipe.publish(PatternKeyBuilder.changes_channel(), pattern)
+        pipe.execute()
+
+
+def remove_pattern(redis, pattern: str, user: str) -> None:
+    """
+    Remove the subscription of a user to a pattern, the pattern is
+    dropped once it has no subscribers.
+    Args:
+        redis: Redis client to write to.
+        pattern (str): The pattern of topics.
+        user (str): The unsubscribed user.
+    """
+    subscribers_key = PatternKeyBuilder.subscribers_key(pattern)
+    with redis.pipeline() as pipe:
+        pipe.srem(subscribers_key, user)
+        subscriptions.remove_subscription(
+            pipe, user, subscriptions.PATTERN, pattern
+        )
+        pipe.publish(PatternKeyBuilder.changes_channel(), pattern)
+        pipe.scard(subscribers_key)
+        remaining = pipe.execute()[-1]
+    if not remaining:
+        redis.srem(PatternKeyBuilder.patterns_key(), pattern)
+
+
+class _PatternNode:
+    """
+    Level of the trie, with the users whose pattern ends on it.
+    """
+    __slots__ = ("children", "users")
+
+    def __init__(self):
+        self.children = {}
+        self.users = set()
+
+
+class PatternIndex:
+    """
+    Trie of the pattern subscriptions of the node, every level of a
+    pattern is a node so a topic is matched in one walk of its levels.
+    """
+
+    def __init__(self):
+        self._root = _PatternNode()
+        self._lock = threading.Lock()
+        self._stale = threading.Event()
+        self._stale.set()
+
+    @property
+    def stale(self) -> bool:
+        """Whether the patterns changed since the trie was loaded."""
+        return self._stale.is_set()
+
+    def load(self, redis) -> None:
+        """
+        Rebuild the trie from the patterns stored in Redis.
+        Args:
+            redis: Redis client to read from.
+        """
+        # Un cambio durante la carga vuelve a marcarlo
+        self._stale.clear()
+        patterns = sorted(redis.smembers(PatternKeyBuilder.patterns_key()))
+        with redis.pipeline(transaction=False) as pipe:
+            for pattern in patterns:
+                pipe.smembers(PatternKeyBuilder.subscribers_key(pattern))
+            members = pipe.execute()
+
+        root = _PatternNode()
+        for pattern, users in zip(patterns, members):
+            node = self._walk(root, pattern)
+            node.users.update(users)
+        with self._lock:
+            self._root = root
+
+    def add(self, pattern: str, user: str) -> None:
+        """
+        Add the subscription of a user to a pattern.
+        Args:
+            pattern (str): The pattern of topics.
+            user (str): The subscribed user.
+        """
+        with self._lock:
+            self._walk(self._root, pattern).users.add(user)
+
+    def remove(self, pattern: str, user: str) -> None:
+        """
+        Remove the subscription of a user to a pattern, the levels left
+        without users are pruned.
+        Args:
+            pattern (str): The pattern of topics.
+            user (str): The unsubscribed user.
+        """
+        with self._lock:
+            path = [self._root]
+            for level in pattern.split(TOPIC_LEVEL_SEPARATOR):
+                node = path[-1].children.get(level)
+                if node is None:
+                    return
+                path.append(node)
+            path[-1].users.discard(user)
+
+            levels = pattern.split(TOPIC_LEVEL_SEPARATOR)
+            for level, parent, node in zip(
+                reversed(levels), reversed(path[:-1]), reversed(path[1:])
+            ):
+                if node.users or node.children:
+                    break
+                del parent.children[level]
+
+    def match(self, topic_name: str) -> set:
+        """
+        Get the users subscribed to a pattern that matches a topic.
+        Args:
+            topic_name (str): The name of the topic.
+        Returns:
+            set: The matching users.
+        """
+        users = set()
+        with self._lock:
+            nodes = [self._root]
+            for level in topic_name.split(TOPIC_LEVEL_SEPARATOR):
+                next_nodes = []
+                for node in nodes:
+                    rest = node.children.get(MULTI_LEVEL)
+                    if rest is not None:
+                        users.update(rest.users)
+                    for key in (level, SINGLE_LEVEL):
+                        child = node.children.get(key)
+                        if child is not None:
+                            next_nodes.append(child)
+                nodes = next_nodes
+                if not nodes:
+                    return users
+
+            # "#" también cubre el nivel del propio tópico
+            for node in nodes:
+                users.update(node.users)
+                rest = node.children.get(MULTI_LEVEL)
+                if rest is not None:
+                    users.update(rest.users)
+        return users
+
+    def watch(self, redis) -> None:
+        """
+        Start the daemon thread that marks the trie stale on every
+        change of the patterns.
+        Args:
+            redis: Redis client whose changes channel is listened to.
+        """
+        threading.Thread(
+            target=self._watch, args=(redis,), name="pattern-index",
+            daemon=True
+        ).start()
+
+    def _watch(self, redis) -> None:
+        while True:
+            pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(PatternKeyBuilder.changes_channel())
+                # Los cambios mientras no se escuchaba se recargan
+                self._stale.set()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._stale.set()
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error escuchando los cambios de patrones")
+                time.sleep(PATTERN_RECONNECT_SECONDS)
+            finally:
+                pubsub.close()
+
+    @staticmethod
+    def _walk(root: _PatternNode, pattern: str) -> _PatternNode:
+        node = root
+        for level in pattern.split(TOPIC_LEVEL_SEPARATOR):
+            node = node.children.setdefault(level, _PatternNode())
+        return node
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_pattern_index(redis) -> PatternIndex:
+    """
+    Get the pattern index of the process, it is loaded on the first
+    call and reloaded when the patterns changed.
+    Args:
+        redis: Redis client the patterns are loaded from.
+    Returns:
+        PatternIndex: The trie of the pattern subscriptions.
+    """
+    global _index # pylint: disable=W0603
+    with _index_lock:
+        if _index is None:
+            _index = PatternIndex()
+            _index.watch(redis)
+        if _index.stale:
+            _index.load(redis)
+    return _index
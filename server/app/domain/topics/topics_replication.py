@@ -20,29 +20,61 @@ from app.grpc.replication_service_pb2 import (
     TopicForwardConsumeMessageRequest
 )
 from app.grpc.replication_service_pb2_grpc import TopicReplicationStub
+from app.domain.replication_stream import ReplicationStream
 from app.domain.models import TopicOperationResult, MOMTopicStatus
 from app.domain.utils import get_node_stubs
+from app.domain.topics import topics_filters
 
 class TopicReplicationClient:
     """Client for topic replication via gRPC"""
 
-    def __init__(self, stub: TopicReplicationStub, target_node_desc: str):
+    def __init__(
+        self, stub: TopicReplicationStub, target_node_desc: str,
+        stream: ReplicationStream = None
+    ):
         """
         Initialize the client with a pre-created gRPC stub.
         Args:
             stub (TopicReplicationStub): The gRPC stub to use for calls.
             target_node_desc (str): Description of the destination
             node (for logging).
+            stream (ReplicationStream): Replication stream to the same
+                node, None to always use the unary calls.
         """
         self.stub = stub
         self.target_node_desc = target_node_desc
+        self.stream = stream
+
+    def _send(self, operation: str, rpc, request):
+        """
+        Send a replication request over the replication stream of the
+        node, or with its unary call when the stream can't be used. The
+        stream keeps it in the journal when the node is down.
+        Args:
+            operation (str): Field of the operation in ReplicationOperation.
+            rpc: The unary call of the operation.
+            request: The request of the operation.
+        Returns:
+            ReplicationResponse: The response of the other node.
+        """
+        if self.stream is not None:
+            return self.stream.replicate(operation, rpc, request)
+        return rpc(request)
 
     def replicate_create_topic(
-            self, topic_name: str, owner: str, created_at
+            self, topic_name: str, owner: str, created_at, storage: str = "",
+            partitions: int = 1
             ) -> bool:
         """
         Replicate topic creation to the replica node
 
+        Args:
+            topic_name (str): The name of the topic to create.
+            owner (str): The owner of the topic.
+            created_at (float): The timestamp of the topic creation.
+            storage (str): Storage engine of the topic messages.
+            partitions (int): Number of partitions of the topic.
+
         Returns:
             bool: True if the topic was created successfully, False otherwise.
         """
@@ -55,9 +87,13 @@ class TopicReplicationClient:
                 topic_name=topic_name,
                 owner=owner,
                 created_at=created_at,
+                storage=storage,
+                partitions=partitions,
             )
 
-            response = self.stub.TopicReplicateCreate(request)
+            response = self._send(
+                "create_topic", self.stub.TopicReplicateCreate, request
+            )
 
             if response.success:
                 return True
@@ -93,7 +129,9 @@ class TopicReplicationClient:
                 requester=owner,
             )
 
-            response = self.stub.TopicReplicateDelete(request)
+            response = self._send(
+                "delete_topic", self.stub.TopicReplicateDelete, request
+            )
 
             if response.success:
                 return True
@@ -109,7 +147,8 @@ class TopicReplicationClient:
             return False
 
     def replicate_publish_message(
-        self, topic_name: str, publisher: str, message: str, timestamp: float
+        self, topic_name: str, publisher: str, message: str, timestamp: float,
+        attributes: dict = None
     ) -> bool:
         """
         Replicate message publishing to the replica node
@@ -119,6 +158,7 @@ class TopicReplicationClient:
             publisher (str): The user publishing the message.
             message (str): The message content.
             timestamp (float): The timestamp of the message.
+            attributes (dict): The attributes of the message.
 
         Returns:
             bool: True if the message was replicated successfully,
@@ -134,9 +174,14 @@ class TopicReplicationClient:
                 publisher=publisher,
                 message=message,
                 timestamp=timestamp,
+                attributes=attributes or {},
             )
 
-            response = self.stub.TopicReplicatePublishMessage(request)
+            response = self._send(
+                "publish_message",
+                self.stub.TopicReplicatePublishMessage,
+                request
+            )
 
             if response.success:
                 return True
@@ -175,7 +220,11 @@ class TopicReplicationClient:
                 topic_name=topic_name, subscriber=subscriber, offset=offset
             )
 
-            response = self.stub.TopicReplicateConsumeMessage(request)
+            response = self._send(
+                "consume_message",
+                self.stub.TopicReplicateConsumeMessage,
+                request
+            )
 
             if response.success:
                 return True
@@ -190,13 +239,20 @@ class TopicReplicationClient:
             logger.exception("Error consuming message replication to topic '%s'", topic_name) # pylint: disable=C0301
             return False
 
-    def replicate_subscribe(self, topic_name: str, subscriber: str) -> bool:
+    def replicate_subscribe(
+        self, topic_name: str, subscriber: str, offset: int = None,
+        message_filter: dict = None
+    ) -> bool:
         """
         Replicate subscription to the replica node
 
         Args:
             topic_name (str): The name of the topic.
             subscriber (str): The user subscribing to the topic.
+            offset (int): Initial offset of the subscriber, None starts
+                after the messages of the replica.
+            message_filter (dict): Filter of the messages of the
+                subscription.
 
         Returns:
             bool: True if the subscription was replicated 
@@ -208,10 +264,13 @@ class TopicReplicationClient:
 
         try:
             request = TopicSubscribeRequest(
-                topic_name=topic_name, subscriber=subscriber
+                topic_name=topic_name, subscriber=subscriber, offset=offset,
+                filter=topics_filters.encode_filter(message_filter)
             )
 
-            response = self.stub.TopicReplicateSubscribe(request)
+            response = self._send(
+                "topic_subscribe", self.stub.TopicReplicateSubscribe, request
+            )
 
             if response.success:
                 return True
@@ -247,7 +306,11 @@ class TopicReplicationClient:
                 topic_name=topic_name, subscriber=subscriber
             )
 
-            response = self.stub.TopicReplicateUnsubscribe(request)
+            response = self._send(
+                "topic_unsubscribe",
+                self.stub.TopicReplicateUnsubscribe,
+                request
+            )
 
             if response.success:
                 return True
@@ -262,7 +325,11 @@ class TopicReplicationClient:
             logger.exception("Error unsubscribing replication from topic '%s'", topic_name) # pylint: disable=C0301
             return False
 
-    def forward_subscribe(self, topic_name: str, user: str, node: str) -> TopicOperationResult:
+    def forward_subscribe(
+        self, topic_name: str, user: str, node: str,
+        start_position: str = None, start_timestamp: float = None,
+        message_filter: dict = None
+    ) -> TopicOperationResult:
         _ , topic_stub = get_node_stubs(node)
 
         if not topic_stub:
@@ -276,6 +343,9 @@ class TopicReplicationClient:
             request = TopicForwardSubscribeRequest(
                 topic_name=topic_name,
                 subscriber=user,
+                start_position=start_position or "",
+                start_timestamp=start_timestamp,
+                filter=topics_filters.encode_filter(message_filter),
             )
             response = topic_stub.TopicReplicateForwardSubscribe(request)
             
@@ -354,7 +424,10 @@ class TopicReplicationClient:
                 details=error_message
             )
 
-    def forward_publish(self, topic_name: str, user: str, message: str, node: str) -> TopicOperationResult:
+    def forward_publish(
+        self, topic_name: str, user: str, message: str, node: str,
+        attributes: dict = None
+    ) -> TopicOperationResult:
         _ , topic_stub = get_node_stubs(node)
 
         if not topic_stub:
@@ -369,6 +442,7 @@ class TopicReplicationClient:
                 topic_name=topic_name,
                 publisher=user,
                 message=message,
+                attributes=attributes or {},
             )
             response = topic_stub.TopicReplicateForwardPublishMessage(request)
             
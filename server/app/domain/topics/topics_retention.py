@@ -0,0 +1,200 @@
+"""
+This module contains the background retention worker for topics.
+The worker runs in a daemon thread started by the API and cleans the
+topics of the node without blocking Redis:
+    - The topics are found with SCAN in small batches, never with KEYS.
+    - Every pass cleans first the topics whose backlog grew the most
+      since the previous pass, the topics with no backlog are skipped.
+    - Cleanups and SCAN steps are spaced so the worker never runs more
+      than RETENTION_TOPICS_PER_SECOND cleanups per second.
+The counters of the worker are exposed by the admin stats endpoint.
+"""
+
+import os
+import threading
+import time
+from app.adapters.factory import ObjectFactory
+from app.adapters.db import Database
+from app.domain.logger_config import logger
+from app.domain.topics.topics_manager import MOMTopicManager
+from app.domain.utils import TopicKeyBuilder
+
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL_SECONDS", "60"))
+RETENTION_SCAN_COUNT = int(os.getenv("RETENTION_SCAN_COUNT", "100"))
+RETENTION_TOPICS_PER_SECOND = float(os.getenv("RETENTION_TOPICS_PER_SECOND", "20"))
+
+
+class TopicRetentionWorker:
+    """
+    Background worker that cleans the topics of the node periodically.
+    """
+
+    def __init__(
+        self, redis_connection, interval: int = RETENTION_INTERVAL,
+        scan_count: int = RETENTION_SCAN_COUNT,
+        topics_per_second: float = RETENTION_TOPICS_PER_SECOND
+    ):
+        self.redis = redis_connection
+        self.interval = interval
+        self.scan_count = scan_count
+        self.pause = 1 / topics_per_second if topics_per_second > 0 else 0
+        self._last_counts = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "running": False,
+            "passes": 0,
+            "topics_scanned": 0,
+            "topics_cleaned": 0,
+            "pending_topics": 0,
+            "deleted_last_pass": 0,
+            "deleted_total": 0,
+            "last_pass_started": None,
+            "last_pass_finished": None,
+        }
+
+    def start(self) -> None:
+        """
+        Start the worker thread if it is not running.
+        """
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="topic-retention", daemon=True
+        )
+        self._thread.start()
+        self._update(running=True)
+        logger.info("Worker de retención de tópicos iniciado")
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Stop the worker thread, the topic being cleaned is finished first.
+        Args:
+            timeout (float): Seconds to wait for the thread.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._update(running=False)
+        logger.info("Worker de retención de tópicos detenido")
+
+    def stats(self) -> dict:
+        """
+        Get the progress counters of the worker.
+        Returns:
+            dict: Passes, scanned and cleaned topics and deleted messages.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _update(self, **values) -> None:
+        with self._lock:
+            self._stats.update(values)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_pass()
+            except Exception: # pylint: disable=W0718
+                logger.exception("Error en la pasada de retención de tópicos")
+            self._stop.wait(self.interval)
+
+    def _scan_topics(self) -> list:
+        """
+        Find the topics with backlog using SCAN in small batches.
+        Returns:
+            list: (growth, backlog, topic_name, owner) of each topic.
+        """
+        pattern = TopicKeyBuilder.metadata_key_pattern()
+        candidates = []
+        counts = {}
+        cursor = None
+        while cursor != 0 and not self._stop.is_set():
+            cursor, keys = self.redis.scan(
+                cursor or 0, match=pattern, count=self.scan_count
+            )
+            if not keys:
+                continue
+
+            with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hmget(key, "message_count", "processed_count", "owner")
+                rows = pipe.execute()
+
+            for key, (message_count, processed_count, owner) in zip(keys, rows):
+                topic_name = key.split(":")[2]
+                message_count = int(message_count or 0)
+                backlog = message_count - int(processed_count or 0)
+                previous = self._last_counts.get(topic_name, 0)
+                counts[topic_name] = message_count
+                if backlog > 0:
+                    candidates.append(
+                        (message_count - previous, backlog, topic_name, owner)
+                    )
+
+            with self._lock:
+                self._stats["topics_scanned"] += len(keys)
+            # Cada paso del SCAN también respeta el ritmo del worker
+            self._stop.wait(self.pause)
+
+        # Los tópicos borrados dejan de contarse
+        self._last_counts = counts
+        return candidates
+
+    def run_pass(self) -> int:
+        """
+        Run one retention pass over every topic of the node.
+        Returns:
+            int: Number of messages deleted in the pass.
+        """
+        self._update(last_pass_started=time.time(), topics_scanned=0)
+        candidates = self._scan_topics()
+
+        # Primero los tópicos que más crecieron desde la pasada anterior
+        candidates.sort(reverse=True)
+        self._update(pending_topics=len(candidates))
+
+        deleted = 0
+        for index, (_, _, topic_name, owner) in enumerate(candidates):
+            if self._stop.is_set():
+                break
+            manager = MOMTopicManager(self.redis, owner or "")
+            deleted_topic = manager._cleanup_processed_messages( # pylint: disable=W0212
+                topic_name, force_cleanup_by_time=True, endpoint=True
+            )
+            deleted += deleted_topic
+            with self._lock:
+                self._stats["topics_cleaned"] += 1
+                self._stats["deleted_total"] += deleted_topic
+                self._stats["pending_topics"] = len(candidates) - index - 1
+            self._stop.wait(self.pause)
+
+        with self._lock:
+            self._stats["passes"] += 1
+            self._stats["deleted_last_pass"] = deleted
+            self._stats["last_pass_finished"] = time.time()
+        logger.info(
+            "Pasada de retención: %d tópicos, %d mensajes eliminados",
+            len(candidates), deleted
+        )
+        return deleted
+
+
+_worker = None
+
+
+def get_retention_worker() -> TopicRetentionWorker:
+    """
+    Get the retention worker of the node, it is created on the first call.
+    Returns:
+        TopicRetentionWorker: The worker over the MOM database.
+    """
+    global _worker # pylint: disable=W0603
+    if _worker is None:
+        client = ObjectFactory.get_instance(
+            Database, ObjectFactory.MOM_DATABASE
+        ).get_client()
+        _worker = TopicRetentionWorker(client)
+    return _worker
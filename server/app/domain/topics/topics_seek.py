@@ -0,0 +1,115 @@
+"""
+This module resolves the positions a subscriber can be moved to.
+A subscriber offset is the number of messages of the topic it already
+read, so seeking only rewrites that number:
+    - "earliest" is the first message still kept by the topic and
+      "latest" skips every message published so far.
+    - An absolute offset is clamped to the messages still kept.
+    - A timestamp is resolved to the first message published at or
+      after it through the index of each storage engine, the timeline
+      of the lists, the directory of the segments or a binary search
+      over the ids of the streams, the topic is never walked.
+"""
+
+from app.domain import envelope, scripts
+from app.domain.utils import TopicKeyBuilder
+
+POSITION_EARLIEST = "earliest"
+POSITION_LATEST = "latest"
+SEEK_POSITIONS = (POSITION_EARLIEST, POSITION_LATEST)
+
+# KEYS: metadata, messages, timeline, segments | ARGV: timestamp, prefix
+# Retorna el offset del primer mensaje publicado desde el timestamp
+SEEK_TIME_SCRIPT = scripts.register("topic_seek_time", envelope.LUA_DECODE + """
+local timestamp = tonumber(ARGV[1])
+local metadata = redis.call('HMGET', KEYS[1],
+    'storage', 'message_count', 'processed_count', 'segment_size')
+local total = tonumber(metadata[2] or '0')
+local first = tonumber(metadata[3] or '0')
+
+if metadata[1] == 'stream' then
+    -- Búsqueda binaria sobre los ids <offset>-0 del stream
+    local head = redis.call('XRANGE', KEYS[2], '-', '+', 'COUNT', 1)
+    if #head == 0 then
+        return total
+    end
+    local lo = tonumber(string.match(head[1][1], '^(%d+)'))
+    local hi = total + 1
+    while lo < hi do
+        local mid = math.floor((lo + hi) / 2)
+        local entry = redis.call('XRANGE', KEYS[2], mid .. '-0', '+', 'COUNT', 1)[1]
+        local seq = tonumber(string.match(entry[1], '^(%d+)'))
+        if (envelope_header(entry[2][2]) or 0) < timestamp then
+            lo = seq + 1
+        else
+            hi = mid
+        end
+    end
+    return lo - 1
+end
+
+if metadata[1] == 'segmented' then
+    -- El directorio da el primer segmento con mensajes desde el timestamp
+    local found = redis.call('ZRANGEBYSCORE', KEYS[4], timestamp, '+inf', 'LIMIT', 0, 1)
+    if #found == 0 then
+        return total
+    end
+    local segment = tonumber(found[1])
+    local key = ARGV[2] .. segment
+    local lo, hi = 0, redis.call('LLEN', key)
+    while lo < hi do
+        local mid = math.floor((lo + hi) / 2)
+        if (envelope_header(redis.call('LINDEX', key, mid)) or 0) < timestamp then
+            lo = mid + 1
+        else
+            hi = mid
+        end
+    end
+    return segment * tonumber(metadata[4]) + lo
+end
+
+local found = redis.call('ZRANGEBYSCORE', KEYS[3], timestamp, '+inf', 'LIMIT', 0, 1)
+if #found == 0 then
+    return total
+end
+return math.max(tonumber(found[1]), first)
+""")
+
+
+def resolve_offset(
+    redis, topic_name: str, position: str = None, offset: int = None,
+    timestamp: float = None
+) -> int:
+    """
+    Resolve the offset of a position of the topic, exactly one of the
+    position, the offset or the timestamp must be given.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+        position (str): "earliest" or "latest".
+        offset (int): An absolute offset.
+        timestamp (float): Moves to the first message published at or
+            after it.
+    Returns:
+        int: The offset to give to the subscriber.
+    """
+    metadata_key = TopicKeyBuilder.metadata_key(topic_name)
+    total, first = redis.hmget(metadata_key, "message_count", "processed_count")
+    total, first = int(total or 0), int(first or 0)
+
+    if timestamp is not None:
+        return SEEK_TIME_SCRIPT(
+            redis,
+            [
+                metadata_key,
+                TopicKeyBuilder.messages_key(topic_name),
+                TopicKeyBuilder.timeline_key(topic_name),
+                TopicKeyBuilder.segments_key(topic_name),
+            ],
+            [repr(float(timestamp)), TopicKeyBuilder.segment_key(topic_name, "")] # pylint: disable=C0301
+        )
+    if position == POSITION_EARLIEST:
+        return first
+    if position == POSITION_LATEST:
+        return total
+    return min(max(offset, first), total)
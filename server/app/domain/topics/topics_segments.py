@@ -0,0 +1,298 @@
+"""
+This module contains the segmented storage engine for topics.
+A topic created with the "segmented" storage splits its messages in
+lists of a fixed size instead of a single list:
+    - The message with absolute offset N lives in the segment
+      N // segment_size, on mom:topics:<name>:segments:<segment>, at
+      the position N % segment_size. The segment size is saved in the
+      metadata when the topic is created.
+    - The directory mom:topics:<name>:segments is a sorted set with
+      every live segment scored by the timestamp of its newest message.
+    - The consume script only reads the segment that holds the offset
+      of the subscriber, the other segments are never touched.
+    - Retention drops whole segments with UNLINK, the segment being
+      written is kept until it is full, so processed_count is always
+      the first offset of the oldest live segment.
+The offsets hash works like in the other storage engines, so the
+replication of offsets and the topic info don't change.
+"""
+
+import os
+from app.domain import envelope, scripts
+from app.domain.topics import topics_filters
+from app.domain.utils import TopicKeyBuilder, STORAGE_SEGMENTED
+
+SEGMENT_SIZE = int(os.getenv("TOPIC_SEGMENT_SIZE", "1000"))
+
+# KEYS: metadata, directory | ARGV: message, timestamp, segment prefix,
+# channel
+# Retorna la cantidad de mensajes publicados en el tópico y publica en
+# su canal de notificaciones
+PUBLISH_SCRIPT = scripts.register("topic_segment_publish", """
+local size = tonumber(redis.call('HGET', KEYS[1], 'segment_size'))
+local offset = redis.call('HINCRBY', KEYS[1], 'message_count', 1) - 1
+local segment = math.floor(offset / size)
+redis.call('RPUSH', ARGV[3] .. segment, ARGV[1])
+
+-- El directorio guarda la fecha del mensaje más nuevo de cada segmento
+local newest = redis.call('ZSCORE', KEYS[2], segment)
+if not newest or tonumber(newest) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[2], ARGV[2], segment)
+end
+redis.call('PUBLISH', ARGV[4], '')
+return offset + 1
+""")
+
+# KEYS: offsets, metadata, filters
+# ARGV: user, max_messages, scan_limit, prefix
+# Mismo contrato que el script de consumo sobre listas
+CONSUME_SCRIPT = scripts.register(
+    "topic_segment_consume",
+    envelope.LUA_DECODE + topics_filters.LUA_FILTER + """
+local offset_field = "subscriber_offset:" .. ARGV[1]
+local current_offset = tonumber(redis.call('HGET', KEYS[1], offset_field))
+if not current_offset then
+    return {"ERROR", "OFFSET_NOT_INITIALIZED"}
+end
+local max_messages = tonumber(ARGV[2])
+local scan_limit = tonumber(ARGV[3])
+local filter = load_filter(KEYS[3], ARGV[1])
+local metadata = redis.call('HMGET', KEYS[2],
+    'segment_size', 'message_count', 'processed_count')
+local size = tonumber(metadata[1])
+local total = tonumber(metadata[2] or '0')
+
+-- Los suscriptores atrasados continúan desde el primer mensaje vivo
+local position = math.max(current_offset, tonumber(metadata[3] or '0'))
+local result = {tostring(current_offset), "", 0}
+local scanned = 0
+while #result - 3 < max_messages and scanned < scan_limit and position < total do
+    local segment = math.floor(position / size)
+    local index = position - segment * size
+    local count = math.min(
+        max_messages - (#result - 3), scan_limit - scanned, size - index
+    )
+    local window = redis.call('LRANGE', ARGV[4] .. segment, index, index + count - 1)
+    if #window == 0 then
+        break
+    end
+    for i = 1, #window do
+        local _, publisher, attributes = envelope_header(window[i])
+        if not publisher then
+            return {"ERROR", "MESSAGE_CORRUPTED"}
+        end
+        -- Saltar mensajes propios y los que no cumplen el filtro
+        if publisher ~= ARGV[1] and filter_matches(filter, attributes) then
+            result[#result + 1] = window[i]
+        end
+    end
+    scanned = scanned + #window
+    position = position + #window
+end
+
+if position ~= current_offset then
+    redis.call('HSET', KEYS[1], offset_field, position)
+end
+result[2] = tostring(position)
+result[3] = (position < total) and 1 or 0
+return result
+""")
+
+# KEYS: offsets, metadata, directory
+# ARGV: force_cleanup, persistency_time, segment prefix
+# Retorna la cantidad de mensajes eliminados
+CLEANUP_SCRIPT = scripts.register("topic_segment_cleanup", """
+local metadata = redis.call('HMGET', KEYS[2],
+    'segment_size', 'message_count', 'processed_count')
+local size = tonumber(metadata[1])
+local total = tonumber(metadata[2] or '0')
+local first = tonumber(metadata[3] or '0')
+
+-- Segmentos que ya leyeron todos los suscriptores
+local subscriber_offsets = redis.call('HGETALL', KEYS[1])
+local min_offset = total
+for i = 2, #subscriber_offsets, 2 do
+    min_offset = math.min(min_offset, tonumber(subscriber_offsets[i]))
+end
+local keep_segment = math.floor(math.max(min_offset, first) / size)
+
+-- Segmentos cuyo mensaje más nuevo ya venció
+if ARGV[1] == 'true' then
+    local cutoff = tonumber(redis.call('TIME')[1]) - (tonumber(ARGV[2]) * 60)
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', '(' .. cutoff)
+    for _, segment in ipairs(expired) do
+        keep_segment = math.max(keep_segment, tonumber(segment) + 1)
+    end
+end
+
+-- El segmento que se está escribiendo solo se borra cuando está lleno
+keep_segment = math.min(keep_segment, math.floor(total / size))
+local new_first = keep_segment * size
+if new_first <= first then
+    return 0
+end
+
+for segment = math.floor(first / size), keep_segment - 1 do
+    redis.call('UNLINK', ARGV[3] .. segment)
+    redis.call('ZREM', KEYS[3], segment)
+end
+
+-- Ajustar offsets de los suscriptores atrasados
+for i = 1, #subscriber_offsets, 2 do
+    if tonumber(subscriber_offsets[i + 1]) < new_first then
+        redis.call('HSET', KEYS[1], subscriber_offsets[i], new_first)
+    end
+end
+redis.call('HSET', KEYS[2], 'processed_count', new_first)
+return new_first - first
+""")
+
+
+def is_segmented(redis, topic_name: str) -> bool:
+    """
+    Check whether the topic stores its messages in segments.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+    Returns:
+        bool: True if the topic uses the "segmented" storage.
+    """
+    metadata_key = TopicKeyBuilder.metadata_key(topic_name)
+    return redis.hget(metadata_key, "storage") == STORAGE_SEGMENTED
+
+
+def segment_prefix(topic_name: str) -> str:
+    """
+    Get the prefix of the segment keys, the scripts append the number.
+    Args:
+        topic_name (str): The name of the topic.
+    Returns:
+        str: The key of the segments without the number.
+    """
+    return TopicKeyBuilder.segment_key(topic_name, "")
+
+
+def publish_message(
+    redis, topic_name: str, message: str, timestamp: float
+) -> int:
+    """
+    Append a message to the last segment of the topic.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        message (str): The message envelope.
+        timestamp (float): The timestamp of the message.
+    Returns:
+        int: Number of messages published in the topic.
+    """
+    return PUBLISH_SCRIPT(
+        redis,
+        [
+            TopicKeyBuilder.metadata_key(topic_name),
+            TopicKeyBuilder.segments_key(topic_name),
+        ],
+        [
+            message, repr(timestamp), segment_prefix(topic_name),
+            TopicKeyBuilder.notify_channel(topic_name)
+        ]
+    )
+
+
+
+async def publish_message_async(
+    redis, topic_name: str, message: str, timestamp: float
+) -> int:
+    """
+    Append a message to the last segment of the topic, like
+    publish_message, on a redis.asyncio client.
+    Args:
+        redis: Async Redis client to write to.
+        topic_name (str): The name of the topic.
+        message (str): The message envelope.
+        timestamp (float): The timestamp of the message.
+    Returns:
+        int: Number of messages published in the topic.
+    """
+    return await PUBLISH_SCRIPT.call_async(
+        redis,
+        [
+            TopicKeyBuilder.metadata_key(topic_name),
+            TopicKeyBuilder.segments_key(topic_name),
+        ],
+        [
+            message, repr(timestamp), segment_prefix(topic_name),
+            TopicKeyBuilder.notify_channel(topic_name)
+        ]
+    )
+
+def consume_messages(
+    redis, topic_name: str, user: str, max_messages: int, scan_limit: int
+) -> list:
+    """
+    Read the next messages of a subscriber from the segment that holds
+    its offset, moving to the next segment only when it is finished.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+        user (str): The subscriber.
+        max_messages (int): Maximum number of messages to return.
+        scan_limit (int): Maximum number of messages to walk.
+    Returns:
+        list: Old offset, new offset, more flag and the envelopes.
+    """
+    return CONSUME_SCRIPT(
+        redis,
+        [
+            TopicKeyBuilder.subscriber_offsets_key(topic_name),
+            TopicKeyBuilder.metadata_key(topic_name),
+            TopicKeyBuilder.filters_key(topic_name),
+        ],
+        [user, max_messages, scan_limit, segment_prefix(topic_name)]
+    )
+
+
+def cleanup_messages(
+    redis, topic_name: str, force_cleanup_by_time: bool,
+    persistency_time: int
+) -> int:
+    """
+    Drop the segments already consumed by every subscriber and, when
+    forced, the ones whose newest message is older than the persistency
+    time.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        force_cleanup_by_time (bool): Whether to drop expired segments
+            even if some subscribers haven't read them.
+        persistency_time (int): Minutes a message is kept.
+    Returns:
+        int: Number of messages deleted from the topic.
+    """
+    return CLEANUP_SCRIPT(
+        redis,
+        [
+            TopicKeyBuilder.subscriber_offsets_key(topic_name),
+            TopicKeyBuilder.metadata_key(topic_name),
+            TopicKeyBuilder.segments_key(topic_name),
+        ],
+        [
+            str(force_cleanup_by_time).lower(), persistency_time,
+            segment_prefix(topic_name)
+        ]
+    )
+
+
+def segment_keys(redis, topic_name: str) -> list:
+    """
+    Get the directory and the keys of the live segments of a topic.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+    Returns:
+        list: The directory key followed by every segment key.
+    """
+    directory_key = TopicKeyBuilder.segments_key(topic_name)
+    return [directory_key] + [
+        TopicKeyBuilder.segment_key(topic_name, segment)
+        for segment in redis.zrange(directory_key, 0, -1)
+    ]
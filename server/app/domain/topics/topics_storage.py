@@ -0,0 +1,261 @@
+"""
+This module contains the Redis Streams storage engine for topics.
+A topic created with the "stream" storage keeps its messages in a
+stream on mom:topics:<name>:messages instead of a list:
+    - Every message is an entry with id <offset>-0 and the envelope
+      in its "message" field, so the absolute offsets kept in
+      mom:topics:<name>:offsets map directly to ids.
+    - Every subscriber has a consumer group named after the user, the
+      consume script reads with XREADGROUP and acknowledges with XACK.
+    - Retention trims with XTRIM MINID, the time based cutoff is found
+      with a binary search over the ids instead of walking the topic.
+The offsets hash is kept up to date next to the groups so the
+replication of offsets and the topic info work the same for both
+storage engines.
+"""
+
+from redis.exceptions import ResponseError
+from app.domain import envelope, scripts
+from app.domain.topics import topics_filters
+from app.domain.utils import TopicKeyBuilder, STORAGE_STREAM
+
+# KEYS: messages, metadata | ARGV: message, channel
+# Retorna el offset absoluto del mensaje publicado y publica en el canal
+# de notificaciones del tópico
+PUBLISH_SCRIPT = scripts.register("topic_stream_publish", """
+local seq = tonumber(redis.call('HGET', KEYS[2], 'message_count') or '0') + 1
+redis.call('XADD', KEYS[1], seq .. '-0', 'message', ARGV[1])
+redis.call('HSET', KEYS[2], 'message_count', seq)
+redis.call('PUBLISH', ARGV[2], '')
+return seq
+""")
+
+# KEYS: offsets, messages, metadata, filters
+# ARGV: user, max_messages, scan_limit
+# Mismo contrato que el script de consumo sobre listas
+CONSUME_SCRIPT = scripts.register(
+    "topic_stream_consume",
+    envelope.LUA_DECODE + topics_filters.LUA_FILTER + """
+local offset_field = "subscriber_offset:" .. ARGV[1]
+local current_offset = tonumber(redis.call('HGET', KEYS[1], offset_field))
+if not current_offset then
+    return {"ERROR", "OFFSET_NOT_INITIALIZED"}
+end
+local max_messages = tonumber(ARGV[2])
+local scan_limit = tonumber(ARGV[3])
+local filter = load_filter(KEYS[4], ARGV[1])
+
+local result = {tostring(current_offset), "", 0}
+local ids = {}
+while #result - 3 < max_messages and #ids < scan_limit do
+    local size = math.min(max_messages - (#result - 3), scan_limit - #ids)
+    local read = redis.pcall('XREADGROUP', 'GROUP', ARGV[1], ARGV[1],
+        'COUNT', size, 'STREAMS', KEYS[2], '>')
+    if type(read) == 'table' and read.err then
+        return {"ERROR", "OFFSET_NOT_INITIALIZED"}
+    end
+    if not read then
+        break
+    end
+    local entries = read[1][2]
+    for i = 1, #entries do
+        ids[#ids + 1] = entries[i][1]
+        local _, publisher, attributes = envelope_header(entries[i][2][2])
+        -- Saltar mensajes propios y los que no cumplen el filtro
+        if publisher ~= ARGV[1] and filter_matches(filter, attributes) then
+            result[#result + 1] = entries[i][2][2]
+        end
+    end
+    if #entries < size then
+        break
+    end
+end
+
+local new_offset = current_offset
+if #ids > 0 then
+    redis.call('XACK', KEYS[2], ARGV[1], unpack(ids))
+    new_offset = tonumber(string.match(ids[#ids], '^(%d+)'))
+    redis.call('HSET', KEYS[1], offset_field, new_offset)
+end
+local last = tonumber(redis.call('HGET', KEYS[3], 'message_count') or '0')
+result[2] = tostring(new_offset)
+result[3] = (new_offset < last) and 1 or 0
+return result
+""")
+
+# KEYS: messages, offsets, metadata | ARGV: force_cleanup, persistency_time
+# Retorna la cantidad de mensajes eliminados
+CLEANUP_SCRIPT = scripts.register(
+    "topic_stream_cleanup", envelope.LUA_DECODE + """
+local first = redis.call('XRANGE', KEYS[1], '-', '+', 'COUNT', 1)
+if #first == 0 then
+    return 0
+end
+local function seq(id)
+    return tonumber(string.match(id, '^(%d+)'))
+end
+local last = redis.call('XREVRANGE', KEYS[1], '+', '-', 'COUNT', 1)
+local last_seq = seq(last[1][1])
+
+-- Todo lo que ya leyeron todos los suscriptores
+local subscriber_offsets = redis.call('HGETALL', KEYS[2])
+local min_offset = last_seq
+for i = 2, #subscriber_offsets, 2 do
+    min_offset = math.min(min_offset, tonumber(subscriber_offsets[i]))
+end
+local keep_from = math.max(min_offset + 1, seq(first[1][1]))
+
+-- Búsqueda binaria del primer mensaje que no venció
+if ARGV[1] == 'true' then
+    local cutoff = tonumber(redis.call('TIME')[1]) - (tonumber(ARGV[2]) * 60)
+    local lo, hi = keep_from, last_seq + 1
+    while lo < hi do
+        local mid = math.floor((lo + hi) / 2)
+        local entry = redis.call('XRANGE', KEYS[1], mid .. '-0', '+', 'COUNT', 1)[1]
+        local timestamp = envelope_header(entry[2][2]) or 0
+        if timestamp < cutoff then
+            lo = seq(entry[1]) + 1
+        else
+            hi = mid
+        end
+    end
+    keep_from = lo
+
+    -- Los suscriptores atrasados continúan desde el primer mensaje vivo
+    for i = 1, #subscriber_offsets, 2 do
+        if tonumber(subscriber_offsets[i + 1]) < keep_from - 1 then
+            redis.call('HSET', KEYS[2], subscriber_offsets[i], keep_from - 1)
+        end
+    end
+end
+
+local deleted = redis.call('XTRIM', KEYS[1], 'MINID', keep_from .. '-0')
+if deleted > 0 then
+    redis.call('HINCRBY', KEYS[3], 'processed_count', deleted)
+end
+return deleted
+""")
+
+
+def is_stream(redis, topic_name: str) -> bool:
+    """
+    Check whether the topic stores its messages in a Redis Stream.
+    Args:
+        redis: Redis client to read from.
+        topic_name (str): The name of the topic.
+    Returns:
+        bool: True if the topic uses the "stream" storage.
+    """
+    metadata_key = TopicKeyBuilder.metadata_key(topic_name)
+    return redis.hget(metadata_key, "storage") == STORAGE_STREAM
+
+
+def publish_message(redis, topic_name: str, message: str) -> int:
+    """
+    Append a message to the stream of the topic.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        message (str): The message envelope.
+    Returns:
+        int: The absolute offset of the published message.
+    """
+    return PUBLISH_SCRIPT(
+        redis,
+        [
+            TopicKeyBuilder.messages_key(topic_name),
+            TopicKeyBuilder.metadata_key(topic_name),
+        ],
+        [message, TopicKeyBuilder.notify_channel(topic_name)]
+    )
+
+
+
+async def publish_message_async(redis, topic_name: str, message: str) -> int:
+    """
+    Append a message to the stream of the topic, like publish_message,
+    on a redis.asyncio client.
+    Args:
+        redis: Async Redis client to write to.
+        topic_name (str): The name of the topic.
+        message (str): The message envelope.
+    Returns:
+        int: The absolute offset of the published message.
+    """
+    return await PUBLISH_SCRIPT.call_async(
+        redis,
+        [
+            TopicKeyBuilder.messages_key(topic_name),
+            TopicKeyBuilder.metadata_key(topic_name),
+        ],
+        [message, TopicKeyBuilder.notify_channel(topic_name)]
+    )
+
+def set_subscriber_offset(
+    redis, topic_name: str, subscriber: str, offset: int
+) -> None:
+    """
+    Set the offset of a subscriber, moving its consumer group too when
+    the topic is a stream. The group is created if it does not exist.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        subscriber (str): The subscriber to move.
+        offset (int): Number of messages already consumed.
+    """
+    offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
+    offset_field = TopicKeyBuilder.subscriber_offset_field(subscriber)
+    redis.hset(offset_key, offset_field, offset)
+    if not is_stream(redis, topic_name):
+        return
+
+    messages_key = TopicKeyBuilder.messages_key(topic_name)
+    try:
+        redis.xgroup_create(
+            messages_key, subscriber, f"{offset}-0", mkstream=True
+        )
+    except ResponseError:
+        # El grupo ya existe, solo se mueve
+        redis.xgroup_setid(messages_key, subscriber, f"{offset}-0")
+
+
+def remove_subscriber_offset(redis, topic_name: str, subscriber: str) -> None:
+    """
+    Remove the offset of a subscriber and its consumer group.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        subscriber (str): The subscriber to remove.
+    """
+    offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
+    offset_field = TopicKeyBuilder.subscriber_offset_field(subscriber)
+    redis.hdel(offset_key, offset_field)
+    if is_stream(redis, topic_name):
+        redis.xgroup_destroy(TopicKeyBuilder.messages_key(topic_name), subscriber) # pylint: disable=C0301
+
+
+def cleanup_messages(
+    redis, topic_name: str, force_cleanup_by_time: bool,
+    persistency_time: int
+) -> int:
+    """
+    Trim the messages already consumed by every subscriber and, when
+    forced, the ones older than the persistency time.
+    Args:
+        redis: Redis client to write to.
+        topic_name (str): The name of the topic.
+        force_cleanup_by_time (bool): Whether to drop expired messages
+            even if some subscribers haven't read them.
+        persistency_time (int): Minutes a message is kept.
+    Returns:
+        int: Number of messages deleted from the topic.
+    """
+    return CLEANUP_SCRIPT(
+        redis,
+        [
+            TopicKeyBuilder.messages_key(topic_name),
+            TopicKeyBuilder.subscriber_offsets_key(topic_name),
+            TopicKeyBuilder.metadata_key(topic_name),
+        ],
+        [str(force_cleanup_by_time).lower(), persistency_time]
+    )
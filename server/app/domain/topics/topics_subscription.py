@@ -1,6 +1,7 @@
 """
 This class handles the management of topic subscriptions in a Redis database,
-including subscribing and unsubscribing users to/from topics.
+including subscribing and unsubscribing users to/from topics and patterns
+of topics.
     it uses the TopicValidator class for validating topic operations.
     It also provides methods for checking the status of topics and
     managing topic metadata. The class is initialized with a Redis
@@ -9,13 +10,20 @@ including subscribing and unsubscribing users to/from topics.
 
 from app.domain.models import TopicOperationResult, MOMTopicStatus
 from app.domain.logger_config import logger
-from app.domain.utils import TopicKeyBuilder
+from app.domain import replication_outbox, subscriptions
+from app.domain.utils import TopicKeyBuilder, PatternKeyBuilder
 from app.domain.topics.topics_validator import TopicValidator
+from app.domain.topics import (
+    topics_storage, topics_partitions, topics_seek, topics_patterns,
+    topics_filters
+)
 from app.domain.models import NODES_CONFIG, WHOAMI
 from app.domain.topics.topics_replication import TopicReplicationClient
 from app.domain.replication_clients import (
     get_replica_client_stub,
     get_source_client_stub,
+    get_replica_stream,
+    get_source_stream,
 )
 from app.adapters.factory import ObjectFactory
 from app.adapters.db import Database
@@ -42,14 +50,74 @@ class TopicSubscriptionService:
 
         # Crear clientes de replicación con los stubs
         self.replication_client = TopicReplicationClient(
-            stub=replica_stub, target_node_desc=f"nodo réplica ({replica_node})"
+            stub=replica_stub, target_node_desc=f"nodo réplica ({replica_node})",
+            stream=get_source_stream()
         )
         self.replication_principal = TopicReplicationClient(
-            stub=source_stub, target_node_desc=f"nodo principal ({WHOAMI})"
+            stub=source_stub, target_node_desc=f"nodo principal ({WHOAMI})",
+            stream=get_replica_stream()
         )
 
-    def subscribe(self, topic_name: str, endpoint: bool = False) -> TopicOperationResult:
+    def subscribe(
+        self, topic_name: str, endpoint: bool = False,
+        start_position: str = None, start_timestamp: float = None,
+        message_filter: dict = None, write_concern: str = None
+    ) -> TopicOperationResult:
+        """
+        Subscribe the user to a topic, or to a pattern of topics when
+        the name has wildcards.
+        Args:
+            topic_name (str): The name of the topic or pattern.
+            endpoint (bool): Whether the subscription comes from the API,
+                if True, it is also applied on the backup.
+            start_position (str): "earliest" replays the messages still
+                kept, "latest" (default) only reads the new ones.
+            start_timestamp (float): Starts at the first message
+                published at or after it, instead of a position.
+            message_filter (dict): Attributes the messages must have to
+                be delivered to the subscriber.
+            write_concern (str): "replica" waits for the replication,
+                "local" queues it in the outbox, None uses the default.
+        Returns:
+            TopicOperationResult: Result of the subscription.
+        """
         try:
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False,
+                )
+
+            if (start_position is not None and start_timestamp is not None) \
+                    or (start_position is not None and start_position not in topics_seek.SEEK_POSITIONS): # pylint: disable=C0301
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid start position",
+                    replication_result=False,
+                )
+
+            # Los filtros solo aplican a tópicos concretos, los tópicos
+            # de un patrón se suscriben al publicar sin conocer el filtro
+            if message_filter is not None and (
+                not topics_filters.is_valid_filter(message_filter)
+                or topics_patterns.is_pattern(topic_name)
+            ):
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid message filter",
+                    replication_result=False,
+                )
+
+            if topics_patterns.is_pattern(topic_name):
+                return self._subscribe_pattern(
+                    topic_name, endpoint, start_position, start_timestamp,
+                    write_concern
+                )
+
             result = self.validator.validate_topic_exists(topic_name)
             if not result.success:
                 # Verificamos si el tópico existe en algún nodo usando SMEMBERS
@@ -79,7 +147,10 @@ class TopicSubscriptionService:
                         result = self.replication_client.forward_subscribe(
                             topic_name=topic_name,
                             user=self.user,
-                            node=node
+                            node=node,
+                            start_position=start_position,
+                            start_timestamp=start_timestamp,
+                            message_filter=message_filter
                         )
                         if result.success:
                             return result
@@ -105,31 +176,61 @@ class TopicSubscriptionService:
             # Realizar la suscripción local
             subscribers_key = TopicKeyBuilder.subscribers_key(topic_name)
             self.redis.sadd(subscribers_key, self.user)
+            subscriptions.add_subscription(
+                self.redis, self.user, subscriptions.TOPIC, topic_name
+            )
 
-            offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
-            offset_field = TopicKeyBuilder.subscriber_offset_field(self.user)
-            metadata_key = TopicKeyBuilder.metadata_key(topic_name)
-
-            current_index = self.redis.hget(metadata_key, "message_count")
-            initial_offset = int(current_index) if current_index is not None else 0  # pylint: disable=C0301
+            # Por defecto solo se leen los mensajes nuevos, así un
+            # suscriptor nuevo no repite el tópico ni frena la limpieza
+            if start_timestamp is not None:
+                initial_offset = topics_seek.resolve_offset(
+                    self.redis, topic_name, timestamp=start_timestamp
+                )
+            else:
+                initial_offset = topics_seek.resolve_offset(
+                    self.redis, topic_name,
+                    position=start_position or topics_seek.POSITION_LATEST
+                )
 
-            self.redis.hset(offset_key, offset_field, initial_offset)
+            # En los tópicos sobre streams también crea el grupo de consumo
+            topics_storage.set_subscriber_offset(
+                self.redis, topic_name, self.user, initial_offset
+            )
+            topics_filters.set_filter(
+                self.redis, topic_name, self.user, message_filter
+            )
 
             if endpoint:
                 # Realizar todas las operaciones en el backup
                 self.redis_backup.sadd(subscribers_key, self.user)
-                self.redis_backup.hset(offset_key, offset_field, initial_offset)
+                topics_storage.set_subscriber_offset(
+                    self.redis_backup, topic_name, self.user, initial_offset
+                )
+                topics_filters.set_filter(
+                    self.redis_backup, topic_name, self.user, message_filter
+                )
 
 
+            # Cada partición tiene su propio offset y se replica sola
+            for partition in topics_partitions.partition_names(self.redis, topic_name): # pylint: disable=C0301
+                self.subscribe(
+                    partition, endpoint, start_position, start_timestamp,
+                    message_filter, write_concern
+                )
+
             # Replicar la suscripción según el rol del nodo
             replication_op = False
             if principal:
-                replication_op = self.replication_client.replicate_subscribe(
-                    topic_name, self.user
+                replication_op = replication_outbox.replicate(
+                    topic_name, write_concern,
+                    self.replication_client.replicate_subscribe,
+                    topic_name, self.user, initial_offset, message_filter
                 )
             else:
-                replication_op = self.replication_principal.replicate_subscribe(
-                    topic_name, self.user
+                replication_op = replication_outbox.replicate(
+                    topic_name, write_concern,
+                    self.replication_principal.replicate_subscribe,
+                    topic_name, self.user, initial_offset, message_filter
                 )
 
             return TopicOperationResult(
@@ -148,8 +249,24 @@ class TopicSubscriptionService:
                 replication_result=False,
             )
 
-    def unsubscribe(self, topic_name: str, endpoint: bool = False) -> TopicOperationResult:
+    def unsubscribe(
+        self, topic_name: str, endpoint: bool = False,
+        write_concern: str = None
+    ) -> TopicOperationResult:
         try:
+            if not replication_outbox.is_valid_write_concern(write_concern):
+                return TopicOperationResult(
+                    success=False,
+                    status=MOMTopicStatus.INVALID_ARGUMENTS,
+                    details="Invalid write concern",
+                    replication_result=False,
+                )
+
+            if topics_patterns.is_pattern(topic_name):
+                return self._unsubscribe_pattern(
+                    topic_name, endpoint, write_concern
+                )
+
             result = self.validator.validate_topic_exists(topic_name)
             if not result.success:
                 # Verificamos si el tópico existe en algún nodo usando SMEMBERS
@@ -211,24 +328,40 @@ class TopicSubscriptionService:
             # Realizar la desuscripción local
             subscribers_key = TopicKeyBuilder.subscribers_key(topic_name)
             self.redis.srem(subscribers_key, self.user)
+            subscriptions.remove_subscription(
+                self.redis, self.user, subscriptions.TOPIC, topic_name
+            )
 
-            offset_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
-            offset_field = TopicKeyBuilder.subscriber_offset_field(self.user)
-            self.redis.hdel(offset_key, offset_field)
+            topics_storage.remove_subscriber_offset(
+                self.redis, topic_name, self.user
+            )
+            topics_filters.set_filter(self.redis, topic_name, self.user, None)
 
             if endpoint:
                 # Realizar todas las operaciones en el backup
                 self.redis_backup.srem(subscribers_key, self.user)
-                self.redis_backup.hdel(offset_key, offset_field)
+                topics_storage.remove_subscriber_offset(
+                    self.redis_backup, topic_name, self.user
+                )
+                topics_filters.set_filter(
+                    self.redis_backup, topic_name, self.user, None
+                )
+
+            for partition in topics_partitions.partition_names(self.redis, topic_name): # pylint: disable=C0301
+                self.unsubscribe(partition, endpoint, write_concern)
 
             # Replicar la desuscripción según el rol del nodo
             replication_op = False
             if principal:
-                replication_op = self.replication_client.replicate_unsubscribe(
+                replication_op = replication_outbox.replicate(
+                    topic_name, write_concern,
+                    self.replication_client.replicate_unsubscribe,
                     topic_name, self.user
                 )
             else:
-                replication_op = self.replication_principal.replicate_unsubscribe(  # pylint: disable=C0301
+                replication_op = replication_outbox.replicate(
+                    topic_name, write_concern,
+                    self.replication_principal.replicate_unsubscribe,
                     topic_name, self.user
                 )
 
@@ -247,3 +380,164 @@ class TopicSubscriptionService:
                 details=str(e),
                 replication_result=False,
             )
+
+    def subscribe_matching(self, topic_name: str, endpoint: bool = False) -> list:
+        """
+        Subscribe the users with a pattern that matches a topic and that
+        are not subscribed to it yet, the patterns are resolved with the
+        in-memory index so the topics without pattern subscribers cost no
+        read.
+        Args:
+            topic_name (str): The name of the topic.
+            endpoint (bool): Whether the subscriptions are also applied
+                on the backup.
+        Returns:
+            list: The users subscribed to the topic.
+        """
+        if topics_partitions.is_partition(topic_name):
+            return []
+        index = topics_patterns.get_pattern_index(self.redis)
+        users = sorted(index.match(topic_name))
+        if not users:
+            return []
+
+        subscribed = self.redis.smismember(
+            TopicKeyBuilder.subscribers_key(topic_name), users
+        )
+        missing = [user for user, member in zip(users, subscribed) if not member]
+        for user in missing:
+            TopicSubscriptionService(self.redis, user).subscribe(
+                topic_name, endpoint
+            )
+        return missing
+
+    def _subscribe_pattern(
+        self, pattern: str, endpoint: bool,
+        start_position: str = None, start_timestamp: float = None,
+        write_concern: str = None
+    ) -> TopicOperationResult:
+        """
+        Subscribe the user to a pattern and to the topics of the node
+        that already match it, the topics created later are subscribed
+        on their first publish.
+        Args:
+            pattern (str): The pattern of topics.
+            endpoint (bool): Whether the subscription is also applied on
+                the backup.
+            start_position (str): Start position of the matching topics.
+            start_timestamp (float): Start timestamp of the matching topics.
+            write_concern (str): Write concern of the replication.
+        Returns:
+            TopicOperationResult: Result of the subscription.
+        """
+        if not topics_patterns.is_valid_pattern(pattern):
+            return TopicOperationResult(
+                success=False,
+                status=MOMTopicStatus.INVALID_ARGUMENTS,
+                details="Invalid topic pattern",
+                replication_result=False,
+            )
+
+        subscribers_key = PatternKeyBuilder.subscribers_key(pattern)
+        if self.redis.sismember(subscribers_key, self.user):
+            return TopicOperationResult(
+                success=False,
+                status=MOMTopicStatus.ALREADY_SUBSCRIBED,
+                details="User is already subscribed to this pattern",
+                replication_result=False,
+            )
+
+        topics_patterns.add_pattern(self.redis, pattern, self.user)
+        if endpoint:
+            # Realizar todas las operaciones en el backup
+            topics_patterns.add_pattern(self.redis_backup, pattern, self.user)
+        topics_patterns.get_pattern_index(self.redis).add(pattern, self.user)
+
+        # El patrón cubre tópicos propios y replicados, se replica a los
+        # dos nodos para que suscriban a los tópicos que publiquen
+        replication_results = [
+            bool(replication_outbox.replicate(
+                pattern, write_concern, client.replicate_subscribe,
+                pattern, self.user
+            ))
+            for client in (self.replication_client, self.replication_principal)
+        ]
+
+        # Cada tópico se suscribe y se replica como una suscripción normal
+        for topic_name in topics_patterns.find_topics(self.redis, pattern):
+            if self.redis.sismember(
+                TopicKeyBuilder.subscribers_key(topic_name), self.user
+            ):
+                continue
+            result = self.subscribe(
+                topic_name, endpoint, start_position, start_timestamp,
+                write_concern=write_concern
+            )
+            replication_results.append(bool(result.replication_result))
+
+        return TopicOperationResult(
+            success=True,
+            status=MOMTopicStatus.SUBSCRIPTION_CREATED,
+            details=f"User {self.user} subscribed to pattern {pattern}",
+            replication_result=all(replication_results),
+        )
+
+    def _unsubscribe_pattern(
+        self, pattern: str, endpoint: bool, write_concern: str = None
+    ) -> TopicOperationResult:
+        """
+        Unsubscribe the user from a pattern and from the topics that
+        match it and no other pattern of the user.
+        Args:
+            pattern (str): The pattern of topics.
+            endpoint (bool): Whether the unsubscription is also applied
+                on the backup.
+            write_concern (str): Write concern of the replication.
+        Returns:
+            TopicOperationResult: Result of the unsubscription.
+        """
+        subscribers_key = PatternKeyBuilder.subscribers_key(pattern)
+        if not self.redis.sismember(subscribers_key, self.user):
+            return TopicOperationResult(
+                success=False,
+                status=MOMTopicStatus.NOT_SUBSCRIBED,
+                details="User is not subscribed to this pattern",
+                replication_result=False,
+            )
+
+        topics_patterns.remove_pattern(self.redis, pattern, self.user)
+        if endpoint:
+            # Realizar todas las operaciones en el backup
+            topics_patterns.remove_pattern(
+                self.redis_backup, pattern, self.user
+            )
+        topics_patterns.get_pattern_index(self.redis).remove(pattern, self.user)
+        replication_results = [
+            bool(replication_outbox.replicate(
+                pattern, write_concern, client.replicate_unsubscribe,
+                pattern, self.user
+            ))
+            for client in (self.replication_client, self.replication_principal)
+        ]
+
+        # Los tópicos que otro patrón del usuario cubre se mantienen
+        user_subscriptions = subscriptions.get_subscriptions(
+            self.redis, self.user
+        )
+        for topic_name in user_subscriptions["topics"]:
+            if not topics_patterns.matches(pattern, topic_name) or any(
+                topics_patterns.matches(other, topic_name)
+                for other in user_subscriptions["patterns"]
+            ):
+                continue
+            # El dueño de un tópico sigue suscrito a él
+            result = self.unsubscribe(topic_name, endpoint, write_concern)
+            if result.success:
+                replication_results.append(bool(result.replication_result))
+
+        return TopicOperationResult(
+            success=True,
+            status=MOMTopicStatus.SUBSCRIPTION_DELETED,
+            details=f"User {self.user} unsubscribed from pattern {pattern}",
+            replication_result=all(replication_results),
+        )
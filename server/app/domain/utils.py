@@ -12,6 +12,23 @@ from app.grpc.replication_service_pb2_grpc import (
     TopicReplicationStub
 )
 
+# Motores de almacenamiento de los mensajes, se elige al crear la cola
+# o el tópico y se guarda en el campo "storage" de la metadata
+STORAGE_DEFAULT = "default"
+STORAGE_STREAM = "stream"
+STORAGE_SEGMENTED = "segmented"
+STORAGE_ENGINES = (STORAGE_DEFAULT, STORAGE_STREAM)
+# El almacenamiento por segmentos solo existe para los tópicos
+TOPIC_STORAGE_ENGINES = STORAGE_ENGINES + (STORAGE_SEGMENTED,)
+
+# Las particiones de un tópico son tópicos internos "<nombre>.<n>", el
+# separador no es válido en los nombres que crean los usuarios
+PARTITION_SEPARATOR = "."
+
+# Los nombres de los tópicos son jerárquicos, sus niveles se separan con
+# "/" y las suscripciones por patrón usan "*" (un nivel) y "#" (el resto)
+TOPIC_LEVEL_SEPARATOR = "/"
+
 class KeyBuilder:
     """
     Class for building repetitive keys
@@ -19,11 +36,18 @@ class KeyBuilder:
     QUEUE_PREFIX = "mom:queues"
     METADATA_SUFFIX = "metadata"
     SUBSCRIBERS_SUFFIX = "subscribers"
+    MESSAGES_SUFFIX = "messages"
+    NOTIFY_SUFFIX = "notify"
+    LEASES_SUFFIX = "leases"
 
     @classmethod
     def queue_key(cls, name: str) -> str:
         return f"{cls.QUEUE_PREFIX}:{name}"
 
+    @classmethod
+    def messages_key(cls, name: str) -> str:
+        return f"{cls.queue_key(name)}:{cls.MESSAGES_SUFFIX}"
+
     @classmethod
     def metadata_key(cls, name: str) -> str:
         return f"{cls.queue_key(name)}:{cls.METADATA_SUFFIX}"
@@ -32,6 +56,14 @@ class KeyBuilder:
     def subscribers_key(cls, name: str) -> str:
         return f"{cls.queue_key(name)}:{cls.SUBSCRIBERS_SUFFIX}"
 
+    @classmethod
+    def notify_channel(cls, name: str) -> str:
+        return f"{cls.queue_key(name)}:{cls.NOTIFY_SUFFIX}"
+
+    @classmethod
+    def leases_key(cls, name: str) -> str:
+        return f"{cls.queue_key(name)}:{cls.LEASES_SUFFIX}"
+
 def handle_redis_errors(log_message: str):
     """
     This wrapper executes an operation over the database that might fail
@@ -64,6 +96,10 @@ class TopicKeyBuilder:
     SUBSCRIBERS_SUFFIX = "subscribers"
     MESSAGES_SUFFIX = "messages"
     SUBSCRIBER_OFFSETS_SUFFIX = "offsets"
+    TIMELINE_SUFFIX = "timeline"
+    SEGMENTS_SUFFIX = "segments"
+    FILTERS_SUFFIX = "filters"
+    NOTIFY_SUFFIX = "notify"
 
     @classmethod
     def topic_key(cls, name: str) -> str:
@@ -85,10 +121,67 @@ class TopicKeyBuilder:
     def subscriber_offsets_key(cls, topic_name: str) -> str:
         return f"{cls.topic_key(topic_name)}:{cls.SUBSCRIBER_OFFSETS_SUFFIX}"
 
+    @classmethod
+    def metadata_key_pattern(cls) -> str:
+        return f"{cls.TOPIC_PREFIX}:*:{cls.METADATA_SUFFIX}"
+
+    @classmethod
+    def timeline_key(cls, topic_name: str) -> str:
+        return f"{cls.topic_key(topic_name)}:{cls.TIMELINE_SUFFIX}"
+
+    @classmethod
+    def segments_key(cls, topic_name: str) -> str:
+        return f"{cls.topic_key(topic_name)}:{cls.SEGMENTS_SUFFIX}"
+
+    @classmethod
+    def segment_key(cls, topic_name: str, segment: int) -> str:
+        return f"{cls.segments_key(topic_name)}:{segment}"
+
+    @classmethod
+    def filters_key(cls, topic_name: str) -> str:
+        return f"{cls.topic_key(topic_name)}:{cls.FILTERS_SUFFIX}"
+
+    @classmethod
+    def notify_channel(cls, topic_name: str) -> str:
+        # Las particiones notifican en el canal de su tópico
+        topic_name = topic_name.split(PARTITION_SEPARATOR)[0]
+        return f"{cls.topic_key(topic_name)}:{cls.NOTIFY_SUFFIX}"
+
     @classmethod
     def subscriber_offset_field(cls, subscriber: str) -> str:
         return f"subscriber_offset:{subscriber}"
 
+class UserKeyBuilder:
+    """
+    Utility class for building Redis keys for user-related operations
+    """
+    USER_PREFIX = "mom:users"
+    SUBSCRIPTIONS_SUFFIX = "subscriptions"
+
+    @classmethod
+    def subscriptions_key(cls, user: str) -> str:
+        return f"{cls.USER_PREFIX}:{user}:{cls.SUBSCRIPTIONS_SUFFIX}"
+
+class PatternKeyBuilder:
+    """
+    Utility class for building Redis keys for topic pattern subscriptions
+    """
+    PATTERN_PREFIX = "mom:patterns"
+    SUBSCRIBERS_SUFFIX = "subscribers"
+    CHANGES_SUFFIX = "changes"
+
+    @classmethod
+    def patterns_key(cls) -> str:
+        return cls.PATTERN_PREFIX
+
+    @classmethod
+    def changes_channel(cls) -> str:
+        return f"{cls.PATTERN_PREFIX}:{cls.CHANGES_SUFFIX}"
+
+    @classmethod
+    def subscribers_key(cls, pattern: str) -> str:
+        return f"{cls.PATTERN_PREFIX}:{pattern}:{cls.SUBSCRIBERS_SUFFIX}"
+
 def limpiar_user(texto):
     texto = texto.replace("'", "")
     texto = texto.replace("[", "").replace("]", "")
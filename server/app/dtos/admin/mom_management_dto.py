@@ -10,6 +10,19 @@ class MomType(str, Enum):
     TOPIC = "topic"
 
 
+class OverflowPolicy(str, Enum):
+    """What a full queue does with new messages"""
+    REJECT = "reject"
+    DROP_OLDEST = "drop_oldest"
+
+
+class StorageEngine(str, Enum):
+    """Where the messages of a queue or topic are stored"""
+    DEFAULT = "default"
+    STREAM = "stream"
+    SEGMENTED = "segmented"
+
+
 class QueueTopic(BaseModel):
     """
     QueueTopic dto for creating a new queue or topic.
@@ -20,8 +33,9 @@ class QueueTopic(BaseModel):
     """
     name: str = Field(
         ...,
-        description="Unique identifier for the queue or topic",
-        pattern=r"^[a-zA-Z0-9_-]+$",
+        description="Unique identifier for the queue or topic, topic " \
+        + "names can have levels separated by /",
+        pattern=r"^[a-zA-Z0-9_-]+(/[a-zA-Z0-9_-]+)*$",
         json_schema_extra={"example": "my_queue"}
     )
     type: MomType = Field(
@@ -36,3 +50,178 @@ class QueueTopic(BaseModel):
             raise ValueError(
                 f"Invalid type: {self.type}. Must be one of {list(MomType)}"
             )
+
+
+class CreateQueueTopic(QueueTopic):
+    """
+    QueueTopic dto for creating a new queue or topic with its limits.
+    
+    Attributes:
+        name (str): Unique identifier for the queue or topic.
+        type (MomType): Type of the queue or topic.
+        message_limit (int): Maximum number of messages in a queue.
+        overflow_policy (OverflowPolicy): What a full queue does with
+        new messages.
+        storage (StorageEngine): Storage engine of the messages.
+        partitions (int): Number of partitions of a topic.
+    """
+    message_limit: int | None = Field(
+        None,
+        ge=1,
+        le=2**32 - 1,
+        description="Maximum number of messages stored in the queue, " \
+        + "only for queues (default 1000)",
+        json_schema_extra={"example": 1000}
+    )
+    overflow_policy: OverflowPolicy | None = Field(
+        None,
+        description="What a full queue does with new messages, reject " \
+        + "them or drop the oldest ones, only for queues (default reject)",
+        json_schema_extra={"example": "reject"}
+    )
+    storage: StorageEngine | None = Field(
+        None,
+        description="Storage engine of the messages, stream keeps them " \
+        + "in a Redis Stream and segmented in fixed size segments, only " \
+        + "for topics (default keeps the classic layout)",
+        json_schema_extra={"example": "stream"}
+    )
+    partitions: int | None = Field(
+        None,
+        ge=1,
+        le=64,
+        description="Number of partitions of the topic, every partition " \
+        + "keeps its own messages and offsets, only for topics (default 1)",
+        json_schema_extra={"example": 4}
+    )
+
+
+class ScriptStats(BaseModel):
+    """
+    Call counters of a Lua script of the message broker.
+    
+    Attributes:
+        sha (str): SHA1 the script is invoked with.
+        calls (int): Number of calls since the API started.
+        errors (int): Number of calls that failed.
+        avg_ms (float): Average latency in milliseconds.
+        max_ms (float): Maximum latency in milliseconds.
+    """
+    sha: str = Field(description="SHA1 the script is invoked with")
+    calls: int = Field(description="Number of calls since the API started")
+    errors: int = Field(description="Number of calls that failed")
+    avg_ms: float = Field(description="Average latency in milliseconds")
+    max_ms: float = Field(description="Maximum latency in milliseconds")
+
+
+class RetentionStats(BaseModel):
+    """
+    Progress counters of the topic retention worker.
+    
+    Attributes:
+        running (bool): Whether the worker is running.
+        passes (int): Finished passes over the topics.
+        topics_scanned (int): Topics found in the current pass.
+        topics_cleaned (int): Topic cleanups since the API started.
+        pending_topics (int): Topics left in the current pass.
+        deleted_last_pass (int): Messages deleted in the last pass.
+        deleted_total (int): Messages deleted since the API started.
+        last_pass_started (float): When the last pass started.
+        last_pass_finished (float): When the last pass finished.
+    """
+    running: bool = Field(description="Whether the worker is running")
+    passes: int = Field(description="Finished passes over the topics")
+    topics_scanned: int = Field(description="Topics found in the current pass")
+    topics_cleaned: int = Field(description="Topic cleanups since the API started")
+    pending_topics: int = Field(description="Topics left in the current pass")
+    deleted_last_pass: int = Field(description="Messages deleted in the last pass")
+    deleted_total: int = Field(description="Messages deleted since the API started")
+    last_pass_started: float | None = Field(description="When the last pass started")
+    last_pass_finished: float | None = Field(description="When the last pass finished")
+
+
+class OffsetReplicationStats(BaseModel):
+    """
+    Counters of the coalesced replication of topic offsets.
+    
+    Attributes:
+        running (bool): Whether the flush thread is running.
+        submitted (int): Offsets queued by the consumes.
+        replicated (int): Offsets sent to the other node.
+        coalesced (int): Offsets replaced by a newer one before a flush.
+        failed (int): Offsets whose replication failed and were retried.
+        flushes (int): Flushes of the pending offsets.
+        pending (int): Subscribers with an offset waiting to be sent.
+    """
+    running: bool = Field(description="Whether the flush thread is running")
+    submitted: int = Field(description="Offsets queued by the consumes")
+    replicated: int = Field(description="Offsets sent to the other node")
+    coalesced: int = Field(description="Offsets replaced by a newer one before a flush")
+    failed: int = Field(description="Offsets whose replication failed and were retried")
+    flushes: int = Field(description="Flushes of the pending offsets")
+    pending: int = Field(description="Subscribers with an offset waiting to be sent")
+
+
+class ReplicationOutboxStats(BaseModel):
+    """
+    Counters of the replication outbox of the node.
+    
+    Attributes:
+        running (bool): Whether the worker threads are running.
+        workers (int): Worker threads draining the outbox.
+        capacity (int): Operations the outbox can hold.
+        depth (int): Operations waiting to be sent.
+        lag_seconds (float): Age of the oldest operation waiting.
+        submitted (int): Operations queued by the writes.
+        replicated (int): Operations sent to the other node.
+        failed (int): Operations whose retries were exhausted.
+        retried (int): Retries of failed calls.
+        dropped (int): Operations dropped because the outbox was full.
+        last_latency_seconds (float): Time from queued to replicated of
+        the last operation.
+        max_latency_seconds (float): Maximum time from queued to replicated.
+    """
+    running: bool = Field(description="Whether the worker threads are running")
+    workers: int = Field(description="Worker threads draining the outbox")
+    capacity: int = Field(description="Operations the outbox can hold")
+    depth: int = Field(description="Operations waiting to be sent")
+    lag_seconds: float = Field(description="Age of the oldest operation waiting")
+    submitted: int = Field(description="Operations queued by the writes")
+    replicated: int = Field(description="Operations sent to the other node")
+    failed: int = Field(description="Operations whose retries were exhausted")
+    retried: int = Field(description="Retries of failed calls")
+    dropped: int = Field(description="Operations dropped because the outbox was full")
+    last_latency_seconds: float = Field(description="Time from queued to replicated of the last operation")
+    max_latency_seconds: float = Field(description="Maximum time from queued to replicated")
+
+
+class ReplicationJournalState(BaseModel):
+    """
+    State of the replication journal of a peer.
+    
+    Attributes:
+        peer (str): The node the journal is replayed to.
+        length (int): Operations waiting for the node.
+        sequence (int): Last sequence given to an operation.
+        lost (int): Operations lost because the journal was full.
+    """
+    peer: str = Field(description="The node the journal is replayed to")
+    length: int = Field(description="Operations waiting for the node")
+    sequence: int = Field(description="Last sequence given to an operation")
+    lost: int = Field(description="Operations lost because the journal was full")
+
+
+class ReplicationJournalStats(BaseModel):
+    """
+    Counters of the replay of the replication journals of the node.
+    
+    Attributes:
+        running (bool): Whether the replay thread is running.
+        replayed (int): Operations acknowledged by the peers on a replay.
+        replays (int): Replays of the journals.
+        journals (list[ReplicationJournalState]): Journal of every peer.
+    """
+    running: bool = Field(description="Whether the replay thread is running")
+    replayed: int = Field(description="Operations acknowledged by the peers on a replay")
+    replays: int = Field(description="Replays of the journals")
+    journals: list[ReplicationJournalState] = Field(description="Journal of every peer")
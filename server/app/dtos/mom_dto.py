@@ -1,10 +1,86 @@
 """
 Mom Interaction dtos for the application.
 """
+from enum import Enum
 from app.dtos.admin.mom_management_dto import QueueTopic
 from pydantic import BaseModel, Field
 
 
+class TopicPosition(str, Enum):
+    """Named positions of a topic a subscriber can be moved to"""
+    EARLIEST = "earliest"
+    LATEST = "latest"
+
+
+class WriteConcern(str, Enum):
+    """When a write answers, after the replica or after the local write"""
+    REPLICA = "replica"
+    LOCAL = "local"
+
+
+WRITE_CONCERN_DESCRIPTION = "Wait for the replication to the other " \
+    + "node (replica) or answer after the local write and replicate in " \
+    + "the background (local), the node default when it is not set"
+
+
+class PatternQueueTopic(QueueTopic):
+    """
+    QueueTopic dto whose name can also be a pattern of topics.
+    
+    Attributes:
+        name (str): Unique identifier for the queue or topic, or a
+        pattern of topics.
+    """
+    name: str = Field(
+        ...,
+        description="Unique identifier for the queue or topic, topics " \
+        + "also accept patterns where * matches one level and # the " \
+        + "remaining levels",
+        pattern=r"^([a-zA-Z0-9_-]+|\*|#)(/([a-zA-Z0-9_-]+|\*|#))*$",
+        json_schema_extra={"example": "orders/*/created"}
+    )
+
+
+class SubscribeQueueTopic(PatternQueueTopic):
+    """
+    QueueTopic dto for subscribing to a queue, topic or pattern of topics.
+    
+    Attributes:
+        name (str): Unique identifier for the queue or topic, or a
+        pattern of topics.
+        start_position (TopicPosition): Where a topic subscription starts.
+        start_timestamp (float): Starts a topic subscription at the first
+        message published at or after it.
+        filter (dict): Attributes the messages of a topic must have to be
+        delivered.
+        write_concern (WriteConcern): When the subscription answers.
+    """
+    start_position: TopicPosition | None = Field(
+        None,
+        description="Where a topic subscription starts, earliest replays " \
+        + "the messages still kept, only for topics (default latest)",
+        json_schema_extra={"example": "latest"}
+    )
+    start_timestamp: float | None = Field(
+        None,
+        ge=0,
+        description="Start a topic subscription at the first message " \
+        + "published at or after this Unix timestamp, only for topics",
+        json_schema_extra={"example": 1714000000.0}
+    )
+    filter: dict[str, str | list[str]] | None = Field(
+        None,
+        description="Only deliver the messages whose attributes have " \
+        + "these values, a list accepts any of its values, only for topics",
+        json_schema_extra={"example": {"region": "eu", "type": ["created", "cancelled"]}} # pylint: disable=C0301
+    )
+    write_concern: WriteConcern | None = Field(
+        None,
+        description=WRITE_CONCERN_DESCRIPTION,
+        json_schema_extra={"example": "local"}
+    )
+
+
 class MessageQueueTopic(QueueTopic):
     """
     QueueTopic dto for creating a new queue or topic.
@@ -12,12 +88,205 @@ class MessageQueueTopic(QueueTopic):
     Attributes:
         name (str): Unique identifier for the queue or topic.
         message (str): Message to be sent to the queue or topic.
+        partition_key (str): Key that chooses the partition of a topic.
+        attributes (dict): Attributes of a topic message.
+        write_concern (WriteConcern): When the send answers.
     """
     message: str = Field(
         ...,
         description="Message to be sent to the queue or topic",
         json_schema_extra={"example": "Hello, World!"}
     )
+    partition_key: str | None = Field(
+        None,
+        max_length=256,
+        description="Messages with the same key go to the same partition " \
+        + "of a partitioned topic, round-robin when it is not set",
+        json_schema_extra={"example": "customer-42"}
+    )
+    attributes: dict[str, str] | None = Field(
+        None,
+        description="Attributes of the message the filters of the " \
+        + "subscriptions are evaluated on, only for topics",
+        json_schema_extra={"example": {"region": "eu", "type": "created"}}
+    )
+    write_concern: WriteConcern | None = Field(
+        None,
+        description=WRITE_CONCERN_DESCRIPTION,
+        json_schema_extra={"example": "local"}
+    )
+
+
+class MessagesQueueTopic(QueueTopic):
+    """
+    QueueTopic dto for sending a batch of messages to a queue.
+    
+    Attributes:
+        name (str): Unique identifier for the queue or topic.
+        messages (list[str]): Messages to be sent, in order.
+        write_concern (WriteConcern): When the send answers.
+    """
+    messages: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=1000,
+        description="Messages to be sent to the queue, in order",
+        json_schema_extra={"example": ["Hello", "World!"]}
+    )
+    write_concern: WriteConcern | None = Field(
+        None,
+        description=WRITE_CONCERN_DESCRIPTION,
+        json_schema_extra={"example": "local"}
+    )
+
+
+class ReceiveQueueTopic(PatternQueueTopic):
+    """
+    QueueTopic dto for receiving one or more messages from a queue or topic.
+    
+    Attributes:
+        name (str): Unique identifier for the queue or topic, or a
+        pattern of the topics the user is subscribed to.
+        max_messages (int): Maximum number of messages to receive at once.
+        wait_seconds (int): Maximum time to wait for a message to arrive.
+        partition (int): Partition of a topic to receive from.
+        write_concern (WriteConcern): When the receive of a queue answers.
+    """
+    max_messages: int = Field(
+        1,
+        ge=1,
+        le=100,
+        description="Maximum number of messages to receive at once",
+        json_schema_extra={"example": 10}
+    )
+    wait_seconds: int = Field(
+        0,
+        ge=0,
+        le=20,
+        description="Maximum time in seconds to wait for a message " \
+        + "when the queue is empty, 0 returns immediately",
+        json_schema_extra={"example": 10}
+    )
+    partition: int | None = Field(
+        None,
+        ge=0,
+        description="Partition of a partitioned topic to receive from, " \
+        + "all the partitions are read when it is not set",
+        json_schema_extra={"example": 0}
+    )
+    write_concern: WriteConcern | None = Field(
+        None,
+        description=WRITE_CONCERN_DESCRIPTION + ", only for queues",
+        json_schema_extra={"example": "local"}
+    )
+
+
+class StreamQueueTopic(PatternQueueTopic):
+    """
+    QueueTopic dto for opening a push delivery of a queue or topic, it is
+    the first frame sent by the client on the WebSocket.
+    
+    Attributes:
+        name (str): Unique identifier for the queue or topic, or a
+        pattern of the topics the user is subscribed to.
+        prefetch (int): Maximum number of messages delivered and not
+        acknowledged yet.
+        partition (int): Partition of a topic to receive from.
+    """
+    prefetch: int = Field(
+        10,
+        ge=1,
+        le=100,
+        description="Maximum number of messages pushed without being " \
+        + "acknowledged, no message is pushed once it is reached",
+        json_schema_extra={"example": 10}
+    )
+    partition: int | None = Field(
+        None,
+        ge=0,
+        description="Partition of a partitioned topic to receive from, " \
+        + "all the partitions are read when it is not set",
+        json_schema_extra={"example": 0}
+    )
+
+
+class StreamAck(BaseModel):
+    """
+    Dto for acknowledging the messages pushed on a WebSocket.
+    
+    Attributes:
+        ack (int): Delivery tag of the last message processed, every
+        message up to it is acknowledged.
+    """
+    ack: int = Field(
+        ...,
+        ge=1,
+        description="Delivery tag of the last message processed, every " \
+        + "message pushed up to it is acknowledged",
+        json_schema_extra={"example": 10}
+    )
+
+
+class StreamDelivery(BaseModel):
+    """
+    Dto for a message pushed on a WebSocket.
+    
+    Attributes:
+        delivery_tag (int): Number of the delivery in the connection.
+        message (str): The message.
+    """
+    delivery_tag: int = Field(
+        ...,
+        description="Number of the delivery in the connection, starting " \
+        + "at 1, used to acknowledge it",
+        json_schema_extra={"example": 1}
+    )
+    message: str = Field(
+        ...,
+        description="Message received from the queue or topic",
+        json_schema_extra={"example": "Hello, World!"}
+    )
+
+
+class SeekTopic(QueueTopic):
+    """
+    QueueTopic dto for moving the offset of a subscriber in a topic.
+    
+    Attributes:
+        name (str): Unique identifier for the topic.
+        position (TopicPosition): Earliest or latest message.
+        offset (int): Absolute offset to move to.
+        timestamp (float): Moves to the first message published at or
+        after it.
+        partition (int): Partition of a topic to move.
+    """
+    position: TopicPosition | None = Field(
+        None,
+        description="Move to the earliest message kept or after the " \
+        + "latest one",
+        json_schema_extra={"example": "earliest"}
+    )
+    offset: int | None = Field(
+        None,
+        ge=0,
+        description="Absolute offset to move to, clamped to the " \
+        + "messages still kept by the topic",
+        json_schema_extra={"example": 120}
+    )
+    timestamp: float | None = Field(
+        None,
+        ge=0,
+        description="Move to the first message published at or after " \
+        + "this Unix timestamp",
+        json_schema_extra={"example": 1714000000.0}
+    )
+    partition: int | None = Field(
+        None,
+        ge=0,
+        description="Partition of a partitioned topic to move, every " \
+        + "partition is moved when it is not set",
+        json_schema_extra={"example": 0}
+    )
 
 
 class QueueTopicResponse(BaseModel):
@@ -28,6 +297,8 @@ class QueueTopicResponse(BaseModel):
         success (bool): Success status of the action.
         message (str): Message receive from the topic or queue,
         or success/error messages.
+        messages (list[str]): Messages received when more than one
+        message was requested.
     """
     success: bool = Field(
         ...,
@@ -40,3 +311,61 @@ class QueueTopicResponse(BaseModel):
         + " or success/error messages",
         json_schema_extra={"example": "Queue test_queue created successfully."}
     )
+    messages: list[str] | None = Field(
+        None,
+        description="Messages received when max_messages is greater than 1",
+        json_schema_extra={"example": ["Hello", "World!"]}
+    )
+
+
+class SubscriptionsResponse(BaseModel):
+    """
+    Dto for answering the queues and topics a user is subscribed to.
+    
+    Attributes:
+        queues (list[str]): Queues the user is subscribed to.
+        topics (list[str]): Topics the user is subscribed to.
+        patterns (list[str]): Patterns of topics the user is subscribed to.
+    """
+    queues: list[str] = Field(
+        ...,
+        description="Queues the user is subscribed to",
+        json_schema_extra={"example": ["queue-example"]}
+    )
+    topics: list[str] = Field(
+        ...,
+        description="Topics the user is subscribed to",
+        json_schema_extra={"example": ["topic-example"]}
+    )
+    patterns: list[str] = Field(
+        [],
+        description="Patterns of topics the user is subscribed to",
+        json_schema_extra={"example": ["orders/#"]}
+    )
+
+
+class SeekResponse(BaseModel):
+    """
+    Dto for answering the new offsets of a subscriber.
+    
+    Attributes:
+        success (bool): Success status of the action.
+        message (str): Success or error message.
+        offsets (dict[str, int]): New offset of the topic or of each
+        of its partitions.
+    """
+    success: bool = Field(
+        ...,
+        description="Success status of the action",
+        json_schema_extra={"example": True}
+    )
+    message: str = Field(
+        ...,
+        description="Success or error message",
+        json_schema_extra={"example": "Subscriber offset updated successfully"}
+    )
+    offsets: dict[str, int] | None = Field(
+        None,
+        description="New offset of the topic or of each of its partitions",
+        json_schema_extra={"example": {"topic-example": 120}}
+    )
@@ -0,0 +1,362 @@
+"""
+Asyncio server for the replication of topics and queues, started by
+serve() with GRPC_SERVER_MODE=aio.
+The threaded server runs every call on one pool of GRPC_MAX_WORKERS
+threads, a burst of calls of one service waits on the calls of the
+other one. In this server:
+    - The replicated writes of messages (publish, consume, enqueue,
+      dequeue and their batches) are applied on the event loop by
+      AsyncReplicaApplier over redis.asyncio, they don't take a thread.
+    - The rest of the calls keep the handlers of the threaded server,
+      run on one executor per service: GRPC_TOPIC_WORKERS threads for
+      the topics and GRPC_QUEUE_WORKERS for the queues, so a slow topic
+      call can't starve the replication of the queues.
+    - The replication stream applies the topic and the queue operations
+      of its batches in one task per service, each in order with the
+      same handlers, so a slow topic operation doesn't hold back the
+      queues. The batches are acknowledged in order once both tasks
+      applied them.
+GRPC_MAX_CONCURRENT_STREAMS limits the calls in flight of every
+connection, as in the threaded server.
+"""
+
+import asyncio
+import os
+from concurrent import futures
+import grpc
+from app.adapters.db import Database
+from app.adapters.factory import ObjectFactory
+from app.config.env import GRPC_PORT
+from app.domain import replication_journal
+from app.domain.logger_config import logger
+from app.domain.replication_apply import AsyncReplicaApplier
+from app.grpc import replication_service_pb2_grpc
+from app.grpc.replication_service_pb2 import (
+    ReplicationAck,
+    ReplicationFailure,
+    ReplicationResponse,
+    StatusCode,
+)
+from app.grpc.server import (
+    QueueReplicationServicer,
+    TopicReplicationServicer,
+    _OperationContext,
+    server_options,
+    stream_handlers,
+)
+
+GRPC_TOPIC_WORKERS = int(os.getenv("GRPC_TOPIC_WORKERS", "4"))
+GRPC_QUEUE_WORKERS = int(os.getenv("GRPC_QUEUE_WORKERS", "4"))
+
+# Llamadas que siguen en los handlers del servidor con hilos
+_TOPIC_HANDLERS = (
+    "TopicReplicateCreate",
+    "TopicReplicateDelete",
+    "TopicReplicateSubscribe",
+    "TopicReplicateUnsubscribe",
+    "TopicReplicateForwardPublishMessage",
+    "TopicReplicateForwardConsumeMessage",
+    "TopicReplicateForwardSubscribe",
+    "TopicReplicateForwardUnsubscribe",
+)
+_QUEUE_HANDLERS = (
+    "QueueReplicateCreate",
+    "QueueReplicateDelete",
+    "QueueReplicateSubscribe",
+    "QueueReplicateUnsubscribe",
+    "QueueReplicateForwardEnqueue",
+    "QueueReplicateForwardDequeue",
+    "QueueReplicateForwardSubscribe",
+    "QueueReplicateForwardUnsubscribe",
+)
+
+
+def _in_executor(handler, executor: futures.Executor):
+    """
+    Wrap a handler of the threaded server in a coroutine that runs it
+    on an executor.
+    Args:
+        handler: The unary handler.
+        executor (futures.Executor): The executor of its service.
+    Returns:
+        The coroutine function of the call.
+    """
+    async def call(request, context):
+        # El contexto de grpc.aio no se toca desde otro hilo
+        operation_context = _OperationContext()
+        response = await asyncio.get_running_loop().run_in_executor(
+            executor, handler, request, operation_context
+        )
+        if operation_context.code is not None:
+            context.set_code(operation_context.code)
+            context.set_details(operation_context.details)
+        return response
+    return call
+
+
+async def _apply(apply, request, context) -> ReplicationResponse:
+    try:
+        return await apply(request, context)
+    except Exception as e: # pylint: disable=W0703
+        logger.exception("Error aplicando una operación replicada")
+        context.set_code(grpc.StatusCode.INTERNAL)
+        context.set_details(str(e))
+        return ReplicationResponse(
+            success=False,
+            status_code=StatusCode.REPLICATION_FAILED,
+            message=str(e)
+        )
+
+
+class AsyncTopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServicer): # pylint: disable=C0301
+    """
+    Service for managing topic replication on the grpc.aio server.
+    """
+    def __init__(
+        self, applier: AsyncReplicaApplier, executor: futures.Executor
+    ):
+        self.applier = applier
+        topics = TopicReplicationServicer()
+        for name in _TOPIC_HANDLERS:
+            setattr(self, name, _in_executor(getattr(topics, name), executor))
+
+    async def TopicReplicatePublishMessage(self, request, context): # pylint: disable=W0236
+        return await _apply(self.applier.publish, request, context)
+
+    async def TopicReplicateConsumeMessage(self, request, context): # pylint: disable=W0236
+        return await _apply(self.applier.consume, request, context)
+
+
+class AsyncQueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServicer): # pylint: disable=C0301
+    """
+    Service for managing queue replication on the grpc.aio server.
+    """
+    def __init__(
+        self, applier: AsyncReplicaApplier, executor: futures.Executor
+    ):
+        self.applier = applier
+        queues = QueueReplicationServicer()
+        for name in _QUEUE_HANDLERS:
+            setattr(self, name, _in_executor(getattr(queues, name), executor))
+
+    async def QueueReplicateEnqueue(self, request, context): # pylint: disable=W0236
+        return await _apply(self.applier.enqueue, request, context)
+
+    async def QueueReplicateEnqueueBatch(self, request, context): # pylint: disable=W0236
+        return await _apply(self.applier.enqueue_batch, request, context)
+
+    async def QueueReplicateDequeue(self, request, context): # pylint: disable=W0236
+        return await _apply(self.applier.dequeue, request, context)
+
+    async def QueueReplicateDequeueBatch(self, request, context): # pylint: disable=W0236
+        return await _apply(self.applier.dequeue_batch, request, context)
+
+
+class _AppliedBatch:
+    """A batch of a replication stream being applied by the services."""
+
+    def __init__(self, batch):
+        self.sequence = batch.operations[-1].sequence
+        self.remaining = len(batch.operations)
+        self.failures = []
+        self.done = asyncio.Event()
+
+    def applied(self, operation, response: ReplicationResponse) -> None:
+        """
+        Record the result of an operation of the batch.
+        Args:
+            operation (ReplicationOperation): The applied operation.
+            response (ReplicationResponse): Its result.
+        """
+        if not response.success:
+            self.failures.append(ReplicationFailure(
+                sequence=operation.sequence,
+                status_code=response.status_code,
+                message=response.message,
+            ))
+        self.remaining -= 1
+        if not self.remaining:
+            self.done.set()
+
+    def ack(self) -> ReplicationAck:
+        """
+        Build the ack of the batch.
+        Returns:
+            ReplicationAck: The sequence of its last operation and its
+                failures in order.
+        """
+        return ReplicationAck(
+            sequence=self.sequence,
+            failures=sorted(self.failures, key=lambda f: f.sequence)
+        )
+
+
+class AsyncReplicationStreamServicer(replication_service_pb2_grpc.ReplicationStreamServicer): # pylint: disable=C0301
+    """
+    Service for the replication of topics and queues over a stream on
+    the grpc.aio server. The operations of each service are applied in
+    order by their own task with the handler of their unary call.
+    """
+    def __init__(
+        self, topics: AsyncTopicReplicationServicer,
+        queues: AsyncQueueReplicationServicer
+    ):
+        self.redis = topics.applier.redis
+        self.handlers = stream_handlers(topics, queues)
+
+    async def ReplicateStream(self, request_iterator, context): # pylint: disable=W0236
+        # Una cola por servicio, los tópicos no frenan a las colas
+        lanes = {
+            service: asyncio.Queue()
+            for service in (
+                replication_journal.SERVICE_TOPICS,
+                replication_journal.SERVICE_QUEUES
+            )
+        }
+        batches = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self._drain(lane)) for lane in lanes.values()
+        ]
+        tasks.append(asyncio.create_task(
+            self._read(request_iterator, lanes, batches)
+        ))
+        try:
+            while True:
+                batch = await batches.get()
+                if batch is None:
+                    return
+                # El ack es acumulado, espera a los lotes anteriores
+                await batch.done.wait()
+                yield batch.ack()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _read(
+        self, request_iterator, lanes: dict, batches: asyncio.Queue
+    ) -> None:
+        try:
+            async for batch in request_iterator:
+                if not batch.operations:
+                    continue
+                applied = _AppliedBatch(batch)
+                batches.put_nowait(applied)
+                for operation in batch.operations:
+                    service = replication_journal.operation_service(operation)
+                    lanes[service].put_nowait(
+                        (operation, batch.origin, applied)
+                    )
+        except Exception: # pylint: disable=W0703
+            logger.exception("Error leyendo el stream de replicación")
+        finally:
+            batches.put_nowait(None)
+
+    async def _drain(self, lane: asyncio.Queue) -> None:
+        while True:
+            operation, origin, applied = await lane.get()
+            applied.applied(operation, await self.apply(operation, origin))
+
+    async def apply(self, operation, origin: str = "") -> ReplicationResponse:
+        """
+        Apply an operation of a replication stream, the operations that
+        were already applied, sent again from the journal of a node, are
+        skipped.
+        Args:
+            operation (ReplicationOperation): The operation to apply.
+            origin (str): The node that sent it.
+        Returns:
+            ReplicationResponse: The response of its unary handler.
+        """
+        field = operation.WhichOneof("operation")
+        handler = self.handlers.get(field)
+        if handler is None:
+            return ReplicationResponse(
+                success=False,
+                status_code=StatusCode.INVALID_REPLICATION_STATUS,
+                message=f"Unknown replication operation: {field}",
+            )
+        try:
+            marks = replication_journal.applied_marks(operation, origin)
+            if marks:
+                applied = await self.redis.mget([key for key, _ in marks])
+                if any(
+                    sequence <= int(last or 0)
+                    for (_, sequence), last in zip(marks, applied)
+                ):
+                    return ReplicationResponse(
+                        success=True,
+                        status_code=StatusCode.REPLICATION_NOT_REQUIRED,
+                        message="Operation already applied",
+                    )
+            response = await handler(
+                getattr(operation, field), _OperationContext()
+            )
+            if marks:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, sequence in marks:
+                    pipe.set(
+                        key, sequence,
+                        ex=replication_journal.REPLICATION_APPLIED_TTL
+                    )
+                await pipe.execute()
+            return response
+        except Exception as e: # pylint: disable=W0703
+            logger.exception("Error aplicando la operación %s del stream", operation.sequence) # pylint: disable=C0301
+            return ReplicationResponse(
+                success=False,
+                status_code=StatusCode.REPLICATION_FAILED,
+                message=str(e),
+            )
+
+
+def create_server(
+    applier: AsyncReplicaApplier, topic_executor: futures.Executor,
+    queue_executor: futures.Executor
+) -> grpc.aio.Server:
+    """
+    Create the grpc.aio server with the replication services, without
+    ports.
+    Args:
+        applier (AsyncReplicaApplier): Applier of the replicated writes.
+        topic_executor (futures.Executor): Executor of the topic calls.
+        queue_executor (futures.Executor): Executor of the queue calls.
+    Returns:
+        grpc.aio.Server: The server, not started.
+    """
+    topics = AsyncTopicReplicationServicer(applier, topic_executor)
+    queues = AsyncQueueReplicationServicer(applier, queue_executor)
+    server = grpc.aio.server(options=server_options())
+    replication_service_pb2_grpc.add_TopicReplicationServicer_to_server(
+        topics, server
+    )
+    replication_service_pb2_grpc.add_QueueReplicationServicer_to_server(
+        queues, server
+    )
+    replication_service_pb2_grpc.add_ReplicationStreamServicer_to_server(
+        AsyncReplicationStreamServicer(topics, queues), server
+    )
+    return server
+
+
+async def serve():
+    database = ObjectFactory.get_instance(Database)
+    topic_executor = futures.ThreadPoolExecutor(
+        GRPC_TOPIC_WORKERS, thread_name_prefix="grpc-topics"
+    )
+    queue_executor = futures.ThreadPoolExecutor(
+        GRPC_QUEUE_WORKERS, thread_name_prefix="grpc-queues"
+    )
+    server = create_server(
+        AsyncReplicaApplier(database.get_async_client()),
+        topic_executor, queue_executor
+    )
+    server.add_insecure_port(f"[::]:{GRPC_PORT}")
+    await server.start()
+    logger.info("Servidor gRPC asíncrono escuchando en el puerto %s", GRPC_PORT) # pylint: disable=C0301
+    try:
+        await server.wait_for_termination()
+    finally:
+        await server.stop(5)
+        topic_executor.shutdown()
+        queue_executor.shutdown()
+        await database.close_async()
@@ -24,59 +24,83 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x19replication_service.proto\x12\x08\x61pp.grpc\"b\n\x13ReplicationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12)\n\x0bstatus_code\x18\x02 \x01(\x0e\x32\x14.app.grpc.StatusCode\x12\x0f\n\x07message\x18\x03 \x01(\t\"F\n\x1cTopicForwardSubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"H\n\x1eTopicForwardUnsubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"[\n!TopicForwardPublishMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x11\n\tpublisher\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"K\n!TopicForwardConsumeMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"K\n\x12\x43reateTopicRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\r\n\x05owner\x18\x02 \x01(\t\x12\x12\n\ncreated_at\x18\x03 \x01(\x01\";\n\x12\x44\x65leteTopicRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"g\n\x1aTopicPublishMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x11\n\tpublisher\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\x01\"T\n\x1aTopicConsumeMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\x12\x0e\n\x06offset\x18\x03 \x01(\x05\"?\n\x15TopicSubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"A\n\x17TopicUnsubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"F\n\x1cQueueForwardSubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"H\n\x1eQueueForwardUnsubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"T\n\x1aQueueForwardEnqueueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\tpublisher\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"D\n\x1aQueueForwardDequeueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"K\n\x12\x43reateQueueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\r\n\x05owner\x18\x02 \x01(\t\x12\x12\n\ncreated_at\x18\x03 \x01(\x01\";\n\x12\x44\x65leteQueueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"i\n\x0e\x45nqueueRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x12\n\nqueue_name\x18\x02 \x01(\t\x12\x11\n\trequester\x18\x03 \x01(\t\x12\x0c\n\x04uuid\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x01\">\n\x15QueueSubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"@\n\x17QueueUnsubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"E\n\x0e\x44\x65queueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\x12\x0c\n\x04uuid\x18\x03 \x01(\t*\x9c\x01\n\nStatusCode\x12\x17\n\x13REPLICATION_SUCCESS\x10\x00\x12\x16\n\x12REPLICATION_FAILED\x10\x01\x12\x1c\n\x18REPLICATION_NOT_REQUIRED\x10\x02\x12\x1e\n\x1aINVALID_REPLICATION_STATUS\x10\x03\x12\x1f\n\x1bREPLICATE_NODE_DISCONNECTED\x10\x04\x32\x90\x08\n\x10TopicReplication\x12U\n\x14TopicReplicateCreate\x12\x1c.app.grpc.CreateTopicRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12U\n\x14TopicReplicateDelete\x12\x1c.app.grpc.DeleteTopicRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cTopicReplicatePublishMessage\x12$.app.grpc.TopicPublishMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cTopicReplicateConsumeMessage\x12$.app.grpc.TopicConsumeMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12[\n\x17TopicReplicateSubscribe\x12\x1f.app.grpc.TopicSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12_\n\x19TopicReplicateUnsubscribe\x12!.app.grpc.TopicUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12s\n#TopicReplicateForwardPublishMessage\x12+.app.grpc.TopicForwardPublishMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12s\n#TopicReplicateForwardConsumeMessage\x12+.app.grpc.TopicForwardConsumeMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12i\n\x1eTopicReplicateForwardSubscribe\x12&.app.grpc.TopicForwardSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12m\n TopicReplicateForwardUnsubscribe\x12(.app.grpc.TopicForwardUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x32\xce\x07\n\x10QueueReplication\x12U\n\x14QueueReplicateCreate\x12\x1c.app.grpc.CreateQueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12U\n\x14QueueReplicateDelete\x12\x1c.app.grpc.DeleteQueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12R\n\x15QueueReplicateEnqueue\x12\x18.app.grpc.EnqueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12[\n\x17QueueReplicateSubscribe\x12\x1f.app.grpc.QueueSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12_\n\x19QueueReplicateUnsubscribe\x12!.app.grpc.QueueUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12R\n\x15QueueReplicateDequeue\x12\x18.app.grpc.DequeueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cQueueReplicateForwardEnqueue\x12$.app.grpc.QueueForwardEnqueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cQueueReplicateForwardDequeue\x12$.app.grpc.QueueForwardDequeueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12i\n\x1eQueueReplicateForwardSubscribe\x12&.app.grpc.QueueForwardSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12m\n QueueReplicateForwardUnsubscribe\x12(.app.grpc.QueueForwardUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x19replication_service.proto\x12\x08\x61pp.grpc\"b\n\x13ReplicationResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12)\n\x0bstatus_code\x18\x02 \x01(\x0e\x32\x14.app.grpc.StatusCode\x12\x0f\n\x07message\x18\x03 \x01(\t\"\xa0\x01\n\x1cTopicForwardSubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\x12\x16\n\x0estart_position\x18\x03 \x01(\t\x12\x1c\n\x0fstart_timestamp\x18\x04 \x01(\x01H\x00\x88\x01\x01\x12\x0e\n\x06\x66ilter\x18\x05 \x01(\tB\x12\n\x10_start_timestamp\"H\n\x1eTopicForwardUnsubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"\xdf\x01\n!TopicForwardPublishMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x11\n\tpublisher\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12O\n\nattributes\x18\x04 \x03(\x0b\x32;.app.grpc.TopicForwardPublishMessageRequest.AttributesEntry\x1a\x31\n\x0f\x41ttributesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"K\n!TopicForwardConsumeMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"p\n\x12\x43reateTopicRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\r\n\x05owner\x18\x02 \x01(\t\x12\x12\n\ncreated_at\x18\x03 \x01(\x01\x12\x0f\n\x07storage\x18\x04 \x01(\t\x12\x12\n\npartitions\x18\x05 \x01(\x05\";\n\x12\x44\x65leteTopicRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"\xe4\x01\n\x1aTopicPublishMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x11\n\tpublisher\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x11\n\ttimestamp\x18\x04 \x01(\x01\x12H\n\nattributes\x18\x05 \x03(\x0b\x32\x34.app.grpc.TopicPublishMessageRequest.AttributesEntry\x1a\x31\n\x0f\x41ttributesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"T\n\x1aTopicConsumeMessageRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\x12\x0e\n\x06offset\x18\x03 \x01(\x05\"o\n\x15TopicSubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\x12\x13\n\x06offset\x18\x03 \x01(\x03H\x00\x88\x01\x01\x12\x0e\n\x06\x66ilter\x18\x04 \x01(\tB\t\n\x07_offset\"A\n\x17TopicUnsubscribeRequest\x12\x12\n\ntopic_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"F\n\x1cQueueForwardSubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"H\n\x1eQueueForwardUnsubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"T\n\x1aQueueForwardEnqueueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\tpublisher\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"D\n\x1aQueueForwardDequeueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x12\n\nsubscriber\x18\x02 \x01(\t\"\x8c\x01\n\x12\x43reateQueueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\r\n\x05owner\x18\x02 \x01(\t\x12\x12\n\ncreated_at\x18\x03 \x01(\x01\x12\x15\n\rmessage_limit\x18\x04 \x01(\r\x12\x17\n\x0foverflow_policy\x18\x05 \x01(\t\x12\x0f\n\x07storage\x18\x06 \x01(\t\";\n\x12\x44\x65leteQueueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"i\n\x0e\x45nqueueRequest\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x12\n\nqueue_name\x18\x02 \x01(\t\x12\x11\n\trequester\x18\x03 \x01(\t\x12\x0c\n\x04uuid\x18\x04 \x01(\t\x12\x11\n\ttimestamp\x18\x05 \x01(\x01\"D\n\x10\x45nqueueBatchItem\x12\x0f\n\x07message\x18\x01 \x01(\t\x12\x0c\n\x04uuid\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\x01\"j\n\x13\x45nqueueBatchRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\x12,\n\x08messages\x18\x03 \x03(\x0b\x32\x1a.app.grpc.EnqueueBatchItem\">\n\x15QueueSubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"@\n\x17QueueUnsubscribeRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\"E\n\x0e\x44\x65queueRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\x12\x0c\n\x04uuid\x18\x03 \x01(\t\"K\n\x13\x44\x65queueBatchRequest\x12\x12\n\nqueue_name\x18\x01 \x01(\t\x12\x11\n\trequester\x18\x02 \x01(\t\x12\r\n\x05uuids\x18\x03 \x03(\t\"\x97\x07\n\x14ReplicationOperation\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12\x34\n\x0c\x63reate_topic\x18\x02 \x01(\x0b\x32\x1c.app.grpc.CreateTopicRequestH\x00\x12\x34\n\x0c\x64\x65lete_topic\x18\x03 \x01(\x0b\x32\x1c.app.grpc.DeleteTopicRequestH\x00\x12?\n\x0fpublish_message\x18\x04 \x01(\x0b\x32$.app.grpc.TopicPublishMessageRequestH\x00\x12?\n\x0f\x63onsume_message\x18\x05 \x01(\x0b\x32$.app.grpc.TopicConsumeMessageRequestH\x00\x12:\n\x0ftopic_subscribe\x18\x06 \x01(\x0b\x32\x1f.app.grpc.TopicSubscribeRequestH\x00\x12>\n\x11topic_unsubscribe\x18\x07 \x01(\x0b\x32!.app.grpc.TopicUnsubscribeRequestH\x00\x12\x34\n\x0c\x63reate_queue\x18\x08 \x01(\x0b\x32\x1c.app.grpc.CreateQueueRequestH\x00\x12\x34\n\x0c\x64\x65lete_queue\x18\t \x01(\x0b\x32\x1c.app.grpc.DeleteQueueRequestH\x00\x12+\n\x07\x65nqueue\x18\n \x01(\x0b\x32\x18.app.grpc.EnqueueRequestH\x00\x12\x36\n\renqueue_batch\x18\x0b \x01(\x0b\x32\x1d.app.grpc.EnqueueBatchRequestH\x00\x12:\n\x0fqueue_subscribe\x18\x0c \x01(\x0b\x32\x1f.app.grpc.QueueSubscribeRequestH\x00\x12>\n\x11queue_unsubscribe\x18\r \x01(\x0b\x32!.app.grpc.QueueUnsubscribeRequestH\x00\x12+\n\x07\x64\x65queue\x18\x0e \x01(\x0b\x32\x18.app.grpc.DequeueRequestH\x00\x12\x36\n\rdequeue_batch\x18\x0f \x01(\x0b\x32\x1d.app.grpc.DequeueBatchRequestH\x00\x12\x18\n\x10journal_sequence\x18\x10 \x01(\x04\x12\x11\n\tstream_id\x18\x11 \x01(\t\x12\x17\n\x0fstream_sequence\x18\x12 \x01(\x04\x42\x0b\n\toperation\"V\n\x10ReplicationBatch\x12\x32\n\noperations\x18\x01 \x03(\x0b\x32\x1e.app.grpc.ReplicationOperation\x12\x0e\n\x06origin\x18\x02 \x01(\t\"b\n\x12ReplicationFailure\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12)\n\x0bstatus_code\x18\x02 \x01(\x0e\x32\x14.app.grpc.StatusCode\x12\x0f\n\x07message\x18\x03 \x01(\t\"R\n\x0eReplicationAck\x12\x10\n\x08sequence\x18\x01 \x01(\x04\x12.\n\x08\x66\x61ilures\x18\x02 \x03(\x0b\x32\x1c.app.grpc.ReplicationFailure*\x9c\x01\n\nStatusCode\x12\x17\n\x13REPLICATION_SUCCESS\x10\x00\x12\x16\n\x12REPLICATION_FAILED\x10\x01\x12\x1c\n\x18REPLICATION_NOT_REQUIRED\x10\x02\x12\x1e\n\x1aINVALID_REPLICATION_STATUS\x10\x03\x12\x1f\n\x1bREPLICATE_NODE_DISCONNECTED\x10\x04\x32\x90\x08\n\x10TopicReplication\x12U\n\x14TopicReplicateCreate\x12\x1c.app.grpc.CreateTopicRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12U\n\x14TopicReplicateDelete\x12\x1c.app.grpc.DeleteTopicRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cTopicReplicatePublishMessage\x12$.app.grpc.TopicPublishMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cTopicReplicateConsumeMessage\x12$.app.grpc.TopicConsumeMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12[\n\x17TopicReplicateSubscribe\x12\x1f.app.grpc.TopicSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12_\n\x19TopicReplicateUnsubscribe\x12!.app.grpc.TopicUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12s\n#TopicReplicateForwardPublishMessage\x12+.app.grpc.TopicForwardPublishMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12s\n#TopicReplicateForwardConsumeMessage\x12+.app.grpc.TopicForwardConsumeMessageRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12i\n\x1eTopicReplicateForwardSubscribe\x12&.app.grpc.TopicForwardSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12m\n TopicReplicateForwardUnsubscribe\x12(.app.grpc.TopicForwardUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x32\x8a\t\n\x10QueueReplication\x12U\n\x14QueueReplicateCreate\x12\x1c.app.grpc.CreateQueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12U\n\x14QueueReplicateDelete\x12\x1c.app.grpc.DeleteQueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12R\n\x15QueueReplicateEnqueue\x12\x18.app.grpc.EnqueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\\\n\x1aQueueReplicateEnqueueBatch\x12\x1d.app.grpc.EnqueueBatchRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12[\n\x17QueueReplicateSubscribe\x12\x1f.app.grpc.QueueSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12_\n\x19QueueReplicateUnsubscribe\x12!.app.grpc.QueueUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12R\n\x15QueueReplicateDequeue\x12\x18.app.grpc.DequeueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\\\n\x1aQueueReplicateDequeueBatch\x12\x1d.app.grpc.DequeueBatchRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cQueueReplicateForwardEnqueue\x12$.app.grpc.QueueForwardEnqueueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12\x65\n\x1cQueueReplicateForwardDequeue\x12$.app.grpc.QueueForwardDequeueRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12i\n\x1eQueueReplicateForwardSubscribe\x12&.app.grpc.QueueForwardSubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x12m\n QueueReplicateForwardUnsubscribe\x12(.app.grpc.QueueForwardUnsubscribeRequest\x1a\x1d.app.grpc.ReplicationResponse\"\x00\x32\x62\n\x11ReplicationStream\x12M\n\x0fReplicateStream\x12\x1a.app.grpc.ReplicationBatch\x1a\x18.app.grpc.ReplicationAck\"\x00(\x01\x30\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'replication_service_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_STATUSCODE']._serialized_start=1665
-  _globals['_STATUSCODE']._serialized_end=1821
+  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._loaded_options = None
+  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._serialized_options = b'8\001'
+  _globals['_TOPICPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._loaded_options = None
+  _globals['_TOPICPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._serialized_options = b'8\001'
+  _globals['_STATUSCODE']._serialized_start=3615
+  _globals['_STATUSCODE']._serialized_end=3771
   _globals['_REPLICATIONRESPONSE']._serialized_start=39
   _globals['_REPLICATIONRESPONSE']._serialized_end=137
-  _globals['_TOPICFORWARDSUBSCRIBEREQUEST']._serialized_start=139
-  _globals['_TOPICFORWARDSUBSCRIBEREQUEST']._serialized_end=209
-  _globals['_TOPICFORWARDUNSUBSCRIBEREQUEST']._serialized_start=211
-  _globals['_TOPICFORWARDUNSUBSCRIBEREQUEST']._serialized_end=283
-  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST']._serialized_start=285
-  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST']._serialized_end=376
-  _globals['_TOPICFORWARDCONSUMEMESSAGEREQUEST']._serialized_start=378
-  _globals['_TOPICFORWARDCONSUMEMESSAGEREQUEST']._serialized_end=453
-  _globals['_CREATETOPICREQUEST']._serialized_start=455
-  _globals['_CREATETOPICREQUEST']._serialized_end=530
-  _globals['_DELETETOPICREQUEST']._serialized_start=532
-  _globals['_DELETETOPICREQUEST']._serialized_end=591
-  _globals['_TOPICPUBLISHMESSAGEREQUEST']._serialized_start=593
-  _globals['_TOPICPUBLISHMESSAGEREQUEST']._serialized_end=696
-  _globals['_TOPICCONSUMEMESSAGEREQUEST']._serialized_start=698
-  _globals['_TOPICCONSUMEMESSAGEREQUEST']._serialized_end=782
-  _globals['_TOPICSUBSCRIBEREQUEST']._serialized_start=784
-  _globals['_TOPICSUBSCRIBEREQUEST']._serialized_end=847
-  _globals['_TOPICUNSUBSCRIBEREQUEST']._serialized_start=849
-  _globals['_TOPICUNSUBSCRIBEREQUEST']._serialized_end=914
-  _globals['_QUEUEFORWARDSUBSCRIBEREQUEST']._serialized_start=916
-  _globals['_QUEUEFORWARDSUBSCRIBEREQUEST']._serialized_end=986
-  _globals['_QUEUEFORWARDUNSUBSCRIBEREQUEST']._serialized_start=988
-  _globals['_QUEUEFORWARDUNSUBSCRIBEREQUEST']._serialized_end=1060
-  _globals['_QUEUEFORWARDENQUEUEREQUEST']._serialized_start=1062
-  _globals['_QUEUEFORWARDENQUEUEREQUEST']._serialized_end=1146
-  _globals['_QUEUEFORWARDDEQUEUEREQUEST']._serialized_start=1148
-  _globals['_QUEUEFORWARDDEQUEUEREQUEST']._serialized_end=1216
-  _globals['_CREATEQUEUEREQUEST']._serialized_start=1218
-  _globals['_CREATEQUEUEREQUEST']._serialized_end=1293
-  _globals['_DELETEQUEUEREQUEST']._serialized_start=1295
-  _globals['_DELETEQUEUEREQUEST']._serialized_end=1354
-  _globals['_ENQUEUEREQUEST']._serialized_start=1356
-  _globals['_ENQUEUEREQUEST']._serialized_end=1461
-  _globals['_QUEUESUBSCRIBEREQUEST']._serialized_start=1463
-  _globals['_QUEUESUBSCRIBEREQUEST']._serialized_end=1525
-  _globals['_QUEUEUNSUBSCRIBEREQUEST']._serialized_start=1527
-  _globals['_QUEUEUNSUBSCRIBEREQUEST']._serialized_end=1591
-  _globals['_DEQUEUEREQUEST']._serialized_start=1593
-  _globals['_DEQUEUEREQUEST']._serialized_end=1662
-  _globals['_TOPICREPLICATION']._serialized_start=1824
-  _globals['_TOPICREPLICATION']._serialized_end=2864
-  _globals['_QUEUEREPLICATION']._serialized_start=2867
-  _globals['_QUEUEREPLICATION']._serialized_end=3841
+  _globals['_TOPICFORWARDSUBSCRIBEREQUEST']._serialized_start=140
+  _globals['_TOPICFORWARDSUBSCRIBEREQUEST']._serialized_end=300
+  _globals['_TOPICFORWARDUNSUBSCRIBEREQUEST']._serialized_start=302
+  _globals['_TOPICFORWARDUNSUBSCRIBEREQUEST']._serialized_end=374
+  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST']._serialized_start=377
+  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST']._serialized_end=600
+  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._serialized_start=551
+  _globals['_TOPICFORWARDPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._serialized_end=600
+  _globals['_TOPICFORWARDCONSUMEMESSAGEREQUEST']._serialized_start=602
+  _globals['_TOPICFORWARDCONSUMEMESSAGEREQUEST']._serialized_end=677
+  _globals['_CREATETOPICREQUEST']._serialized_start=679
+  _globals['_CREATETOPICREQUEST']._serialized_end=791
+  _globals['_DELETETOPICREQUEST']._serialized_start=793
+  _globals['_DELETETOPICREQUEST']._serialized_end=852
+  _globals['_TOPICPUBLISHMESSAGEREQUEST']._serialized_start=855
+  _globals['_TOPICPUBLISHMESSAGEREQUEST']._serialized_end=1083
+  _globals['_TOPICPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._serialized_start=551
+  _globals['_TOPICPUBLISHMESSAGEREQUEST_ATTRIBUTESENTRY']._serialized_end=600
+  _globals['_TOPICCONSUMEMESSAGEREQUEST']._serialized_start=1085
+  _globals['_TOPICCONSUMEMESSAGEREQUEST']._serialized_end=1169
+  _globals['_TOPICSUBSCRIBEREQUEST']._serialized_start=1171
+  _globals['_TOPICSUBSCRIBEREQUEST']._serialized_end=1282
+  _globals['_TOPICUNSUBSCRIBEREQUEST']._serialized_start=1284
+  _globals['_TOPICUNSUBSCRIBEREQUEST']._serialized_end=1349
+  _globals['_QUEUEFORWARDSUBSCRIBEREQUEST']._serialized_start=1351
+  _globals['_QUEUEFORWARDSUBSCRIBEREQUEST']._serialized_end=1421
+  _globals['_QUEUEFORWARDUNSUBSCRIBEREQUEST']._serialized_start=1423
+  _globals['_QUEUEFORWARDUNSUBSCRIBEREQUEST']._serialized_end=1495
+  _globals['_QUEUEFORWARDENQUEUEREQUEST']._serialized_start=1497
+  _globals['_QUEUEFORWARDENQUEUEREQUEST']._serialized_end=1581
+  _globals['_QUEUEFORWARDDEQUEUEREQUEST']._serialized_start=1583
+  _globals['_QUEUEFORWARDDEQUEUEREQUEST']._serialized_end=1651
+  _globals['_CREATEQUEUEREQUEST']._serialized_start=1654
+  _globals['_CREATEQUEUEREQUEST']._serialized_end=1794
+  _globals['_DELETEQUEUEREQUEST']._serialized_start=1796
+  _globals['_DELETEQUEUEREQUEST']._serialized_end=1855
+  _globals['_ENQUEUEREQUEST']._serialized_start=1857
+  _globals['_ENQUEUEREQUEST']._serialized_end=1962
+  _globals['_ENQUEUEBATCHITEM']._serialized_start=1964
+  _globals['_ENQUEUEBATCHITEM']._serialized_end=2032
+  _globals['_ENQUEUEBATCHREQUEST']._serialized_start=2034
+  _globals['_ENQUEUEBATCHREQUEST']._serialized_end=2140
+  _globals['_QUEUESUBSCRIBEREQUEST']._serialized_start=2142
+  _globals['_QUEUESUBSCRIBEREQUEST']._serialized_end=2204
+  _globals['_QUEUEUNSUBSCRIBEREQUEST']._serialized_start=2206
+  _globals['_QUEUEUNSUBSCRIBEREQUEST']._serialized_end=2270
+  _globals['_DEQUEUEREQUEST']._serialized_start=2272
+  _globals['_DEQUEUEREQUEST']._serialized_end=2341
+  _globals['_DEQUEUEBATCHREQUEST']._serialized_start=2343
+  _globals['_DEQUEUEBATCHREQUEST']._serialized_end=2418
+  _globals['_REPLICATIONOPERATION']._serialized_start=2421
+  _globals['_REPLICATIONOPERATION']._serialized_end=3340
+  _globals['_REPLICATIONBATCH']._serialized_start=3342
+  _globals['_REPLICATIONBATCH']._serialized_end=3428
+  _globals['_REPLICATIONFAILURE']._serialized_start=3430
+  _globals['_REPLICATIONFAILURE']._serialized_end=3528
+  _globals['_REPLICATIONACK']._serialized_start=3530
+  _globals['_REPLICATIONACK']._serialized_end=3612
+  _globals['_TOPICREPLICATION']._serialized_start=3774
+  _globals['_TOPICREPLICATION']._serialized_end=4814
+  _globals['_QUEUEREPLICATION']._serialized_start=4817
+  _globals['_QUEUEREPLICATION']._serialized_end=5979
+  _globals['_REPLICATIONSTREAM']._serialized_start=5981
+  _globals['_REPLICATIONSTREAM']._serialized_end=6079
 # @@protoc_insertion_point(module_scope)
@@ -523,6 +523,11 @@ class QueueReplicationStub(object):
                 request_serializer=replication__service__pb2.EnqueueRequest.SerializeToString,
                 response_deserializer=replication__service__pb2.ReplicationResponse.FromString,
                 _registered_method=True)
+        self.QueueReplicateEnqueueBatch = channel.unary_unary(
+                '/app.grpc.QueueReplication/QueueReplicateEnqueueBatch',
+                request_serializer=replication__service__pb2.EnqueueBatchRequest.SerializeToString,
+                response_deserializer=replication__service__pb2.ReplicationResponse.FromString,
+                _registered_method=True)
         self.QueueReplicateSubscribe = channel.unary_unary(
                 '/app.grpc.QueueReplication/QueueReplicateSubscribe',
                 request_serializer=replication__service__pb2.QueueSubscribeRequest.SerializeToString,
@@ -538,6 +543,11 @@ class QueueReplicationStub(object):
                 request_serializer=replication__service__pb2.DequeueRequest.SerializeToString,
                 response_deserializer=replication__service__pb2.ReplicationResponse.FromString,
                 _registered_method=True)
+        self.QueueReplicateDequeueBatch = channel.unary_unary(
+                '/app.grpc.QueueReplication/QueueReplicateDequeueBatch',
+                request_serializer=replication__service__pb2.DequeueBatchRequest.SerializeToString,
+                response_deserializer=replication__service__pb2.ReplicationResponse.FromString,
+                _registered_method=True)
         self.QueueReplicateForwardEnqueue = channel.unary_unary(
                 '/app.grpc.QueueReplication/QueueReplicateForwardEnqueue',
                 request_serializer=replication__service__pb2.QueueForwardEnqueueRequest.SerializeToString,
@@ -585,6 +595,13 @@ class QueueReplicationServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def QueueReplicateEnqueueBatch(self, request, context):
+        """Publish a batch of messages in a single call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def QueueReplicateSubscribe(self, request, context):
         """Subscribe user replication Done
         """
@@ -606,6 +623,13 @@ class QueueReplicationServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def QueueReplicateDequeueBatch(self, request, context):
+        """Dequeue a batch of messages in a single call
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def QueueReplicateForwardEnqueue(self, request, context):
         """Forward queue enqueue
         """
@@ -652,6 +676,11 @@ def add_QueueReplicationServicer_to_server(servicer, server):
                     request_deserializer=replication__service__pb2.EnqueueRequest.FromString,
                     response_serializer=replication__service__pb2.ReplicationResponse.SerializeToString,
             ),
+            'QueueReplicateEnqueueBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.QueueReplicateEnqueueBatch,
+                    request_deserializer=replication__service__pb2.EnqueueBatchRequest.FromString,
+                    response_serializer=replication__service__pb2.ReplicationResponse.SerializeToString,
+            ),
             'QueueReplicateSubscribe': grpc.unary_unary_rpc_method_handler(
                     servicer.QueueReplicateSubscribe,
                     request_deserializer=replication__service__pb2.QueueSubscribeRequest.FromString,
@@ -667,6 +696,11 @@ def add_QueueReplicationServicer_to_server(servicer, server):
                     request_deserializer=replication__service__pb2.DequeueRequest.FromString,
                     response_serializer=replication__service__pb2.ReplicationResponse.SerializeToString,
             ),
+            'QueueReplicateDequeueBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.QueueReplicateDequeueBatch,
+                    request_deserializer=replication__service__pb2.DequeueBatchRequest.FromString,
+                    response_serializer=replication__service__pb2.ReplicationResponse.SerializeToString,
+            ),
             'QueueReplicateForwardEnqueue': grpc.unary_unary_rpc_method_handler(
                     servicer.QueueReplicateForwardEnqueue,
                     request_deserializer=replication__service__pb2.QueueForwardEnqueueRequest.FromString,
@@ -780,6 +814,33 @@ class QueueReplication(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def QueueReplicateEnqueueBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/app.grpc.QueueReplication/QueueReplicateEnqueueBatch',
+            replication__service__pb2.EnqueueBatchRequest.SerializeToString,
+            replication__service__pb2.ReplicationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def QueueReplicateSubscribe(request,
             target,
@@ -861,6 +922,33 @@ class QueueReplication(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def QueueReplicateDequeueBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/app.grpc.QueueReplication/QueueReplicateDequeueBatch',
+            replication__service__pb2.DequeueBatchRequest.SerializeToString,
+            replication__service__pb2.ReplicationResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def QueueReplicateForwardEnqueue(request,
             target,
@@ -968,3 +1056,84 @@ class QueueReplication(object):
             timeout,
             metadata,
             _registered_method=True)
+
+
+class ReplicationStreamStub(object):
+    """Replication of every topic and queue operation over one long-lived
+    stream per peer, the operations are sent in batches and acknowledged
+    with the sequence of the last one applied
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.ReplicateStream = channel.stream_stream(
+                '/app.grpc.ReplicationStream/ReplicateStream',
+                request_serializer=replication__service__pb2.ReplicationBatch.SerializeToString,
+                response_deserializer=replication__service__pb2.ReplicationAck.FromString,
+                _registered_method=True)
+
+
+class ReplicationStreamServicer(object):
+    """Replication of every topic and queue operation over one long-lived
+    stream per peer, the operations are sent in batches and acknowledged
+    with the sequence of the last one applied
+    """
+
+    def ReplicateStream(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_ReplicationStreamServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'ReplicateStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.ReplicateStream,
+                    request_deserializer=replication__service__pb2.ReplicationBatch.FromString,
+                    response_serializer=replication__service__pb2.ReplicationAck.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'app.grpc.ReplicationStream', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('app.grpc.ReplicationStream', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class ReplicationStream(object):
+    """Replication of every topic and queue operation over one long-lived
+    stream per peer, the operations are sent in batches and acknowledged
+    with the sequence of the last one applied
+    """
+
+    @staticmethod
+    def ReplicateStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/app.grpc.ReplicationStream/ReplicateStream',
+            replication__service__pb2.ReplicationBatch.SerializeToString,
+            replication__service__pb2.ReplicationAck.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
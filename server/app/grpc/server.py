@@ -4,36 +4,56 @@ For allow the comunnication between the nodes
 wit grpc.
 """
 from concurrent import futures
+import asyncio
 import grpc
 import os
 import redis
 from app.domain.logger_config import logger
 from app.domain.topics.topics_manager import MOMTopicManager
 from app.domain.queues.queues_manager import MOMQueueManager
+from app.domain.topics import (
+    topics_storage, topics_segments, topics_filters, topics_patterns
+)
+from app.domain import replication_journal, subscriptions
+from app.domain.replication_apply import get_replica_applier
 from app.domain.utils import TopicKeyBuilder, KeyBuilder
-from app.grpc.replication_service_pb2 import ReplicationResponse, StatusCode
+from app.grpc.replication_service_pb2 import (
+    ReplicationAck,
+    ReplicationFailure,
+    ReplicationResponse,
+    StatusCode,
+)
 from app.grpc import replication_service_pb2_grpc
 import json
 
 from app.adapters.db import Database
 from app.adapters.factory import ObjectFactory
+from app.config.env import GRPC_PORT
 
+# "thread" usa el servidor con pool de hilos, "aio" el de grpc.aio
+GRPC_SERVER_MODE = os.getenv("GRPC_SERVER_MODE", "thread").lower()
+GRPC_MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+GRPC_MAX_CONCURRENT_STREAMS = int(
+    os.getenv("GRPC_MAX_CONCURRENT_STREAMS", "100")
+)
+
+
+def server_options() -> list:
+    """Opciones comunes de los servidores gRPC del nodo"""
+    return [("grpc.max_concurrent_streams", GRPC_MAX_CONCURRENT_STREAMS)]
 
 
 def create_redis2_connection():
-    """Crea y retorna una conexión a redis2"""
+    """Retorna el cliente de redis2 que comparten todas las llamadas"""
     try:
-        db = ObjectFactory.get_instance(Database)
-        client = db.get_client()
-        return client
+        # Se crea una vez, sin ping ni cierre por llamada
+        return get_replica_applier().redis
     except redis.AuthenticationError:
         print("Error de autenticación. Verifica la contraseña")
         return None
     except redis.ConnectionError:
         print("No se pudo conectar a redis2. Verifica si el servicio está corriendo") # pylint: disable=C0301
         return None
-    finally:
-        client.close()
 
 
 class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServicer): # pylint: disable=C0301
@@ -52,11 +72,19 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                         message="Redis connection failed",
                 )
             
+            # Los nodos con una versión anterior no envían el almacenamiento
+            storage = {}
+            if request.storage:
+                storage["storage"] = request.storage
+            if request.partitions:
+                storage["partitions"] = request.partitions
+
             topic_manager = MOMTopicManager(db, request.owner)
             result = topic_manager.create_topic(
                 topic_name=request.topic_name,
                 principal=False,
                     created_at=request.created_at,
+                **storage
             )
             
             if not result.success:
@@ -100,6 +128,8 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
             subscribers_key = TopicKeyBuilder.subscribers_key(request.topic_name)
             offset_key = TopicKeyBuilder.subscriber_offsets_key(request.topic_name)
             messages_key = TopicKeyBuilder.messages_key(request.topic_name)
+            timeline_key = TopicKeyBuilder.timeline_key(request.topic_name)
+            filters_key = TopicKeyBuilder.filters_key(request.topic_name)
 
             # Verificar si el tópico existe
             if not db.exists(metadata_key):
@@ -112,7 +142,15 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                 )
 
             # Eliminar todas las claves relacionadas con el tópico
-            db.delete(topic_key, metadata_key, subscribers_key, offset_key, messages_key)
+            subscriptions.remove_all_subscriptions(
+                db, db.smembers(subscribers_key),
+                subscriptions.TOPIC, request.topic_name
+            )
+            db.delete(
+                topic_key, metadata_key, subscribers_key, offset_key,
+                messages_key, timeline_key, filters_key
+            )
+            db.unlink(*topics_segments.segment_keys(db, request.topic_name))
 
             return ReplicationResponse(
                 success=True,
@@ -130,38 +168,7 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
 
     def TopicReplicatePublishMessage(self, request, context):
         try:
-            db = create_redis2_connection()
-            if db is None:
-                context.set_code(grpc.StatusCode.UNAVAILABLE)
-                context.set_details("Redis connection failed")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="Redis connection failed",
-                )
-
-            topic_manager = MOMTopicManager(db, request.publisher)
-            result = topic_manager.publish(
-                message=request.message,
-                topic_name=request.topic_name,
-                timestamp=request.timestamp,
-                im_replicating=True,
-            )
-
-            if not result.success:
-                context.set_code(grpc.StatusCode.INTERNAL)
-                context.set_details(result.status.value)
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message=result.status.value,
-                )
-
-            return ReplicationResponse(
-                success=True,
-                status_code=StatusCode.REPLICATION_SUCCESS,
-                message="Message replicated successfully",
-            )
+            return get_replica_applier().publish(request, context)
         except Exception as e: # pylint: disable=W0703
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
@@ -173,37 +180,7 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
 
     def TopicReplicateConsumeMessage(self, request, context):
         try:
-            db = create_redis2_connection()
-            if db is None:
-                context.set_code(grpc.StatusCode.UNAVAILABLE)
-                context.set_details("Redis connection failed")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="Redis connection failed",
-                )
-
-            subscribers_key = TopicKeyBuilder.subscribers_key(request.topic_name) # pylint: disable=C0301
-            is_subscribed = db.sismember(subscribers_key, request.subscriber)
-            if not is_subscribed:
-                context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
-                context.set_details("User is not subscribed to this topic")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="User is not subscribed to this topic",
-                )
-
-            # Actualizar el offset del suscriptor
-            offset_key = TopicKeyBuilder.subscriber_offsets_key(request.topic_name) # pylint: disable=C0301
-            offset_field = TopicKeyBuilder.subscriber_offset_field(request.subscriber) # pylint: disable=C0301
-
-            db.hset(offset_key, offset_field, request.offset)
-            return ReplicationResponse(
-                success=True,
-                status_code=StatusCode.REPLICATION_SUCCESS,
-                message="Offset updated successfully",
-            )
+            return get_replica_applier().consume(request, context)
         except Exception as e: # pylint: disable=W0703
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
@@ -225,9 +202,19 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                     message="Redis connection failed",
                 )
 
+            # Las suscripciones a un patrón no tienen tópico, sus
+            # tópicos se replican cada uno con su propia suscripción
+            if topics_patterns.is_pattern(request.topic_name):
+                topics_patterns.add_pattern(
+                    db, request.topic_name, request.subscriber
+                )
+                return ReplicationResponse(
+                    success=True,
+                    status_code=StatusCode.REPLICATION_SUCCESS,
+                    message="User subscribed successfully",
+                )
+
             subscribers_key = TopicKeyBuilder.subscribers_key(request.topic_name) # pylint: disable=C0301
-            offset_key = TopicKeyBuilder.subscriber_offsets_key(request.topic_name) # pylint: disable=C0301
-            offset_field = TopicKeyBuilder.subscriber_offset_field(request.subscriber) # pylint: disable=C0301
 
             metadata_key = TopicKeyBuilder.metadata_key(request.topic_name)
             if not db.exists(metadata_key):
@@ -247,9 +234,23 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                     status_code=StatusCode.REPLICATION_FAILED,
                     message="User is already subscribed to this topic",
                 )
-            message_count = int(db.hget(metadata_key, "message_count") or 0)
+            # Los nodos anteriores no envían el offset inicial
+            if request.HasField("offset"):
+                offset = request.offset
+            else:
+                offset = int(db.hget(metadata_key, "message_count") or 0)
             db.sadd(subscribers_key, request.subscriber)
-            db.hset(offset_key, offset_field, message_count)
+            subscriptions.add_subscription(
+                db, request.subscriber, subscriptions.TOPIC, request.topic_name
+            )
+            topics_storage.set_subscriber_offset(
+                db, request.topic_name, request.subscriber, offset
+            )
+            if request.filter:
+                topics_filters.set_filter(
+                    db, request.topic_name, request.subscriber,
+                    json.loads(request.filter)
+                )
 
             return ReplicationResponse(
                 success=True,
@@ -276,9 +277,17 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                     message="Redis connection failed",
                 )
 
+            if topics_patterns.is_pattern(request.topic_name):
+                topics_patterns.remove_pattern(
+                    db, request.topic_name, request.subscriber
+                )
+                return ReplicationResponse(
+                    success=True,
+                    status_code=StatusCode.REPLICATION_SUCCESS,
+                    message="User unsubscribed successfully",
+                )
+
             subscribers_key = TopicKeyBuilder.subscribers_key(request.topic_name) # pylint: disable=C0301
-            offset_key = TopicKeyBuilder.subscriber_offsets_key(request.topic_name) # pylint: disable=C0301
-            offset_field = TopicKeyBuilder.subscriber_offset_field(request.subscriber) # pylint: disable=C0301
 
             metadata_key = TopicKeyBuilder.metadata_key(request.topic_name)
             if not db.exists(metadata_key):
@@ -310,7 +319,15 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                 )
 
             db.srem(subscribers_key, request.subscriber)
-            db.hdel(offset_key, offset_field)
+            subscriptions.remove_subscription(
+                db, request.subscriber, subscriptions.TOPIC, request.topic_name
+            )
+            topics_storage.remove_subscriber_offset(
+                db, request.topic_name, request.subscriber
+            )
+            topics_filters.set_filter(
+                db, request.topic_name, request.subscriber, None
+            )
 
             return ReplicationResponse(
                 success=True,
@@ -342,7 +359,8 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
                 message=request.message,
                 topic_name=request.topic_name,
                 im_replicating=False,
-                endpoint=True
+                endpoint=True,
+                attributes=dict(request.attributes) or None
             )
 
             if not result.success:
@@ -434,7 +452,10 @@ class TopicReplicationServicer(replication_service_pb2_grpc.TopicReplicationServ
             topic_manager = MOMTopicManager(db, request.subscriber)
             result = topic_manager.subscriptions.subscribe(
                 topic_name=request.topic_name,
-                endpoint=True
+                endpoint=True,
+                start_position=request.start_position or None,
+                start_timestamp=request.start_timestamp if request.HasField("start_timestamp") else None, # pylint: disable=C0301
+                message_filter=json.loads(request.filter) if request.filter else None # pylint: disable=C0301
             )
 
             if not result.success:
@@ -527,11 +548,21 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
                     message="Redis connection failed",
                 )
 
+            # Los nodos con una versión anterior no envían estas opciones
+            options = {}
+            if request.message_limit:
+                options["message_limit"] = request.message_limit
+            if request.overflow_policy:
+                options["overflow_policy"] = request.overflow_policy
+            if request.storage:
+                options["storage"] = request.storage
+
             queue_manager = MOMQueueManager(db, request.owner)
             result = queue_manager.create_queue(
                 queue_name=request.queue_name,
                 principal=False,
                 created_at=request.created_at,
+                **options
             )
             
             if not result.success:
@@ -569,8 +600,10 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
 
             # Obtener las claves necesarias
             queue_key = KeyBuilder.queue_key(request.queue_name)
+            messages_key = KeyBuilder.messages_key(request.queue_name)
             metadata_key = KeyBuilder.metadata_key(request.queue_name)
             subscribers_key = KeyBuilder.subscribers_key(request.queue_name)
+            leases_key = KeyBuilder.leases_key(request.queue_name)
 
             # Verificar si la cola existe
             if not db.exists(metadata_key):
@@ -583,7 +616,14 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
                 )
 
             # Eliminar todas las claves relacionadas con la cola
-            db.delete(queue_key, metadata_key, subscribers_key)
+            subscriptions.remove_all_subscriptions(
+                db, db.smembers(subscribers_key),
+                subscriptions.QUEUE, request.queue_name
+            )
+            db.delete(
+                queue_key, messages_key, metadata_key, subscribers_key,
+                leases_key
+            )
             nodes = ["A", "B", "C"]
             db_nodes = ObjectFactory.get_instance(Database, ObjectFactory.NODES_DATABASE).get_client()
             for node in nodes:
@@ -638,6 +678,9 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
 
             # Suscribir al usuario
             db.sadd(subscribers_key, request.requester)
+            subscriptions.add_subscription(
+                db, request.requester, subscriptions.QUEUE, request.queue_name
+            )
 
             return ReplicationResponse(
                 success=True,
@@ -689,6 +732,9 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
 
             # Eliminar la suscripción
             db.srem(subscribers_key, request.requester)
+            subscriptions.remove_subscription(
+                db, request.requester, subscriptions.QUEUE, request.queue_name
+            )
 
             return ReplicationResponse(
                 success=True,
@@ -704,107 +750,54 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
 
     def QueueReplicateEnqueue(self, request, context):
         try:
-            db = create_redis2_connection()
-            if db is None:
-                logger.error("No se pudo conectar a Redis")
-                context.set_code(grpc.StatusCode.UNAVAILABLE)
-                context.set_details("Redis connection failed")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="Redis connection failed",
-                )
-
-            queue_manager = MOMQueueManager(db, request.requester)
-
-            # Verificar si la cola existe
-            metadata_key = KeyBuilder.metadata_key(request.queue_name)
-            if not db.exists(metadata_key):
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details("Queue does not exist")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="Queue does not exist",
-                )
-
-            result = queue_manager.enqueue(
-                message=request.message,
-                queue_name=request.queue_name,
-                uuid=request.uuid,
-                timestamp=request.timestamp,
-                im_replicating=True,
-            )
-
-            if not result.success:
-                context.set_code(grpc.StatusCode.INTERNAL)
-                context.set_details(result.status.value)
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message=result.status.value,
-                )
-
+            return get_replica_applier().enqueue(request, context)
+        except Exception as e: # pylint: disable=W0703
+            logger.exception("Error inesperado en QueueReplicateEnqueue")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
             return ReplicationResponse(
-                success=True,
-                status_code=StatusCode.REPLICATION_SUCCESS,
-                message="Message enqueued successfully",
+                success=False,
+                status_code=StatusCode.REPLICATION_FAILED,
+                message=str(e)
             )
 
+    def QueueReplicateEnqueueBatch(self, request, context):
+        try:
+            return get_replica_applier().enqueue_batch(request, context)
         except Exception as e: # pylint: disable=W0703
-            logger.exception("Error inesperado en QueueReplicateEnqueue")
+            logger.exception("Error inesperado en QueueReplicateEnqueueBatch")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return ReplicationResponse(
-                success=False, status_code=StatusCode.REPLICATION_FAILED, message=str(e) # pylint: disable=C0301
+                success=False,
+                status_code=StatusCode.REPLICATION_FAILED,
+                message=str(e)
             )
 
     def QueueReplicateDequeue(self, request, context):
         try:
-            db = create_redis2_connection()
-            if db is None:
-                context.set_code(grpc.StatusCode.UNAVAILABLE)
-                context.set_details("Redis connection failed")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="Redis connection failed",
-                )
-
-            # Verificar si la cola existe
-            metadata_key = KeyBuilder.metadata_key(request.queue_name)
-            if not db.exists(metadata_key):
-                context.set_code(grpc.StatusCode.NOT_FOUND)
-                context.set_details("Queue does not exist")
-                return ReplicationResponse(
-                    success=False,
-                    status_code=StatusCode.REPLICATION_FAILED,
-                    message="Queue does not exist",
-                )
-
-            # Buscar el mensaje por UUID y desencolarlo
-            queue_key = KeyBuilder.queue_key(request.queue_name)
-            messages = db.lrange(queue_key, 0, -1)
-            for i, msg in enumerate(messages):
-                message = json.loads(msg)
-                if message["id"] == request.uuid:
-                    db.lset(queue_key, i, "__DELETED__")
-                    db.lrem(queue_key, 1, "__DELETED__")
-                    db.hincrby(metadata_key, "total_messages", -1)
-                    break
-
+            return get_replica_applier().dequeue(request, context)
+        except Exception as e: # pylint: disable=W0703
+            logger.exception("Error inesperado en QueueReplicateDequeue")
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details(str(e))
             return ReplicationResponse(
-                success=True,
-                status_code=StatusCode.REPLICATION_SUCCESS,
-                message="Message dequeued successfully",
+                success=False,
+                status_code=StatusCode.REPLICATION_FAILED,
+                message=str(e)
             )
 
+    def QueueReplicateDequeueBatch(self, request, context):
+        try:
+            return get_replica_applier().dequeue_batch(request, context)
         except Exception as e: # pylint: disable=W0703
-            logger.exception("Error inesperado en QueueReplicateDequeue")
+            logger.exception("Error inesperado en QueueReplicateDequeueBatch")
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details(str(e))
             return ReplicationResponse(
-                success=False, status_code=StatusCode.REPLICATION_FAILED, message=str(e) # pylint: disable=C0301
+                success=False,
+                status_code=StatusCode.REPLICATION_FAILED,
+                message=str(e)
             )
 
     def QueueReplicateForwardEnqueue(self, request, context):
@@ -986,15 +979,151 @@ class QueueReplicationServicer(replication_service_pb2_grpc.QueueReplicationServ
                 message=str(e)
             )
 
+class _OperationContext:
+    """
+    Context given to the unary handlers for every operation of a
+    replication stream, the status they set goes to the ack instead of
+    ending the stream.
+    """
+    def __init__(self):
+        self.code = None
+        self.details = ""
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+
+def stream_handlers(topics, queues) -> dict:
+    """
+    Handler of every operation of a replication stream.
+    Args:
+        topics: The topic replication servicer.
+        queues: The queue replication servicer.
+    Returns:
+        dict: The unary handler by field of ReplicationOperation.
+    """
+    return {
+        "create_topic": topics.TopicReplicateCreate,
+        "delete_topic": topics.TopicReplicateDelete,
+        "publish_message": topics.TopicReplicatePublishMessage,
+        "consume_message": topics.TopicReplicateConsumeMessage,
+        "topic_subscribe": topics.TopicReplicateSubscribe,
+        "topic_unsubscribe": topics.TopicReplicateUnsubscribe,
+        "create_queue": queues.QueueReplicateCreate,
+        "delete_queue": queues.QueueReplicateDelete,
+        "enqueue": queues.QueueReplicateEnqueue,
+        "enqueue_batch": queues.QueueReplicateEnqueueBatch,
+        "queue_subscribe": queues.QueueReplicateSubscribe,
+        "queue_unsubscribe": queues.QueueReplicateUnsubscribe,
+        "dequeue": queues.QueueReplicateDequeue,
+        "dequeue_batch": queues.QueueReplicateDequeueBatch,
+    }
+
+
+class ReplicationStreamServicer(replication_service_pb2_grpc.ReplicationStreamServicer): # pylint: disable=C0301
+    """
+    Service for the replication of topics and queues over a stream.
+    Every operation is applied in order with the handler of its unary call.
+    """
+    def __init__(self):
+        self.handlers = stream_handlers(
+            TopicReplicationServicer(), QueueReplicationServicer()
+        )
+
+    def ReplicateStream(self, request_iterator, context):
+        for batch in request_iterator:
+            if not batch.operations:
+                continue
+            failures = []
+            for operation in batch.operations:
+                response = self.apply(operation, batch.origin)
+                if not response.success:
+                    failures.append(ReplicationFailure(
+                        sequence=operation.sequence,
+                        status_code=response.status_code,
+                        message=response.message,
+                    ))
+            # El ack es acumulado, cubre todas las operaciones del lote
+            yield ReplicationAck(
+                sequence=batch.operations[-1].sequence, failures=failures
+            )
+
+    def apply(self, operation, origin: str = "") -> ReplicationResponse:
+        """
+        Apply an operation of a replication stream, the operations that
+        were already applied, sent again from the journal of a node, are
+        skipped.
+        Args:
+            operation (ReplicationOperation): The operation to apply.
+            origin (str): The node that sent it.
+        Returns:
+            ReplicationResponse: The response of its unary handler.
+        """
+        field = operation.WhichOneof("operation")
+        handler = self.handlers.get(field)
+        if handler is None:
+            return ReplicationResponse(
+                success=False,
+                status_code=StatusCode.INVALID_REPLICATION_STATUS,
+                message=f"Unknown replication operation: {field}",
+            )
+        try:
+            marks = replication_journal.applied_marks(operation, origin)
+            if marks:
+                db = create_redis2_connection()
+                # Reenviada tras un lote que se cortó o sin ack
+                applied = db.mget([key for key, _ in marks])
+                if any(
+                    sequence <= int(last or 0)
+                    for (_, sequence), last in zip(marks, applied)
+                ):
+                    return ReplicationResponse(
+                        success=True,
+                        status_code=StatusCode.REPLICATION_NOT_REQUIRED,
+                        message="Operation already applied",
+                    )
+            response = handler(getattr(operation, field), _OperationContext())
+            if marks:
+                pipe = db.pipeline(transaction=False)
+                for key, sequence in marks:
+                    pipe.set(
+                        key, sequence,
+                        ex=replication_journal.REPLICATION_APPLIED_TTL
+                    )
+                pipe.execute()
+            return response
+        except Exception as e: # pylint: disable=W0703
+            logger.exception("Error aplicando la operación %s del stream", operation.sequence) # pylint: disable=C0301
+            return ReplicationResponse(
+                success=False,
+                status_code=StatusCode.REPLICATION_FAILED,
+                message=str(e),
+            )
+
+
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    if GRPC_SERVER_MODE == "aio":
+        from app.grpc import aio_server # pylint: disable=C0415
+        asyncio.run(aio_server.serve())
+        return
+
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=GRPC_MAX_WORKERS),
+        options=server_options()
+    )
     replication_service_pb2_grpc.add_TopicReplicationServicer_to_server(
         TopicReplicationServicer(), server
     )
     replication_service_pb2_grpc.add_QueueReplicationServicer_to_server(
         QueueReplicationServicer(), server
     )
-    server.add_insecure_port("[::]:50051")
+    replication_service_pb2_grpc.add_ReplicationStreamServicer_to_server(
+        ReplicationStreamServicer(), server
+    )
+    server.add_insecure_port(f"[::]:{GRPC_PORT}")
     server.start()
     server.wait_for_termination()
 
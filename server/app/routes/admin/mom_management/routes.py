@@ -6,14 +6,23 @@ from app.adapters.db import Database
 from app.auth.auth import auth_handler
 from app.config.limiter import limiter
 from app.config.logging import logger
+from app.domain import scripts
+from app.domain.replication_clients import get_journal_replayer
+from app.domain.replication_outbox import get_replication_outbox
 from app.domain.queues.queues_manager import MOMQueueManager
 from app.domain.topics.topics_manager import MOMTopicManager
+from app.domain.topics.topics_retention import get_retention_worker
+from app.domain.topics.topics_offsets import get_offset_replicator
 from app.dtos.general_dtos import ResponseError
 from app.dtos.mom_dto import QueueTopicResponse
-from app.dtos.admin.mom_management_dto import QueueTopic, MomType
+from app.dtos.admin.mom_management_dto import (
+    QueueTopic, CreateQueueTopic, MomType, ScriptStats, RetentionStats,
+    OffsetReplicationStats, ReplicationOutboxStats, ReplicationJournalStats
+)
 from app.utils.exceptions import raise_exception
 from fastapi import APIRouter, HTTPException, Request, status, Depends, Query
 from slowapi.errors import RateLimitExceeded
+from typing import Dict
 
 
 router = APIRouter()
@@ -46,7 +55,7 @@ router = APIRouter()
 @limiter.limit("100/minute")
 def create_queue_topic(
     request: Request,
-    queue_topic: QueueTopic,
+    queue_topic: CreateQueueTopic,
     auth: dict = Depends(auth_handler.authenticate_as_admin),
     db_manager: Database = Depends(
         lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
@@ -56,7 +65,9 @@ def create_queue_topic(
     Endpoint to create a topic or queue in the message broker.
     
     Args:
-        queue_topic (QueueTopic): Queue or topic to be created.
+        queue_topic (CreateQueueTopic): Queue or topic to be created,
+            queues may set their message limit and overflow policy and
+            both may choose their storage engine.
         auth (dict): Authenticated user information.
     Returns:
         (str): Success message or error message.
@@ -70,25 +81,44 @@ def create_queue_topic(
         success: bool = False
         message: str = ""
         details: str = ""
+        storage = {}
+        if queue_topic.storage is not None:
+            storage["storage"] = queue_topic.storage.value
 
         if queue_topic.type == MomType.QUEUE:
+            if queue_topic.partitions is not None:
+                raise ValueError("Partitions are only supported for topics")
+            limits = {}
+            if queue_topic.message_limit is not None:
+                limits["message_limit"] = queue_topic.message_limit
+            if queue_topic.overflow_policy is not None:
+                limits["overflow_policy"] = queue_topic.overflow_policy.value
+
             manager = MOMQueueManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
             result = manager.create_queue(
                 queue_name=queue_topic.name,
-                endpoint=True
+                endpoint=True,
+                **limits,
+                **storage
             )
             success = result.success
             message = result.details
             details = result.status.value
         else:
+            if queue_topic.message_limit is not None or \
+                    queue_topic.overflow_policy is not None:
+                raise ValueError("Message limits are only supported for queues")
             manager = MOMTopicManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
+            if queue_topic.partitions is not None:
+                storage["partitions"] = queue_topic.partitions
             result = manager.create_topic(
                 topic_name=queue_topic.name,
-                endpoint=True
+                endpoint=True,
+                **storage
             )
             success = result.success
             message = result.details
@@ -219,3 +249,247 @@ def delete_queue_topic(
         ) from e
     except Exception as e: # pylint: disable=W0718
         raise_exception(e, logger)
+
+
+@router.get("/scripts/stats/",
+            tags=["Admin", "Admin Mom Management"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint to get the call counters of the Lua " \
+                + "scripts of the message broker.",
+            response_model=Dict[str, ScriptStats],
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("100/minute")
+def get_scripts_stats(
+    request: Request,
+    auth: dict = Depends(auth_handler.authenticate_as_admin),
+): # pylint: disable=W0613
+    """
+    Endpoint to get the call counters of the Lua scripts of this node.
+    
+    Args:
+        auth (dict): Authenticated user information.
+    Returns:
+        (dict): Calls, errors and latency of each script by name.
+    """
+    try:
+        return scripts.get_stats()
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
+@router.get("/retention/stats/",
+            tags=["Admin", "Admin Mom Management"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint to get the progress of the topic " \
+                + "retention worker.",
+            response_model=RetentionStats,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("100/minute")
+def get_retention_stats(
+    request: Request,
+    auth: dict = Depends(auth_handler.authenticate_as_admin),
+): # pylint: disable=W0613
+    """
+    Endpoint to get the progress counters of the topic retention worker.
+    
+    Args:
+        auth (dict): Authenticated user information.
+    Returns:
+        (RetentionStats): Passes, cleaned topics and deleted messages.
+    """
+    try:
+        return get_retention_worker().stats()
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
+@router.get("/replication/offsets/stats/",
+            tags=["Admin", "Admin Mom Management"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint to get the counters of the coalesced " \
+                + "replication of topic offsets.",
+            response_model=OffsetReplicationStats,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("100/minute")
+def get_offset_replication_stats(
+    request: Request,
+    auth: dict = Depends(auth_handler.authenticate_as_admin),
+): # pylint: disable=W0613
+    """
+    Endpoint to get the counters of the coalesced offset replication.
+    
+    Args:
+        auth (dict): Authenticated user information.
+    Returns:
+        (OffsetReplicationStats): Submitted, replicated and pending offsets.
+    """
+    try:
+        return get_offset_replicator().stats()
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
+@router.get("/replication/outbox/stats/",
+            tags=["Admin", "Admin Mom Management"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint to get the depth, lag and counters of the " \
+                + "replication outbox.",
+            response_model=ReplicationOutboxStats,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("100/minute")
+def get_replication_outbox_stats(
+    request: Request,
+    auth: dict = Depends(auth_handler.authenticate_as_admin),
+): # pylint: disable=W0613
+    """
+    Endpoint to get the counters of the replication outbox, used by the
+    writes with the local write concern.
+    
+    Args:
+        auth (dict): Authenticated user information.
+    Returns:
+        (ReplicationOutboxStats): Depth, lag and replicated, failed and
+            dropped operations.
+    """
+    try:
+        return get_replication_outbox().stats()
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
+@router.get("/replication/journal/stats/",
+            tags=["Admin", "Admin Mom Management"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint to get the replication journal of every " \
+                + "peer of the node.",
+            response_model=ReplicationJournalStats,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("100/minute")
+def get_replication_journal_stats(
+    request: Request,
+    auth: dict = Depends(auth_handler.authenticate_as_admin),
+): # pylint: disable=W0613
+    """
+    Endpoint to get the operations the peers of the node missed and the
+    counters of their replay.
+    
+    Args:
+        auth (dict): Authenticated user information.
+    Returns:
+        (ReplicationJournalStats): Replayed operations and the length,
+            sequence and lost operations of every journal.
+    """
+    try:
+        return get_journal_replayer().stats()
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
@@ -1,18 +1,31 @@
 """
 This module defines the admin mom management endpoints of the API.
 """
+import asyncio
 from app.adapters.factory import ObjectFactory
 from app.adapters.db import Database
 from app.auth.auth import auth_handler
 from app.config.limiter import limiter
 from app.config.logging import logger
+from app.domain import notifications, subscriptions
+from app.domain.topics import topics_patterns
 from app.domain.queues.queues_manager import MOMQueueManager
+from app.domain.models import MOMTopicStatus
 from app.domain.topics.topics_manager import MOMTopicManager
 from app.dtos.general_dtos import ResponseError
 from app.dtos.admin.mom_management_dto import MomType
-from app.dtos.mom_dto import QueueTopic, MessageQueueTopic, QueueTopicResponse
+from app.dtos.mom_dto import (
+    MessageQueueTopic, MessagesQueueTopic, ReceiveQueueTopic, QueueTopicResponse,
+    SubscriptionsResponse, SeekTopic, SeekResponse, SubscribeQueueTopic,
+    PatternQueueTopic, StreamQueueTopic, StreamAck, StreamDelivery
+)
 from app.utils.exceptions import raise_exception
-from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi import (
+    APIRouter, HTTPException, Request, status, Depends, WebSocket,
+    WebSocketDisconnect
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.websockets import WebSocketState
 from slowapi.errors import RateLimitExceeded
 
 
@@ -45,7 +58,7 @@ router = APIRouter()
 @limiter.limit("200/minute")
 def subscribe(
     request: Request,
-    queue_topic: QueueTopic,
+    queue_topic: SubscribeQueueTopic,
     auth: dict = Depends(auth_handler.authenticate),
     db_manager: Database = Depends(
         lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
@@ -56,7 +69,8 @@ def subscribe(
     queue in the message broker.
     
     Args:
-        queue_topic (Queue): Queue or topic to be subscribed to.
+        queue_topic (Queue): Queue or topic to be subscribed to,
+            topics may choose where the subscription starts.
         auth (dict): Authenticated user information.
     Returns:
         (str): Success message or error message.
@@ -76,12 +90,20 @@ def subscribe(
         details: str = ""
 
         if queue_topic.type == MomType.QUEUE:
+            if queue_topic.start_position is not None or \
+                    queue_topic.start_timestamp is not None:
+                raise ValueError("Start positions are only supported for topics")
+            if topics_patterns.is_pattern(queue_topic.name):
+                raise ValueError("Patterns are only supported for topics")
+            if queue_topic.filter is not None:
+                raise ValueError("Filters are only supported for topics")
             manager = MOMQueueManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
             result = manager.subscriptions.subscribe(
                 queue_name=queue_topic.name,
-                endpoint=True
+                endpoint=True,
+                write_concern=queue_topic.write_concern.value if queue_topic.write_concern else None # pylint: disable=C0301
             )
             success = result.success
             message = result.details
@@ -92,7 +114,11 @@ def subscribe(
             )
             result = manager.subscriptions.subscribe(
                 topic_name=queue_topic.name,
-                endpoint=True
+                endpoint=True,
+                start_position=queue_topic.start_position.value if queue_topic.start_position else None, # pylint: disable=C0301
+                start_timestamp=queue_topic.start_timestamp,
+                message_filter=queue_topic.filter,
+                write_concern=queue_topic.write_concern.value if queue_topic.write_concern else None # pylint: disable=C0301
             )
             success = result.success
             message = result.details
@@ -146,7 +172,7 @@ def subscribe(
 @limiter.limit("200/minute")
 def unsubscribe(
     request: Request,
-    queue_topic: QueueTopic,
+    queue_topic: PatternQueueTopic,
     auth: dict = Depends(auth_handler.authenticate),
     db_manager: Database = Depends(
         lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
@@ -177,6 +203,8 @@ def unsubscribe(
         details: str = ""
 
         if queue_topic.type == MomType.QUEUE:
+            if topics_patterns.is_pattern(queue_topic.name):
+                raise ValueError("Patterns are only supported for topics")
             manager = MOMQueueManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
@@ -220,6 +248,61 @@ def unsubscribe(
         raise_exception(e, logger)
 
 
+@router.get("/subscriptions/",
+            tags=["Mom"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint for a user to list the topics and queues " \
+                + "it is subscribed to.",
+            response_model=SubscriptionsResponse,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                }
+            })
+@limiter.limit("200/minute")
+def list_subscriptions(
+    request: Request,
+    auth: dict = Depends(auth_handler.authenticate),
+    db_manager: Database = Depends(
+        lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
+    ),
+): # pylint: disable=W0613
+    """
+    Endpoint to list the queues and topics a user is subscribed to
+    in this node.
+    
+    Args:
+        auth (dict): Authenticated user information.
+    Returns:
+        (SubscriptionsResponse): Queues and topics of the user.
+    """
+    try:
+        logger.info("%s listing its subscriptions.", auth["username"])
+        return SubscriptionsResponse(
+            **subscriptions.get_subscriptions(
+                db_manager.get_client(), auth["username"]
+            )
+        )
+    except HTTPException as e:
+        raise e
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
 @router.post("/send/",
             tags=["Mom"],
             status_code=status.HTTP_200_OK,
@@ -277,13 +360,18 @@ def send_message(
         details: str = ""
 
         if message_queue_topic.type == MomType.QUEUE:
+            if message_queue_topic.partition_key is not None:
+                raise ValueError("Partition keys are only supported for topics")
+            if message_queue_topic.attributes is not None:
+                raise ValueError("Attributes are only supported for topics")
             manager = MOMQueueManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
             result = manager.enqueue(
                 queue_name=message_queue_topic.name,
                 message=message_queue_topic.message,
-                endpoint=True
+                endpoint=True,
+                write_concern=message_queue_topic.write_concern.value if message_queue_topic.write_concern else None # pylint: disable=C0301
             )
             success = result.success
             message = result.details
@@ -295,7 +383,10 @@ def send_message(
             result = manager.publish(
                 topic_name=message_queue_topic.name,
                 message=message_queue_topic.message,
-                endpoint=True
+                endpoint=True,
+                partition_key=message_queue_topic.partition_key,
+                attributes=message_queue_topic.attributes,
+                write_concern=message_queue_topic.write_concern.value if message_queue_topic.write_concern else None # pylint: disable=C0301
             )
             success = result.success
             message = result.details
@@ -322,6 +413,91 @@ def send_message(
         raise_exception(e, logger)
 
 
+@router.post("/send_batch/",
+            tags=["Mom"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint for a user to send" \
+                + "a batch of messages to a queue.",
+            response_model=QueueTopicResponse,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("200/minute")
+def send_batch(
+    request: Request,
+    messages_queue_topic: MessagesQueueTopic,
+    auth: dict = Depends(auth_handler.authenticate),
+    db_manager: Database = Depends(
+        lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
+    ),
+): # pylint: disable=W0613
+    """
+    Endpoint to send a batch of messages to a queue in the message broker,
+    stored with a single write and replicated with a single call.
+    
+    Args:
+        messages_queue_topic (MessagesQueueTopic): Messages to be sent.
+        auth (dict): Authenticated user information.
+    Returns:
+        (str): Success message or error message.
+    """
+    try:
+        logger.info(
+            "%s attempting to publish %s messages to Queue %s.",
+            auth["username"],
+            len(messages_queue_topic.messages),
+            messages_queue_topic.name,
+        )
+
+        if messages_queue_topic.type != MomType.QUEUE:
+            raise ValueError("Batch send is only supported for queues")
+
+        manager = MOMQueueManager(
+            redis_connection=db_manager.get_client(), user=auth["username"]
+        )
+        result = manager.enqueue_many(
+            queue_name=messages_queue_topic.name,
+            messages=messages_queue_topic.messages,
+            endpoint=True,
+            write_concern=messages_queue_topic.write_concern.value if messages_queue_topic.write_concern else None # pylint: disable=C0301
+        )
+
+        logger.info(result.status.value)
+        return QueueTopicResponse(
+            success=result.success,
+            message=result.details
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=403,
+            detail=str(e)
+        ) from e
+    except HTTPException as e:
+        raise e
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
 @router.post("/receive/",
             tags=["Mom"],
             status_code=status.HTTP_200_OK,
@@ -347,9 +523,9 @@ def send_message(
                 }
             })
 @limiter.limit("200/minute")
-def receive_message(
+async def receive_message(
     request: Request,
-    queue_topic: QueueTopic,
+    queue_topic: ReceiveQueueTopic,
     auth: dict = Depends(auth_handler.authenticate),
     db_manager: Database = Depends(
         lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
@@ -359,7 +535,8 @@ def receive_message(
     Endpoint to receive a message from a topic or queue in the message broker.
     
     Args:
-        queue_topic (Queue): Queue or topic to receive messages from.
+        queue_topic (Queue): Queue or topic to receive messages from,
+            with the maximum number of messages to receive.
         auth (dict): Authenticated user information.
         
     Returns:
@@ -380,23 +557,38 @@ def receive_message(
         details: str = ""
 
         if queue_topic.type == MomType.QUEUE:
+            if queue_topic.partition is not None:
+                raise ValueError("Partitions are only supported for topics")
+            if topics_patterns.is_pattern(queue_topic.name):
+                raise ValueError("Patterns are only supported for topics")
             manager = MOMQueueManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
-            result = manager.dequeue(
+            # El long poll espera en el loop, no ocupa un hilo del pool
+            result = await manager.dequeue_waiting(
                 queue_name=queue_topic.name,
-                endpoint=True
+                endpoint=True,
+                max_messages=queue_topic.max_messages,
+                wait_seconds=queue_topic.wait_seconds,
+                write_concern=queue_topic.write_concern.value if queue_topic.write_concern else None # pylint: disable=C0301
             )
             success = result.success
             message = result.details
             details = result.status.value
         else:
+            if queue_topic.wait_seconds > 0:
+                raise ValueError("Waiting for messages is only supported for queues")
+            if queue_topic.write_concern is not None:
+                raise ValueError("Write concerns on receive are only supported for queues") # pylint: disable=C0301
             manager = MOMTopicManager(
                 redis_connection=db_manager.get_client(), user=auth["username"]
             )
-            result = manager.consume(
+            result = await run_in_threadpool(
+                manager.consume,
                 topic_name=queue_topic.name,
-                endpoint=True
+                endpoint=True,
+                max_messages=queue_topic.max_messages,
+                partition=queue_topic.partition
             )
             success = result.success
             message = result.details
@@ -404,11 +596,438 @@ def receive_message(
             
         if message == "":
             message = None
+
+        messages = None
+        if isinstance(message, list):
+            messages = message
+            message = None
         
         logger.info(details)
         return QueueTopicResponse(
             success=success,
-            message=message
+            message=message,
+            messages=messages
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=403,
+            detail=str(e)
+        ) from e
+    except HTTPException as e:
+        raise e
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests."
+        ) from e
+    except Exception as e: # pylint: disable=W0718
+        raise_exception(e, logger)
+
+
+@router.websocket("/stream/")
+async def stream_messages(
+    websocket: WebSocket,
+    db_manager: Database = Depends(
+        lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
+    ),
+):
+    """
+    WebSocket to receive the messages of a queue or topic as they are
+    enqueued or published, instead of calling the receive endpoint.
+    
+    The token goes in the Authorization header or, for the clients that
+    cannot set it, in the token query parameter. The first frame of the
+    client is a StreamQueueTopic, then the server pushes StreamDelivery
+    frames while the messages not acknowledged are under the prefetch,
+    and the client acknowledges them with StreamAck frames. The pushed
+    messages stay in flight until they are acknowledged, the queue
+    messages are dequeued and the topic offsets kept on the ack, and
+    what is not acknowledged when the connection closes is delivered
+    again. The connection waits on the notifications of the node, not
+    on a poll.
+    
+    Args:
+        websocket (WebSocket): Connection with the client.
+    """
+    try:
+        auth = _authenticate_websocket(websocket)
+    except HTTPException as e:
+        await websocket.close(
+            code=status.WS_1008_POLICY_VIOLATION, reason=e.detail
+        )
+        return
+
+    await websocket.accept()
+    handle = None
+    reader = None
+    delivery = None
+    state = {"delivered": 0, "acked": 0, "closed": False, "error": None}
+    hub = notifications.get_notification_hub()
+    try:
+        queue_topic = StreamQueueTopic(**await websocket.receive_json())
+        logger.info(
+            "%s opening a push delivery of %s %s.",
+            auth["username"],
+            queue_topic.type.value,
+            queue_topic.name,
+        )
+
+        if queue_topic.type == MomType.QUEUE:
+            if queue_topic.partition is not None:
+                raise ValueError("Partitions are only supported for topics")
+            if topics_patterns.is_pattern(queue_topic.name):
+                raise ValueError("Patterns are only supported for topics")
+            manager = MOMQueueManager(
+                redis_connection=db_manager.get_client(), user=auth["username"]
+            )
+            kind = subscriptions.QUEUE
+            delivery = _QueueDelivery(manager, queue_topic.name)
+        else:
+            manager = MOMTopicManager(
+                redis_connection=db_manager.get_client(), user=auth["username"]
+            )
+            kind = subscriptions.TOPIC
+            delivery = _TopicDelivery(
+                manager, queue_topic.name, queue_topic.partition
+            )
+
+        # El hilo de notificaciones despierta esta conexión en su loop
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        handle = hub.register(
+            kind, queue_topic.name, lambda: loop.call_soon_threadsafe(wake.set)
+        )
+        reader = asyncio.create_task(_read_acks(websocket, state, wake))
+
+        while not state["closed"]:
+            # Se limpia antes de leer, una notificación durante la
+            # lectura no se pierde
+            wake.clear()
+            if state["acked"] > delivery.acked:
+                await run_in_threadpool(delivery.ack, state["acked"])
+            pending = state["delivered"] - state["acked"]
+            credit = queue_topic.prefetch - pending
+            if credit > 0:
+                messages = await run_in_threadpool(delivery.fetch, credit)
+                for message in messages:
+                    state["delivered"] += 1
+                    await websocket.send_json(StreamDelivery(
+                        delivery_tag=state["delivered"], message=message
+                    ).model_dump())
+                if messages:
+                    continue
+
+            try:
+                await asyncio.wait_for(
+                    wake.wait(), notifications.NOTIFY_FALLBACK_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+        if state["error"]:
+            raise ValueError(state["error"])
+    except ValueError as e:
+        await _close_websocket(
+            websocket, status.WS_1008_POLICY_VIOLATION, str(e)
+        )
+    except WebSocketDisconnect:
+        pass
+    except Exception: # pylint: disable=W0718
+        logger.exception("Error pushing messages to %s", auth["username"])
+        await _close_websocket(
+            websocket, status.WS_1011_INTERNAL_ERROR, "Internal server error."
+        )
+    finally:
+        if handle is not None:
+            hub.unregister(handle)
+        if reader is not None:
+            reader.cancel()
+        if delivery is not None:
+            try:
+                # Lo no confirmado se vuelve a entregar
+                await run_in_threadpool(delivery.close, state["acked"])
+            except Exception: # pylint: disable=W0718
+                logger.exception(
+                    "Error returning the messages not acknowledged by %s",
+                    auth["username"]
+                )
+
+
+class _QueueDelivery:
+    """
+    Messages of a queue pushed on a WebSocket, they are leased when
+    pushed and dequeued when acknowledged.
+    """
+
+    def __init__(self, manager: MOMQueueManager, queue_name: str):
+        self.manager = manager
+        self.queue_name = queue_name
+        # UUIDs de los mensajes sin confirmar, en orden de entrega
+        self.in_flight = []
+        self.acked = 0
+
+    def fetch(self, credit: int) -> list:
+        """
+        Lease the next messages of the queue.
+        
+        Args:
+            credit (int): Maximum number of messages to push.
+        Returns:
+            (list): The payloads to push, in order.
+        """
+        result = self.manager.lease(self.queue_name, max_messages=credit)
+        if not result.success:
+            raise ValueError(result.details)
+        self.in_flight.extend(message["id"] for message in result.details)
+        return [message["payload"] for message in result.details]
+
+    def ack(self, acked: int):
+        """
+        Dequeue the messages acknowledged up to a delivery tag.
+        
+        Args:
+            acked (int): Delivery tag of the last acknowledged message.
+        """
+        uuids = self.in_flight[:acked - self.acked]
+        result = self.manager.acknowledge(self.queue_name, uuids, endpoint=True)
+        if not result.success:
+            raise ValueError(result.details)
+        del self.in_flight[:len(uuids)]
+        self.acked = acked
+
+    def close(self, acked: int):
+        """
+        Dequeue the last acknowledged messages and release the rest.
+        
+        Args:
+            acked (int): Delivery tag of the last acknowledged message.
+        """
+        try:
+            if acked > self.acked:
+                self.ack(acked)
+        finally:
+            if self.in_flight:
+                self.manager.release(self.queue_name, self.in_flight)
+                self.in_flight = []
+
+
+class _TopicDelivery:
+    """
+    Messages of a topic pushed on a WebSocket, the offsets move when
+    they are pushed and are rewound to the first batch with messages
+    not acknowledged when the connection closes.
+    """
+
+    def __init__(
+        self, manager: MOMTopicManager, topic_name: str, partition: int
+    ):
+        self.manager = manager
+        self.topic_name = topic_name
+        self.partition = partition
+        # (último delivery tag, offsets previos) de los lotes sin confirmar
+        self.batches = []
+        self.delivered = 0
+        self.acked = 0
+
+    def fetch(self, credit: int) -> list:
+        """
+        Consume the next messages of the topic.
+        
+        Args:
+            credit (int): Maximum number of messages to push.
+        Returns:
+            (list): The payloads to push, in order.
+        """
+        offsets = {}
+        result = self.manager.consume(
+            self.topic_name, endpoint=True, max_messages=credit,
+            partition=self.partition, offsets=offsets
+        )
+        if not result.success:
+            raise ValueError(result.details)
+        if result.status == MOMTopicStatus.NO_MESSAGES:
+            return []
+        messages = result.details if isinstance(result.details, list) \
+            else [result.details]
+        self.delivered += len(messages)
+        self.batches.append((self.delivered, offsets))
+        return messages
+
+    def ack(self, acked: int):
+        """
+        Forget the batches acknowledged up to a delivery tag.
+        
+        Args:
+            acked (int): Delivery tag of the last acknowledged message.
+        """
+        self.batches = [batch for batch in self.batches if batch[0] > acked]
+        self.acked = acked
+
+    def close(self, acked: int):
+        """
+        Rewind the offsets to the first batch not acknowledged, the
+        acknowledged messages of that batch are delivered again.
+        
+        Args:
+            acked (int): Delivery tag of the last acknowledged message.
+        """
+        self.ack(acked)
+        rewind = {}
+        for _, offsets in self.batches:
+            for topic_name, offset in offsets.items():
+                rewind.setdefault(topic_name, offset)
+        for topic_name, offset in rewind.items():
+            result = self.manager.seek(
+                topic_name, offset=offset, endpoint=True
+            )
+            if not result.success:
+                logger.error(
+                    "Could not rewind %s to %s: %s",
+                    topic_name, offset, result.details
+                )
+        self.batches = []
+
+
+def _authenticate_websocket(websocket: WebSocket) -> dict:
+    """
+    Authenticate the user of a WebSocket with the bearer token of the
+    Authorization header or of the token query parameter.
+    
+    Args:
+        websocket (WebSocket): Connection with the client.
+    Returns:
+        (dict): Authenticated user information.
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    scheme, _, credentials = authorization.partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        token = credentials
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return auth_handler.decode_token(token)
+
+
+async def _close_websocket(websocket: WebSocket, code: int, error: str):
+    """
+    Send an error frame and close the WebSocket if the client is still
+    connected.
+    
+    Args:
+        websocket (WebSocket): Connection with the client.
+        code (int): Close code.
+        error (str): Error message for the client.
+    """
+    if websocket.client_state != WebSocketState.CONNECTED:
+        return
+    try:
+        await websocket.send_json({"error": error})
+        await websocket.close(code=code)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+
+
+async def _read_acks(websocket: WebSocket, state: dict, wake: asyncio.Event):
+    """
+    Read the acknowledgements of the client, every ack frees room in the
+    prefetch and wakes the delivery loop.
+    
+    Args:
+        websocket (WebSocket): Connection with the client.
+        state (dict): Delivered and acknowledged messages of the connection.
+        wake (asyncio.Event): Event the delivery loop waits on.
+    """
+    try:
+        while True:
+            ack = StreamAck(**await websocket.receive_json())
+            # Solo se confirman mensajes ya entregados
+            state["acked"] = max(
+                state["acked"], min(ack.ack, state["delivered"])
+            )
+            wake.set()
+    except WebSocketDisconnect:
+        state["closed"] = True
+        wake.set()
+    except ValueError as e:
+        # Un frame inválido también cierra la entrega
+        state["error"] = str(e)
+        state["closed"] = True
+        wake.set()
+
+
+@router.post("/seek/",
+            tags=["Mom"],
+            status_code=status.HTTP_200_OK,
+            summary="Endpoint for a user to move its offset " \
+                + "in a topic.",
+            response_model=SeekResponse,
+            responses={
+                500: {
+                    "model": ResponseError, 
+                    "description": "Internal server error."
+                },
+                429: {
+                    "model": ResponseError, 
+                    "description": "Too many requests."
+                },
+                401: {
+                    "model": ResponseError,
+                    "description": "Unauthorized."
+                },
+                403: {
+                    "model": ResponseError,
+                    "description": "Forbidden."
+                }
+            })
+@limiter.limit("200/minute")
+def seek_topic(
+    request: Request,
+    seek: SeekTopic,
+    auth: dict = Depends(auth_handler.authenticate),
+    db_manager: Database = Depends(
+        lambda: ObjectFactory.get_instance(Database, ObjectFactory.MOM_DATABASE)
+    ),
+): # pylint: disable=W0613
+    """
+    Endpoint to move the offset of a user in a topic to an absolute
+    offset, the earliest or latest message or a timestamp, so the
+    messages can be replayed or skipped.
+    
+    Args:
+        seek (SeekTopic): Topic and position to move to.
+        auth (dict): Authenticated user information.
+    Returns:
+        (SeekResponse): The new offsets of the user.
+    """
+    try:
+        logger.info(
+            "%s attempting to seek in Topic %s.",
+            auth["username"],
+            seek.name,
+        )
+
+        if seek.type != MomType.TOPIC:
+            raise ValueError("Seek is only supported for topics")
+
+        manager = MOMTopicManager(
+            redis_connection=db_manager.get_client(), user=auth["username"]
+        )
+        result = manager.seek(
+            topic_name=seek.name,
+            position=seek.position.value if seek.position else None,
+            offset=seek.offset,
+            timestamp=seek.timestamp,
+            partition=seek.partition,
+            endpoint=True
+        )
+
+        logger.info(result.status.value)
+        if not result.success:
+            return SeekResponse(success=False, message=result.details)
+        return SeekResponse(
+            success=True,
+            message=result.status.value,
+            offsets=result.details
         )
     except ValueError as e:
         raise HTTPException(
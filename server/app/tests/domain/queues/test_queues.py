@@ -4,14 +4,40 @@ Test cases for the MOMQueueManager class
 
 from app.adapters.db import Database
 from app.adapters.factory import ObjectFactory
+import asyncio
 import redis
+import redis.asyncio
 import os
 import json
 import pytest
 import time
+import threading
+import socket
 from datetime import datetime, timedelta
+from unittest import mock
 from app.domain.models import MOMQueueStatus 
+from concurrent import futures
+import grpc
 from app.domain.queues.queues_manager import MOMQueueManager
+from app.domain.queues.queues_replication import QueueReplicationClient
+from app.domain.replication_apply import AsyncReplicaApplier, ReplicaApplier
+from app.domain.replication_journal import JournalReplayer, ReplicationJournal
+from app.domain import replication_journal, replication_stream
+from app.domain.replication_stream import ReplicationStream
+from app.grpc import replication_service_pb2_grpc
+from app.grpc.aio_server import (
+    AsyncQueueReplicationServicer, AsyncReplicationStreamServicer,
+    AsyncTopicReplicationServicer
+)
+from app.grpc.replication_service_pb2 import (
+    DequeueBatchRequest, DequeueRequest, EnqueueBatchItem,
+    EnqueueBatchRequest, EnqueueRequest, ReplicationBatch,
+    ReplicationOperation, ReplicationResponse, StatusCode,
+    TopicPublishMessageRequest
+)
+from app.grpc.server import ReplicationStreamServicer
+from app.domain.queues import queues_storage
+from app.domain import replication_outbox, subscriptions
 from app.domain.utils import KeyBuilder
 
 # Configuración de Redis para el nodo principal y réplica
@@ -98,20 +124,75 @@ def test_enqueue_message(queue_manager, redis_connection, redis2_connection):
     assert result.success is True
     
     # Verificar en Redis principal
-    queue_key = KeyBuilder.queue_key(queue_name)
-    messages = redis_connection.lrange(queue_key, 0, -1)
+    messages = queues_storage.get_messages(redis_connection, queue_name)
     assert len(messages) == 1
     
     # Verificar en Redis réplica
-    messages_replica = redis2_connection.lrange(queue_key, 0, -1)
+    messages_replica = queues_storage.get_messages(redis2_connection, queue_name)
     assert len(messages_replica) == 1
     
     # Verificar contenido del mensaje
-    message_data = json.loads(messages[0])
-    assert json.loads(message_data["payload"]) == message
+    message_data = messages[0]
+    assert message_data["payload"] == message
     assert message_data["id"] is not None
     assert message_data["timestamp"] is not None
 
+def test_enqueue_many_messages(queue_manager, redis_connection, redis2_connection):
+    """Test encolar un lote de mensajes y verificar su replicación"""
+    queue_name = "test_queue"
+    messages = ["Message 1", "Message 2", "Message 3"]
+
+    queue_manager.create_queue(queue_name)
+
+    result = queue_manager.enqueue_many(messages, queue_name)
+    assert result.success is True
+
+    # El orden se conserva en ambos nodos
+    stored = queues_storage.get_messages(redis_connection, queue_name)
+    assert [m["payload"] for m in stored] == messages
+    assert len({m["id"] for m in stored}) == len(messages)
+
+    stored_replica = queues_storage.get_messages(redis2_connection, queue_name)
+    assert [m["id"] for m in stored_replica] == [m["id"] for m in stored]
+
+    metadata_key = KeyBuilder.metadata_key(queue_name)
+    assert redis_connection.hget(metadata_key, "total_messages") == "3"
+
+    # Un lote replicado con menos UUIDs que mensajes se rechaza entero
+    result = queue_manager.enqueue_many(
+        messages, queue_name, uuids=["a", "b"], timestamps=[0, 0, 0],
+        im_replicating=True
+    )
+    assert result.status == MOMQueueStatus.INVALID_ARGUMENTS
+    assert redis_connection.hget(metadata_key, "total_messages") == "3"
+
+def test_enqueue_message_limit(queue_manager, redis_connection, redis2_connection):
+    """Test las políticas de desborde de una cola llena"""
+    queue_manager.create_queue("reject_queue", message_limit=2)
+    assert queue_manager.enqueue_many(["1", "2"], "reject_queue").success is True
+
+    result = queue_manager.enqueue("3", "reject_queue")
+    assert result.success is False
+    assert result.status == MOMQueueStatus.QUEUE_FULL
+
+    queue_manager.create_queue(
+        "drop_queue", message_limit=2, overflow_policy="drop_oldest"
+    )
+    # Un lote más grande que el límite nunca cabe
+    result = queue_manager.enqueue_many(["1", "2", "3"], "drop_queue")
+    assert result.status == MOMQueueStatus.QUEUE_FULL
+
+    queue_manager.enqueue_many(["1", "2"], "drop_queue")
+    assert queue_manager.enqueue("3", "drop_queue").success is True
+
+    # La réplica descarta los mismos mensajes
+    for connection in (redis_connection, redis2_connection):
+        stored = queues_storage.get_messages(connection, "drop_queue")
+        assert [m["payload"] for m in stored] == ["2", "3"]
+
+    result = queue_manager.create_queue("bad_queue", overflow_policy="block")
+    assert result.status == MOMQueueStatus.INVALID_ARGUMENTS
+
 def test_dequeue_message(queue_manager, queue_manager_replica, redis_connection, redis2_connection):
     """Test desencolar un mensaje y verificar su replicación"""
     queue_name = "test_queue"
@@ -128,10 +209,558 @@ def test_dequeue_message(queue_manager, queue_manager_replica, redis_connection,
     
     # Verificar en Redis principal
     queue_key = KeyBuilder.queue_key(queue_name)
-    assert redis_connection.llen(queue_key) == 0
+    assert redis_connection.zcard(queue_key) == 0
     
     # Verificar en Redis réplica
-    assert redis2_connection.llen(queue_key) == 0
+    assert redis2_connection.zcard(queue_key) == 0
+
+def test_dequeue_many_messages(queue_manager, redis_connection, redis2_connection):
+    """Test desencolar varios mensajes a la vez y verificar su replicación"""
+    queue_name = "test_queue"
+    messages = ["Message 1", "Message 2", "Message 3"]
+
+    queue_manager.create_queue(queue_name)
+    queue_manager.enqueue_many(messages, queue_name)
+
+    result = queue_manager.dequeue(queue_name, max_messages=2)
+    assert result.success is True
+    assert result.details == messages[:2]
+
+    # Solo queda el último mensaje en ambos nodos
+    queue_key = KeyBuilder.queue_key(queue_name)
+    assert redis_connection.zcard(queue_key) == 1
+    assert redis2_connection.zcard(queue_key) == 1
+
+    result = queue_manager.dequeue(queue_name, max_messages=5)
+    assert result.details == messages[2:]
+
+    result = queue_manager.dequeue(queue_name, max_messages=5)
+    assert result.status == MOMQueueStatus.EMPTY_QUEUE
+
+def test_dequeue_message_waiting(queue_manager, redis_connection, redis2_connection):
+    """Test que un receive con espera retorna apenas llega el mensaje"""
+    queue_name = "test_queue"
+    message = "Late message"
+
+    queue_manager.create_queue(queue_name)
+
+    # Cola vacía y sin espera: retorna de inmediato
+    result = asyncio.run(queue_manager.dequeue_waiting(queue_name))
+    assert result.status == MOMQueueStatus.EMPTY_QUEUE
+
+    timer = threading.Timer(0.5, queue_manager.enqueue, args=(message, queue_name))
+    timer.start()
+
+    start = time.monotonic()
+    result = asyncio.run(
+        queue_manager.dequeue_waiting(queue_name, wait_seconds=5)
+    )
+    elapsed = time.monotonic() - start
+    timer.join()
+
+    assert result.success is True
+    assert result.details == message
+    assert elapsed < 5
+
+    # El mensaje también se elimina de la réplica
+    queue_key = KeyBuilder.queue_key(queue_name)
+    assert redis2_connection.zcard(queue_key) == 0
+
+    # Un tiempo de espera fuera de rango se rechaza
+    result = asyncio.run(
+        queue_manager.dequeue_waiting(queue_name, wait_seconds=60)
+    )
+    assert result.status == MOMQueueStatus.INVALID_ARGUMENTS
+
+def test_dequeue_message_by_uuid(queue_manager, redis_connection, redis2_connection):
+    """Test desencolar un mensaje del medio de la cola por su UUID"""
+    queue_name = "test_queue"
+    messages = ["Message 1", "Message 2", "Message 3"]
+
+    queue_manager.create_queue(queue_name)
+    queue_manager.enqueue_many(messages, queue_name)
+    stored = queues_storage.get_messages(redis_connection, queue_name)
+
+    result = queue_manager.dequeue(queue_name, uuid=stored[1]["id"])
+    assert result.success is True
+    assert result.details == messages[1]
+
+    # El orden del resto se conserva en ambos nodos
+    for connection in (redis_connection, redis2_connection):
+        remaining = queues_storage.get_messages(connection, queue_name)
+        assert [m["id"] for m in remaining] == [stored[0]["id"], stored[2]["id"]]
+        metadata_key = KeyBuilder.metadata_key(queue_name)
+        assert connection.hget(metadata_key, "total_messages") == "2"
+
+    result = queue_manager.dequeue(queue_name, uuid=stored[1]["id"])
+    assert result.status == MOMQueueStatus.MESSAGE_NOT_FOUND
+
+def test_dequeue_legacy_message(queue_manager, redis_connection):
+    """Test que los mensajes guardados como JSON se siguen leyendo"""
+    queue_name = "test_queue"
+    queue_manager.create_queue(queue_name)
+    queue_manager.enqueue("New message", queue_name)
+
+    # Mensaje escrito antes del sobre compacto, con el payload en JSON
+    legacy = {"id": "legacy", "timestamp": 1.0, "payload": json.dumps("Old message")}
+    redis_connection.zadd(KeyBuilder.queue_key(queue_name), {"legacy": 0})
+    redis_connection.hset(
+        KeyBuilder.messages_key(queue_name), "legacy", json.dumps(legacy)
+    )
+
+    result = queue_manager.dequeue(queue_name, max_messages=2)
+    assert result.details == ["Old message", "New message"]
+
+def test_dequeue_legacy_list_queue(queue_manager, redis_connection):
+    """Test que las colas guardadas en una LIST se migran al desencolar"""
+    queue_name = "test_queue"
+    queue_manager.create_queue(queue_name)
+
+    # Cola escrita con el formato anterior, los sobres en una LIST
+    queue_key = KeyBuilder.queue_key(queue_name)
+    redis_connection.delete(queue_key)
+    for i in range(3):
+        legacy = {"id": f"legacy-{i}", "timestamp": float(i),
+                  "payload": json.dumps(f"Old message {i}")}
+        redis_connection.rpush(queue_key, json.dumps(legacy))
+    redis_connection.hset(
+        KeyBuilder.metadata_key(queue_name), "total_messages", 3
+    )
+
+    messages = queues_storage.get_messages(redis_connection, queue_name)
+    assert [m["id"] for m in messages] == ["legacy-0", "legacy-1", "legacy-2"]
+
+    result = queue_manager.dequeue(queue_name)
+    assert result.details == "Old message 0"
+    assert redis_connection.type(queue_key) == "zset"
+
+    queue_manager.enqueue("New message", queue_name)
+    result = queue_manager.dequeue(queue_name, max_messages=5)
+    assert result.details == ["Old message 1", "Old message 2", "New message"]
+    metadata_key = KeyBuilder.metadata_key(queue_name)
+    assert redis_connection.hget(metadata_key, "total_messages") == "0"
+
+def test_lease_messages(queue_manager, redis_connection, redis2_connection):
+    """Test que los mensajes entregados por un stream esperan su confirmación"""
+    queue_name = "test_queue"
+    messages = ["Message 1", "Message 2", "Message 3"]
+
+    queue_manager.create_queue(queue_name)
+    queue_manager.enqueue_many(messages, queue_name)
+
+    result = queue_manager.lease(queue_name, max_messages=2)
+    leased = [m["id"] for m in result.details]
+    assert [m["payload"] for m in result.details] == messages[:2]
+
+    # Los mensajes con lease siguen en la cola pero no se entregan
+    result = queue_manager.dequeue(queue_name, max_messages=5)
+    assert result.details == [messages[2]]
+
+    # La confirmación los desencola en ambos nodos, lo liberado vuelve
+    result = queue_manager.acknowledge(queue_name, leased[:1])
+    assert result.details == leased[:1]
+    queue_manager.release(queue_name, leased[1:])
+    for connection in (redis_connection, redis2_connection):
+        remaining = queues_storage.get_messages(connection, queue_name)
+        assert [m["id"] for m in remaining] == leased[1:]
+
+    result = queue_manager.dequeue(queue_name)
+    assert result.details == messages[1]
+
+    # drop_oldest no descarta los mensajes que esperan su confirmación
+    queue_manager.create_queue(
+        "drop_queue", message_limit=2, overflow_policy="drop_oldest"
+    )
+    queue_manager.enqueue_many(["1", "2"], "drop_queue")
+    leased = queue_manager.lease("drop_queue").details[0]["id"]
+    assert queue_manager.enqueue("3", "drop_queue").success is True
+    stored = queues_storage.get_messages(redis_connection, "drop_queue")
+    assert [m["payload"] for m in stored] == ["1", "3"]
+
+    # Con la cola llena de mensajes con lease no hay lugar
+    queue_manager.lease("drop_queue")
+    result = queue_manager.enqueue("4", "drop_queue")
+    assert result.status == MOMQueueStatus.QUEUE_FULL
+    assert queue_manager.acknowledge("drop_queue", [leased]).details == [leased]
+
+def test_stream_queue(queue_manager, redis_connection, redis2_connection):
+    """Test una cola sobre Redis Streams y su replicación"""
+    queue_name = "stream_queue"
+    messages = ["Message 1", "Message 2", "Message 3"]
+
+    result = queue_manager.create_queue(queue_name, storage="stream")
+    assert result.success is True
+    queue_manager.enqueue_many(messages, queue_name)
+
+    # La réplica guarda los mismos ids que asignó XADD
+    queue_key = KeyBuilder.queue_key(queue_name)
+    assert redis_connection.type(queue_key) == "stream"
+    stored = queues_storage.get_messages(redis_connection, queue_name)
+    stored_replica = queues_storage.get_messages(redis2_connection, queue_name)
+    assert [m["id"] for m in stored_replica] == [m["id"] for m in stored]
+
+    # Un id repetido se ignora y uno anterior al último no se reasigna
+    replayed = [{"id": stored[0]["id"], "timestamp": 0, "payload": "x"}]
+    added, _, _ = queues_storage.push_messages(
+        redis2_connection, queue_name, replayed, enforce_limit=False
+    )
+    assert added == 0
+    behind = [{"id": "1-0", "timestamp": 0, "payload": "x"}]
+    added, _, _ = queues_storage.push_messages(
+        redis2_connection, queue_name, behind, enforce_limit=False
+    )
+    assert added == queues_storage.ID_CONFLICT
+    assert redis2_connection.xlen(queue_key) == len(messages)
+
+    result = queue_manager.dequeue(queue_name, uuid=stored[1]["id"])
+    assert result.details == messages[1]
+
+    result = queue_manager.dequeue(queue_name, max_messages=5)
+    assert result.details == [messages[0], messages[2]]
+    assert redis_connection.xlen(queue_key) == 0
+    assert redis2_connection.xlen(queue_key) == 0
+
+    result = queue_manager.create_queue("bad_queue", storage="list")
+    assert result.status == MOMQueueStatus.INVALID_ARGUMENTS
+
+def test_local_write_concern(queue_manager, monkeypatch):
+    """Test the local write concern answers before the replica and keeps the order"""
+    release = threading.Event()
+
+    class RecordingClient:
+        def __init__(self):
+            self.calls = []
+        def enqueue(self, queue_name, user, message, uuid, timestamp):
+            release.wait(5)
+            self.calls.append(("enqueue", message))
+            return True
+        def dequeue(self, queue_name, user, uuid):
+            self.calls.append(("dequeue", uuid))
+            return True
+
+    outbox = replication_outbox.ReplicationOutbox(size=10, workers=2)
+    monkeypatch.setattr(replication_outbox, "_outbox", outbox)
+    queue_name = "local_queue"
+    queue_manager.create_queue(queue_name)
+    client = RecordingClient()
+    queue_manager.replication_client = client
+    queue_manager.replication_principal = client
+
+    # La escritura responde sin esperar a la réplica
+    result = queue_manager.enqueue("Hello", queue_name, write_concern="local")
+    assert result.success is True
+    assert result.replication_result is True
+    assert client.calls == []
+    result = queue_manager.dequeue(queue_name, write_concern="local")
+    assert result.details == "Hello"
+
+    # Una escritura "replica" de la misma cola espera a las locales
+    replica = threading.Thread(
+        target=queue_manager.enqueue, args=("World", queue_name),
+        kwargs={"write_concern": "replica"}
+    )
+    replica.start()
+    time.sleep(0.2)
+    assert client.calls == []
+
+    release.set()
+    replica.join(5)
+    outbox.stop()
+    assert [call[0] for call in client.calls] == ["enqueue", "dequeue", "enqueue"] # pylint: disable=C0301
+    assert client.calls[-1][1] == "World"
+    stats = outbox.stats()
+    assert stats["replicated"] == 3
+    assert stats["depth"] == 0
+
+    result = queue_manager.enqueue("Hello", queue_name, write_concern="all")
+    assert result.status == MOMQueueStatus.INVALID_ARGUMENTS
+
+def test_replication_stream():
+    """Test the replication operations are multiplexed over one stream with cumulative acks"""
+    applied = []
+
+    def handler(request, context):
+        applied.append(request.uuid)
+        if request.uuid == "bad":
+            context.set_code(grpc.StatusCode.INTERNAL)
+            return ReplicationResponse(
+                success=False, status_code=StatusCode.REPLICATION_FAILED,
+                message="Queue does not exist"
+            )
+        return ReplicationResponse(
+            success=True, status_code=StatusCode.REPLICATION_SUCCESS
+        )
+
+    servicer = ReplicationStreamServicer()
+    servicer.handlers = {name: handler for name in servicer.handlers}
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    replication_service_pb2_grpc.add_ReplicationStreamServicer_to_server(
+        servicer, server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    stream = ReplicationStream(channel, "test node")
+    client = QueueReplicationClient(
+        replication_service_pb2_grpc.QueueReplicationStub(channel),
+        "test node", stream=stream
+    )
+    try:
+        assert client.enqueue("stream_queue", "user", "Hello", "1", 1.0)
+        assert client.dequeue("stream_queue", "user", "1")
+        # Un fallo solo afecta a su operación
+        assert not client.dequeue("stream_queue", "user", "bad")
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda i=i: results.append(
+                client.enqueue("stream_queue", "user", "Hello", str(i), 1.0)
+            ))
+            for i in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [True] * 20
+        assert applied[:3] == ["1", "1", "bad"]
+        assert len(applied) == 23
+    finally:
+        stream.close()
+        server.stop(0)
+
+    # Sin el nodo las operaciones fallan como una llamada unaria
+    assert not client.enqueue("stream_queue", "user", "Hello", "2", 1.0)
+
+def test_replication_journal(redis_connection):
+    """Test the operations a peer misses are journaled and replayed in order when it is back"""
+    applied = []
+
+    def handler(request, context):
+        applied.append(request.uuid)
+        return ReplicationResponse(
+            success=True, status_code=StatusCode.REPLICATION_SUCCESS
+        )
+
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        port = sock.getsockname()[1]
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    stream = ReplicationStream(channel, "test node", "journal_peer")
+    journal = ReplicationJournal(redis_connection, "journal_node", "journal_peer")
+    redis_connection.delete(journal.journal_key, journal.sequence_key, journal.lost_key)
+    stream._journal = journal # pylint: disable=W0212
+    client = QueueReplicationClient(
+        replication_service_pb2_grpc.QueueReplicationStub(channel),
+        "test node", stream=stream
+    )
+
+    # Con el nodo caído las operaciones quedan en el diario, en orden
+    assert not client.enqueue("journal_queue", "user", "Hello", "1", 1.0)
+    assert not client.enqueue("journal_queue", "user", "World", "2", 1.0)
+    assert not client.dequeue("journal_queue", "user", "1")
+    assert journal.stats()["length"] == 3
+    assert [op.journal_sequence for op in journal.read(10)] == [1, 2, 3]
+
+    servicer = ReplicationStreamServicer()
+    servicer.handlers = {name: handler for name in servicer.handlers}
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    replication_service_pb2_grpc.add_ReplicationStreamServicer_to_server(
+        servicer, server
+    )
+    server.add_insecure_port(f"localhost:{port}")
+    server.start()
+    try:
+        # El canal puede tardar en reconectar, el reenvío se reintenta
+        replayer = JournalReplayer([stream], interval=0.2)
+        deadline = time.time() + 20
+        while journal.stats()["length"] and time.time() < deadline:
+            replayer.replay()
+            time.sleep(0.2)
+        assert applied == ["1", "2", "1"]
+        assert journal.stats() == {
+            "peer": "journal_peer", "length": 0, "sequence": 3, "lost": 0
+        }
+
+        # Con el diario vacío se vuelve a replicar directamente
+        assert client.enqueue("journal_queue", "user", "Again", "3", 1.0)
+        assert applied[-1] == "3"
+        assert journal.stats()["length"] == 0
+    finally:
+        stream.close()
+        server.stop(0)
+        redis_connection.delete(journal.journal_key, journal.sequence_key, journal.lost_key)
+
+def test_replication_stream_lost_ack(redis_connection, monkeypatch):
+    """Test an operation without ack is journaled and not applied twice when replayed"""
+    applied = []
+    release = threading.Event()
+
+    def handler(request, context):
+        applied.append(request.uuid)
+        if request.uuid == "1":
+            # El par la aplica pero el ack llega tarde
+            release.wait(5)
+        return ReplicationResponse(
+            success=True, status_code=StatusCode.REPLICATION_SUCCESS
+        )
+
+    monkeypatch.setattr(replication_stream, "REPLICATION_STREAM_TIMEOUT", 0.5)
+    servicer = ReplicationStreamServicer()
+    servicer.handlers = {name: handler for name in servicer.handlers}
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    replication_service_pb2_grpc.add_ReplicationStreamServicer_to_server(
+        servicer, server
+    )
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    stream = ReplicationStream(channel, "test node", "lost_ack_peer")
+    journal = ReplicationJournal(redis_connection, "lost_ack_node", "lost_ack_peer")
+    applied_key = replication_journal.applied_key(
+        replication_stream.WHOAMI, replication_journal.SERVICE_QUEUES
+    )
+    redis_connection.delete(
+        journal.journal_key, journal.sequence_key, journal.lost_key, applied_key
+    )
+    stream._journal = journal # pylint: disable=W0212
+    client = QueueReplicationClient(
+        replication_service_pb2_grpc.QueueReplicationStub(channel),
+        "test node", stream=stream
+    )
+    try:
+        # Sin ack se cierra el stream y la operación pasa al diario
+        assert not client.enqueue("lost_ack_queue", "user", "Hello", "1", 1.0)
+        assert journal.stats()["length"] == 1
+        # Lo siguiente queda detrás en el diario para mantener el orden
+        assert not client.enqueue("lost_ack_queue", "user", "World", "2", 1.0)
+        assert journal.stats()["length"] == 2
+        release.set()
+        time.sleep(0.5)
+
+        # El par ya aplicó la primera, al reenviar el diario la salta
+        assert stream.replay_journal() == 2
+        assert applied == ["1", "2"]
+        assert journal.stats()["length"] == 0
+    finally:
+        release.set()
+        stream.close()
+        server.stop(0)
+        redis_connection.delete(
+            journal.journal_key, journal.sequence_key, journal.lost_key,
+            applied_key
+        )
+
+def test_replica_applier(queue_manager, redis_connection):
+    """Test the replicated writes are applied on the storage without a manager"""
+    queue_name = "apply_queue"
+    queue_manager.create_queue(queue_name)
+    applier = ReplicaApplier(redis_connection)
+    context = mock.Mock()
+    request = EnqueueBatchRequest(
+        queue_name=queue_name, requester="test_user",
+        messages=[
+            EnqueueBatchItem(message="Hello", uuid="1", timestamp=1.0),
+            EnqueueBatchItem(message="World", uuid="2", timestamp=2.0),
+        ]
+    )
+    assert applier.enqueue_batch(request, context).success
+    # Reaplicar el lote no duplica los mensajes
+    assert applier.enqueue_batch(request, context).success
+    messages = queues_storage.get_messages(redis_connection, queue_name)
+    assert [m["payload"] for m in messages] == ["Hello", "World"]
+
+    response = applier.dequeue_batch(
+        DequeueBatchRequest(queue_name=queue_name, uuids=["1", "3"]), context
+    )
+    assert response.message == "1 messages dequeued successfully"
+    assert len(queues_storage.get_messages(redis_connection, queue_name)) == 1
+
+    response = applier.dequeue_batch(
+        DequeueBatchRequest(queue_name="missing_queue", uuids=["1"]), context
+    )
+    assert not response.success
+    context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
+
+def test_async_replica_applier(queue_manager, redis_connection):
+    """Test the async applier of the grpc.aio server applies the replicated writes"""
+    queue_name = "async_apply_queue"
+    queue_manager.create_queue(queue_name)
+    context = mock.Mock()
+
+    async def apply():
+        client = redis.asyncio.Redis(**REDIS_CONFIG)
+        applier = AsyncReplicaApplier(client)
+        try:
+            enqueued = await applier.enqueue(EnqueueRequest(
+                queue_name=queue_name, requester="test_user",
+                message="Hello", uuid="1", timestamp=1.0
+            ), context)
+            missing = await applier.dequeue(
+                DequeueRequest(queue_name="missing_queue", uuid="1"), context
+            )
+            return enqueued, missing
+        finally:
+            await client.aclose()
+
+    enqueued, missing = asyncio.run(apply())
+    assert enqueued.success
+    messages = queues_storage.get_messages(redis_connection, queue_name)
+    assert [m["payload"] for m in messages] == ["Hello"]
+    assert not missing.success
+    context.set_code.assert_called_with(grpc.StatusCode.NOT_FOUND)
+
+def test_async_replication_stream():
+    """Test a slow topic operation of the aio stream doesn't hold back the queues"""
+    applied = []
+
+    async def replicate():
+        release = asyncio.Event()
+
+        async def publish(request, context):
+            await release.wait()
+            applied.append("publish")
+            return ReplicationResponse(success=True)
+
+        async def enqueue(request, context):
+            applied.append(request.uuid)
+            if request.uuid == "2":
+                release.set()
+            return ReplicationResponse(
+                success=request.uuid != "2",
+                status_code=StatusCode.REPLICATION_FAILED
+            )
+
+        async def batches():
+            yield ReplicationBatch(operations=[
+                ReplicationOperation(sequence=1, publish_message=TopicPublishMessageRequest(topic_name="slow_topic")), # pylint: disable=C0301
+                ReplicationOperation(sequence=2, enqueue=EnqueueRequest(uuid="1")), # pylint: disable=C0301
+            ])
+            yield ReplicationBatch(operations=[
+                ReplicationOperation(sequence=3, enqueue=EnqueueRequest(uuid="2")), # pylint: disable=C0301
+            ])
+
+        client = redis.asyncio.Redis(**REDIS_CONFIG)
+        applier = AsyncReplicaApplier(client)
+        executor = futures.ThreadPoolExecutor(max_workers=1)
+        servicer = AsyncReplicationStreamServicer(
+            AsyncTopicReplicationServicer(applier, executor),
+            AsyncQueueReplicationServicer(applier, executor)
+        )
+        servicer.handlers = {"publish_message": publish, "enqueue": enqueue}
+        try:
+            return [ack async for ack in servicer.ReplicateStream(batches(), None)] # pylint: disable=C0301
+        finally:
+            executor.shutdown()
+            await client.aclose()
+
+    acks = asyncio.run(replicate())
+    # Las colas se aplican mientras el tópico espera
+    assert applied == ["1", "2", "publish"]
+    # Los acks salen en orden con los fallos de cada lote
+    assert [ack.sequence for ack in acks] == [2, 3]
+    assert not acks[0].failures
+    assert [failure.sequence for failure in acks[1].failures] == [3]
 
 def test_subscribe_to_queue(queue_manager, queue_manager_replica, redis_connection, redis2_connection):
     """Test suscribirse a una cola y verificar la replicación"""
@@ -179,6 +808,26 @@ def test_unsubscribe_from_queue(queue_manager, queue_manager_replica, redis_conn
     assert redis_connection.sismember(subscribers_key, "other_user") == 0
     assert redis2_connection.sismember(subscribers_key, "other_user") == 0
 
+def test_subscriptions_index(queue_manager, redis_connection):
+    """Test el índice de suscripciones del usuario sigue las colas"""
+    other_user_manager = MOMQueueManager(redis_connection, "other_user")
+    queue_manager.create_queue("first_queue")
+    queue_manager.create_queue("second_queue")
+    other_user_manager.subscriptions.subscribe("first_queue")
+
+    result = subscriptions.get_subscriptions(redis_connection, "test_user")
+    assert result["queues"] == ["first_queue", "second_queue"]
+    result = subscriptions.get_subscriptions(redis_connection, "other_user")
+    assert result["queues"] == ["first_queue"]
+
+    other_user_manager.subscriptions.unsubscribe("first_queue")
+    assert subscriptions.get_subscriptions(redis_connection, "other_user")["queues"] == []
+
+    # Eliminar la cola la saca del índice de todos sus suscriptores
+    queue_manager.delete_queue("second_queue")
+    result = subscriptions.get_subscriptions(redis_connection, "test_user")
+    assert result["queues"] == ["first_queue"]
+
 def test_delete_queue(queue_manager, redis_connection, redis2_connection):
     """Test eliminar una cola y verificar su replicación"""
     queue_name = "test_queue"
@@ -193,10 +842,12 @@ def test_delete_queue(queue_manager, redis_connection, redis2_connection):
     # Verificar en Redis principal
     metadata_key = KeyBuilder.metadata_key(queue_name)
     queue_key = KeyBuilder.queue_key(queue_name)
+    messages_key = KeyBuilder.messages_key(queue_name)
     subscribers_key = KeyBuilder.subscribers_key(queue_name)
     
     assert redis_connection.exists(metadata_key) == 0
     assert redis_connection.exists(queue_key) == 0
+    assert redis_connection.exists(messages_key) == 0
     assert redis_connection.exists(subscribers_key) == 0
     
     # Verificar en Redis réplica
@@ -11,9 +11,15 @@ import json
 import pytest
 import time
 from datetime import datetime, timedelta
+from unittest import mock
 from app.domain.models import MOMTopicStatus 
 from app.domain.topics.topics_manager import MOMTopicManager
+from app.domain.topics.topics_retention import TopicRetentionWorker
+from app.domain.topics import topics_segments, topics_offsets, topics_patterns
 from app.domain.utils import TopicKeyBuilder
+from app.domain import envelope, scripts
+from app.domain.replication_apply import ReplicaApplier
+from app.grpc.replication_service_pb2 import TopicPublishMessageRequest
 
 
 # Erase Redis data before each test
@@ -521,6 +527,117 @@ def test_consume_to_empty_topic(topic_manager, topic_manager_alt, redis_connecti
     assert result.status == MOMTopicStatus.NO_MESSAGES
     assert result.details == f"No new messages"
 
+def test_consume_many_messages(topic_manager, topic_manager_alt, redis_connection):
+    """Test consuming several messages in one call skipping own messages"""
+    topic_name = "batch_topic"
+    topic_manager.create_topic(topic_name)
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+
+    for i in range(5):
+        topic_manager.publish(f"Message {i}", topic_name)
+        topic_manager_alt.publish(f"Own {i}", topic_name)
+
+    result = topic_manager_alt.consume(topic_name, max_messages=3)
+    assert result.status == MOMTopicStatus.MESSAGE_CONSUMED
+    assert result.details == ["Message 0", "Message 1", "Message 2"]
+
+    # The offset stops right after the last delivered message
+    offsets_key = TopicKeyBuilder.subscriber_offsets_key(topic_name)
+    offset_field = TopicKeyBuilder.subscriber_offset_field(topic_manager_alt.user)
+    assert int(redis_connection.hget(offsets_key, offset_field)) == 5
+
+    result = topic_manager_alt.consume(topic_name, max_messages=10)
+    assert result.details == ["Message 3", "Message 4"]
+    assert int(redis_connection.hget(offsets_key, offset_field)) == 10
+
+    result = topic_manager_alt.consume(topic_name, max_messages=10)
+    assert result.status == MOMTopicStatus.NO_MESSAGES
+    assert result.details == []
+
+def test_consume_reloads_flushed_scripts(topic_manager, topic_manager_alt, redis_connection):
+    """Test the scripts are loaded again after Redis forgets them"""
+    topic_name = "script_topic"
+    topic_manager.create_topic(topic_name)
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+    topic_manager.publish("Hello", topic_name)
+
+    calls = scripts.get_stats()["topic_consume"]["calls"]
+    redis_connection.script_flush()
+
+    result = topic_manager_alt.consume(topic_name)
+    assert result.details == "Hello"
+    assert scripts.get_stats()["topic_consume"]["calls"] == calls + 1
+
+def test_stream_topic(topic_manager, topic_manager_alt, redis_connection):
+    """Test a topic stored in a Redis Stream with consumer groups"""
+    topic_name = "stream_topic"
+    result = topic_manager.create_topic(topic_name, storage="stream")
+    assert result.success == True
+
+    result = topic_manager_alt.subscriptions.subscribe(topic_name)
+    assert result.success == True
+
+    messages_key = TopicKeyBuilder.messages_key(topic_name)
+    groups = {g["name"] for g in redis_connection.xinfo_groups(messages_key)}
+    assert groups == {topic_manager.user, topic_manager_alt.user}
+
+    topic_manager.publish("First", topic_name)
+    topic_manager.publish("Second", topic_name)
+
+    # The owner skips its own messages
+    result = topic_manager.consume(topic_name)
+    assert result.status == MOMTopicStatus.NO_MESSAGES
+
+    result = topic_manager_alt.consume(topic_name)
+    assert result.status == MOMTopicStatus.MESSAGE_CONSUMED
+    assert result.details == "First"
+
+    # Only the messages read by every subscriber are trimmed
+    assert topic_manager._cleanup_processed_messages(topic_name) == 1
+    assert redis_connection.xlen(messages_key) == 1
+
+    result = topic_manager_alt.consume(topic_name)
+    assert result.details == "Second"
+
+    result = topic_manager_alt.subscriptions.unsubscribe(topic_name)
+    assert result.success == True
+    groups = {g["name"] for g in redis_connection.xinfo_groups(messages_key)}
+    assert groups == {topic_manager.user}
+
+def test_segmented_topic(topic_manager, topic_manager_alt, redis_connection, monkeypatch):
+    """Test a topic stored in fixed size segments dropped whole by the cleanup"""
+    monkeypatch.setattr(topics_segments, "SEGMENT_SIZE", 4)
+    topic_name = "segmented_topic"
+    result = topic_manager.create_topic(topic_name, storage="segmented")
+    assert result.success == True
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+
+    for i in range(10):
+        topic_manager.publish(f"Message {i}", topic_name)
+
+    segments_key = TopicKeyBuilder.segments_key(topic_name)
+    assert redis_connection.zrange(segments_key, 0, -1) == ["0", "1", "2"]
+    assert redis_connection.llen(TopicKeyBuilder.segment_key(topic_name, 1)) == 4
+
+    result = topic_manager_alt.consume(topic_name, max_messages=6)
+    assert result.details == [f"Message {i}" for i in range(6)]
+
+    # Only the first segment was read by every subscriber
+    topic_manager.consume(topic_name, max_messages=100)
+    assert topic_manager._cleanup_processed_messages(topic_name) == 4
+    assert not redis_connection.exists(TopicKeyBuilder.segment_key(topic_name, 0))
+    assert redis_connection.zrange(segments_key, 0, -1) == ["1", "2"]
+
+    result = topic_manager_alt.consume(topic_name, max_messages=100)
+    assert result.details == [f"Message {i}" for i in range(6, 10)]
+
+    # The segment being written is kept until it is full
+    assert topic_manager._cleanup_processed_messages(topic_name) == 4
+    assert redis_connection.zrange(segments_key, 0, -1) == ["2"]
+
+    topic_manager.delete_topic(topic_name)
+    assert redis_connection.keys(f"{segments_key}*") == []
+
 ## Intensive tests
 
 def test_multiple_publishers_and_consumers(redis_connection, topic_manager, user_managers):
@@ -686,12 +803,15 @@ def test_time_based_cleanup_with_lagging_consumers(redis_connection, topic_manag
     
     # Step 7: Manipulate message timestamps to simulate older messages (for time-based cleanup)
     messages_key = TopicKeyBuilder.messages_key(topic_name)
+    timeline_key = TopicKeyBuilder.timeline_key(topic_name)
     for i in range(20):
-        message_json = redis_connection.lindex(messages_key, i)
-        message_data = json.loads(message_json)
+        message_data = envelope.decode(redis_connection.lindex(messages_key, i))
         # Establecer timestamp a 2 minutos atrás (como número)
         message_data["timestamp"] = (datetime.now() - timedelta(minutes=2)).timestamp()
+        # Se reescriben en el formato JSON anterior y sin entrada en el
+        # índice de tiempo, como los mensajes publicados antes del índice
         redis_connection.lset(messages_key, i, json.dumps(message_data))
+        redis_connection.zrem(timeline_key, i)
     
     # Step 8: Run cleanup with time-based force
     deleted_count = topic_manager._cleanup_processed_messages(topic_name, force_cleanup_by_time=True)
@@ -730,6 +850,250 @@ def test_time_based_cleanup_with_lagging_consumers(redis_connection, topic_manag
     message_num = int(result.details.split("Test message ")[1])
     assert message_num >= deleted_count
 
+def test_time_cleanup_uses_the_time_index(redis_connection, topic_manager, topic_manager_alt, monkeypatch):
+    """Test the time based cleanup finds the expired messages in the time index"""
+    monkeypatch.setenv("PERSISTENCY_ON_TOPIC_TIME", "1")
+    topic_name = "time_index_test"
+    topic_manager.create_topic(topic_name)
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+
+    for i in range(10):
+        topic_manager.publish(f"Message {i}", topic_name)
+
+    timeline_key = TopicKeyBuilder.timeline_key(topic_name)
+    assert redis_connection.zcard(timeline_key) == 10
+
+    # The first four messages are older than the persistency time
+    old = (datetime.now() - timedelta(minutes=2)).timestamp()
+    redis_connection.zadd(timeline_key, {str(i): old for i in range(4)})
+
+    deleted = topic_manager._cleanup_processed_messages(topic_name, force_cleanup_by_time=True)
+    assert deleted == 4
+    assert redis_connection.zrange(timeline_key, 0, -1) == [str(i) for i in range(4, 10)]
+
+    result = topic_manager_alt.consume(topic_name)
+    assert result.details == "Message 4"
+
+def test_seek_topic(topic_manager, topic_manager_alt):
+    """Test moving a subscriber by position, offset and timestamp"""
+    topic_name = "seek_topic"
+    topic_manager.create_topic(topic_name)
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+    base = datetime.now().timestamp()
+    for i in range(10):
+        topic_manager.publish(f"Message {i}", topic_name, timestamp=base + i)
+
+    result = topic_manager_alt.seek(topic_name, timestamp=base + 4.5)
+    assert result.status == MOMTopicStatus.OFFSET_UPDATED
+    assert result.details == {topic_name: 5}
+    assert topic_manager_alt.consume(topic_name).details == "Message 5"
+
+    topic_manager_alt.seek(topic_name, position="earliest")
+    assert topic_manager_alt.consume(topic_name).details == "Message 0"
+
+    topic_manager_alt.seek(topic_name, offset=8)
+    assert topic_manager_alt.consume(topic_name, max_messages=10).details == ["Message 8", "Message 9"]
+
+    result = topic_manager_alt.seek(topic_name, position="latest", offset=1)
+    assert result.status == MOMTopicStatus.INVALID_ARGUMENTS
+
+def test_subscribe_start_position(topic_manager, topic_manager_alt):
+    """Test a subscription starting at the earliest, latest or a timestamp"""
+    topic_name = "start_position_topic"
+    topic_manager.create_topic(topic_name)
+    base = datetime.now().timestamp()
+    for i in range(5):
+        topic_manager.publish(f"Message {i}", topic_name, timestamp=base + i)
+
+    result = topic_manager_alt.subscriptions.subscribe(topic_name, start_position="earliest")
+    assert result.success == True
+    assert topic_manager_alt.consume(topic_name).details == "Message 0"
+    topic_manager_alt.subscriptions.unsubscribe(topic_name)
+
+    topic_manager_alt.subscriptions.subscribe(topic_name, start_timestamp=base + 2.5)
+    assert topic_manager_alt.consume(topic_name).details == "Message 3"
+    topic_manager_alt.subscriptions.unsubscribe(topic_name)
+
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+    assert topic_manager_alt.consume(topic_name).status == MOMTopicStatus.NO_MESSAGES
+
+    result = topic_manager_alt.subscriptions.subscribe(
+        "start_position_topic_2", start_position="earliest", start_timestamp=base
+    )
+    assert result.status == MOMTopicStatus.INVALID_ARGUMENTS
+
+def test_pattern_subscription(topic_manager, topic_manager_alt, redis_connection):
+    """Test a pattern subscription resolving existing and new topics"""
+    topic_manager.create_topic("orders/eu/created")
+    topic_manager.create_topic("orders/eu/cancelled")
+
+    result = topic_manager_alt.subscriptions.subscribe("orders/*/created")
+    assert result.status == MOMTopicStatus.SUBSCRIPTION_CREATED
+    assert redis_connection.sismember(
+        TopicKeyBuilder.subscribers_key("orders/eu/created"), "alt_user"
+    )
+    assert not redis_connection.sismember(
+        TopicKeyBuilder.subscribers_key("orders/eu/cancelled"), "alt_user"
+    )
+
+    # The topics created later are subscribed on their first publish
+    topic_manager.create_topic("orders/us/created")
+    topic_manager.publish("Created EU", "orders/eu/created")
+    topic_manager.publish("Created US", "orders/us/created")
+    topic_manager.publish("Cancelled EU", "orders/eu/cancelled")
+
+    result = topic_manager_alt.consume("orders/*/created", max_messages=10)
+    assert result.status == MOMTopicStatus.MESSAGE_CONSUMED
+    assert sorted(result.details) == ["Created EU", "Created US"]
+
+    result = topic_manager_alt.subscriptions.subscribe("orders/#/created")
+    assert result.status == MOMTopicStatus.INVALID_ARGUMENTS
+
+    result = topic_manager_alt.subscriptions.unsubscribe("orders/*/created")
+    assert result.status == MOMTopicStatus.SUBSCRIPTION_DELETED
+    assert not redis_connection.sismember(
+        TopicKeyBuilder.subscribers_key("orders/us/created"), "alt_user"
+    )
+
+def test_pattern_index_changes(redis_connection):
+    """Test the pattern index reloads the patterns changed by another node"""
+    index = topics_patterns.get_pattern_index(redis_connection)
+    assert "peer_user" not in index.match("orders/eu")
+
+    # Un patrón replicado se guarda sin pasar por el índice del proceso
+    topics_patterns.add_pattern(redis_connection, "orders/*", "peer_user")
+    deadline = time.time() + 5
+    users = set()
+    while "peer_user" not in users and time.time() < deadline:
+        time.sleep(0.05)
+        index = topics_patterns.get_pattern_index(redis_connection)
+        users = index.match("orders/eu")
+    assert "peer_user" in users
+
+def test_filtered_subscription(topic_manager, topic_manager_alt, topic_manager_alt2):
+    """Test the filter of a subscription skips the messages that don't match"""
+    topic_name = "filtered_topic"
+    topic_manager.create_topic(topic_name)
+    result = topic_manager_alt.subscriptions.subscribe(
+        topic_name, message_filter={"region": "eu", "type": ["created", "paid"]}
+    )
+    assert result.success == True
+    topic_manager_alt2.subscriptions.subscribe(topic_name)
+
+    topic_manager.publish("Created EU", topic_name, attributes={"region": "eu", "type": "created"})
+    topic_manager.publish("Created US", topic_name, attributes={"region": "us", "type": "created"})
+    topic_manager.publish("Cancelled EU", topic_name, attributes={"region": "eu", "type": "cancelled"})
+    topic_manager.publish("No attributes", topic_name)
+    topic_manager.publish("Paid EU", topic_name, attributes={"region": "eu", "type": "paid"})
+
+    result = topic_manager_alt.consume(topic_name, max_messages=10)
+    assert result.details == ["Created EU", "Paid EU"]
+    assert topic_manager_alt.consume(topic_name).status == MOMTopicStatus.NO_MESSAGES
+
+    # Los suscriptores sin filtro reciben todos los mensajes
+    result = topic_manager_alt2.consume(topic_name, max_messages=10)
+    assert len(result.details) == 5
+
+    result = topic_manager_alt2.subscriptions.subscribe(
+        "other_topic", message_filter={"region": 1}
+    )
+    assert result.status == MOMTopicStatus.INVALID_ARGUMENTS
+
+def test_partitioned_topic(topic_manager, topic_manager_alt, redis_connection):
+    """Test a topic spread over partitions with one offset per partition"""
+    topic_name = "partitioned_topic"
+    result = topic_manager.create_topic(topic_name, partitions=3)
+    assert result.success == True
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+
+    # The messages with the same key keep their partition and order
+    for i in range(4):
+        topic_manager.publish(f"Keyed {i}", topic_name, partition_key="customer-42")
+    for i in range(3):
+        topic_manager.publish(f"Message {i}", topic_name)
+
+    lengths = sorted(
+        redis_connection.llen(TopicKeyBuilder.messages_key(f"{topic_name}.{p}"))
+        for p in range(3)
+    )
+    assert lengths == [1, 1, 5]
+
+    result = topic_manager_alt.consume(topic_name, max_messages=100)
+    assert result.status == MOMTopicStatus.MESSAGE_CONSUMED
+    assert sorted(result.details) == sorted(
+        [f"Keyed {i}" for i in range(4)] + [f"Message {i}" for i in range(3)]
+    )
+    keyed = [message for message in result.details if message.startswith("Keyed")]
+    assert keyed == [f"Keyed {i}" for i in range(4)]
+
+    result = topic_manager_alt.consume(topic_name, partition=3)
+    assert result.status == MOMTopicStatus.INVALID_ARGUMENTS
+
+    # La réplica guarda en la partición del primario y no elige una
+    applier = ReplicaApplier(redis_connection)
+    context = mock.Mock()
+    request = TopicPublishMessageRequest(
+        topic_name=topic_name, message="Replicated", timestamp=time.time()
+    )
+    assert applier.publish(request, context).success is False
+    request.topic_name = f"{topic_name}.1"
+    assert applier.publish(request, context).success is True
+
+    topic_manager.delete_topic(topic_name)
+    assert redis_connection.keys(f"mom:topics:{topic_name}*") == []
+
+def test_coalesced_offset_replication(topic_manager, topic_manager_alt, monkeypatch):
+    """Test the coalesced mode only replicates the latest offset of a subscriber"""
+    class RecordingClient:
+        def __init__(self):
+            self.calls = []
+        def replicate_consume_message(self, topic_name, subscriber, offset):
+            self.calls.append((topic_name, subscriber, offset))
+            return True
+
+    replicator = topics_offsets.OffsetReplicator(interval=60)
+    monkeypatch.setattr(topics_offsets, "OFFSET_REPLICATION_MODE", "coalesced")
+    monkeypatch.setattr(topics_offsets, "_replicator", replicator)
+    client = RecordingClient()
+    topic_manager_alt.replication_client = client
+
+    topic_name = "coalesced_topic"
+    topic_manager.create_topic(topic_name)
+    topic_manager_alt.subscriptions.subscribe(topic_name)
+    for i in range(5):
+        topic_manager.publish(f"Message {i}", topic_name)
+        result = topic_manager_alt.consume(topic_name)
+        assert result.details == f"Message {i}"
+        assert result.replication_result == True
+
+    assert client.calls == []
+    replicator.stop()
+    assert client.calls == [(topic_name, topic_manager_alt.user, 5)]
+    assert replicator.stats()["coalesced"] == 4
+
+def test_retention_worker_pass(redis_connection, topic_manager, topic_manager_alt):
+    """Test a retention pass cleans the topics with the largest growth first"""
+    for topic_name, count in (("quiet_topic", 2), ("busy_topic", 20)):
+        topic_manager.create_topic(topic_name)
+        topic_manager_alt.subscriptions.subscribe(topic_name)
+        for i in range(count):
+            topic_manager.publish(f"Message {i}", topic_name)
+        topic_manager.consume(topic_name, max_messages=100)
+        topic_manager_alt.consume(topic_name, max_messages=100)
+
+    worker = TopicRetentionWorker(redis_connection, topics_per_second=0)
+    assert worker.run_pass() == 22
+
+    stats = worker.stats()
+    assert stats["passes"] == 1
+    assert stats["topics_cleaned"] == 2
+    assert stats["deleted_total"] == 22
+    assert redis_connection.llen(TopicKeyBuilder.messages_key("busy_topic")) == 0
+
+    # Topics without backlog are skipped in the next pass
+    assert worker.run_pass() == 0
+    assert worker.stats()["topics_cleaned"] == 2
+
 def test_high_volume_publish_consume_with_periodic_cleanup(redis_connection, topic_manager, user_managers):
     """
     Test high volume scenario with periodic cleanups and multiple subscribers,
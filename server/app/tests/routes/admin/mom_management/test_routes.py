@@ -146,6 +146,60 @@ def test_create_queue_topic_failure_duplicated():
     assert False == data["success"]
 
 
+def test_create_queue_with_limit():
+    """
+    Test the create queue topic endpoint with a message limit
+    """
+    response = client.post(f"/api/{API_VERSION}/{API_NAME}/login/", json={
+        "username": DEFAULT_USER_NAME,
+        "password": DEFAULT_USER_PASSWORD
+    })
+    assert response.status_code == 200
+    data = response.json()
+    token = data["access_token"]
+    token_type = data["token_type"]
+    headers = {
+        "Authorization": f"{token_type} {token}"
+    }
+    response = client.put(
+        f"/api/{API_VERSION}/{API_NAME}/admin/queue_topic/create",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "message_limit": 1,
+            "overflow_policy": "reject"
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert True == data["success"]
+
+    for expected in (True, False):
+        response = client.post(
+            f"/api/{API_VERSION}/{API_NAME}/queue_topic/send",
+            headers=headers,
+            json={
+                "name": "queue-example",
+                "type": "queue",
+                "message": "Hello, World!"
+            }
+        )
+        assert response.status_code == 200
+        assert expected == response.json()["success"]
+
+    response = client.put(
+        f"/api/{API_VERSION}/{API_NAME}/admin/queue_topic/create",
+        headers=headers,
+        json={
+            "name": "topic-example",
+            "type": "topic",
+            "message_limit": 1
+        }
+    )
+    assert response.status_code == 403
+
+
 def test_delete_queue_topic():
     """
     Test the delete queue topic endpoint
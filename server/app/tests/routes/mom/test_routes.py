@@ -601,6 +601,57 @@ def test_send_unauthorized():
     assert data["detail"] == "Not authenticated"
 
 
+def test_send_batch():
+    """
+    Test the send batch endpoint
+    """
+    response = client.post(f"/api/{API_VERSION}/{API_NAME}/login/", json={
+        "username": DEFAULT_USER_NAME,
+        "password": DEFAULT_USER_PASSWORD
+    })
+    assert response.status_code == 200
+    data = response.json()
+    token = data["access_token"]
+    token_type = data["token_type"]
+    headers = {
+        "Authorization": f"{token_type} {token}"
+    }
+    response = client.put(
+        f"/api/{API_VERSION}/{API_NAME}/admin/queue_topic/create",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue"
+        }
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/send_batch",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "messages": ["Hello", "World", "!"]
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert "3 messages enqueued successfully" == data["message"]
+    assert True == data["success"]
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/send_batch",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "topic",
+            "messages": ["Hello"]
+        }
+    )
+    assert response.status_code == 403
+
+
 def test_receive_topic():
     """
     Test the receive endpoint
@@ -927,6 +978,175 @@ def test_receive_queue_same_publish():
     assert "Hello, World!" == data["message"]
 
 
+def test_receive_queue_many():
+    """
+    Test the receive endpoint requesting several messages at once
+    """
+    response = client.post(f"/api/{API_VERSION}/{API_NAME}/login/", json={
+        "username": DEFAULT_USER_NAME,
+        "password": DEFAULT_USER_PASSWORD
+    })
+    assert response.status_code == 200
+    data = response.json()
+    token = data["access_token"]
+    token_type = data["token_type"]
+    headers = {
+        "Authorization": f"{token_type} {token}"
+    }
+    response = client.put(
+        f"/api/{API_VERSION}/{API_NAME}/admin/queue_topic/create",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue"
+        }
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/send_batch",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "messages": ["Hello", "World", "!"]
+        }
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/receive",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "max_messages": 2
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert True == data["success"]
+    assert data["message"] is None
+    assert ["Hello", "World"] == data["messages"]
+
+
+def test_receive_queue_wait_empty():
+    """
+    Test the receive endpoint waiting on an empty queue
+    """
+    response = client.post(f"/api/{API_VERSION}/{API_NAME}/login/", json={
+        "username": DEFAULT_USER_NAME,
+        "password": DEFAULT_USER_PASSWORD
+    })
+    assert response.status_code == 200
+    data = response.json()
+    token = data["access_token"]
+    token_type = data["token_type"]
+    headers = {
+        "Authorization": f"{token_type} {token}"
+    }
+    response = client.put(
+        f"/api/{API_VERSION}/{API_NAME}/admin/queue_topic/create",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue"
+        }
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/receive",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "wait_seconds": 1
+        }
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert True == data["success"]
+    assert data["message"] is None
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/receive",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "wait_seconds": 60
+        }
+    )
+    assert response.status_code == 422
+
+
+def test_stream_queue():
+    """
+    Test the push delivery of a queue with its prefetch and acknowledgements
+    """
+    response = client.post(f"/api/{API_VERSION}/{API_NAME}/login/", json={
+        "username": DEFAULT_USER_NAME,
+        "password": DEFAULT_USER_PASSWORD
+    })
+    assert response.status_code == 200
+    data = response.json()
+    token = data["access_token"]
+    token_type = data["token_type"]
+    headers = {
+        "Authorization": f"{token_type} {token}"
+    }
+    response = client.put(
+        f"/api/{API_VERSION}/{API_NAME}/admin/queue_topic/create",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue"
+        }
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/send_batch",
+        headers=headers,
+        json={
+            "name": "queue-example",
+            "type": "queue",
+            "messages": ["Hello", "World", "!"]
+        }
+    )
+    assert response.status_code == 200
+
+    with client.websocket_connect(
+        f"/api/{API_VERSION}/{API_NAME}/queue_topic/stream/",
+        headers=headers
+    ) as websocket:
+        websocket.send_json({
+            "name": "queue-example",
+            "type": "queue",
+            "prefetch": 2
+        })
+        assert {"delivery_tag": 1, "message": "Hello"} == websocket.receive_json()
+        assert {"delivery_tag": 2, "message": "World"} == websocket.receive_json()
+
+        # Con el prefetch lleno solo se entrega después del ack
+        websocket.send_json({"ack": 2})
+        assert {"delivery_tag": 3, "message": "!"} == websocket.receive_json()
+
+        # Los mensajes nuevos se empujan sin volver a pedirlos
+        response = client.post(
+            f"/api/{API_VERSION}/{API_NAME}/queue_topic/send",
+            headers=headers,
+            json={
+                "name": "queue-example",
+                "type": "queue",
+                "message": "Pushed"
+            }
+        )
+        assert response.status_code == 200
+        assert {"delivery_tag": 4, "message": "Pushed"} == websocket.receive_json()
+
+
 def test_receive_topic_empty():
     """
     Test the receive endpoint with queue empty
@@ -58,7 +58,7 @@ def test_generate_keys():
     queue_name = "test_queue"
     queue_keys = generate_keys(queue_name, "queue")
 
-    assert len(queue_keys) == 3, "Should generate 3 keys for queues"
+    assert len(queue_keys) == 4, "Should generate 4 keys for queues"
     assert all(key.startswith(f"mom:queues:{queue_name}") for key in queue_keys), \
         "Keys should start with 'mom:queues:test_queue'"
 
@@ -5,6 +5,8 @@ It includes a function to initialize the database with default values.
 from app.auth.auth import auth_handler
 from app.adapters.db import Database
 from app.adapters.factory import ObjectFactory
+from app.domain import scripts, subscriptions
+from app.domain.utils import PARTITION_SEPARATOR
 from app.config.env import DEFAULT_USER_PASSWORD, DEFAULT_USER_NAME, WHOAMI
 from app.dtos.admin.mom_management_dto import QueueTopic
 from app.exceptions.database_exceptions import DatabaseConnectionError
@@ -40,6 +42,18 @@ def initialize_database():
     client.config_set("maxmemory-policy", "allkeys-lru")
 
 
+def load_scripts():
+    """
+    Loads the Lua scripts of the MOM in the main and backup databases,
+    so the first calls already find them by their SHA.
+    """
+    for name in (ObjectFactory.MOM_DATABASE, ObjectFactory.BACK_UP_DATABASE):
+        client = ObjectFactory.get_instance(Database, name).get_client()
+        if not client:
+            raise DatabaseConnectionError("Database client not initialized")
+        scripts.load_all(client)
+
+
 def get_elements_from_db() -> List[QueueTopic]:
     """
     Function to get all the elements from the database.
@@ -54,6 +68,9 @@ def get_elements_from_db() -> List[QueueTopic]:
     for key in keys:
         name = key.split(":")[1]
         type_ = key.split(":")[0]
+        # Las particiones se restauran junto con su tópico
+        if type_ == "topic" and PARTITION_SEPARATOR in name:
+            continue
         elements.append(QueueTopic(name=name, type=type_))
     return elements
 
@@ -67,6 +84,7 @@ def generate_keys(name: str, type_: str) -> List[str]:
     if type_ == "queue":
         keys += [
             f"{base}:metadata",
+            f"{base}:messages",
             f"{base}:subscribers"
         ]
     elif type_ == "topic":
@@ -74,7 +92,10 @@ def generate_keys(name: str, type_: str) -> List[str]:
             f"{base}:metadata",
             f"{base}:offsets",
             f"{base}:messages",
-            f"{base}:subscribers"
+            f"{base}:subscribers",
+            f"{base}:timeline",
+            f"{base}:segments",
+            f"{base}:filters"
         ]
     return keys
 
@@ -100,6 +121,25 @@ def backup_database(elements: List[QueueTopic]):
 
     for element in elements:
         keys = generate_keys(element.name, element.type.value)
+        if element.type.value == "topic":
+            names = [element.name]
+            partitions = int(backup_client.hget(
+                f"mom:topics:{element.name}:metadata", "partitions"
+            ) or 1)
+            if partitions > 1:
+                names += [
+                    f"{element.name}{PARTITION_SEPARATOR}{p}"
+                    for p in range(partitions)
+                ]
+                for name in names[1:]:
+                    keys += generate_keys(name, "topic")
+            # Los segmentos vivos salen del directorio del tópico
+            for name in names:
+                segments_key = f"mom:topics:{name}:segments"
+                keys += [
+                    f"{segments_key}:{segment}"
+                    for segment in backup_client.zrange(segments_key, 0, -1)
+                ]
         for key in keys:
             data_type = backup_client.type(key)
             if data_type == "none":
@@ -120,3 +160,31 @@ def backup_database(elements: List[QueueTopic]):
             elif data_type == "zset":
                 data = backup_client.zrange(key, 0, -1, withscores=True)
                 client.zadd(key, {k: v for k, v in data})
+            elif data_type == "stream":
+                # Se conservan los ids y la posición de los grupos
+                for entry_id, fields in backup_client.xrange(key):
+                    client.xadd(key, fields, id=entry_id)
+                for group in backup_client.xinfo_groups(key):
+                    client.xgroup_create(
+                        key, group["name"], group["last-delivered-id"],
+                        mkstream=True
+                    )
+
+        # El índice de suscripciones se reconstruye desde los suscriptores
+        subscribers_key = f"mom:{element.type.value}s:{element.name}:subscribers"
+        for user in client.smembers(subscribers_key):
+            subscriptions.add_subscription(
+                client, user, element.type.value, element.name
+            )
+
+    # Las suscripciones por patrón no pertenecen a un tópico
+    for pattern in backup_client.smembers("mom:patterns"):
+        users = backup_client.smembers(f"mom:patterns:{pattern}:subscribers")
+        if not users:
+            continue
+        client.sadd("mom:patterns", pattern)
+        client.sadd(f"mom:patterns:{pattern}:subscribers", *users)
+        for user in users:
+            subscriptions.add_subscription(
+                client, user, subscriptions.PATTERN, pattern
+            )